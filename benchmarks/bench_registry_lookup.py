@@ -0,0 +1,127 @@
+#!/usr/bin/env python3
+"""Benchmark entity reference lookups against growing entity registries.
+
+Checks a fixed set of references (half registered, half unknown) against
+registries of increasing size. With the precomputed RegistryIndex the cost
+per reference should stay flat; the previous implementation rebuilt a dict
+over the whole registry for every unknown reference.
+
+Usage: python benchmarks/bench_registry_lookup.py [--refs N] [--legacy]
+"""
+
+import argparse
+import json
+import shutil
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tools.reference_validator import ReferenceValidator  # noqa: E402
+
+REGISTRY_SIZES = [1_000, 5_000, 10_000, 50_000]
+
+
+def write_registries(storage_dir: Path, size: int):
+    """Write synthetic entity and device registries with `size` entities."""
+    entities = [
+        {
+            "entity_id": f"sensor.synthetic_{i}",
+            "id": f"{i:032x}",
+            "platform": "synthetic",
+            "disabled_by": "user" if i % 10 == 0 else None,
+        }
+        for i in range(size)
+    ]
+    with open(storage_dir / "core.entity_registry", "w") as f:
+        json.dump({"data": {"entities": entities}}, f)
+    with open(storage_dir / "core.device_registry", "w") as f:
+        json.dump({"data": {"devices": []}}, f)
+
+
+def make_references(size: int, count: int):
+    """Build a reference set, half registered and half unknown."""
+    known = [f"sensor.synthetic_{(i * 7919) % size}" for i in range(count // 2)]
+    unknown = [f"sensor.missing_{i}" for i in range(count - len(known))]
+    registry_ids = [f"{i:032x}" for i in range(0, size, size // 10)]
+    return {
+        "entities": {entity_id: ["entity_id"] for entity_id in known + unknown},
+        "devices": {},
+        "areas": {},
+        "registry_ids": {registry_id: ["entity_id"] for registry_id in registry_ids},
+        "template_areas": {},
+    }
+
+
+def legacy_check(validator: ReferenceValidator, references) -> int:
+    """Reproduce the previous per-reference registry scan."""
+    entities = validator.load_entity_registry()
+    found = 0
+    for entity_id in references["entities"]:
+        if entity_id not in entities:
+            disabled_entities = {
+                e["entity_id"]: e
+                for e in entities.values()
+                if e.get("disabled_by") is not None
+            }
+            found += entity_id in disabled_entities
+    return found
+
+
+def run(ref_count: int, include_legacy: bool):
+    """Run the benchmark and print one row per registry size."""
+    header = f"{'entities':>9} {'index build':>12} {'check':>10} {'per ref':>10}"
+    if include_legacy:
+        header += f" {'legacy':>10}"
+    print(header)
+
+    for size in REGISTRY_SIZES:
+        temp_dir = Path(tempfile.mkdtemp())
+        try:
+            storage_dir = temp_dir / ".storage"
+            storage_dir.mkdir()
+            write_registries(storage_dir, size)
+            references = make_references(size, ref_count)
+
+            validator = ReferenceValidator(str(temp_dir))
+            validator._yaml_entities = set()
+            validator.load_entity_registry()
+
+            start = time.perf_counter()
+            validator.get_registry_index()
+            build_time = time.perf_counter() - start
+
+            start = time.perf_counter()
+            validator.check_file_references(Path("bench.yaml"), references)
+            check_time = time.perf_counter() - start
+
+            row = (
+                f"{size:>9} {build_time * 1000:>10.1f}ms {check_time * 1000:>8.2f}ms"
+                f" {check_time / ref_count * 1e6:>8.2f}us"
+            )
+            if include_legacy:
+                start = time.perf_counter()
+                legacy_check(validator, references)
+                row += f" {(time.perf_counter() - start) * 1000:>8.1f}ms"
+            print(row)
+        finally:
+            shutil.rmtree(temp_dir)
+
+
+def main():
+    """Run the registry lookup benchmark from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--refs", type=int, default=500, help="References to check")
+    parser.add_argument(
+        "--legacy",
+        action="store_true",
+        help="Also time the previous per-reference registry scan",
+    )
+    args = parser.parse_args()
+    run(args.refs, args.legacy)
+
+
+if __name__ == "__main__":
+    main()
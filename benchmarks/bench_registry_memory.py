@@ -0,0 +1,162 @@
+#!/usr/bin/env python3
+"""Benchmark peak memory and time of loading a large entity registry.
+
+Writes a synthetic entity registry (entries shaped like Home Assistant's,
+plus a deleted_entities section) and loads it in a fresh interpreter per
+loader, reporting peak RSS above the interpreter baseline:
+
+- json.load: the previous loader, json.load plus a dict of raw entries
+- streaming: tools.registry.load_registry with compact EntityRecords
+
+Usage: python benchmarks/bench_registry_memory.py [--entities N] [--deleted N]
+"""
+
+import argparse
+import json
+import resource
+import subprocess
+import sys
+import tempfile
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tools.registry import EntityRecord, load_registry  # noqa: E402
+
+LOADERS = ["baseline", "json.load", "streaming"]
+PLATFORMS = ["mqtt", "zha", "hue", "template", "shelly", "esphome"]
+
+
+def make_entity(i: int):
+    """Build an entity registry entry with the fields Home Assistant writes."""
+    domain = ["sensor", "light", "switch", "binary_sensor"][i % 4]
+    return {
+        "aliases": [],
+        "area_id": f"area_{i % 25}" if i % 3 else None,
+        "categories": {},
+        "capabilities": {"state_class": "measurement"} if domain == "sensor" else None,
+        "config_entry_id": f"{i % 500:032x}",
+        "config_subentry_id": None,
+        "created_at": "2024-01-01T00:00:00.000000+00:00",
+        "device_class": None,
+        "device_id": f"{i // 4:032x}",
+        "disabled_by": "integration" if i % 10 == 0 else None,
+        "entity_category": "diagnostic" if i % 7 == 0 else None,
+        "entity_id": f"{domain}.synthetic_entity_{i}",
+        "hidden_by": None,
+        "icon": None,
+        "id": f"{i:032x}",
+        "has_entity_name": True,
+        "labels": [],
+        "modified_at": "2024-06-01T00:00:00.000000+00:00",
+        "name": None,
+        "options": {
+            "conversation": {"should_expose": False},
+            "sensor": {"suggested_display_precision": 1},
+        },
+        "orphaned_timestamp": None,
+        "original_device_class": "temperature" if domain == "sensor" else None,
+        "original_icon": None,
+        "original_name": f"Synthetic entity {i}",
+        "platform": PLATFORMS[i % len(PLATFORMS)],
+        "supported_features": 0,
+        "translation_key": None,
+        "unique_id": f"synthetic-{i:08d}-{i * 7919:012x}",
+        "previous_unique_id": None,
+        "unit_of_measurement": "°C" if domain == "sensor" else None,
+    }
+
+
+def write_registry(path: Path, entities: int, deleted: int):
+    """Write a synthetic registry file."""
+    data = {
+        "version": 1,
+        "minor_version": 18,
+        "key": "core.entity_registry",
+        "data": {
+            "entities": [make_entity(i) for i in range(entities)],
+            "deleted_entities": [make_entity(entities + i) for i in range(deleted)],
+        },
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+
+
+def peak_rss_kib() -> int:
+    """Return this process's peak resident set size in KiB."""
+    # Linux keeps ru_maxrss across exec, so it would include the parent's
+    # peak; VmHWM starts over with the new program
+    try:
+        with open("/proc/self/status") as f:
+            for line in f:
+                if line.startswith("VmHWM:"):
+                    return int(line.split()[1])
+    except OSError:
+        pass
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak // 1024 if sys.platform == "darwin" else peak
+
+
+def measure(loader: str, path: Path):
+    """Load the registry with one loader and print its time and peak RSS."""
+    start = time.perf_counter()
+    if loader == "json.load":
+        with open(path, "r") as f:
+            data = json.load(f)
+            entities = {
+                entity["entity_id"]: entity
+                for entity in data.get("data", {}).get("entities", [])
+            }
+    elif loader == "streaming":
+        entities = load_registry(path, "entities", EntityRecord, key="entity_id")
+    else:
+        entities = {}
+    seconds = time.perf_counter() - start
+    print(f"{seconds} {peak_rss_kib()} {len(entities)}")
+
+
+def run(entities: int, deleted: int):
+    """Run every loader in its own interpreter and print one row each."""
+    with tempfile.TemporaryDirectory() as temp_dir:
+        path = Path(temp_dir) / "core.entity_registry"
+        write_registry(path, entities, deleted)
+        size = path.stat().st_size
+        print(f"{entities} entities, {deleted} deleted, {size / 1e6:.1f} MB")
+
+        results = {}
+        for loader in LOADERS:
+            output = subprocess.run(
+                [sys.executable, __file__, "--measure", loader, str(path)],
+                capture_output=True,
+                text=True,
+                check=True,
+            ).stdout.split()
+            results[loader] = (float(output[0]), int(output[1]), int(output[2]))
+
+    baseline = results["baseline"][1]
+    for loader in LOADERS[1:]:
+        seconds, peak, count = results[loader]
+        print(
+            f"{loader:<10} {seconds * 1000:>8.0f}ms "
+            f"{(peak - baseline) / 1024:>8.1f} MiB peak RSS ({count} entities)"
+        )
+
+
+def main():
+    """Run the registry memory benchmark from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--entities", type=int, default=50_000, help="Registered entities"
+    )
+    parser.add_argument("--deleted", type=int, default=20_000, help="Deleted entities")
+    parser.add_argument("--measure", nargs=2, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+    if args.measure:
+        measure(args.measure[0], Path(args.measure[1]))
+    else:
+        run(args.entities, args.deleted)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""Benchmark entity extraction from Jinja2 templates.
+
+Runs the precompiled, memoized template matcher over a synthetic corpus of
+templates (with the repetition typical of dashboards and automations) and
+compares it to the previous extractor, which ran seven separate uncompiled
+regular expressions per template.
+
+Usage: python benchmarks/bench_template_extraction.py [--templates N] [--unique N]
+"""
+
+import argparse
+import random
+import re
+import sys
+import time
+from pathlib import Path
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tools.reference_validator import extract_template_references  # noqa: E402
+
+TEMPLATE_FORMS = [
+    "{{{{ states('{entity}') | float(0) > 20 }}}}",
+    '{{{{ is_state("{entity}", "on") and states.{entity}.last_changed }}}}',
+    "{{{{ state_attr('{entity}', 'brightness') | int(0) }}}}",
+    "{{{{ is_state_attr('{entity}', 'hvac_action', 'heating') }}}}",
+    "{{{{ expand('{entity}') | selectattr('state', 'eq', 'on') | list }}}}",
+    "{{{{ has_value('{entity}') }}}} {{{{ area_entities('kitchen') | count }}}}",
+    "Temperature is {{{{ states.{entity}.state }}}} degrees",
+    "{{{{ now().hour > 6 and now().hour < 22 }}}}",
+]
+DOMAINS = ["sensor", "light", "binary_sensor", "climate", "switch", "group"]
+
+LEGACY_PATTERNS = [
+    r"states\('([^']+)'\)",
+    r'states\("([^"]+)"\)',
+    r"states\.([a-zA-Z_][a-zA-Z0-9_]*\.[a-zA-Z_][a-zA-Z0-9_]*)",
+    r"is_state\('([^']+)'",
+    r'is_state\("([^"]+)"',
+    r"state_attr\('([^']+)'",
+    r'state_attr\("([^"]+)"',
+]
+
+
+def make_corpus(count: int, unique: int):
+    """Build `count` templates drawn from `unique` distinct ones."""
+    rng = random.Random(42)
+    distinct = [
+        rng.choice(TEMPLATE_FORMS).format(entity=f"{rng.choice(DOMAINS)}.synthetic_{i}")
+        for i in range(unique)
+    ]
+    return [rng.choice(distinct) for _ in range(count)]
+
+
+def legacy_extract(template: str):
+    """Reproduce the previous extractor."""
+    entities = set()
+    for pattern in LEGACY_PATTERNS:
+        for match in re.findall(pattern, template):
+            if "." in match and len(match.split(".")) == 2:
+                entities.add(match)
+    return entities
+
+
+def time_pass(function, corpus) -> float:
+    """Return the seconds taken to run `function` over the corpus."""
+    start = time.perf_counter()
+    for template in corpus:
+        function(template)
+    return time.perf_counter() - start
+
+
+def run(count: int, unique: int):
+    """Run the benchmark and print one row per extractor."""
+    corpus = make_corpus(count, unique)
+    print(f"{count} templates, {unique} distinct")
+
+    legacy = time_pass(legacy_extract, corpus)
+
+    extract_template_references.cache_clear()
+    cold = time_pass(extract_template_references, corpus)
+    warm = time_pass(extract_template_references, corpus)
+
+    uncached = time_pass(extract_template_references.__wrapped__, corpus)
+
+    for label, seconds in [
+        ("legacy (7 patterns)", legacy),
+        ("compiled, no memo", uncached),
+        ("compiled, cold memo", cold),
+        ("compiled, warm memo", warm),
+    ]:
+        print(
+            f"{label:<22} {seconds * 1000:>9.1f}ms "
+            f"{seconds / count * 1e6:>7.2f}us/template {legacy / seconds:>6.1f}x"
+        )
+
+
+def main():
+    """Run the template extraction benchmark from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--templates", type=int, default=200_000, help="Templates to extract from"
+    )
+    parser.add_argument(
+        "--unique", type=int, default=5_000, help="Distinct templates in the corpus"
+    )
+    args = parser.parse_args()
+    run(args.templates, args.unique)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,301 @@
+#!/usr/bin/env python3
+"""Benchmark the validation pipeline on synthetic configurations.
+
+Generates a configuration (see synthetic_config.py) for each registry size
+and times, over several rounds, each stage of validation:
+
+- yaml_validator: YAMLValidator.validate_all
+- reference_validator: ReferenceValidator.validate_all, without a cache
+- reference_validator (cached): the same with a warm validation cache
+- explorer index: loading the registries and indexing them for search
+- explorer search: a batch of entity_explorer search queries
+
+Each benchmark runs in fresh validators per round, and once more under
+tracemalloc to record its peak memory. Results can be saved as JSON and
+later runs compared against them, failing when a benchmark got slower or
+needs more memory than the threshold allows.
+
+Usage: python benchmarks/bench_validation.py [--entities N [N ...]]
+       [--rounds N] [--save FILE] [--compare FILE] [--threshold PCT]
+"""
+
+import argparse
+import json
+import statistics
+import sys
+import tempfile
+import time
+import tracemalloc
+from pathlib import Path
+from typing import Any, Callable, Dict, List, NamedTuple, Optional, Tuple
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from synthetic_config import SyntheticConfig, generate_config  # noqa: E402
+
+from tools.entity_explorer import (  # noqa: E402
+    build_search_index,
+    categorize_entities,
+    load_registries,
+)
+from tools.reference_validator import ReferenceValidator  # noqa: E402
+from tools.validation_cache import ValidationCache  # noqa: E402
+from tools.yaml_validator import YAMLValidator  # noqa: E402
+
+REGISTRY_SIZES = [1_000, 10_000, 100_000]
+SEARCH_QUERIES = [
+    "synthetic entity 42",
+    "domain:light area:area_3",
+    "temperature",
+    "sensor.synthetic_entity_1",
+    "synthetc entty",
+    "class:temperature 7",
+    "hue",
+    "area:area_12 switch",
+]
+
+# (setup, run): setup prepares the state of one round untimed and returns
+# the function to time
+Setup = Callable[[], Callable[[], Any]]
+
+
+class Result(NamedTuple):
+    """Timings in seconds and peak memory in bytes of one benchmark."""
+
+    name: str
+    entities: int
+    rounds: int
+    min: float
+    median: float
+    mean: float
+    stddev: float
+    peak_memory: int
+
+    @property
+    def key(self) -> str:
+        """Identify the benchmark across runs."""
+        return f"{self.name}[{self.entities}]"
+
+
+def measure(name: str, entities: int, setup: Setup, rounds: int) -> Result:
+    """Time a benchmark over rounds, after a warmup, and trace its memory."""
+    setup()()
+    times = []
+    for _ in range(rounds):
+        function = setup()
+        start = time.perf_counter()
+        function()
+        times.append(time.perf_counter() - start)
+
+    function = setup()
+    tracemalloc.start()
+    try:
+        function()
+        peak = tracemalloc.get_traced_memory()[1]
+    finally:
+        tracemalloc.stop()
+
+    return Result(
+        name,
+        entities,
+        rounds,
+        min(times),
+        statistics.median(times),
+        statistics.mean(times),
+        statistics.stdev(times) if rounds > 1 else 0.0,
+        peak,
+    )
+
+
+def _checked(run: Callable[[], bool], validator: Any, errors: int) -> Callable:
+    """Run a validation and check it found what the generator planted."""
+
+    def function():
+        run()
+        if len(validator.errors) != errors:
+            raise AssertionError(
+                f"{type(validator).__name__} reported {len(validator.errors)} "
+                f"errors, expected {errors}"
+            )
+
+    return function
+
+
+def benchmarks(config: SyntheticConfig, cache_dir: Path) -> List[Tuple[str, Setup]]:
+    """Return the benchmarks to run on a synthetic configuration."""
+    config_dir = str(config.config_dir)
+
+    def yaml_validator():
+        validator = YAMLValidator(config_dir)
+        return _checked(validator.validate_all, validator, 0)
+
+    def reference_validator():
+        validator = ReferenceValidator(config_dir)
+        return _checked(validator.validate_all, validator, config.unknown_references)
+
+    def cached_reference_validator():
+        validator = ReferenceValidator(
+            config_dir, validation_cache=ValidationCache(cache_dir)
+        )
+        return _checked(validator.validate_all, validator, config.unknown_references)
+
+    def explorer_index():
+        def function():
+            entities, area_names, _device_names = load_registries(config.config_dir)
+            build_search_index(categorize_entities(entities, area_names))
+
+        return function
+
+    loaded = load_registries(config.config_dir)
+    assert loaded is not None
+    categorized = categorize_entities(loaded[0], loaded[1])
+
+    def explorer_search():
+        # A fresh index, as its term cache would answer repeated queries
+        index = build_search_index(categorized)
+        return lambda: [index.search(query, limit=50) for query in SEARCH_QUERIES]
+
+    return [
+        ("yaml_validator", yaml_validator),
+        ("reference_validator", reference_validator),
+        ("reference_validator (cached)", cached_reference_validator),
+        ("explorer index", explorer_index),
+        ("explorer search", explorer_search),
+    ]
+
+
+def format_result(result: Result, baseline: Optional[Dict[str, Any]] = None) -> str:
+    """Format a result as a table row, with its change from the baseline."""
+    row = (
+        f"{result.name:<29} {result.entities:>8} "
+        f"{result.min * 1000:>9.1f} {result.median * 1000:>9.1f} "
+        f"{result.mean * 1000:>9.1f} ±{result.stddev * 1000:>6.1f} "
+        f"{result.peak_memory / 2**20:>9.1f}"
+    )
+    if baseline is not None:
+        row += (
+            f" {_change(result.median, baseline['median']):>8}"
+            f" {_change(result.peak_memory, baseline['peak_memory']):>8}"
+        )
+    return row
+
+
+def _change(value: float, base: float) -> str:
+    """Format the relative change from base to value."""
+    return f"{(value - base) / base * 100:+.0f}%" if base else "n/a"
+
+
+def regressions(
+    results: List[Result], baseline: Dict[str, Dict[str, Any]], threshold: float
+) -> List[str]:
+    """Describe the results slower or larger than the baseline allows."""
+    found = []
+    for result in results:
+        base = baseline.get(result.key)
+        if base is None:
+            continue
+        for field, label in (("median", "time"), ("peak_memory", "peak memory")):
+            value = getattr(result, field)
+            if base[field] and value > base[field] * (1 + threshold / 100):
+                found.append(
+                    f"{result.key}: {label} {_change(value, base[field])} "
+                    f"(threshold {threshold:g}%)"
+                )
+    return found
+
+
+def run(
+    sizes: List[int],
+    rounds: int,
+    automations: int,
+    templates: int,
+    cards: int,
+    baseline: Optional[Dict[str, Dict[str, Any]]] = None,
+) -> List[Result]:
+    """Run every benchmark for every registry size and print a table."""
+    header = (
+        f"{'benchmark':<29} {'entities':>8} {'min ms':>9} {'median ms':>9} "
+        f"{'mean ms':>9} {'stddev':>7} {'peak MiB':>9}"
+    )
+    if baseline is not None:
+        header += f" {'time':>8} {'memory':>8}"
+    print(f"{automations} automations, {templates} templates, {cards} cards")
+    print(header)
+
+    results = []
+    for size in sizes:
+        with tempfile.TemporaryDirectory() as temp_dir:
+            config = generate_config(
+                Path(temp_dir) / "config", size, automations, templates, cards
+            )
+            cache_dir = Path(temp_dir) / "cache"
+            for name, setup in benchmarks(config, cache_dir):
+                result = measure(name, size, setup, rounds)
+                results.append(result)
+                base = None if baseline is None else baseline.get(result.key)
+                print(format_result(result, base), flush=True)
+    return results
+
+
+def main():
+    """Run the validation benchmarks from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "--entities",
+        type=int,
+        nargs="+",
+        default=REGISTRY_SIZES,
+        help="Registry sizes to benchmark",
+    )
+    parser.add_argument("--rounds", type=int, default=5, help="Timed rounds")
+    parser.add_argument("--automations", type=int, default=500, help="Automations")
+    parser.add_argument("--templates", type=int, default=200, help="Template sensors")
+    parser.add_argument("--cards", type=int, default=1_000, help="Dashboard cards")
+    parser.add_argument("--save", type=Path, help="Write the results to a JSON file")
+    parser.add_argument(
+        "--compare", type=Path, help="Compare with results saved by --save"
+    )
+    parser.add_argument(
+        "--threshold",
+        type=float,
+        default=20.0,
+        help="Percentage slowdown or memory growth that fails --compare",
+    )
+    args = parser.parse_args()
+
+    baseline = None
+    if args.compare:
+        with open(args.compare, "r", encoding="utf-8") as f:
+            baseline = json.load(f)["benchmarks"]
+
+    results = run(
+        args.entities,
+        args.rounds,
+        args.automations,
+        args.templates,
+        args.cards,
+        baseline,
+    )
+
+    if args.save:
+        args.save.parent.mkdir(parents=True, exist_ok=True)
+        with open(args.save, "w", encoding="utf-8") as f:
+            json.dump(
+                {
+                    "python": sys.version.split()[0],
+                    "benchmarks": {result.key: result._asdict() for result in results},
+                },
+                f,
+                indent=2,
+            )
+
+    if baseline is not None:
+        found = regressions(results, baseline, args.threshold)
+        for regression in found:
+            print(f"Regression: {regression}")
+        if found:
+            sys.exit(1)
+
+
+if __name__ == "__main__":
+    main()
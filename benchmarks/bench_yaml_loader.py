@@ -0,0 +1,101 @@
+#!/usr/bin/env python3
+"""Benchmark YAML parse throughput of the libyaml and pure-Python loaders.
+
+Parses every YAML file under the configuration directory with both
+HAYamlLoader (libyaml backed when available) and PureHAYamlLoader, and
+reports throughput in MB/s. Both record the position of every value; the
+"untracked" rows show the same loaders without that, to measure its cost.
+
+Usage: python benchmarks/bench_yaml_loader.py [config_dir] [--repeat N]
+"""
+
+import argparse
+import sys
+import time
+from pathlib import Path
+from typing import List, Tuple
+
+import yaml
+
+sys.path.insert(0, str(Path(__file__).resolve().parent.parent))
+
+from tools.ha_yaml import (  # noqa: E402
+    LIBYAML_AVAILABLE,
+    FastSafeLoader,
+    HAYamlLoader,
+    PureHAYamlLoader,
+    register_ha_tags,
+)
+
+
+class UntrackedLoader(FastSafeLoader):
+    """HAYamlLoader without position tracking."""
+
+
+class PureUntrackedLoader(yaml.SafeLoader):
+    """PureHAYamlLoader without position tracking."""
+
+
+register_ha_tags(UntrackedLoader)
+register_ha_tags(PureUntrackedLoader)
+
+
+def read_corpus(config_dir: Path) -> List[Tuple[Path, str]]:
+    """Read every parseable YAML file below config_dir."""
+    corpus = []
+    for file_path in sorted(config_dir.rglob("*.yaml")):
+        try:
+            text = file_path.read_text(encoding="utf-8")
+            yaml.load(text, Loader=HAYamlLoader)
+        except Exception:
+            # Only compare files both loaders accept
+            continue
+        corpus.append((file_path, text))
+    return corpus
+
+
+def time_loader(loader, corpus: List[Tuple[Path, str]], repeat: int) -> float:
+    """Return the best time in seconds to parse the whole corpus."""
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        for _file_path, text in corpus:
+            yaml.load(text, Loader=loader)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(config_dir: Path, repeat: int):
+    """Run the benchmark and print one row per loader."""
+    corpus = read_corpus(config_dir)
+    size = sum(len(text.encode("utf-8")) for _file_path, text in corpus)
+    print(f"{len(corpus)} files, {size / 1e6:.2f} MB, best of {repeat}")
+    if not LIBYAML_AVAILABLE:
+        print("libyaml is not available, HAYamlLoader is pure Python")
+
+    pure = time_loader(PureHAYamlLoader, corpus, repeat)
+    for label, seconds in [
+        ("HAYamlLoader", time_loader(HAYamlLoader, corpus, repeat)),
+        ("  untracked", time_loader(UntrackedLoader, corpus, repeat)),
+        ("PureHAYamlLoader", pure),
+        ("  untracked", time_loader(PureUntrackedLoader, corpus, repeat)),
+    ]:
+        print(
+            f"{label:<18} {seconds * 1000:>9.1f}ms {size / 1e6 / seconds:>7.2f} MB/s"
+            f" {pure / seconds:>6.1f}x"
+        )
+
+
+def main():
+    """Run the YAML loader benchmark from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "config_dir", nargs="?", default="config", help="Configuration directory"
+    )
+    parser.add_argument("--repeat", type=int, default=3, help="Runs per loader")
+    args = parser.parse_args()
+    run(Path(args.config_dir), args.repeat)
+
+
+if __name__ == "__main__":
+    main()
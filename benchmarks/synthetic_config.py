@@ -0,0 +1,271 @@
+#!/usr/bin/env python3
+"""Generate synthetic Home Assistant configurations for benchmarks.
+
+Writes a configuration directory with N automations, M template sensors and
+a YAML-mode dashboard of K cards, plus entity, device and area registries,
+all referencing each other the way real configurations do. Every hundredth
+automation and card also references an entity that doesn't exist, so the
+reference validator has findings to report.
+
+Usage: python benchmarks/synthetic_config.py OUTPUT_DIR [--entities N]
+       [--automations N] [--templates N] [--cards N]
+"""
+
+import argparse
+import json
+import random
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, NamedTuple
+
+import yaml
+
+sys.path.insert(0, str(Path(__file__).resolve().parent))
+
+from bench_registry_memory import make_entity  # noqa: E402
+
+AREAS = 25
+# One in this many automations and cards references a missing entity
+UNKNOWN_EVERY = 100
+
+
+class SyntheticConfig(NamedTuple):
+    """What generate_config() wrote."""
+
+    config_dir: Path
+    entities: int
+    automations: int
+    templates: int
+    cards: int
+    unknown_references: int
+
+
+def entity_id(i: int) -> str:
+    """Return the ID of the i-th registry entity, as make_entity() names it."""
+    domain = ["sensor", "light", "switch", "binary_sensor"][i % 4]
+    return f"{domain}.synthetic_entity_{i}"
+
+
+class _Generator:
+    """Picks entities for synthetic configuration items."""
+
+    def __init__(self, entities: int, seed: int):
+        """Create a generator over a registry of `entities` entities."""
+        self.rng = random.Random(seed)
+        self.entities = entities
+
+    def entity(self, domain: str = "") -> str:
+        """Pick a registered entity, of a domain if given."""
+        domains = ["sensor", "light", "switch", "binary_sensor"]
+        i = self.rng.randrange(self.entities)
+        if domain:
+            i += (domains.index(domain) - i) % 4
+            if i >= self.entities:
+                i -= 4
+        return entity_id(i)
+
+    def automation(self, i: int) -> Dict[str, Any]:
+        """Build an automation switching lights on sensor changes."""
+        lights = [self.entity("light") for _ in range(self.rng.randint(1, 4))]
+        if i % UNKNOWN_EVERY == UNKNOWN_EVERY - 1:
+            lights.append(f"light.missing_automation_{i}")
+        return {
+            "id": f"synthetic_automation_{i}",
+            "alias": f"Synthetic automation {i}",
+            "triggers": [
+                {
+                    "trigger": "state",
+                    "entity_id": self.entity("binary_sensor"),
+                    "to": "on",
+                },
+                {
+                    "trigger": "numeric_state",
+                    "entity_id": self.entity("sensor"),
+                    "above": 20,
+                },
+            ],
+            "conditions": [
+                {
+                    "condition": "template",
+                    "value_template": (
+                        f"{{{{ is_state('{self.entity('switch')}', 'on') "
+                        f"and states('{self.entity('sensor')}') | float(0) > 5 }}}}"
+                    ),
+                }
+            ],
+            "actions": [
+                {
+                    "action": "light.turn_on",
+                    "target": {
+                        "entity_id": lights,
+                        "area_id": f"area_{self.rng.randrange(AREAS)}",
+                    },
+                    "data": {"brightness_pct": self.rng.randint(1, 100)},
+                },
+                {"delay": {"minutes": self.rng.randint(1, 30)}},
+                {"action": "switch.turn_off", "entity_id": self.entity("switch")},
+            ],
+            "mode": "restart",
+        }
+
+    def template_sensor(self, i: int) -> Dict[str, Any]:
+        """Build a template sensor averaging registry sensors."""
+        sensors = [self.entity("sensor") for _ in range(3)]
+        average = " + ".join(f"states('{sensor}') | float(0)" for sensor in sensors)
+        return {
+            "name": f"Synthetic template {i}",
+            "unique_id": f"synthetic_template_{i}",
+            "unit_of_measurement": "°C",
+            "state": f"{{{{ (({average}) / 3) | round(1) }}}}",
+            "availability": f"{{{{ has_value('{sensors[0]}') }}}}",
+        }
+
+    def card(self, i: int, templates: int) -> Dict[str, Any]:
+        """Build a dashboard card of one of a few common types."""
+        kind = i % 4
+        if kind == 0:
+            entities = [self.entity() for _ in range(self.rng.randint(2, 6))]
+            if i % UNKNOWN_EVERY == 0:
+                entities.append(f"sensor.missing_card_{i}")
+            return {"type": "entities", "title": f"Card {i}", "entities": entities}
+        if kind == 1:
+            return {"type": "tile", "entity": self.entity("light")}
+        if kind == 2 and templates:
+            return {
+                "type": "sensor",
+                "entity": f"sensor.synthetic_template_{self.rng.randrange(templates)}",
+                "graph": "line",
+            }
+        return {
+            "type": "markdown",
+            "content": (
+                f"Outside is {{{{ states('{self.entity('sensor')}') }}}} °C, "
+                f"{{{{ states.{self.entity('light')}.state }}}}"
+            ),
+        }
+
+
+def _dump(path: Path, data: Any):
+    """Write data as YAML."""
+    with open(path, "w", encoding="utf-8") as f:
+        yaml.safe_dump(data, f, allow_unicode=True, sort_keys=False)
+
+
+def _write_registry(path: Path, collection: str, entries: List[Dict[str, Any]]):
+    """Write a registry file like Home Assistant's storage."""
+    data = {
+        "version": 1,
+        "minor_version": 1,
+        "key": path.name,
+        "data": {collection: entries},
+    }
+    with open(path, "w", encoding="utf-8") as f:
+        json.dump(data, f, ensure_ascii=False)
+
+
+def generate_config(
+    config_dir: Path,
+    entities: int = 10_000,
+    automations: int = 500,
+    templates: int = 200,
+    cards: int = 1_000,
+    seed: int = 42,
+) -> SyntheticConfig:
+    """Write a synthetic configuration directory and its registries."""
+    generator = _Generator(entities, seed)
+    config_dir.mkdir(parents=True, exist_ok=True)
+    storage_dir = config_dir / ".storage"
+    storage_dir.mkdir(exist_ok=True)
+
+    (config_dir / "configuration.yaml").write_text(
+        "homeassistant:\n"
+        "  name: Synthetic\n"
+        "  unit_system: metric\n"
+        "lovelace:\n"
+        "  mode: yaml\n"
+        "automation: !include automations.yaml\n"
+        "template: !include templates.yaml\n",
+        encoding="utf-8",
+    )
+    _dump(
+        config_dir / "automations.yaml",
+        [generator.automation(i) for i in range(automations)],
+    )
+    _dump(
+        config_dir / "templates.yaml",
+        [{"sensor": [generator.template_sensor(i) for i in range(templates)]}],
+    )
+
+    views: List[Dict[str, Any]] = []
+    for start in range(0, cards, 50):
+        views.append(
+            {
+                "title": f"View {len(views)}",
+                "path": f"view_{len(views)}",
+                "cards": [
+                    generator.card(i, templates)
+                    for i in range(start, min(start + 50, cards))
+                ],
+            }
+        )
+    _dump(config_dir / "ui-lovelace.yaml", {"title": "Synthetic", "views": views})
+
+    _write_registry(
+        storage_dir / "core.entity_registry",
+        "entities",
+        [make_entity(i) for i in range(entities)],
+    )
+    _write_registry(
+        storage_dir / "core.device_registry",
+        "devices",
+        [
+            {
+                "id": f"{i:032x}",
+                "name": f"Synthetic device {i}",
+                "name_by_user": None,
+                "area_id": f"area_{i % AREAS}",
+                "disabled_by": None,
+            }
+            for i in range((entities + 3) // 4)
+        ],
+    )
+    _write_registry(
+        storage_dir / "core.area_registry",
+        "areas",
+        [{"id": f"area_{i}", "name": f"Area {i}"} for i in range(AREAS)],
+    )
+
+    unknown = automations // UNKNOWN_EVERY + -(-cards // UNKNOWN_EVERY)
+    return SyntheticConfig(config_dir, entities, automations, templates, cards, unknown)
+
+
+def main():
+    """Write a synthetic configuration from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("output_dir", help="Configuration directory to write")
+    parser.add_argument(
+        "--entities", type=int, default=10_000, help="Registered entities"
+    )
+    parser.add_argument("--automations", type=int, default=500, help="Automations")
+    parser.add_argument("--templates", type=int, default=200, help="Template sensors")
+    parser.add_argument("--cards", type=int, default=1_000, help="Dashboard cards")
+    parser.add_argument("--seed", type=int, default=42, help="Random seed")
+    args = parser.parse_args()
+
+    config = generate_config(
+        Path(args.output_dir),
+        args.entities,
+        args.automations,
+        args.templates,
+        args.cards,
+        args.seed,
+    )
+    print(
+        f"Wrote {config.automations} automations, {config.templates} template "
+        f"sensors and {config.cards} cards referencing {config.entities} "
+        f"entities to {config.config_dir}"
+    )
+
+
+if __name__ == "__main__":
+    main()
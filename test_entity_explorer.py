@@ -0,0 +1,192 @@
+#!/usr/bin/env python3
+"""Unit tests for the entity explorer."""
+
+import io
+import json
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+from unittest import mock
+
+from tools.entity_explorer import (
+    ExplorerShell,
+    categorize_entities,
+    print_by_area,
+    print_detailed_by_domain,
+    print_summary,
+)
+
+
+class TestCategorizedEntities(unittest.TestCase):
+    """Test categorizing entities on demand."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.categorized = categorize_entities(
+            [
+                {"entity_id": "switch.fan", "area_id": "attic"},
+                {"entity_id": "light.porch", "hidden_by": "user"},
+                {"entity_id": "sensor.power", "original_device_class": "power"},
+                {"entity_id": "climate.attic", "area_id": "attic", "name": "Heat"},
+                {"entity_id": "sensor.humidity", "device_class": "humidity"},
+            ],
+            {"attic": "Attic"},
+        )
+
+    def test_views(self):
+        """Test the whole views of enabled entities."""
+        by_domain = self.categorized["by_domain"]
+        self.assertEqual(list(by_domain), ["climate", "sensor", "switch"])
+        self.assertEqual(
+            [entity["entity_id"] for entity in by_domain["sensor"]],
+            ["sensor.humidity", "sensor.power"],
+        )
+        self.assertEqual(by_domain["climate"][0]["name"], "Heat")
+        self.assertEqual(list(self.categorized["by_area"]), ["Attic", "No Area"])
+        self.assertEqual(
+            {
+                domain: [entity["entity_id"] for entity in entities]
+                for domain, entities in self.categorized["automation_relevant"].items()
+            },
+            {
+                "climate": ["climate.attic"],
+                "sensor": ["sensor.power", "sensor.humidity"],
+                "switch": ["switch.fan"],
+            },
+        )
+        self.assertIs(self.categorized["by_domain"], by_domain)
+
+    def test_slices_describe_only_their_entities(self):
+        """Test that listing a domain or area only describes its entities."""
+        describe = mock.Mock(wraps=self.categorized.describe)
+        self.categorized.describe = describe
+        with redirect_stdout(io.StringIO()) as output:
+            print_detailed_by_domain(self.categorized, "sensor")
+            print_by_area(self.categorized, "Attic")
+        self.assertEqual(describe.call_count, 2)
+        self.assertIn("sensor.power (power)", output.getvalue())
+        self.assertIn("climate: climate.attic", output.getvalue())
+
+        with redirect_stdout(io.StringIO()) as output:
+            print_summary(self.categorized)
+        # Only the automation-relevant examples are described
+        self.assertEqual(describe.call_count, 6)
+        self.assertIn("Total Entities: 4", output.getvalue())
+
+
+class TestExplorerShell(unittest.TestCase):
+    """Test answering queries from registries loaded once."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.config_dir = Path(self.temp_dir) / "config"
+        self.storage_dir = self.config_dir / ".storage"
+        self.storage_dir.mkdir(parents=True)
+
+        self.write(
+            "core.entity_registry",
+            "entities",
+            [
+                {
+                    "entity_id": "light.kitchen_ceiling",
+                    "platform": "hue",
+                    "area_id": "kitchen",
+                    "device_id": "d1",
+                },
+                {
+                    "entity_id": "sensor.kitchen_temperature",
+                    "platform": "hue",
+                    "device_id": "d1",
+                    "original_device_class": "temperature",
+                    "unit_of_measurement": "°C",
+                },
+                {"entity_id": "switch.fan", "platform": "zha", "device_id": "d2"},
+            ],
+        )
+        self.write(
+            "core.device_registry",
+            "devices",
+            [
+                {"id": "d1", "name": "Hue Bridge", "name_by_user": "Kitchen Hub"},
+                {"id": "d2", "name": "Fan Plug"},
+            ],
+        )
+        self.write("core.area_registry", "areas", [{"id": "kitchen", "name": "Kök"}])
+
+        self.shell = ExplorerShell(self.config_dir, Path(self.temp_dir) / "cache")
+        self.assertTrue(self.shell.load())
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        shutil.rmtree(self.temp_dir)
+
+    def write(self, name: str, collection: str, entries):
+        """Write a registry file."""
+        with open(self.storage_dir / name, "w", encoding="utf-8") as f:
+            json.dump({"data": {collection: entries}}, f)
+
+    def run_batch(self, *commands: str) -> str:
+        """Run commands as --stdin would and return their output."""
+        output = io.StringIO()
+        with redirect_stdout(output):
+            self.shell.run_batch(f"{command}\n" for command in commands)
+        return output.getvalue()
+
+    def test_queries(self):
+        """Test domain, area, device and search queries."""
+        output = self.run_batch("domain switch", "area kök")
+        self.assertIn("switch.fan", output)
+        self.assertIn("KÖK (1 entities)", output)
+        self.assertIn("light: light.kitchen_ceiling", output)
+        self.assertNotIn("sensor.kitchen_temperature", output)
+
+        output = self.run_batch("device kitchen")
+        self.assertIn("Kitchen Hub (2 entities)", output)
+        self.assertIn("sensor.kitchen_temperature (temperature) [°C]", output)
+        self.assertNotIn("switch.fan", output)
+        self.assertIn("Device 'attic' not found", self.run_batch("device attic"))
+
+        output = self.run_batch("search domain:sensor kitchen", "fan")
+        self.assertIn("sensor.kitchen_temperature", output)
+        self.assertIn("switch.fan", output)
+        self.assertNotIn("light.kitchen_ceiling", output)
+
+    def test_batch_skips_comments_and_stops_at_quit(self):
+        """Test that batches skip blank lines and comments and end at quit."""
+        output = self.run_batch("# domain switch", "", "quit", "domain switch")
+        self.assertEqual(output, "")
+
+    def test_state_kept_until_reload(self):
+        """Test that the search index is reused until the registries reload."""
+        self.run_batch("search fan")
+        index = self.shell.index
+        self.run_batch("search kitchen")
+        self.assertIs(self.shell.index, index)
+
+        self.write("core.entity_registry", "entities", [{"entity_id": "fan.attic"}])
+        self.assertIn("Loaded 1 entities", self.run_batch("reload"))
+        self.assertIn("fan.attic", self.run_batch("search attic"))
+        self.assertIsNot(self.shell.index, index)
+
+    def test_complete(self):
+        """Test completing domains, areas and search words."""
+        self.assertEqual(
+            self.shell.complete_domain("s", "domain s", 7, 8),
+            [
+                "sensor",
+                "switch",
+            ],
+        )
+        self.assertEqual(self.shell.complete_area("k", "area k", 5, 6), ["Kök"])
+        line = "search domain:li"
+        # Readline splits words at the colon, completing only "li"
+        self.assertEqual(
+            self.shell.complete_search("li", line, 14, len(line)), ["light"]
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,144 @@
+#!/usr/bin/env python3
+"""Unit tests for the entity search index."""
+
+import io
+import unittest
+from contextlib import redirect_stdout
+
+from tools.entity_explorer import build_search_index, search_entities
+from tools.entity_search import EntitySearchIndex, parse_query
+
+
+def entity(entity_id, name, area="No Area", device_class=None, platform="zha"):
+    """Build an entity as categorize_entities() describes it."""
+    return {
+        "entity_id": entity_id,
+        "name": name,
+        "area": area,
+        "device_class": device_class,
+        "platform": platform,
+        "unit": None,
+    }
+
+
+class TestEntitySearchIndex(unittest.TestCase):
+    """Test ranked search, filters and completion."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.index = EntitySearchIndex(
+            [
+                entity(
+                    "sensor.kitchen_temperature",
+                    "Kitchen Temperature",
+                    "Kitchen",
+                    "temperature",
+                ),
+                entity("sensor.outdoor_temp", "Outdoor", device_class="temperature"),
+                entity("sensor.temperature_offset", "Offset", "Living Room"),
+                entity(
+                    "binary_sensor.hall_motion",
+                    "Hall Motion",
+                    "Living Room",
+                    "motion",
+                    "hue",
+                ),
+                entity("light.kitchen_ceiling", "Ceiling", "Kitchen", platform="hue"),
+                entity("sensor.attemperator_level", "Level"),
+            ]
+        )
+
+    def ids(self, query, limit=None):
+        """Return the entity IDs found for a query, best first."""
+        return [found["entity_id"] for _, found in self.index.search(query, limit)]
+
+    def test_parse_query(self):
+        """Test splitting filters from free terms."""
+        self.assertEqual(
+            parse_query('domain:sensor area:"Living Room" outdoor_temp'),
+            ([("domain", "sensor"), ("area", "living_room")], ["outdoor", "temp"]),
+        )
+        self.assertEqual(parse_query("12:30 'open"), ([], ["12", "30", "open"]))
+
+    def test_ranking(self):
+        """Test exact words rank above prefixes, substrings and field matches."""
+        self.assertEqual(
+            self.ids("temperature"),
+            [
+                "sensor.kitchen_temperature",
+                "sensor.temperature_offset",
+                "sensor.outdoor_temp",
+            ],
+        )
+        self.assertEqual(
+            self.ids("temp"),
+            [
+                "sensor.outdoor_temp",
+                "sensor.kitchen_temperature",
+                "sensor.temperature_offset",
+                "sensor.attemperator_level",
+            ],
+        )
+
+    def test_fuzzy_match(self):
+        """Test that misspelt terms still find entities."""
+        self.assertEqual(self.ids("ceilng"), ["light.kitchen_ceiling"])
+        self.assertEqual(self.ids("xyzzy"), [])
+
+    def test_filters_and_terms(self):
+        """Test combining filters with terms that must all match."""
+        self.assertEqual(
+            self.ids("domain:sensor area:kitchen temp"), ["sensor.kitchen_temperature"]
+        )
+        self.assertEqual(
+            self.ids('area:"living room"'),
+            ["binary_sensor.hall_motion", "sensor.temperature_offset"],
+        )
+        self.assertEqual(
+            self.ids("class:motion platform:hue"), ["binary_sensor.hall_motion"]
+        )
+        self.assertEqual(self.ids("kitchen ceiling"), ["light.kitchen_ceiling"])
+        self.assertEqual(self.ids("kitchen motion"), [])
+        self.assertEqual(self.ids("domain:climate"), [])
+
+    def test_no_area_is_not_text(self):
+        """Test that the placeholder area doesn't match free text."""
+        self.assertEqual(self.ids("area"), [])
+        self.assertEqual(len(self.ids("area:no_area")), 2)
+
+    def test_entity_id_query(self):
+        """Test that a full entity ID lists that entity first."""
+        self.assertEqual(
+            self.ids("sensor.outdoor_temp", limit=1), ["sensor.outdoor_temp"]
+        )
+
+    def test_complete(self):
+        """Test completing words, entity IDs and filter values."""
+        self.assertEqual(self.index.complete("kit"), ["kitchen"])
+        self.assertEqual(self.index.complete("te"), ["temperature", "temp"])
+        self.assertEqual(self.index.complete("sensor.t"), ["sensor.temperature_offset"])
+        self.assertEqual(self.index.complete("area:liv"), ["area:living_room"])
+        self.assertEqual(
+            self.index.complete("domain:"),
+            ["domain:binary_sensor", "domain:light", "domain:sensor"],
+        )
+
+    def test_explorer_search(self):
+        """Test that entity_explorer prints ranked search results."""
+        categorized = {
+            "by_domain": {
+                "sensor": [entity("sensor.outdoor_temp", "Outdoor", "Garden")],
+                "light": [entity("light.garden", "Garden Lights")],
+            }
+        }
+        index = build_search_index(categorized)
+        output = io.StringIO()
+        with redirect_stdout(output):
+            search_entities(categorized, "garden", index)
+
+        lines = [line.strip() for line in output.getvalue().splitlines()]
+        self.assertEqual(lines[-2:], ["light.garden", "sensor.outdoor_temp | Garden"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,167 @@
+#!/usr/bin/env python3
+"""Unit tests for structured validation findings."""
+
+import io
+import json
+import pickle
+import shutil
+import tempfile
+import unittest
+from contextlib import redirect_stderr
+from pathlib import Path
+from unittest import mock
+
+from tools.findings import Finding, FindingList, FindingWriter, stream_findings
+from tools.reference_validator import ReferenceValidator
+from tools.run_tests import ValidationTestRunner
+from tools.validation_cache import ValidationCache
+from tools.yaml_validator import YAMLValidator
+
+
+class TestFindings(unittest.TestCase):
+    """Test the findings model and writers."""
+
+    def test_finding_is_its_message(self):
+        """Test that findings read as the messages validators printed."""
+        finding = Finding(
+            "Unknown entity 'light.a'", code="unknown-entity", file="a.yaml", line=2
+        )
+        self.assertEqual(finding, "a.yaml: Unknown entity 'light.a'")
+        self.assertEqual(
+            pickle.loads(pickle.dumps(finding)).to_dict(), finding.to_dict()
+        )
+        self.assertEqual(Finding.from_dict(finding.to_dict()), finding)
+
+        parsed = Finding.from_message("config/a.yaml: Automation 0 is broken")
+        self.assertEqual(parsed.file, "config/a.yaml")
+        self.assertEqual(parsed.message, "Automation 0 is broken")
+        parsed = Finding.from_message("YAML syntax error in scripts.yaml: boom")
+        self.assertIsNone(parsed.file)
+
+    def test_list_reports_findings(self):
+        """Test that appended messages become findings passed to the listener."""
+        reported = []
+        findings = FindingList("warning", "yaml_validator")
+        findings.listener = reported.append
+        findings.append("a.yaml: Missing 'homeassistant' section")
+        findings.extend([{"message": "cached", "code": "c"}])
+
+        self.assertEqual(reported, findings)
+        self.assertEqual(
+            [(f.severity, f.validator, f.code) for f in findings],
+            [("warning", "yaml_validator", None), ("warning", "yaml_validator", "c")],
+        )
+
+    def write(self, output_format, valid=False):
+        """Write two findings in a format and return the output."""
+        output = io.StringIO()
+        writer = FindingWriter(output, output_format)
+        writer.write(Finding("Broken", severity="error", file="a.yaml", line=3))
+        writer.write(Finding("Odd", severity="warning", path="x", entity="light.a"))
+        writer.finish(valid)
+        return output.getvalue()
+
+    def test_formats(self):
+        """Test that every format is valid and holds the findings and result."""
+        report = json.loads(self.write("json"))
+        self.assertEqual([f["message"] for f in report["findings"]], ["Broken", "Odd"])
+        self.assertEqual(
+            (report["valid"], report["errors"], report["warnings"]), (False, 1, 1)
+        )
+
+        lines = [json.loads(line) for line in self.write("ndjson", True).splitlines()]
+        self.assertEqual(lines[0]["line"], 3)
+        self.assertEqual(
+            lines[-1], {"summary": {"valid": True, "errors": 1, "warnings": 1}}
+        )
+
+        run = json.loads(self.write("sarif"))["runs"][0]
+        self.assertEqual(
+            [result["level"] for result in run["results"]], ["error", "warning"]
+        )
+        location = run["results"][0]["locations"][0]["physicalLocation"]
+        self.assertEqual(location["artifactLocation"]["uri"], "a.yaml")
+        self.assertEqual(location["region"], {"startLine": 3})
+        self.assertEqual(run["results"][1]["properties"], {"entity": "light.a"})
+
+        empty = io.StringIO()
+        FindingWriter(empty, "sarif").finish(True)
+        self.assertEqual(json.loads(empty.getvalue())["runs"][0]["results"], [])
+
+
+class TestValidatorFindings(unittest.TestCase):
+    """Test the findings reported by validators."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.config_dir = Path(self.temp_dir) / "config"
+        storage_dir = self.config_dir / ".storage"
+        storage_dir.mkdir(parents=True)
+        for name, collection in [
+            ("core.entity_registry", "entities"),
+            ("core.device_registry", "devices"),
+        ]:
+            with open(storage_dir / name, "w") as f:
+                json.dump({"data": {collection: []}}, f)
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        shutil.rmtree(self.temp_dir)
+
+    def test_yaml_syntax_error_position(self):
+        """Test that syntax errors point at their line and column."""
+        (self.config_dir / "configuration.yaml").write_text("a: 1\nb: [\n")
+        validator = YAMLValidator(str(self.config_dir))
+        reported = []
+        stream_findings(validator, reported.append)
+
+        self.assertFalse(validator.validate_all())
+        self.assertEqual(reported, validator.errors)
+        error = validator.errors[0]
+        self.assertEqual((error.code, error.line, error.column), ("yaml-syntax", 3, 1))
+        self.assertTrue(error.startswith(f"{error.file}: YAML syntax error"))
+
+    def test_cached_findings_keep_their_fields(self):
+        """Test that findings replayed from the cache are still structured."""
+        (self.config_dir / "automations.yaml").write_text(
+            "- triggers: []\n  actions:\n    - action: light.turn_on\n"
+            "      entity_id: light.missing\n"
+        )
+        results = []
+        for _run in range(2):
+            validator = ReferenceValidator(
+                str(self.config_dir),
+                validation_cache=ValidationCache(Path(self.temp_dir) / "cache"),
+            )
+            self.assertFalse(validator.validate_all())
+            results.append([error.to_dict() for error in validator.errors])
+
+        self.assertEqual(results[0], results[1])
+        self.assertEqual(results[0][0]["code"], "unknown-entity")
+        self.assertEqual(results[0][0]["entity"], "light.missing")
+        self.assertEqual(results[0][0]["path"], "[0].actions[0].entity_id")
+
+    def test_runner_streams_findings(self):
+        """Test that the runner writes every validator's findings to stdout."""
+        (self.config_dir / "configuration.yaml").write_text("homeassistant: [\n")
+        runner = ValidationTestRunner(
+            str(self.config_dir), use_cache=False, output_format="ndjson"
+        )
+        stdout = io.StringIO()
+        with (
+            mock.patch.object(runner.writer, "stream", stdout),
+            redirect_stderr(io.StringIO()),
+        ):
+            self.assertFalse(runner.run())
+
+        lines = [json.loads(line) for line in stdout.getvalue().splitlines()]
+        self.assertEqual(
+            [line.get("code") for line in lines[:-1]],
+            ["yaml-syntax", "stage-skipped", "stage-skipped"],
+        )
+        self.assertFalse(lines[-1]["summary"]["valid"])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,199 @@
+#!/usr/bin/env python3
+"""Unit tests for the structured Home Assistant config check."""
+
+import os
+import shutil
+import subprocess
+import tempfile
+import textwrap
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from tools.ha_check import problem_location, stream_check
+from tools.ha_config_validator import HAConfigValidator
+from tools.ha_official_validator import HAOfficialValidator
+
+# Stands in for homeassistant.scripts.check_config, whose check() returns
+# the problems per domain, each message followed by the offending config
+FAKE_CHECK_CONFIG = textwrap.dedent("""
+    import os
+    import time
+
+    def check(config_dir):
+        print("Testing configuration at", config_dir)
+        if os.path.exists(os.path.join(config_dir, "slow")):
+            time.sleep(30)
+        if os.path.exists(os.path.join(config_dir, "crash")):
+            os.write(2, b"Setting up light\\nFatal: boom\\n")
+            os._exit(3)
+        # Printed by native code, around Python's sys.stdout
+        os.write(1, b"noise\\n")
+        return {
+            "except": {
+                "light": [
+                    "Invalid config for 'light' at configuration.yaml, line 3: "
+                    "required key 'platform' not provided",
+                    {"name": "Kitchen"},
+                ],
+                "General Errors": [
+                    "Platform error 'sensor.foo' - Integration 'foo' not found."
+                ],
+            },
+            "warn": {
+                "template": [
+                    "Deprecated option (See /config/templates.yaml, line 7).",
+                ],
+            },
+        }
+    """)
+
+
+class TestStructuredCheck(unittest.TestCase):
+    """Test checking configurations through Home Assistant's Python API."""
+
+    def setUp(self):
+        """Set up a configuration and a fake Home Assistant."""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.config_dir = self.temp_dir / "config"
+        self.config_dir.mkdir()
+        (self.config_dir / "configuration.yaml").write_text("homeassistant:\n")
+
+        scripts = self.temp_dir / "site" / "homeassistant" / "scripts"
+        scripts.mkdir(parents=True)
+        (scripts.parent / "__init__.py").write_text("")
+        (scripts / "__init__.py").write_text("")
+        (scripts / "check_config.py").write_text(FAKE_CHECK_CONFIG)
+        patcher = mock.patch.dict(
+            os.environ, {"PYTHONPATH": str(self.temp_dir / "site")}
+        )
+        patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def test_problem_location(self):
+        """Test reading the file and line from check_config messages."""
+        self.assertEqual(
+            problem_location(
+                "Invalid config for 'light' at packages/lights.yaml, line 12: x",
+                "/config",
+            ),
+            ("/config/packages/lights.yaml", 12),
+        )
+        self.assertEqual(
+            problem_location("Invalid config (See /config/a.yaml, line 4).", "/c"),
+            ("/config/a.yaml", 4),
+        )
+        self.assertEqual(
+            problem_location("Invalid config (See ?, line ?).", "/c"), (None, None)
+        )
+        self.assertEqual(problem_location("Integration not found", "/c"), (None, None))
+
+    def test_stream_check(self):
+        """Test that problems are streamed with their domain and location."""
+        items = list(stream_check(self.config_dir))
+
+        self.assertEqual(items[-1], {"summary": {"returncode": 2}})
+        problems = items[:-1]
+        self.assertEqual(
+            [(p["severity"], p["domain"]) for p in problems],
+            [("error", "light"), ("error", None), ("warning", "template")],
+        )
+        config_dir = str(self.config_dir.resolve())
+        self.assertEqual(
+            (problems[0]["file"], problems[0]["line"]),
+            (os.path.join(config_dir, "configuration.yaml"), 3),
+        )
+        self.assertEqual(problems[1]["file"], None)
+        self.assertEqual(
+            (problems[2]["file"], problems[2]["line"]), ("/config/templates.yaml", 7)
+        )
+
+    def test_crash_and_timeout(self):
+        """Test a check that dies or hangs."""
+        (self.config_dir / "crash").touch()
+        self.assertEqual(
+            list(stream_check(self.config_dir)),
+            [
+                {
+                    "summary": {
+                        "returncode": 3,
+                        "error": "check_config exited with code 3: Fatal: boom",
+                    }
+                }
+            ],
+        )
+
+        (self.config_dir / "slow").touch()
+        with self.assertRaises(subprocess.TimeoutExpired):
+            list(stream_check(self.config_dir, timeout=0.5))
+
+    def test_official_validator(self):
+        """Test that only reported problems become findings."""
+        validator = HAOfficialValidator(str(self.config_dir))
+
+        self.assertFalse(validator.validate_all())
+        self.assertEqual(len(validator.errors), 2)
+        error = validator.errors[0]
+        self.assertEqual(
+            error.file, str(self.config_dir.resolve() / "configuration.yaml")
+        )
+        self.assertEqual(
+            (error.line, error.path, error.code), (3, "light", "ha-config")
+        )
+        self.assertTrue(
+            error.message.startswith("HA Check: Invalid config for 'light'")
+        )
+        self.assertEqual(
+            validator.errors[1],
+            "HA Check: Platform error 'sensor.foo' - Integration 'foo' not found.",
+        )
+        self.assertEqual(len(validator.warnings), 1)
+
+    def test_official_validator_crash(self):
+        """Test that a check that couldn't run is a single error."""
+        (self.config_dir / "crash").touch()
+        validator = HAOfficialValidator(str(self.config_dir))
+
+        self.assertFalse(validator.validate_all())
+        self.assertEqual(
+            validator.errors, ["check_config exited with code 3: Fatal: boom"]
+        )
+
+    def test_config_validator(self):
+        """Test that the check_config validator reports the same problems."""
+        validator = HAConfigValidator(str(self.config_dir))
+        with mock.patch.object(validator, "check_ha_installation", return_value=True):
+            self.assertFalse(validator.validate_all())
+        self.assertEqual([error.line for error in validator.errors], [3, None])
+        self.assertEqual(len(validator.warnings), 1)
+
+    def test_scoped_config_validator(self):
+        """Test that changed files scope the check_config validator."""
+        (self.config_dir / "configuration.yaml").write_text(
+            "homeassistant:\nlight: !include lights.yaml\n"
+        )
+        lights = self.config_dir / "lights.yaml"
+        lights.write_text("[]\n")
+        (self.config_dir / "ui.yaml").write_text("views: []\n")
+        validator = HAConfigValidator(str(self.config_dir))
+        with (
+            mock.patch.object(validator, "check_ha_installation", return_value=True),
+            mock.patch(
+                "tools.ha_config_validator.stream_check", wraps=stream_check
+            ) as check,
+        ):
+            self.assertTrue(validator.validate_all([self.config_dir / "ui.yaml"]))
+            self.assertFalse(check.called)
+
+            # The fake Home Assistant can't check single domains
+            self.assertFalse(validator.validate_all([lights]))
+
+        self.assertEqual(
+            [call.args[1] for call in check.call_args_list], [["light"], None]
+        )
+        self.assertEqual([error.line for error in validator.errors], [3, None])
+
+
+if __name__ == "__main__":
+    unittest.main()
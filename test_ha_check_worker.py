@@ -0,0 +1,191 @@
+#!/usr/bin/env python3
+"""Unit tests for the persistent check_config worker."""
+
+import shutil
+import socket
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from typing import List, Optional
+from unittest import mock
+
+from tools import ha_check_worker
+from tools.ha_check_worker import (
+    CheckConfigClient,
+    CheckConfigWorker,
+    WorkerError,
+    WorkerServer,
+)
+from tools.ha_official_validator import HAOfficialValidator
+
+
+class FakeCheck:
+    """Stands in for run_check, recording the directories checked."""
+
+    def __init__(self, message: str = "", severity: str = "error"):
+        """Report message as a problem of every domain checked."""
+        self.message = message
+        self.severity = severity
+        self.checked: List[str] = []
+        self.domains: Optional[List[str]] = None
+
+    def __call__(self, config_dir: str, domains=None):
+        """Check a configuration directory, or only some domains."""
+        self.checked.append(config_dir)
+        self.domains = domains
+        problems = [
+            {"severity": self.severity, "domain": domain, "message": self.message}
+            for domain in (domains or ["light"])
+            if self.message
+        ]
+        errors = [p for p in problems if p["severity"] == "error"]
+        return {"returncode": len(errors), "domains": domains, "problems": problems}
+
+
+class TestCheckConfigWorker(unittest.TestCase):
+    """Test the worker protocol and the client restarting it."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.temp_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.config_dir = self.temp_dir / "config"
+        self.config_dir.mkdir()
+        self.socket_path = self.temp_dir / "worker.sock"
+
+    def start_worker(self, check, version="2025.1.0"):
+        """Serve a worker on the socket in a thread."""
+        worker = CheckConfigWorker(check, version)
+        server = WorkerServer(self.socket_path, worker)
+
+        def serve():
+            server.serve_until_idle()
+            server.server_close()
+
+        thread = threading.Thread(target=serve, daemon=True)
+        thread.start()
+        self.addCleanup(thread.join)
+        self.addCleanup(worker.stopping.set)
+        return worker
+
+    def test_check_and_status(self):
+        """Test checking a configuration and querying the worker."""
+        check = FakeCheck("Invalid config for 'light'", "warning")
+        self.start_worker(check)
+        client = CheckConfigClient(self.socket_path)
+
+        with mock.patch.object(
+            ha_check_worker, "installed_ha_version", return_value="2025.1.0"
+        ):
+            result = client.check(self.config_dir)
+            client.check(self.config_dir)
+
+        self.assertEqual(result["returncode"], 0)
+        self.assertEqual(result["problems"][0]["message"], "Invalid config for 'light'")
+        self.assertEqual(check.checked, [str(self.config_dir.resolve())] * 2)
+        status = client.status()
+        self.assertEqual((status["version"], status["checks"]), ("2025.1.0", 2))
+
+        response = client.request({"command": "check", "config_dir": "/missing"})
+        self.assertFalse(response["ok"])
+        self.assertFalse(client.request({"command": "bogus"})["ok"])
+
+    def test_restarted_for_new_version(self):
+        """Test that a worker for another Home Assistant version is replaced."""
+        old_check = FakeCheck()
+        new_check = FakeCheck()
+        old_worker = self.start_worker(old_check, "2024.12.0")
+
+        def spawn():
+            self.start_worker(new_check)
+
+        client = CheckConfigClient(self.socket_path)
+        with (
+            mock.patch.object(
+                ha_check_worker, "installed_ha_version", return_value="2025.1.0"
+            ),
+            mock.patch.object(client, "_spawn", spawn),
+        ):
+            client.check(self.config_dir)
+
+        self.assertTrue(old_worker.stopping.is_set())
+        self.assertEqual(old_check.checked, [])
+        self.assertEqual(len(new_check.checked), 1)
+
+    def test_validator_uses_worker(self):
+        """Test that the official validator reports the worker's problems."""
+        (self.config_dir / "configuration.yaml").write_text("homeassistant:\n")
+        self.start_worker(FakeCheck("Invalid config for 'light'"))
+
+        validator = HAOfficialValidator(str(self.config_dir), self.socket_path)
+        with mock.patch.object(
+            ha_check_worker, "installed_ha_version", return_value="2025.1.0"
+        ):
+            self.assertFalse(validator.validate_all())
+        self.assertEqual(validator.errors, ["HA Check: Invalid config for 'light'"])
+
+    def test_scoped_check(self):
+        """Test that changed files limit the check to their domains."""
+        (self.config_dir / "configuration.yaml").write_text(
+            "homeassistant:\n"
+            "automation: !include automations.yaml\n"
+            "script: !include scripts.yaml\n"
+        )
+        automations = self.config_dir / "automations.yaml"
+        automations.write_text("[]\n")
+        (self.config_dir / "scripts.yaml").write_text("{}\n")
+        (self.config_dir / "ui.yaml").write_text("views: []\n")
+        check = FakeCheck("Invalid config for 'automation'")
+        self.start_worker(check)
+
+        validator = HAOfficialValidator(str(self.config_dir), self.socket_path)
+        with mock.patch.object(
+            ha_check_worker, "installed_ha_version", return_value="2025.1.0"
+        ):
+            self.assertFalse(validator.validate_all([automations]))
+            self.assertTrue(validator.validate_all([self.config_dir / "ui.yaml"]))
+
+        self.assertEqual(check.domains, ["automation"])
+        self.assertEqual(len(check.checked), 1)
+        self.assertEqual(
+            validator.errors, ["HA Check: Invalid config for 'automation'"]
+        )
+        self.assertEqual(validator.errors[0].path, "automation")
+
+    def test_truncated_response(self):
+        """Test that a response cut short is a worker error."""
+        listener = socket.socket(socket.AF_UNIX, socket.SOCK_STREAM)
+        self.addCleanup(listener.close)
+        listener.bind(str(self.socket_path))
+        listener.listen(1)
+
+        def answer():
+            connection, _address = listener.accept()
+            with connection:
+                connection.recv(4096)
+                connection.sendall(b'{"returncode": 0, "prob')
+
+        thread = threading.Thread(target=answer, daemon=True)
+        thread.start()
+        self.addCleanup(thread.join)
+
+        with self.assertRaises(WorkerError):
+            CheckConfigClient(self.socket_path).request({"command": "status"})
+
+    def test_missing_home_assistant(self):
+        """Test that no worker is started without Home Assistant."""
+        client = CheckConfigClient(self.socket_path)
+        with (
+            mock.patch.object(
+                ha_check_worker, "installed_ha_version", return_value=None
+            ),
+            mock.patch.object(client, "_spawn") as spawn,
+        ):
+            with self.assertRaises(WorkerError):
+                client.check(self.config_dir)
+        spawn.assert_not_called()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,123 @@
+#!/usr/bin/env python3
+"""Unit tests for the Home Assistant REST client."""
+
+import json
+import threading
+import time
+import unittest
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+import requests
+
+from tools.ha_client import HAClient
+
+# Seconds every /slow/ request takes
+SLOW = 0.3
+
+
+class StubHandler(BaseHTTPRequestHandler):
+    """Answers like Home Assistant, slowly or flakily on some paths."""
+
+    protocol_version = "HTTP/1.1"
+
+    def do_GET(self):
+        """Answer a GET request."""
+        server = self.server
+        with server.lock:
+            server.connections.add(self.client_address)
+            server.hits[self.path] = server.hits.get(self.path, 0) + 1
+            hits = server.hits[self.path]
+
+        if self.headers.get("Authorization") != "Bearer secret":
+            self.respond(401, {"message": "Unauthorized"})
+        elif self.path.startswith("/slow/"):
+            time.sleep(SLOW)
+            self.respond(200, {"path": self.path})
+        elif self.path == "/flaky" and hits <= 2:
+            self.respond(503, {"message": "Starting"})
+        else:
+            self.respond(200, {"path": self.path})
+
+    def do_POST(self):
+        """Fail every service call."""
+        with self.server.lock:
+            self.server.hits[self.path] = self.server.hits.get(self.path, 0) + 1
+        self.respond(503, {"message": "Starting"})
+
+    def respond(self, status: int, body):
+        """Send a JSON response, keeping the connection open."""
+        data = json.dumps(body).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(data)))
+        self.end_headers()
+        self.wfile.write(data)
+
+    def log_message(self, format, *args):
+        """Keep the test output quiet."""
+
+
+class TestHAClient(unittest.TestCase):
+    """Test the client against a local stub server."""
+
+    def setUp(self):
+        """Start the stub server."""
+        self.server = ThreadingHTTPServer(("127.0.0.1", 0), StubHandler)
+        self.server.daemon_threads = True
+        self.server.lock = threading.Lock()
+        self.server.connections = set()
+        self.server.hits = {}
+        thread = threading.Thread(
+            target=self.server.serve_forever, args=(0.05,), daemon=True
+        )
+        thread.start()
+        self.addCleanup(self.server.server_close)
+        self.addCleanup(self.server.shutdown)
+
+        host, port = self.server.server_address
+        self.client = HAClient(f"http://{host}:{port}/", "secret", backoff=0.01)
+        self.addCleanup(self.client.close)
+
+    def test_connection_reused(self):
+        """Test that consecutive requests keep one connection alive."""
+        for _ in range(3):
+            self.assertEqual(self.client.get("/api/").json(), {"path": "/api/"})
+        self.assertEqual(len(self.server.connections), 1)
+
+    def test_get_all_concurrent(self):
+        """Test that endpoints are fetched at once and returned in order."""
+        paths = [f"/slow/{i}" for i in range(6)]
+
+        start = time.perf_counter()
+        responses = self.client.get_all(paths)
+        elapsed = time.perf_counter() - start
+
+        self.assertEqual([r.json()["path"] for r in responses], paths)
+        self.assertLess(elapsed, SLOW * 3)
+
+    def test_get_all_failure(self):
+        """Test that a failed request is returned with the others."""
+        client = HAClient("http://127.0.0.1:1", "secret", retries=0)
+        self.addCleanup(client.close)
+        responses = client.get_all(["/api/", "/api/states"])
+        self.assertTrue(all(isinstance(r, requests.ConnectionError) for r in responses))
+
+    def test_retry(self):
+        """Test that unavailable responses are retried with backoff."""
+        self.assertEqual(self.client.get("/flaky").status_code, 200)
+        self.assertEqual(self.server.hits["/flaky"], 3)
+
+        # Service calls aren't idempotent, so they're sent once
+        self.assertEqual(self.client.post("/api/services/x/y").status_code, 503)
+        self.assertEqual(self.server.hits["/api/services/x/y"], 1)
+
+    def test_authorization(self):
+        """Test that requests carry the token."""
+        client = HAClient(self.client.url, "wrong")
+        self.addCleanup(client.close)
+        self.assertEqual(client.get("/api/").status_code, 401)
+        self.assertEqual(self.client.get("/api/").status_code, 200)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,234 @@
+#!/usr/bin/env python3
+"""Unit tests for the Home Assistant WebSocket client."""
+
+import asyncio
+import json
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from tools.entity_explorer import load_registries
+from tools.ha_websocket import (
+    OP_CLOSE,
+    OP_CONTINUATION,
+    OP_PING,
+    OP_PONG,
+    OP_TEXT,
+    AuthenticationError,
+    CommandError,
+    HAWebSocketClient,
+    accept_key,
+    encode_frame,
+    read_frame,
+    websocket_url,
+    write_storage,
+)
+
+RESULTS = {
+    "config/entity_registry/list": [
+        {"id": "abc", "entity_id": "sensor.outside", "platform": "met"},
+        {"id": "def", "entity_id": "light.kitchen", "area_id": "kitchen"},
+    ],
+    "config/device_registry/list": [
+        {"id": "dev1", "name": "Weather", "name_by_user": None, "area_id": None}
+    ],
+    "config/area_registry/list": [{"area_id": "kitchen", "name": "Kitchen"}],
+    "get_states": [
+        {
+            "entity_id": "sensor.outside",
+            "state": "12.5",
+            "attributes": {"device_class": "temperature", "unit_of_measurement": "°C"},
+        }
+    ],
+}
+
+
+class MockHomeAssistant:
+    """A WebSocket server answering like Home Assistant.
+
+    Commands are only answered once `pipeline` of them have arrived, in
+    reverse order and coalesced into one frame, so a client waiting for
+    each answer before sending the next command would hang.
+    """
+
+    def __init__(self, token: str = "secret", pipeline: int = 1):
+        """Accept the given token."""
+        self.token = token
+        self.pipeline = pipeline
+        self.commands: List[Dict[str, Any]] = []
+        self.server: Optional[asyncio.Server] = None
+
+    async def start(self) -> str:
+        """Start listening and return the instance's URL."""
+        server = await asyncio.start_server(self.handle, "127.0.0.1", 0)
+        self.server = server
+        host, port = server.sockets[0].getsockname()[:2]
+        return f"http://{host}:{port}"
+
+    async def stop(self):
+        """Stop listening."""
+        self.server.close()
+        await self.server.wait_closed()
+
+    async def handle(self, reader, writer):
+        """Serve one connection."""
+        request = await reader.readuntil(b"\r\n\r\n")
+        headers = dict(
+            line.split(": ", 1) for line in request.decode().split("\r\n")[1:] if line
+        )
+        writer.write(
+            (
+                "HTTP/1.1 101 Switching Protocols\r\n"
+                "Upgrade: websocket\r\nConnection: Upgrade\r\n"
+                f"Sec-WebSocket-Accept: {accept_key(headers['Sec-WebSocket-Key'])}"
+                "\r\n\r\n"
+            ).encode()
+        )
+        self.send(writer, {"type": "auth_required", "ha_version": "2025.1.0"})
+
+        pending = []
+        try:
+            while True:
+                _fin, opcode, payload = await read_frame(reader)
+                if opcode == OP_CLOSE:
+                    break
+                if opcode == OP_PONG:
+                    continue
+                message = json.loads(payload)
+                if message["type"] == "auth":
+                    if message["access_token"] != self.token:
+                        self.send(writer, {"type": "auth_invalid", "message": "Bad"})
+                        break
+                    self.send(writer, {"type": "auth_ok", "ha_version": "2025.1.0"})
+                    continue
+                self.commands.append(message)
+                pending.append(message)
+                if len(pending) == self.pipeline:
+                    self.answer(writer, pending[::-1])
+                    pending = []
+                await writer.drain()
+        finally:
+            writer.close()
+
+    def answer(self, writer, commands):
+        """Answer commands, after a ping and with the answers fragmented."""
+        writer.write(encode_frame(OP_PING, b"ping", masked=False))
+        results = []
+        for command in commands:
+            if command["type"] in RESULTS:
+                results.append(
+                    {
+                        "id": command["id"],
+                        "type": "result",
+                        "success": True,
+                        "result": RESULTS[command["type"]],
+                    }
+                )
+            else:
+                results.append(
+                    {
+                        "id": command["id"],
+                        "type": "result",
+                        "success": False,
+                        "error": {"code": "unknown_command", "message": "Unknown"},
+                    }
+                )
+        data = json.dumps(results).encode()
+        middle = len(data) // 2
+        writer.write(
+            bytes([OP_TEXT]) + encode_frame(OP_TEXT, data[:middle], masked=False)[1:]
+        )
+        writer.write(encode_frame(OP_CONTINUATION, data[middle:], masked=False))
+
+    def send(self, writer, message):
+        """Send one message."""
+        writer.write(encode_frame(OP_TEXT, json.dumps(message).encode(), masked=False))
+
+
+class TestHAWebSocketClient(unittest.IsolatedAsyncioTestCase):
+    """Test the client against a mock Home Assistant."""
+
+    async def start(self, **kwargs) -> str:
+        """Start a mock instance for the test."""
+        self.mock = MockHomeAssistant(**kwargs)
+        url = await self.mock.start()
+        self.addAsyncCleanup(self.mock.stop)
+        return url
+
+    def test_websocket_url(self):
+        """Test deriving the WebSocket URL from HA_URL."""
+        self.assertEqual(
+            websocket_url("http://homeassistant.local:8123/"),
+            "ws://homeassistant.local:8123/api/websocket",
+        )
+        self.assertEqual(
+            websocket_url("https://ha.example.com/api/websocket"),
+            "wss://ha.example.com/api/websocket",
+        )
+
+    async def test_fetch_registries_pipelined(self):
+        """Test that all registries are fetched in a single round trip."""
+        url = await self.start(pipeline=4)
+
+        async with HAWebSocketClient(url, "secret", timeout=5) as client:
+            registries = await client.fetch_registries()
+            self.assertEqual(client.ha_version, "2025.1.0")
+
+        self.assertEqual(
+            [command["type"] for command in self.mock.commands],
+            [
+                "config/entity_registry/list",
+                "config/device_registry/list",
+                "config/area_registry/list",
+                "get_states",
+            ],
+        )
+        self.assertEqual(len({command["id"] for command in self.mock.commands}), 4)
+        self.assertEqual(registries["entities"], RESULTS["config/entity_registry/list"])
+        self.assertEqual(registries["states"], RESULTS["get_states"])
+
+    async def test_invalid_token(self):
+        """Test that a rejected token raises AuthenticationError."""
+        url = await self.start()
+        with self.assertRaises(AuthenticationError):
+            async with HAWebSocketClient(url, "wrong", timeout=5):
+                pass
+
+    async def test_command_error(self):
+        """Test that a failed command raises CommandError."""
+        url = await self.start()
+        async with HAWebSocketClient(url, "secret", timeout=5) as client:
+            with self.assertRaises(CommandError) as context:
+                await client.command("bogus")
+            self.assertEqual(context.exception.code, "unknown_command")
+            self.assertEqual(
+                str(context.exception), "bogus failed: Unknown (unknown_command)"
+            )
+            # The connection stays usable
+            areas = await client.command("config/area_registry/list")
+        self.assertEqual(areas, RESULTS["config/area_registry/list"])
+
+    async def test_write_storage(self):
+        """Test that written registries load like copied .storage files."""
+        url = await self.start(pipeline=4)
+        async with HAWebSocketClient(url, "secret", timeout=5) as client:
+            registries = await client.fetch_registries()
+
+        config_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, config_dir)
+        write_storage(registries, config_dir / ".storage")
+
+        entities, area_names, device_names = load_registries(config_dir)
+        by_id = {entity["entity_id"]: entity for entity in entities}
+        self.assertEqual(
+            by_id["sensor.outside"]["original_device_class"], "temperature"
+        )
+        self.assertEqual(by_id["sensor.outside"]["unit_of_measurement"], "°C")
+        self.assertEqual(area_names, {"kitchen": "Kitchen"})
+        self.assertEqual(device_names, {"dev1": "Weather"})
+
+
+if __name__ == "__main__":
+    unittest.main()
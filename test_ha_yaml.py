@@ -0,0 +1,261 @@
+#!/usr/bin/env python3
+"""Unit tests for the shared YAML document cache."""
+
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+import yaml
+
+from tools.ha_yaml import (
+    DocumentCache,
+    HAYamlLoader,
+    IncludeResolver,
+    PureHAYamlLoader,
+    get_yaml_files,
+)
+from tools.reference_validator import ReferenceValidator
+from tools.yaml_validator import YAMLValidator
+
+
+class TestDocumentCache(unittest.TestCase):
+    """Test single-parse document caching."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.config_dir = Path(self.temp_dir)
+        self.cache = DocumentCache(HAYamlLoader)
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        shutil.rmtree(self.temp_dir)
+
+    def write(self, name: str, content: str) -> Path:
+        """Write a file into the temporary config directory."""
+        path = self.config_dir / name
+        with open(path, "w", encoding="utf-8") as f:
+            f.write(content)
+        return path
+
+    def test_file_parsed_once_across_validators(self):
+        """Test that all checks of all validators share one parse."""
+        self.write(
+            "automations.yaml",
+            "- alias: Test\n  triggers: []\n  actions:\n"
+            "    - action: light.turn_on\n      entity_id: light.kitchen\n",
+        )
+        self.write("configuration.yaml", "automation: !include automations.yaml\n")
+
+        yaml_validator = YAMLValidator(str(self.config_dir), self.cache)
+        reference_validator = ReferenceValidator(str(self.config_dir), self.cache)
+        yaml_validator.validate_all()
+        reference_validator.validate_all()
+
+        self.assertEqual(self.cache.reads, 2)
+        self.assertEqual(self.cache.parses, 2)
+
+    def test_identical_content_parsed_once(self):
+        """Test that files with identical content share a parse."""
+        first = self.write("a.yaml", "key: value\n")
+        second = self.write("b.yaml", "key: value\n")
+
+        self.assertEqual(self.cache.load(first), {"key": "value"})
+        self.assertEqual(self.cache.load(second), {"key": "value"})
+        self.assertEqual(self.cache.reads, 2)
+        self.assertEqual(self.cache.parses, 1)
+
+    def test_changed_file_is_reread(self):
+        """Test that a modified file is read and parsed again."""
+        path = self.write("a.yaml", "key: old\n")
+        self.assertEqual(self.cache.load(path), {"key": "old"})
+
+        self.write("a.yaml", "key: new value\n")
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 1_000_000))
+        self.assertEqual(self.cache.load(path), {"key": "new value"})
+
+    def test_saved_versions_are_not_kept(self):
+        """Test that repeatedly saving a file doesn't grow the cache."""
+        path = self.write("a.yaml", "key: 0\n")
+        self.write("b.yaml", "key: 0\n")
+        self.cache.load(self.config_dir / "b.yaml")
+        for version in range(30):
+            self.write("a.yaml", f"key: {version}\n")
+            stat = path.stat()
+            os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + version * 10**9))
+            self.assertEqual(self.cache.load(path), {"key": version})
+        self.assertEqual(len(self.cache._by_digest), 2)
+
+        # Content still used by another file keeps its parse
+        self.cache.invalidate(path)
+        self.assertEqual(len(self.cache._by_digest), 1)
+        self.cache.load(self.write("c.yaml", "key: 0\n"))
+        self.assertEqual(self.cache.parses, 30)
+
+    def test_errors_are_cached(self):
+        """Test that decode and syntax errors are kept with the document."""
+        bad_yaml = self.write("bad.yaml", "key: [unclosed\n")
+        bad_encoding = self.config_dir / "latin1.yaml"
+        bad_encoding.write_bytes("name: caf\xe9\n".encode("latin-1"))
+
+        self.assertFalse(self.cache.get(bad_yaml).ok)
+        self.assertIsInstance(self.cache.get(bad_encoding).error, UnicodeDecodeError)
+        with self.assertRaises(UnicodeDecodeError):
+            self.cache.load(bad_encoding)
+
+
+class TestHAYamlLoader(unittest.TestCase):
+    """Test the Home Assistant YAML loaders."""
+
+    def test_loaders_agree_on_ha_tags(self):
+        """Test that the libyaml and pure-Python loaders parse tags alike."""
+        content = (
+            "automation: !include automations.yaml\n"
+            "sensor: !include_dir_merge_list sensors\n"
+            "script: !include_dir_named scripts\n"
+            "scene: !include_dir_list scenes\n"
+            "group: !include_dir_merge_named groups\n"
+            "api_key: !secret api_key\n"
+            "target: !input target_light\n"
+        )
+
+        expected = {
+            "automation": "!include automations.yaml",
+            "sensor": "!include_dir_merge_list sensors",
+            "script": "!include_dir_named scripts",
+            "scene": "!include_dir_list scenes",
+            "group": "!include_dir_merge_named groups",
+            "api_key": "!secret api_key",
+            "target": "!input target_light",
+        }
+        self.assertEqual(yaml.load(content, Loader=HAYamlLoader), expected)
+        self.assertEqual(yaml.load(content, Loader=PureHAYamlLoader), expected)
+
+    def test_positions_recorded(self):
+        """Test that both loaders record where each value starts."""
+        content = "light:\n  - platform: group\n    entities: [light.a, light.b]\n"
+        for loader_class in (HAYamlLoader, PureHAYamlLoader):
+            loader = loader_class(content)
+            try:
+                data = loader.get_single_data()
+            finally:
+                loader.dispose()
+            entities = data["light"][0]["entities"]
+            positions = loader.positions
+
+            self.assertEqual(positions.get(data, "light"), (2, 3))
+            self.assertEqual(positions.get(data["light"][0], "entities"), (3, 15))
+            self.assertEqual(positions.get(entities, 1), (3, 25))
+            self.assertIsNone(positions.get(entities, 2))
+            self.assertIsNone(positions.get({}, "light"))
+
+    def test_position_column_clamped(self):
+        """Test that a huge column can't spill into the packed line."""
+        loader = HAYamlLoader("a: 1\nb: " + " " * (1 << 20) + "2\n")
+        try:
+            data = loader.get_single_data()
+        finally:
+            loader.dispose()
+        line, column = loader.positions.get(data, "b")
+        self.assertEqual(line, 2)
+        self.assertEqual(column, 1 << 20)
+
+    def test_get_yaml_files_top_level_only(self):
+        """Test that file discovery skips subdirectories like blueprints/."""
+        temp_dir = Path(tempfile.mkdtemp())
+        self.addCleanup(shutil.rmtree, temp_dir)
+        (temp_dir / "configuration.yaml").write_text("homeassistant:\n")
+        (temp_dir / "scripts.yml").write_text("{}\n")
+        (temp_dir / "blueprints").mkdir()
+        (temp_dir / "blueprints" / "motion.yaml").write_text("blueprint:\n")
+
+        self.assertEqual(
+            sorted(path.name for path in get_yaml_files(temp_dir)),
+            ["configuration.yaml", "scripts.yml"],
+        )
+
+
+class TestIncludeResolver(unittest.TestCase):
+    """Test include resolution and the include graph."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.config_dir = Path(self.temp_dir)
+        self.cache = DocumentCache()
+        self.resolver = IncludeResolver(self.config_dir, self.cache)
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        shutil.rmtree(self.temp_dir)
+
+    def write(self, name: str, content: str) -> Path:
+        """Write a file below the temporary config directory."""
+        path = self.config_dir / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content, encoding="utf-8")
+        return path
+
+    def test_resolves_nested_and_directory_includes(self):
+        """Test that every include form is replaced by file content."""
+        config = self.write(
+            "configuration.yaml",
+            "homeassistant:\n"
+            "  packages: !include_dir_named packages\n"
+            "automation: !include automations.yaml\n"
+            "sensor: !include_dir_merge_list sensors\n"
+            "api_key: !secret api_key\n",
+        )
+        self.write("automations.yaml", "- alias: A\n- !include extra.yaml\n")
+        self.write("extra.yaml", "alias: B\n")
+        self.write("packages/heating.yaml", "input_boolean:\n  boost:\n")
+        self.write("packages/lights/hall.yaml", "light: []\n")
+        self.write("sensors/a.yaml", "- platform: a\n")
+        self.write("sensors/b.yaml", "- platform: b\n")
+        self.write("sensors/secrets.yaml", "- platform: secret\n")
+
+        self.assertEqual(
+            self.resolver.resolve(config),
+            {
+                "homeassistant": {
+                    "packages": {
+                        "heating": {"input_boolean": {"boost": None}},
+                        "hall": {"light": []},
+                    }
+                },
+                "automation": [{"alias": "A"}, {"alias": "B"}],
+                "sensor": [{"platform": "a"}, {"platform": "b"}],
+                "api_key": "!secret api_key",
+            },
+        )
+        self.assertEqual(self.resolver.errors, [])
+
+        closure = self.resolver.include_closure([config])
+        self.assertEqual(len(closure), 7)
+        self.assertEqual(self.cache.reads, 7)
+
+    def test_cycles_and_missing_files_are_reported(self):
+        """Test that cycles and missing targets are left as placeholders."""
+        config = self.write(
+            "configuration.yaml",
+            "a: !include a.yaml\nmissing: !include missing.yaml\n",
+        )
+        self.write("a.yaml", "b: !include b.yaml\n")
+        self.write("b.yaml", "a: !include a.yaml\n")
+
+        resolved = self.resolver.resolve(config)
+
+        self.assertEqual(resolved["a"], {"b": {"a": "!include a.yaml"}})
+        self.assertEqual(resolved["missing"], "!include missing.yaml")
+        self.assertEqual(len(self.resolver.errors), 2)
+        self.assertEqual(
+            [path.name for path in self.resolver.include_closure([config])],
+            ["configuration.yaml", "a.yaml", "b.yaml"],
+        )
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -1,6 +1,7 @@
 #!/usr/bin/env python3
 """Unit tests for reference_validator.py UUID support."""
 
+import io
 import json
 import shutil
 import tempfile
@@ -10,6 +11,8 @@ from pathlib import Path
 import yaml
 
 from tools.reference_validator import ReferenceValidator
+from tools.registry import EntityRecord, iter_json_array
+from tools.validation_cache import ValidationCache
 
 
 class TestReferenceValidatorUUID(unittest.TestCase):
@@ -267,6 +270,84 @@ class TestReferenceValidatorUUID(unittest.TestCase):
             any("disabled entity" in warning for warning in self.validator.warnings)
         )
 
+    def test_validate_disabled_entity_reference(self):
+        """Test that referencing a disabled entity by entity_id warns."""
+        test_file = self.config_dir / "test_automation.yaml"
+        with open(test_file, "w") as f:
+            yaml.dump([{"triggers": [{"entity_id": "sensor.disabled_sensor"}]}], f)
+
+        result = self.validator.validate_file_references(test_file)
+        self.assertTrue(result)
+        self.assertEqual(len(self.validator.errors), 0)
+        self.assertTrue(
+            any(
+                "disabled entity 'sensor.disabled_sensor'" in warning
+                for warning in self.validator.warnings
+            )
+        )
+
+    def test_registry_index(self):
+        """Test the precomputed entity registry index."""
+        index = self.validator.get_registry_index()
+
+        self.assertIs(index, self.validator.get_registry_index())
+        self.assertIn("sensor.normal_sensor", index)
+        self.assertNotIn("sensor.unknown", index)
+        self.assertEqual(index.disabled, {"sensor.disabled_sensor"})
+        self.assertEqual(
+            index.resolve_registry_id("aabbccddeeff00112233445566778899"),
+            "sensor.normal_sensor",
+        )
+        self.assertEqual(
+            sorted(index.by_domain["sensor"]),
+            ["sensor.complex", "sensor.disabled_sensor", "sensor.normal_sensor"],
+        )
+
+    def test_streaming_registry_loader(self):
+        """Test that registries load into compact records."""
+        entities = self.validator.load_entity_registry()
+
+        record = entities["binary_sensor.test_motion_battery"]
+        self.assertIsInstance(record, EntityRecord)
+        self.assertFalse(hasattr(record, "__dict__"))
+        self.assertEqual(record["device_id"], "0c086f69ee6b3fa8411af7194876cbd7")
+        self.assertIsNone(record.get("area_id"))
+        self.assertNotIn("unique_id", record)
+        self.assertEqual(
+            self.validator.load_area_registry()["living_room"]["name"], "Living Room"
+        )
+
+    def test_iter_json_array_across_chunks(self):
+        """Test streaming array items regardless of where chunks end."""
+        document = {
+            "version": 1,
+            "data": {
+                "deleted_entities": [{"entity_id": 'x.y"]}', "n": [1.5, {"a": []}]}],
+                "entities": self.entity_registry_data["data"]["entities"],
+            },
+        }
+        text = json.dumps(document)
+        for chunk_size in (1, 3, 16, 4096):
+            self.assertEqual(
+                list(
+                    iter_json_array(io.StringIO(text), ("data", "entities"), chunk_size)
+                ),
+                document["data"]["entities"],
+            )
+        self.assertEqual(list(iter_json_array(io.StringIO(text), ("data", "x"))), [])
+        with self.assertRaises(ValueError):
+            list(iter_json_array(io.StringIO(text[:-40]), ("data", "entities"), 16))
+
+    def test_invalid_registry_reported(self):
+        """Test that a malformed registry file is reported as an error."""
+        with open(self.storage_dir / "core.entity_registry", "w") as f:
+            f.write('{"data": {"entities": [{"entity_id": "light.a",}]}}')
+
+        self.assertEqual(self.validator.load_entity_registry(), {})
+        self.assertTrue(
+            self.validator.errors[0].startswith("Failed to load entity registry")
+        )
+
     def test_validate_mixed_entity_formats(self):
         """Test validation with both normal entity IDs and registry UUIDs."""
         automation_data = [
@@ -315,6 +396,86 @@ class TestReferenceValidatorUUID(unittest.TestCase):
         expected_refs = {"sensor.normal_entity", "binary_sensor.another_sensor"}
         self.assertEqual(entity_refs, expected_refs)
 
+    def test_collect_references_single_pass(self):
+        """Test that all reference kinds and their paths are collected."""
+        config_data = [
+            {
+                "triggers": [
+                    {
+                        "device_id": "0c086f69ee6b3fa8411af7194876cbd7",
+                        "entity_id": "88a52f17bf43cb276836f06ac5c07444",
+                    }
+                ],
+                "actions": [
+                    {
+                        "target": {
+                            "entity_id": "light.kitchen",
+                            "area_id": ["living_room"],
+                        },
+                        "data": {"message": "{{ states('sensor.temp') }}"},
+                    }
+                ],
+            }
+        ]
+
+        references = self.validator.collect_references(config_data).to_dict()
+
+        self.assertEqual(
+            references["entities"],
+            {
+                "light.kitchen": ["[0].actions[0].target.entity_id"],
+                "sensor.temp": ["[0].actions[0].data.message"],
+            },
+        )
+        self.assertEqual(
+            references["devices"],
+            {"0c086f69ee6b3fa8411af7194876cbd7": ["[0].triggers[0].device_id"]},
+        )
+        self.assertEqual(
+            references["areas"],
+            {"living_room": ["[0].actions[0].target.area_id"]},
+        )
+        self.assertEqual(
+            references["registry_ids"],
+            {"88a52f17bf43cb276836f06ac5c07444": ["[0].triggers[0].entity_id"]},
+        )
+
+    def test_findings_report_line_and_column(self):
+        """Test that findings locate references in the file, even when cached."""
+        test_file = self.config_dir / "automations.yaml"
+        test_file.write_text(
+            "- triggers: []\n"
+            "  actions:\n"
+            "    - action: light.turn_on\n"
+            "      target:\n"
+            "        entity_id:\n"
+            "          - sensor.normal_sensor\n"
+            "          - light.missing\n"
+            "        device_id: missing_device\n"
+        )
+        cache = ValidationCache(Path(self.temp_dir) / "cache")
+
+        for _ in range(2):
+            validator = ReferenceValidator(str(self.config_dir), validation_cache=cache)
+            self.assertFalse(validator.validate_file_references(test_file))
+            entity, device = validator.errors
+            self.assertEqual((entity.line, entity.column), (7, 13))
+            self.assertEqual((device.line, device.column), (8, 20))
+            self.assertIn(
+                "Unknown entity 'light.missing' at "
+                "[0].actions[0].target.entity_id (line 7)",
+                entity,
+            )
+
+    def test_collect_references_deeply_nested(self):
+        """Test that nesting deeper than the recursion limit is handled."""
+        config_data: dict = {"entity_id": "sensor.deep"}
+        for _ in range(5000):
+            config_data = {"choose": [config_data]}
+
+        entity_refs = self.validator.extract_entity_references(config_data)
+        self.assertEqual(entity_refs, {"sensor.deep"})
+
     def test_is_template(self):
         """Test template detection."""
         # Valid template expressions
@@ -380,6 +541,53 @@ class TestReferenceValidatorUUID(unittest.TestCase):
             self.validator.should_skip_entity_validation("light.living_room")
         )
 
+    def test_extract_entities_from_template(self):
+        """Test that all template reference forms are recognized."""
+        template = (
+            "{{ states('sensor.a') }} {{ states(\"sensor.b\", rounded=True) }}"
+            " {{ states.sensor.c.state }} {{ is_state('light.d', 'on') }}"
+            " {{ state_attr(\"light.e\", 'brightness') }}"
+            " {{ is_state_attr('climate.f', 'hvac_action', 'heating') }}"
+            " {{ has_value('sensor.g') }} {{ expand('group.h') }}"
+            " {{ states('not_an_entity') }} {{ hass.states.get('x') }}"
+        )
+
+        self.assertEqual(
+            self.validator.extract_entities_from_template(template),
+            {
+                "sensor.a",
+                "sensor.b",
+                "sensor.c",
+                "light.d",
+                "light.e",
+                "climate.f",
+                "sensor.g",
+                "group.h",
+            },
+        )
+
+    def test_template_area_references(self):
+        """Test that template area lookups accept area IDs and names."""
+        references = self.validator.collect_references(
+            {
+                "value_template": (
+                    "{{ area_entities('living_room') | count }}"
+                    " {{ area_devices('Living Room') }} {{ area_entities('attic') }}"
+                )
+            }
+        ).to_dict()
+
+        self.assertEqual(
+            set(references["template_areas"]), {"living_room", "Living Room", "attic"}
+        )
+        self.assertTrue(
+            self.validator.check_file_references(Path("test.yaml"), references)
+        )
+        self.assertEqual(
+            [w for w in self.validator.warnings if "Unknown area" in w],
+            ["test.yaml: Unknown area 'attic' at value_template"],
+        )
+
     def test_extract_entity_references_with_templates(self):
         """Test entity reference extraction skips templates."""
         config_data = {
@@ -464,6 +672,38 @@ class TestReferenceValidatorUUID(unittest.TestCase):
         self.assertTrue(result)
         self.assertEqual(len(self.validator.errors), 0)
 
+    def test_validate_all_follows_packages(self):
+        """Test that included package files are validated and define entities."""
+        packages_dir = self.config_dir / "packages"
+        packages_dir.mkdir()
+        (self.config_dir / "configuration.yaml").write_text(
+            "homeassistant:\n  packages: !include_dir_named packages\n"
+        )
+        (packages_dir / "heating.yaml").write_text(
+            "input_boolean:\n"
+            "  heating_override:\n"
+            "automation:\n"
+            "  - alias: Heating\n"
+            "    triggers:\n"
+            "      - trigger: state\n"
+            "        entity_id: input_boolean.heating_override\n"
+            "    actions:\n"
+            "      - action: climate.turn_on\n"
+            "        entity_id: climate.missing\n"
+        )
+
+        self.assertFalse(self.validator.validate_all())
+        self.assertIn(
+            "input_boolean.heating_override", self.validator.load_yaml_entities()
+        )
+        self.assertEqual(
+            [error for error in self.validator.errors if "Unknown entity" in error],
+            [
+                f"{packages_dir / 'heating.yaml'}: Unknown entity 'climate.missing' "
+                "at automation[0].actions[0].entity_id (line 10)"
+            ],
+        )
+
 
 if __name__ == "__main__":
     unittest.main()
@@ -0,0 +1,141 @@
+#!/usr/bin/env python3
+"""Unit tests for the memory-mapped registry snapshot."""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from tools.reference_validator import ReferenceValidator
+from tools.registry import EntityRecord, RegistryIndex, load_registry
+from tools.registry_snapshot import SNAPSHOT_NAME, SnapshotTable, load_snapshot
+from tools.validation_cache import ValidationCache
+
+
+class TestRegistrySnapshot(unittest.TestCase):
+    """Test compiling and reading registry snapshots."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.config_dir = Path(self.temp_dir) / "config"
+        self.storage_dir = self.config_dir / ".storage"
+        self.storage_dir.mkdir(parents=True)
+        self.cache_dir = Path(self.temp_dir) / "cache"
+        self.snapshot_path = self.cache_dir / SNAPSHOT_NAME
+
+        self.entities = [
+            {
+                "entity_id": "light.kitchen",
+                "id": "a" * 32,
+                "platform": "hue",
+                "area_id": "kitchen",
+                "original_name": "Köket",
+                "options": {"light": {}},
+            },
+            {
+                "entity_id": "sensor.outdoor",
+                "id": "b" * 32,
+                "platform": "hue",
+                "disabled_by": "user",
+                "unit_of_measurement": "°C",
+            },
+        ]
+        self.write("core.entity_registry", "entities", self.entities)
+        self.write("core.device_registry", "devices", [{"id": "d1", "name": "Hub"}])
+        self.write("core.area_registry", "areas", [{"id": "kitchen", "name": "Kök"}])
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        shutil.rmtree(self.temp_dir)
+
+    def write(self, name: str, collection: str, entries):
+        """Write a registry file with a fresh mtime."""
+        path = self.storage_dir / name
+        with open(path, "w", encoding="utf-8") as f:
+            json.dump({"data": {collection: entries, "deleted_" + collection: []}}, f)
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    def test_snapshot_matches_registries(self):
+        """Test that the snapshot holds the same records as the JSON files."""
+        snapshot = load_snapshot(self.storage_dir, self.cache_dir)
+        self.addCleanup(snapshot.close)
+        expected = load_registry(
+            self.storage_dir / "core.entity_registry",
+            "entities",
+            EntityRecord,
+            key="entity_id",
+        )
+
+        self.assertEqual(dict(snapshot.entities), expected)
+        self.assertEqual(snapshot.entities.records(), list(expected.values()))
+        self.assertIsNone(snapshot.entities["light.kitchen"]["disabled_by"])
+        self.assertEqual(snapshot.areas["kitchen"]["name"], "Kök")
+        self.assertIn("d1", snapshot.devices)
+        self.assertNotIn("d2", snapshot.devices)
+
+        index = snapshot.registry_index()
+        expected_index = RegistryIndex(expected.values())
+        self.assertEqual(index.disabled, expected_index.disabled)
+        self.assertEqual(index.registry_ids, expected_index.registry_ids)
+        self.assertEqual(index.by_domain, expected_index.by_domain)
+
+    def test_snapshot_rebuilt_when_registry_changes(self):
+        """Test that the snapshot is reused until a registry file changes."""
+        load_snapshot(self.storage_dir, self.cache_dir).close()
+        built = self.snapshot_path.stat().st_ino
+
+        snapshot = load_snapshot(self.storage_dir, self.cache_dir)
+        self.assertEqual(self.snapshot_path.stat().st_ino, built)
+        snapshot.close()
+
+        self.write("core.device_registry", "devices", [{"id": "d2"}])
+        snapshot = load_snapshot(self.storage_dir, self.cache_dir)
+        self.addCleanup(snapshot.close)
+        self.assertEqual(list(snapshot.devices), ["d2"])
+
+    def test_missing_and_invalid_registries(self):
+        """Test missing registries as empty tables and invalid ones as None."""
+        (self.storage_dir / "core.area_registry").unlink()
+        snapshot = load_snapshot(self.storage_dir, self.cache_dir)
+        self.assertEqual(len(snapshot.areas), 0)
+        snapshot.close()
+
+        (self.storage_dir / "core.entity_registry").write_text('{"data": {')
+        self.assertIsNone(load_snapshot(self.storage_dir, self.cache_dir))
+
+    def test_corrupt_snapshot_rebuilt(self):
+        """Test that a damaged snapshot file is replaced."""
+        self.cache_dir.mkdir()
+        self.snapshot_path.write_bytes(b"HAREGSNP\x01")
+
+        snapshot = load_snapshot(self.storage_dir, self.cache_dir)
+        self.addCleanup(snapshot.close)
+        self.assertEqual(len(snapshot.entities), 2)
+
+    def test_reference_validator_uses_snapshot(self):
+        """Test that the reference validator reads registries via the snapshot."""
+        automations = self.config_dir / "automations.yaml"
+        automations.write_text(
+            "- triggers: []\n"
+            "  actions:\n"
+            "    - action: light.turn_on\n"
+            "      entity_id: [light.kitchen, sensor.outdoor, light.missing]\n"
+        )
+        validator = ReferenceValidator(
+            str(self.config_dir), validation_cache=ValidationCache(self.cache_dir)
+        )
+
+        self.assertFalse(validator.validate_all())
+        self.assertIsInstance(validator.load_entity_registry(), SnapshotTable)
+        self.assertTrue(self.snapshot_path.exists())
+        self.assertEqual(len(validator.errors), 1)
+        self.assertIn("light.missing", validator.errors[0])
+        self.assertIn("disabled entity 'sensor.outdoor'", validator.warnings[0])
+
+
+if __name__ == "__main__":
+    unittest.main()
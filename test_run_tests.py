@@ -0,0 +1,305 @@
+#!/usr/bin/env python3
+"""Unit tests for the validation test runner."""
+
+import io
+import json
+import os
+import shutil
+import subprocess
+import tempfile
+import unittest
+from contextlib import redirect_stdout
+from pathlib import Path
+from unittest import mock
+
+from tools.change_set import affected_domains
+from tools.ha_official_validator import HAOfficialValidator
+from tools.ha_yaml import IncludeResolver
+from tools.run_tests import ValidationTestRunner
+from tools.validation_cache import ValidationCache
+from tools.yaml_validator import YAMLValidator
+
+
+class TestValidationTestRunner(unittest.TestCase):
+    """Test in-process, scheduled validator execution."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.config_dir = Path(self.temp_dir)
+        # Home Assistant's own check passes unless a test says otherwise
+        patcher = mock.patch.object(
+            HAOfficialValidator, "run_ha_check_config", return_value=True
+        )
+        self.ha_check = patcher.start()
+        self.addCleanup(patcher.stop)
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        shutil.rmtree(self.temp_dir)
+
+    def write_registries(self):
+        """Write empty entity and device registries."""
+        storage_dir = self.config_dir / ".storage"
+        storage_dir.mkdir()
+        with open(storage_dir / "core.entity_registry", "w") as f:
+            json.dump({"data": {"entities": []}}, f)
+        with open(storage_dir / "core.device_registry", "w") as f:
+            json.dump({"data": {"devices": []}}, f)
+
+    def run_changed(self) -> ValidationTestRunner:
+        """Run the suite in --changed mode, caching below the temp dir."""
+        runner = ValidationTestRunner(
+            str(self.config_dir),
+            cache_dir=str(Path(self.temp_dir) / "cache"),
+            changed=True,
+        )
+        with redirect_stdout(io.StringIO()):
+            runner.run_all_tests()
+        return runner
+
+    def test_syntax_failure_skips_dependent_stages(self):
+        """Test that stages depending on YAML syntax are not run."""
+        (self.config_dir / "configuration.yaml").write_text("homeassistant: [\n")
+
+        runner = ValidationTestRunner(str(self.config_dir), use_cache=False)
+        with redirect_stdout(io.StringIO()):
+            passed = runner.run_all_tests()
+
+        self.assertFalse(passed)
+        self.assertFalse(runner.results["yaml_validator.py"]["passed"])
+        self.assertFalse(runner.results["yaml_validator.py"]["skipped"])
+        self.assertTrue(runner.results["reference_validator.py"]["skipped"])
+        self.assertTrue(runner.results["ha_official_validator.py"]["skipped"])
+
+    def test_in_process_stage_captures_report(self):
+        """Test that an in-process validator's report is captured."""
+        (self.config_dir / "configuration.yaml").write_text("homeassistant:\n")
+
+        runner = ValidationTestRunner(str(self.config_dir), use_cache=False)
+        passed, stdout, stderr, _duration = runner.run_validator(
+            "yaml_validator.py", "YAML Syntax Validation"
+        )
+
+        self.assertTrue(passed)
+        self.assertIn("YAML", stdout)
+        self.assertEqual(stderr, "")
+        self.assertEqual(runner.document_cache.parses, 1)
+
+    def test_changed_mode_validates_affected_files(self):
+        """Test that --changed validates changed files and their dependents."""
+        self.write_registries()
+        (self.config_dir / "configuration.yaml").write_text(
+            "homeassistant:\n  packages: !include_dir_named packages\n"
+        )
+        (self.config_dir / "packages").mkdir()
+        package = self.config_dir / "packages" / "heating.yaml"
+        package.write_text("input_boolean:\n  boost:\n")
+        (self.config_dir / "scripts.yaml").write_text(
+            "boost:\n  sequence:\n    - action: input_boolean.turn_on\n"
+            "      entity_id: input_boolean.boost\n"
+        )
+        (self.config_dir / "scenes.yaml").write_text("[]\n")
+
+        # Without a previous run everything is validated
+        self.assertIsNone(self.run_changed().files)
+        runner = self.run_changed()
+        self.assertEqual(runner.files, [])
+        # The official check decides for itself which integrations to check
+        self.assertIn(
+            "no integration configuration changed",
+            runner.results["ha_official_validator.py"]["stdout"],
+        )
+
+        # Renaming the helper affects the script that references it
+        package.write_text("input_boolean:\n  turbo:\n")
+        stat = package.stat()
+        os.utime(package, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        runner = self.run_changed()
+
+        self.assertEqual(
+            sorted(path.name for path in runner.files),
+            ["configuration.yaml", "heating.yaml", "scripts.yaml"],
+        )
+        self.assertFalse(runner.results["reference_validator.py"]["passed"])
+
+        # The failing script is validated again until it is fixed
+        self.assertEqual(
+            [path.name for path in self.run_changed().files], ["scripts.yaml"]
+        )
+
+    def test_changed_mode_after_standalone_validator(self):
+        """Test that a validator run on its own doesn't hide changes."""
+        self.write_registries()
+        (self.config_dir / "configuration.yaml").write_text(
+            "script: !include scripts.yaml\n"
+        )
+        scripts = self.config_dir / "scripts.yaml"
+        scripts.write_text("{}\n")
+        self.run_changed()
+        self.assertEqual(self.run_changed().files, [])
+
+        scripts.write_text(
+            "dim:\n  sequence:\n    - action: light.turn_on\n"
+            "      entity_id: light.nonexistent\n"
+        )
+        stat = scripts.stat()
+        os.utime(scripts, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        validator = YAMLValidator(
+            str(self.config_dir),
+            validation_cache=ValidationCache(Path(self.temp_dir) / "cache"),
+        )
+        with redirect_stdout(io.StringIO()):
+            self.assertTrue(validator.validate_all())
+        runner = self.run_changed()
+
+        self.assertEqual(
+            sorted(path.name for path in runner.files),
+            ["configuration.yaml", "scripts.yaml"],
+        )
+        self.assertFalse(runner.results["reference_validator.py"]["passed"])
+
+    def test_changed_mode_validates_commits_since_last_run(self):
+        """Test that changes committed after the last run are validated."""
+        self.write_registries()
+        (self.config_dir / "configuration.yaml").write_text("homeassistant:\n")
+        scripts = self.config_dir / "scripts.yaml"
+        scripts.write_text("{}\n")
+        (self.config_dir / ".gitignore").write_text("cache/\n")
+
+        def git(*args: str):
+            subprocess.run(
+                ["git", "-c", "user.name=Test", "-c", "user.email=test@example.com"]
+                + list(args),
+                cwd=self.config_dir,
+                check=True,
+                capture_output=True,
+            )
+
+        git("init", "-q")
+        git("add", ".")
+        git("commit", "-q", "-m", "Initial")
+        self.assertIsNone(self.run_changed().files)
+        self.assertEqual(self.run_changed().files, [])
+
+        # Committed without running the validators in between
+        scripts.write_text("boost:\n  sequence: []\n")
+        git("commit", "-q", "-am", "Add script")
+        self.assertEqual(
+            [path.name for path in self.run_changed().files], ["scripts.yaml"]
+        )
+        self.assertEqual(self.run_changed().files, [])
+
+    def test_changed_mode_after_official_check_failure(self):
+        """Test that a failed official check is followed by a full run."""
+        self.write_registries()
+        config_file = self.config_dir / "configuration.yaml"
+        config_file.write_text("homeassistant:\n")
+        self.assertIsNone(self.run_changed().files)
+        self.assertEqual(self.run_changed().files, [])
+
+        # Which files the problems are in isn't recorded
+        config_file.write_text("homeassistant:\n  name: Home\n")
+        self.ha_check.return_value = False
+        runner = self.run_changed()
+        self.assertEqual(runner.files, [config_file])
+        self.assertFalse(runner.results["ha_official_validator.py"]["passed"])
+        self.ha_check.return_value = True
+        self.assertIsNone(self.run_changed().files)
+        self.assertEqual(self.run_changed().files, [])
+
+    def test_isolated_official_check_gets_changed_files(self):
+        """Test that an isolated official check is scoped like in-process."""
+        runner = ValidationTestRunner(
+            str(self.config_dir),
+            cache_dir=str(Path(self.temp_dir) / "cache"),
+            isolated=True,
+            changed=True,
+        )
+        self.assertIsNotNone(runner.validation_cache)
+        runner.changed_files = [self.config_dir / "scripts.yaml"]
+
+        with mock.patch("subprocess.run") as run:
+            run.return_value = subprocess.CompletedProcess([], 0, "", "")
+            runner.run_validator("ha_official_validator.py", "Official check")
+
+        cmd = run.call_args.args[0]
+        self.assertEqual(
+            cmd[-2:], ["--changed-files", str(self.config_dir / "scripts.yaml")]
+        )
+
+        # Nothing changed still scopes the check, to nothing
+        runner.changed_files = []
+        with mock.patch("subprocess.run") as run:
+            run.return_value = subprocess.CompletedProcess([], 0, "", "")
+            runner.run_validator("ha_official_validator.py", "Official check")
+        self.assertEqual(run.call_args.args[0][-1], "--changed-files")
+
+
+class TestAffectedDomains(unittest.TestCase):
+    """Test mapping changed files to the integrations they configure."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.config_dir = Path(self.temp_dir)
+        self.addCleanup(shutil.rmtree, self.temp_dir)
+        self.write(
+            "configuration.yaml",
+            "homeassistant:\n"
+            "  customize: !include customize.yaml\n"
+            "  packages: !include_dir_named packages\n"
+            "automation: !include automations.yaml\n"
+            "automation manual: !include_dir_merge_list automations\n"
+            "template: !include templates.yaml\n"
+            "light:\n  - platform: group\n    entities: []\n",
+        )
+        for name in ("customize.yaml", "automations.yaml", "automations/night.yaml"):
+            self.write(name, "{}\n")
+        self.write("templates.yaml", "- sensor: !include template/sensors.yaml\n")
+        self.write("template/sensors.yaml", "[]\n")
+        self.write("packages/heating.yaml", "climate: []\ninput_boolean: {}\n")
+        self.write("blueprints/script/notify.yaml", "blueprint: {}\n")
+
+    def write(self, name: str, content: str):
+        """Write a file below the config directory."""
+        path = self.config_dir / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+
+    def domains(self, *names):
+        """Return the domains affected by changes to the named files."""
+        return affected_domains(
+            self.config_dir,
+            [self.config_dir / name for name in names],
+            IncludeResolver(self.config_dir),
+        )
+
+    def test_included_files(self):
+        """Test that files map to the keys that include them."""
+        self.assertEqual(self.domains("automations/night.yaml"), {"automation"})
+        self.assertEqual(self.domains("template/sensors.yaml"), {"template"})
+        self.assertEqual(self.domains("customize.yaml"), {"homeassistant"})
+        self.assertEqual(
+            self.domains("packages/heating.yaml", "blueprints/script/notify.yaml"),
+            {"climate", "input_boolean", "script"},
+        )
+
+    def test_unrelated_and_global_changes(self):
+        """Test files outside the configuration and changes affecting all."""
+        self.write("ui-lovelace.yaml", "views: []\n")
+        self.assertEqual(self.domains("ui-lovelace.yaml"), set())
+        self.assertIsNone(self.domains("configuration.yaml"))
+        self.assertIsNone(self.domains("secrets.yaml"))
+        self.assertIsNone(self.domains("custom_components/foo/sensor.py"))
+
+    def test_deleted_files(self):
+        """Test that deleting an included file affects every domain."""
+        (self.config_dir / "automations.yaml").unlink()
+        (self.config_dir / "packages" / "heating.yaml").unlink()
+        self.assertIsNone(self.domains("automations.yaml"))
+        self.assertIsNone(self.domains("packages/heating.yaml"))
+
+
+if __name__ == "__main__":
+    unittest.main()
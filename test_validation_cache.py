@@ -0,0 +1,102 @@
+#!/usr/bin/env python3
+"""Unit tests for the persistent validation cache."""
+
+import json
+import os
+import shutil
+import tempfile
+import unittest
+from pathlib import Path
+
+from tools.reference_validator import ReferenceValidator
+from tools.validation_cache import ValidationCache
+from tools.yaml_validator import YAMLValidator
+
+
+class TestValidationCache(unittest.TestCase):
+    """Test that unchanged files are skipped across runs."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.config_dir = Path(self.temp_dir) / "config"
+        self.storage_dir = self.config_dir / ".storage"
+        self.storage_dir.mkdir(parents=True)
+        self.cache_dir = Path(self.temp_dir) / "cache"
+
+        self.write_registry(["light.kitchen"])
+        with open(self.storage_dir / "core.device_registry", "w") as f:
+            json.dump({"data": {"devices": []}}, f)
+
+        self.automations = self.config_dir / "automations.yaml"
+        self.automations.write_text(
+            "- alias: Test\n"
+            "  triggers: []\n"
+            "  actions:\n"
+            "    - action: light.turn_on\n"
+            "      entity_id: light.kitchen\n"
+            "    - action: light.turn_on\n"
+            "      entity_id: light.missing\n"
+        )
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        shutil.rmtree(self.temp_dir)
+
+    def write_registry(self, entity_ids):
+        """Write an entity registry containing the given entity IDs."""
+        registry_file = self.storage_dir / "core.entity_registry"
+        entities = [
+            {"entity_id": entity_id, "id": f"{i:032x}", "disabled_by": None}
+            for i, entity_id in enumerate(entity_ids)
+        ]
+        with open(registry_file, "w") as f:
+            json.dump({"data": {"entities": entities}}, f)
+        # Make sure the registry fingerprint changes between writes
+        stat = registry_file.stat()
+        os.utime(registry_file, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+
+    def run_references(self) -> ReferenceValidator:
+        """Run reference validation with a fresh cache instance."""
+        validator = ReferenceValidator(
+            str(self.config_dir), validation_cache=ValidationCache(self.cache_dir)
+        )
+        validator.validate_all()
+        return validator
+
+    def test_unchanged_files_are_not_parsed(self):
+        """Test that a second run replays findings without parsing."""
+        first = self.run_references()
+        second = self.run_references()
+
+        self.assertEqual(first.errors, second.errors)
+        self.assertEqual(second.document_cache.parses, 0)
+        self.assertTrue(any("light.missing" in error for error in second.errors))
+
+    def test_registry_change_invalidates_findings(self):
+        """Test that findings are recomputed when the registry changes."""
+        self.run_references()
+        self.write_registry(["light.kitchen", "light.missing"])
+
+        validator = self.run_references()
+        self.assertEqual(validator.errors, [])
+        # References are reused, only the registry check is repeated
+        self.assertEqual(validator.document_cache.parses, 0)
+
+    def test_changed_file_is_revalidated(self):
+        """Test that editing a file invalidates its cached YAML findings."""
+        validator = YAMLValidator(
+            str(self.config_dir), validation_cache=ValidationCache(self.cache_dir)
+        )
+        self.assertTrue(validator.validate_all())
+
+        self.automations.write_text("- alias: Broken\n  triggers: [\n")
+        validator = YAMLValidator(
+            str(self.config_dir), validation_cache=ValidationCache(self.cache_dir)
+        )
+        self.assertFalse(validator.validate_all())
+        self.assertEqual(validator.document_cache.parses, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,198 @@
+#!/usr/bin/env python3
+"""Unit tests for the watch mode validator."""
+
+import json
+import os
+import shutil
+import socket
+import tempfile
+import threading
+import unittest
+from pathlib import Path
+from unittest import mock
+
+from tools.watch_validator import (
+    GLOBAL_KEY,
+    InotifyWatcher,
+    PollingWatcher,
+    WatchValidator,
+)
+
+
+class TestWatchValidator(unittest.TestCase):
+    """Test incremental revalidation with warm state."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.config_dir = Path(self.temp_dir)
+        storage_dir = self.config_dir / ".storage"
+        storage_dir.mkdir()
+        with open(storage_dir / "core.entity_registry", "w") as f:
+            json.dump(
+                {"data": {"entities": [{"entity_id": "light.kitchen", "id": "1"}]}}, f
+            )
+        with open(storage_dir / "core.device_registry", "w") as f:
+            json.dump({"data": {"devices": []}}, f)
+        with open(storage_dir / "core.area_registry", "w") as f:
+            json.dump({"data": {"areas": []}}, f)
+
+        self.configuration = self.write(
+            "configuration.yaml",
+            "homeassistant:\n  packages: !include_dir_named packages\n",
+        )
+        self.package = self.write("packages/helpers.yaml", "input_boolean:\n  boost:\n")
+        self.scripts = self.write(
+            "scripts.yaml",
+            "boost:\n  sequence:\n    - action: input_boolean.turn_on\n"
+            "      entity_id: input_boolean.boost\n",
+        )
+        self.watch = WatchValidator(str(self.config_dir))
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        shutil.rmtree(self.temp_dir)
+
+    def write(self, name: str, content: str) -> Path:
+        """Write a file below the config directory with a fresh mtime."""
+        path = self.config_dir / name
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_text(content)
+        stat = path.stat()
+        os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns + 10**9))
+        return path
+
+    def test_saved_file_is_revalidated(self):
+        """Test that only the saved file's diagnostics are recomputed."""
+        self.watch.validate_all()
+        self.assertEqual(self.watch.count("errors"), 0)
+        parses = self.watch.document_cache.parses
+
+        self.write(
+            "scripts.yaml",
+            "boost:\n  sequence:\n    - action: light.turn_on\n"
+            "      entity_id: light.missing\n",
+        )
+        changes = self.watch.handle_changes([self.scripts])
+
+        self.assertEqual(list(changes), ["scripts.yaml"])
+        errors = changes["scripts.yaml"]["errors"]
+        self.assertIn("Unknown entity 'light.missing'", errors[0])
+        self.assertEqual(self.watch.document_cache.parses, parses + 1)
+
+    def test_entity_definition_change_revalidates_dependents(self):
+        """Test that files referencing a removed helper are checked again."""
+        self.watch.validate_all()
+
+        self.write("packages/helpers.yaml", "input_boolean:\n  turbo:\n")
+        changes = self.watch.handle_changes([self.package])
+
+        self.assertEqual(list(changes), ["scripts.yaml"])
+        self.assertEqual(len(changes["scripts.yaml"]["errors"]), 1)
+
+    def test_including_files_are_revalidated(self):
+        """Test that files including the saved file are checked again."""
+        self.watch.validate_all()
+
+        self.write("packages/helpers.yaml", "input_boolean:\n  boost:\n  turbo:\n")
+        with mock.patch.object(
+            self.watch, "_check_file", wraps=self.watch._check_file
+        ) as check_file:
+            self.watch.handle_changes([self.package])
+
+        self.assertEqual(
+            sorted(call.args[0].name for call in check_file.call_args_list),
+            ["configuration.yaml", "helpers.yaml"],
+        )
+
+    def test_registry_change_reloads_registries(self):
+        """Test that registry updates are picked up."""
+        self.write(
+            "automations.yaml",
+            "- alias: A\n  triggers: []\n  actions:\n"
+            "    - action: light.turn_on\n      entity_id: light.hall\n",
+        )
+        self.watch.validate_all()
+        self.assertEqual(self.watch.count("errors"), 1)
+
+        registry = self.config_dir / ".storage" / "core.entity_registry"
+        with open(registry, "w") as f:
+            json.dump({"data": {"entities": [{"entity_id": "light.hall"}]}}, f)
+        changes = self.watch.handle_changes([registry])
+
+        self.assertEqual(changes["automations.yaml"]["errors"], [])
+
+    def test_socket_protocol(self):
+        """Test JSON-lines requests over the Unix socket."""
+        from tools.watch_validator import DiagnosticsServer
+
+        self.watch.validate_all()
+        socket_path = self.config_dir / "watch.sock"
+        server = DiagnosticsServer(socket_path, self.watch)
+        thread = threading.Thread(target=server.serve_forever, daemon=True)
+        thread.start()
+        self.addCleanup(server.server_close)
+        self.addCleanup(server.shutdown)
+
+        with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+            client.connect(str(socket_path))
+            stream = client.makefile("rw", encoding="utf-8")
+            responses = []
+            for request in (
+                {"command": "status"},
+                {"command": "validate", "path": "scripts.yaml"},
+                {"command": "bogus"},
+            ):
+                stream.write(json.dumps(request) + "\n")
+                stream.flush()
+                responses.append(json.loads(stream.readline()))
+
+        self.assertEqual(responses[0]["files"], 3)
+        self.assertEqual(list(responses[1]["diagnostics"]), ["scripts.yaml"])
+        self.assertEqual(responses[1]["diagnostics"]["scripts.yaml"]["errors"], [])
+        self.assertFalse(responses[2]["ok"])
+        self.assertIn(GLOBAL_KEY, self.watch.diagnostics)
+
+
+class TestWatchers(unittest.TestCase):
+    """Test change detection."""
+
+    def setUp(self):
+        """Set up test fixtures."""
+        self.temp_dir = tempfile.mkdtemp()
+        self.config_dir = Path(self.temp_dir)
+        self.file = self.config_dir / "automations.yaml"
+        self.file.write_text("[]\n")
+
+    def tearDown(self):
+        """Clean up test fixtures."""
+        shutil.rmtree(self.temp_dir)
+
+    def test_polling_watcher(self):
+        """Test that the polling watcher reports modified files."""
+        watcher = PollingWatcher(self.config_dir)
+        self.file.write_text("- alias: A\n")
+        (self.config_dir / "notes.txt").write_text("ignored\n")
+
+        self.assertEqual(watcher.poll(0), [self.file])
+        self.assertEqual(watcher.poll(0), [])
+
+    def test_inotify_watcher(self):
+        """Test that inotify reports saved files, including in new directories."""
+        try:
+            watcher = InotifyWatcher(self.config_dir)
+        except (OSError, AttributeError):
+            self.skipTest("inotify is not available")
+        self.addCleanup(watcher.close)
+
+        self.file.write_text("- alias: A\n")
+        self.assertEqual(watcher.poll(1), [self.file])
+
+        package = self.config_dir / "packages" / "new.yaml"
+        package.parent.mkdir()
+        package.write_text("{}\n")
+        self.assertEqual(watcher.poll(1), [package])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,262 @@
+"""Work out which configuration files a change affects.
+
+Used by ``run_tests.py --changed``. Changed files come from git, and from
+the mtime and size of each file as the last run recorded them. They are
+expanded through the include graph and a reverse index of entity references,
+so only the affected files are validated again.
+"""
+
+import os
+import subprocess
+from collections import defaultdict, deque
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Optional,
+    Set,
+    Tuple,
+)
+
+if TYPE_CHECKING or __package__:
+    from tools.ha_yaml import HATag, IncludeResolver
+    from tools.reference_validator import ReferenceValidator
+    from tools.validation_cache import registry_fingerprint
+else:  # Executed as a script from the tools directory
+    from ha_yaml import HATag, IncludeResolver
+    from reference_validator import ReferenceValidator
+    from validation_cache import registry_fingerprint
+
+# Name of the run state kept in the validation cache
+STATE_NAME = "changes"
+
+
+def _git(args: List[str], cwd: Path) -> List[str]:
+    """Run a git command and return its non-empty output lines."""
+    result = subprocess.run(
+        ["git", *args], cwd=cwd, capture_output=True, text=True, check=True
+    )
+    return [line for line in result.stdout.splitlines() if line]
+
+
+def git_head(config_dir: Path) -> Optional[str]:
+    """Return the commit checked out in config_dir's work tree, if any."""
+    try:
+        return _git(["rev-parse", "--verify", "HEAD"], Path(config_dir))[0]
+    except (OSError, IndexError, subprocess.CalledProcessError):
+        return None
+
+
+def git_changed_files(config_dir: Path, base: str = "HEAD") -> Optional[List[Path]]:
+    """Return files below config_dir that differ from `base` or are untracked.
+
+    Returns None if config_dir is not in a git work tree or `base` is unknown.
+    """
+    config_dir = Path(config_dir)
+    try:
+        top_level = Path(_git(["rev-parse", "--show-toplevel"], config_dir)[0])
+        names = _git(["diff", "--name-only", base, "--", "."], config_dir)
+        names += _git(
+            ["ls-files", "--others", "--exclude-standard", "--full-name", "--", "."],
+            config_dir,
+        )
+    except (OSError, IndexError, subprocess.CalledProcessError):
+        return None
+
+    # git reports paths relative to the top level; keep config_dir's form
+    config_root = config_dir.resolve()
+    changed = []
+    for name in names:
+        relative = os.path.relpath(top_level / name, config_root)
+        changed.append(Path(os.path.normpath(config_dir / relative)))
+    return changed
+
+
+def file_snapshot(config_dir: Path, files: Iterable[Path]) -> Dict[str, List[int]]:
+    """Return the mtime and size of each file, keyed by its relative path."""
+    snapshot = {}
+    for path in files:
+        try:
+            stat = os.stat(path)
+        except OSError:
+            continue
+        snapshot[os.path.relpath(path, config_dir)] = [stat.st_mtime_ns, stat.st_size]
+    return snapshot
+
+
+def snapshot_changed_files(
+    config_dir: Path,
+    snapshot: Dict[str, List[int]],
+    previous: Dict[str, List[int]],
+) -> List[Path]:
+    """Return the files of a snapshot whose mtime or size differs from before."""
+    return [
+        Path(os.path.normpath(config_dir / name))
+        for name, entry in snapshot.items()
+        if previous.get(name) != entry
+    ]
+
+
+def find_including_files(
+    resolver: IncludeResolver, files: Iterable[Path], changed: Iterable[Path]
+) -> Set[Path]:
+    """Return the files whose resolved content includes a changed file.
+
+    Includes are followed transitively, so a file including another that
+    includes a changed file is returned too.
+    """
+    included_by: Dict[Path, List[Path]] = defaultdict(list)
+    for file_path in files:
+        for target in resolver.includes(file_path):
+            included_by[target].append(file_path)
+
+    including: Set[Path] = set()
+    queue = deque(Path(os.path.normpath(path)) for path in changed)
+    while queue:
+        for includer in included_by.get(queue.popleft(), []):
+            if includer not in including:
+                including.add(includer)
+                queue.append(includer)
+    return including
+
+
+def find_affected_files(
+    validator: ReferenceValidator,
+    changed: Iterable[Path],
+    previous: Optional[Dict[str, Any]],
+) -> Optional[List[Path]]:
+    """Return the files to validate again, or None if all of them must be.
+
+    Besides the changed files themselves, these are the files including a
+    changed file, the files that failed on the last run, and the files
+    referencing entities whose YAML definition appeared or disappeared.
+    Everything is revalidated if there is no previous run to compare with or
+    the registries changed since.
+    """
+    registry_fp = registry_fingerprint(validator.storage_dir)
+    if previous is None or registry_fp is None or previous["registry"] != registry_fp:
+        return None
+
+    files = validator.get_yaml_files()
+    config_dir = validator.config_dir
+    normalized = {Path(os.path.normpath(path)) for path in changed}
+    affected: Set[Path] = {path for path in files if path in normalized}
+    affected.update(
+        Path(os.path.normpath(config_dir / name)) for name in previous["failing"]
+    )
+
+    affected.update(find_including_files(validator.include_resolver, files, normalized))
+
+    # Files referencing entities that were added to or removed from YAML
+    defined = validator.load_yaml_entities()
+    redefined = defined.symmetric_difference(previous["yaml_entities"])
+    if redefined:
+        affected.update(validator.get_entity_dependents(redefined, files))
+
+    return [path for path in files if path in affected]
+
+
+def current_state(
+    validator: ReferenceValidator,
+    failed_files: Iterable[Path],
+    commit: Optional[str] = None,
+    snapshot: Optional[Dict[str, List[int]]] = None,
+) -> Optional[Dict[str, Any]]:
+    """Return the run state the next ``--changed`` run compares against.
+
+    commit is the git commit the configuration was validated at, if any, and
+    snapshot the file_snapshot taken before validating it.
+    """
+    registry_fp = registry_fingerprint(validator.storage_dir)
+    if registry_fp is None:
+        return None
+    return {
+        "commit": commit,
+        "registry": registry_fp,
+        "yaml_entities": sorted(validator.load_yaml_entities()),
+        "failing": sorted(
+            {os.path.relpath(path, validator.config_dir) for path in failed_files}
+        ),
+        "files": snapshot or {},
+    }
+
+
+def domain_key(key: str) -> str:
+    """Return the domain of a configuration key such as "light 2"."""
+    return key.split(" ", 1)[0]
+
+
+def _packages(
+    packages: Any, config_file: Path, resolver: IncludeResolver
+) -> Iterator[Tuple[List[Path], Any]]:
+    """Yield the files each package is read from, with its configuration."""
+    if isinstance(packages, HATag):
+        for target in resolver.node_includes(packages, config_file):
+            data = resolver.resolve(target)
+            if packages.tag == "!include_dir_named":
+                yield [target], data
+            elif isinstance(data, dict):
+                # !include and !include_dir_merge_named name the packages
+                for package in data.values():
+                    yield [target], package
+    elif isinstance(packages, dict):
+        for package in packages.values():
+            files = resolver.node_includes(package, config_file)
+            if isinstance(package, HATag) and package.tag == "!include":
+                yield files, resolver.resolve(files[0]) if files else None
+            else:
+                yield files, package
+
+
+def affected_domains(
+    config_dir: Path, changed: Iterable[Path], resolver: IncludeResolver
+) -> Optional[Set[str]]:
+    """Return the integration domains whose configuration a change touches.
+
+    Each top-level key of configuration.yaml and of its packages is a
+    domain, affected when a changed file is included below it. Returns
+    None when every domain may be affected: when configuration.yaml itself,
+    secrets or custom integrations changed, or a file was deleted, as what
+    included it can't be told any more.
+    """
+    config_dir = Path(os.path.abspath(config_dir))
+    config_file = config_dir / "configuration.yaml"
+    changed_files = {Path(os.path.abspath(path)) for path in changed}
+
+    domains: Set[str] = set()
+    for path in changed_files:
+        if path == config_file or path.name == "secrets.yaml":
+            return None
+        try:
+            parts = path.relative_to(config_dir).parts
+        except ValueError:
+            continue
+        if parts[0] == "custom_components" or not path.exists():
+            return None
+        if parts[0] == "blueprints" and len(parts) > 2:
+            # blueprints/<domain>/..., used by that domain's configuration
+            domains.add(parts[1])
+
+    config = resolver.document_cache.get(config_file).data
+    if not isinstance(config, dict):
+        return None
+
+    def touched(files: List[Path]) -> bool:
+        return not changed_files.isdisjoint(resolver.include_closure(files))
+
+    for key, value in config.items():
+        if key == "homeassistant" and isinstance(value, dict):
+            packages = value.get("packages")
+            for files, package in _packages(packages, config_file, resolver):
+                if touched(files) and isinstance(package, dict):
+                    domains.update(domain_key(str(name)) for name in package)
+            core = {name: item for name, item in value.items() if name != "packages"}
+            if touched(resolver.node_includes(core, config_file)):
+                domains.add("homeassistant")
+        elif touched(resolver.node_includes(value, config_file)):
+            domains.add(domain_key(str(key)))
+    return domains
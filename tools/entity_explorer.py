@@ -7,47 +7,137 @@ organized by domain and area for easy automation creation.
 """
 
 import argparse
-import json
+import cmd
 import sys
 from collections import defaultdict
 from pathlib import Path
-from typing import Dict, List, Optional
+from typing import (
+    TYPE_CHECKING,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Tuple,
+)
+
+if TYPE_CHECKING or __package__:
+    from tools.entity_search import EntitySearchIndex
+    from tools.registry import (
+        AreaRecord,
+        DeviceRecord,
+        EntityRecord,
+        RegistryRecord,
+        load_registry,
+    )
+    from tools.registry_snapshot import RegistrySnapshot, load_snapshot
+    from tools.validation_cache import DEFAULT_CACHE_DIR
+else:  # Executed as a script from the tools directory
+    from entity_search import EntitySearchIndex
+    from registry import (
+        AreaRecord,
+        DeviceRecord,
+        EntityRecord,
+        RegistryRecord,
+        load_registry,
+    )
+    from registry_snapshot import RegistrySnapshot, load_snapshot
+    from validation_cache import DEFAULT_CACHE_DIR
 
 
-def load_entity_registry(config_path: Path) -> Optional[Dict]:
-    """Load and parse the entity registry file."""
+def load_entity_registry(
+    config_path: Path, snapshot: Optional[RegistrySnapshot] = None
+) -> Optional[List[RegistryRecord]]:
+    """Load the entries of the entity registry file."""
     registry_path = config_path / ".storage" / "core.entity_registry"
 
     if not registry_path.exists():
         print(f"Error: Entity registry not found at {registry_path}")
         return None
 
+    if snapshot is not None:
+        return snapshot.entities.records()
+
     try:
-        with open(registry_path, "r") as f:
-            return json.load(f)
+        return list(
+            load_registry(
+                registry_path, "entities", EntityRecord, key="entity_id"
+            ).values()
+        )
     except Exception as e:
         print(f"Error reading entity registry: {e}")
         return None
 
 
-def load_area_registry(config_path: Path) -> Dict[str, str]:
+def load_area_registry(
+    config_path: Path, snapshot: Optional[RegistrySnapshot] = None
+) -> Dict[str, str]:
     """Load area names from area registry."""
     area_path = config_path / ".storage" / "core.area_registry"
     area_names = {}
 
+    if snapshot is not None:
+        areas = snapshot.areas
+        return {
+            area_id: name
+            for area_id, name in zip(areas.key_column(), areas.column("name"))
+            if name is not None
+        }
+
     if area_path.exists():
         try:
-            with open(area_path, "r") as f:
-                area_data = json.load(f)
-                for area in area_data.get("data", {}).get("areas", []):
-                    area_names[area["id"]] = area["name"]
+            for area_id, area in load_registry(area_path, "areas", AreaRecord).items():
+                area_names[area_id] = area["name"]
         except Exception as e:
             print(f"Warning: Could not load area names: {e}")
 
     return area_names
 
 
-def get_entity_display_name(entity: Dict) -> str:
+def load_device_registry(
+    config_path: Path, snapshot: Optional[RegistrySnapshot] = None
+) -> Dict[str, str]:
+    """Load device names from device registry."""
+    device_path = config_path / ".storage" / "core.device_registry"
+    devices: Mapping[str, Mapping] = {}
+
+    if snapshot is not None:
+        devices = snapshot.devices
+    elif device_path.exists():
+        try:
+            devices = load_registry(device_path, "devices", DeviceRecord)
+        except Exception as e:
+            print(f"Warning: Could not load device names: {e}")
+
+    return {
+        device_id: device["name_by_user"] or device["name"] or device_id
+        for device_id, device in devices.items()
+    }
+
+
+def load_registries(
+    config_path: Path, cache_dir: Optional[Path] = None
+) -> Optional[Tuple[List[RegistryRecord], Dict[str, str], Dict[str, str]]]:
+    """Load entities, area names and device names.
+
+    Reads the registry snapshot in cache_dir, or the JSON registries if
+    cache_dir is None. Returns None if the entity registry can't be loaded.
+    """
+    snapshot = None
+    if cache_dir is not None:
+        snapshot = load_snapshot(config_path / ".storage", cache_dir)
+    entities = load_entity_registry(config_path, snapshot)
+    if entities is None:
+        return None
+    return (
+        entities,
+        load_area_registry(config_path, snapshot),
+        load_device_registry(config_path, snapshot),
+    )
+
+
+def get_entity_display_name(entity: Mapping) -> str:
     """Get the best display name for an entity."""
     if entity.get("name"):
         return entity["name"]
@@ -58,210 +148,484 @@ def get_entity_display_name(entity: Dict) -> str:
         return entity["entity_id"].split(".")[-1].replace("_", " ").title()
 
 
-def categorize_entities(entities: List[Dict], area_names: Dict[str, str]) -> Dict:
-    """Categorize entities by domain and area."""
-    by_domain = defaultdict(list)
-    by_area = defaultdict(list)
-    automation_relevant = defaultdict(list)
-
-    # Domains that are commonly used in automations
-    key_domains = {
-        "climate",
-        "switch",
-        "light",
-        "fan",
-        "cover",
-        "lock",
-        "camera",
-        "person",
-        "device_tracker",
-        "binary_sensor",
-        "sensor",
-        "media_player",
-        "scene",
-        "script",
-        "input_boolean",
-        "input_select",
-        "input_number",
-    }
-
-    for entity in entities:
-        if entity.get("disabled_by") or entity.get("hidden_by"):
-            continue
-
-        entity_id = entity["entity_id"]
-        domain = entity_id.split(".")[0]
-        display_name = get_entity_display_name(entity)
+# Domains that are commonly used in automations
+KEY_DOMAINS = {
+    "climate",
+    "switch",
+    "light",
+    "fan",
+    "cover",
+    "lock",
+    "camera",
+    "person",
+    "device_tracker",
+    "binary_sensor",
+    "sensor",
+    "media_player",
+    "scene",
+    "script",
+    "input_boolean",
+    "input_select",
+    "input_number",
+}
+
+
+def get_device_class(entity: Mapping) -> Optional[str]:
+    """Get the device class of an entity."""
+    return entity.get("original_device_class") or entity.get("device_class")
+
+
+def is_automation_relevant(entity: Mapping) -> bool:
+    """Return whether an entity is commonly used in automations."""
+    domain = entity["entity_id"].split(".")[0]
+    if domain in KEY_DOMAINS:
+        return True
+    device_class = get_device_class(entity)
+    if domain == "sensor":
+        return device_class in ["temperature", "humidity", "motion", "door", "window"]
+    if domain == "binary_sensor":
+        return device_class in ["motion", "door", "window", "occupancy"]
+    return False
+
+
+class CategorizedEntities(Mapping):
+    """Enabled entities categorized by domain and area on demand.
+
+    Registry entries are grouped by domain or area the first time such a
+    slice is asked for, and an entity's display info is only built as it's
+    listed, so showing one domain or area describes just its entities.
+    Looking up the "by_domain", "by_area" or "automation_relevant" view
+    builds and keeps all of it, as categorize_entities() used to return.
+    """
+
+    VIEWS = ("by_domain", "by_area", "automation_relevant")
+
+    def __init__(self, entities: Iterable[Mapping], area_names: Dict[str, str]):
+        """Keep the entities that aren't disabled or hidden."""
+        self._entities = [
+            entity
+            for entity in entities
+            if not entity.get("disabled_by") and not entity.get("hidden_by")
+        ]
+        self._area_names = area_names
+        self._domains: Optional[Dict[str, List[Mapping]]] = None
+        self._areas: Optional[Dict[str, List[Mapping]]] = None
+        self._views: Dict[str, Dict[str, List[Dict]]] = {}
+
+    def __getitem__(self, view: str) -> Dict[str, List[Dict]]:
+        """Return a whole view, mapping names to lists of entity info."""
+        if view not in self.VIEWS:
+            raise KeyError(view)
+        if view not in self._views:
+            groups = {}
+            if view == "by_domain":
+                for domain in self.domains():
+                    groups[domain] = list(self.iter_domain(domain))
+            elif view == "by_area":
+                for area in self.areas():
+                    groups[area] = list(self.iter_area(area))
+            else:
+                for domain in self.domains():
+                    relevant = self.automation_relevant_entries(domain)
+                    if relevant:
+                        groups[domain] = list(map(self.describe, relevant))
+            self._views[view] = groups
+        return self._views[view]
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over the view names."""
+        return iter(self.VIEWS)
+
+    def __len__(self) -> int:
+        """Return the number of views."""
+        return len(self.VIEWS)
+
+    @property
+    def entity_count(self) -> int:
+        """Return the number of enabled entities."""
+        return len(self._entities)
+
+    def area_name(self, entity: Mapping) -> str:
+        """Get the name of an entity's area."""
         area_id = entity.get("area_id")
-        area_name = area_names.get(area_id, "No Area") if area_id else "No Area"
-        device_class = entity.get("original_device_class") or entity.get("device_class")
-
-        entity_info = {
-            "entity_id": entity_id,
-            "name": display_name,
-            "area": area_name,
-            "device_class": device_class,
+        return self._area_names.get(area_id, "No Area") if area_id else "No Area"
+
+    def describe(self, entity: Mapping) -> Dict:
+        """Build the display info of a registry entry."""
+        return {
+            "entity_id": entity["entity_id"],
+            "name": get_entity_display_name(entity),
+            "area": self.area_name(entity),
+            "device_class": get_device_class(entity),
             "platform": entity.get("platform"),
             "unit": entity.get("unit_of_measurement"),
+            "device_id": entity.get("device_id"),
         }
 
-        by_domain[domain].append(entity_info)
-        by_area[area_name].append(entity_info)
-
-        # Categorize automation-relevant entities
-        if domain in key_domains:
-            automation_relevant[domain].append(entity_info)
-        elif domain == "sensor" and device_class in [
-            "temperature",
-            "humidity",
-            "motion",
-            "door",
-            "window",
-        ]:
-            automation_relevant["sensor"].append(entity_info)
-        elif domain == "binary_sensor" and device_class in [
-            "motion",
-            "door",
-            "window",
-            "occupancy",
-        ]:
-            automation_relevant["binary_sensor"].append(entity_info)
+    def _by_domain(self) -> Dict[str, List[Mapping]]:
+        """Group the registry entries by domain, once."""
+        if self._domains is None:
+            self._domains = defaultdict(list)
+            for entity in self._entities:
+                self._domains[entity["entity_id"].split(".")[0]].append(entity)
+        return self._domains
+
+    def _by_area(self) -> Dict[str, List[Mapping]]:
+        """Group the registry entries by area name, once."""
+        if self._areas is None:
+            self._areas = defaultdict(list)
+            for entity in self._entities:
+                self._areas[self.area_name(entity)].append(entity)
+        return self._areas
+
+    def domains(self) -> List[str]:
+        """Return the domains with enabled entities, sorted."""
+        return sorted(self._by_domain())
+
+    def areas(self) -> List[str]:
+        """Return the names of areas with enabled entities, sorted."""
+        return sorted(self._by_area())
+
+    def domain_entries(self, domain: str) -> List[Mapping]:
+        """Return the registry entries of a domain, in registry order."""
+        return self._by_domain().get(domain, [])
+
+    def area_entries(self, area: str) -> List[Mapping]:
+        """Return the registry entries in an area, in registry order."""
+        return self._by_area().get(area, [])
+
+    def iter_domain(self, domain: str) -> Iterator[Dict]:
+        """Yield the info of a domain's entities by entity ID."""
+        entries = sorted(self.domain_entries(domain), key=lambda x: x["entity_id"])
+        return map(self.describe, entries)
+
+    def iter_area(self, area: str) -> Iterator[Dict]:
+        """Yield the info of an area's entities by entity ID."""
+        entries = sorted(self.area_entries(area), key=lambda x: x["entity_id"])
+        return map(self.describe, entries)
+
+    def automation_relevant_entries(self, domain: str) -> List[Mapping]:
+        """Return a domain's automation-relevant entries, in registry order."""
+        return list(filter(is_automation_relevant, self.domain_entries(domain)))
+
+    def iter_entities(self) -> Iterator[Dict]:
+        """Yield the info of all enabled entities, in registry order."""
+        return map(self.describe, self._entities)
+
+
+def categorize_entities(
+    entities: Iterable[Mapping], area_names: Dict[str, str]
+) -> CategorizedEntities:
+    """Categorize entities by domain and area."""
+    return CategorizedEntities(entities, area_names)
 
-    return {
-        "by_domain": dict(by_domain),
-        "by_area": dict(by_area),
-        "automation_relevant": dict(automation_relevant),
-    }
 
+def format_entity(entity: Mapping) -> str:
+    """Format an entity as one line of a listing."""
+    area_str = f" | {entity['area']}" if entity["area"] != "No Area" else ""
+    unit_str = f" [{entity['unit']}]" if entity.get("unit") else ""
+    device_class_str = (
+        f" ({entity['device_class']})" if entity.get("device_class") else ""
+    )
+    return f"   {entity['entity_id']}{device_class_str}{unit_str}{area_str}"
 
-def print_summary(categorized: Dict):
-    """Print a summary of available entities."""
-    print("=" * 80)
-    print("HOME ASSISTANT ENTITY REGISTRY SUMMARY")
-    print("=" * 80)
 
-    # Overall stats
-    total_entities = sum(
-        len(entities) for entities in categorized["by_domain"].values()
-    )
-    total_domains = len(categorized["by_domain"])
-    total_areas = len(categorized["by_area"])
+def summary_lines(categorized: CategorizedEntities) -> Iterator[str]:
+    """Yield the lines of a summary of available entities."""
+    yield "=" * 80
+    yield "HOME ASSISTANT ENTITY REGISTRY SUMMARY"
+    yield "=" * 80
 
-    print("\n📊 OVERVIEW:")
-    print(f"   Total Entities: {total_entities}")
-    print(f"   Domains: {total_domains}")
-    print(f"   Areas: {total_areas}")
+    # Overall stats
+    yield "\n📊 OVERVIEW:"
+    yield f"   Total Entities: {categorized.entity_count}"
+    yield f"   Domains: {len(categorized.domains())}"
+    yield f"   Areas: {len(categorized.areas())}"
 
     # Automation-relevant entities
-    print("\n🤖 AUTOMATION-RELEVANT ENTITIES:")
-    for domain in sorted(categorized["automation_relevant"].keys()):
-        entities = categorized["automation_relevant"][domain]
-        print(f"   {domain.upper()}: {len(entities)} entities")
+    yield "\n🤖 AUTOMATION-RELEVANT ENTITIES:"
+    for domain in categorized.domains():
+        relevant = categorized.automation_relevant_entries(domain)
+        if not relevant:
+            continue
+        count = len(relevant)
+        yield f"   {domain.upper()}: {count} entities"
 
         # Show a few examples
-        for entity in entities[:3]:
+        for entity in map(categorized.describe, relevant[:3]):
             area_str = f" ({entity['area']})" if entity["area"] != "No Area" else ""
             unit_str = f" [{entity['unit']}]" if entity.get("unit") else ""
-            print(f"     • {entity['entity_id']}{area_str}{unit_str}")
+            yield f"     • {entity['entity_id']}{area_str}{unit_str}"
 
-        if len(entities) > 3:
-            print(f"     ... and {len(entities) - 3} more")
-        print()
+        if count > 3:
+            yield f"     ... and {count - 3} more"
+        yield ""
 
 
-def print_detailed_by_domain(categorized: Dict, domain_filter: Optional[str] = None):
-    """Print detailed breakdown by domain."""
-    print("\n" + "=" * 80)
-    print("ENTITIES BY DOMAIN")
-    print("=" * 80)
+def domain_lines(
+    categorized: CategorizedEntities, domain_filter: Optional[str] = None
+) -> Iterator[str]:
+    """Yield the lines of a detailed breakdown by domain."""
+    yield "\n" + "=" * 80
+    yield "ENTITIES BY DOMAIN"
+    yield "=" * 80
 
-    domains_to_show = (
-        [domain_filter] if domain_filter else sorted(categorized["by_domain"].keys())
-    )
+    domains_to_show = [domain_filter] if domain_filter else categorized.domains()
 
     for domain in domains_to_show:
-        if domain not in categorized["by_domain"]:
-            print(f"Domain '{domain}' not found")
+        count = len(categorized.domain_entries(domain))
+        if not count:
+            yield f"Domain '{domain}' not found"
             continue
 
-        entities = categorized["by_domain"][domain]
-        print(f"\n🏷️  {domain.upper()} ({len(entities)} entities):")
-
-        for entity in sorted(entities, key=lambda x: x["entity_id"]):
-            area_str = f" | {entity['area']}" if entity["area"] != "No Area" else ""
-            unit_str = f" [{entity['unit']}]" if entity.get("unit") else ""
-            device_class_str = (
-                f" ({entity['device_class']})" if entity.get("device_class") else ""
-            )
+        yield f"\n🏷️  {domain.upper()} ({count} entities):"
+        for entity in categorized.iter_domain(domain):
+            yield format_entity(entity)
 
-            print(f"   {entity['entity_id']}{device_class_str}" f"{unit_str}{area_str}")
 
+def area_lines(
+    categorized: CategorizedEntities, area_filter: Optional[str] = None
+) -> Iterator[str]:
+    """Yield the lines of a listing of entities organized by area."""
+    yield "\n" + "=" * 80
+    yield "ENTITIES BY AREA"
+    yield "=" * 80
 
-def print_by_area(categorized: Dict, area_filter: Optional[str] = None):
-    """Print entities organized by area."""
-    print("\n" + "=" * 80)
-    print("ENTITIES BY AREA")
-    print("=" * 80)
-
-    areas_to_show = (
-        [area_filter] if area_filter else sorted(categorized["by_area"].keys())
-    )
+    areas_to_show = [area_filter] if area_filter else categorized.areas()
 
     for area in areas_to_show:
-        if area not in categorized["by_area"]:
-            print(f"Area '{area}' not found")
+        entities = categorized.area_entries(area)
+        if not entities:
+            yield f"Area '{area}' not found"
             continue
 
-        entities = categorized["by_area"][area]
-        print(f"\n🏠 {area.upper()} ({len(entities)} entities):")
+        yield f"\n🏠 {area.upper()} ({len(entities)} entities):"
 
         # Group by domain within area
         by_domain_in_area = defaultdict(list)
         for entity in entities:
             domain = entity["entity_id"].split(".")[0]
-            by_domain_in_area[domain].append(entity)
+            by_domain_in_area[domain].append(entity["entity_id"])
 
         for domain in sorted(by_domain_in_area.keys()):
-            domain_entities = by_domain_in_area[domain]
-            entity_ids = ", ".join(
-                e["entity_id"]
-                for e in sorted(domain_entities, key=lambda x: x["entity_id"])
-            )
-            print(f"   {domain}: {entity_ids}")
+            entity_ids = ", ".join(sorted(by_domain_in_area[domain]))
+            yield f"   {domain}: {entity_ids}"
 
 
-def search_entities(categorized: Dict, query: str):
-    """Search for entities matching a query."""
+def print_summary(categorized: CategorizedEntities):
+    """Print a summary of available entities."""
+    for line in summary_lines(categorized):
+        print(line)
+
+
+def print_detailed_by_domain(
+    categorized: CategorizedEntities, domain_filter: Optional[str] = None
+):
+    """Print detailed breakdown by domain."""
+    for line in domain_lines(categorized, domain_filter):
+        print(line)
+
+
+def print_by_area(categorized: CategorizedEntities, area_filter: Optional[str] = None):
+    """Print entities organized by area."""
+    for line in area_lines(categorized, area_filter):
+        print(line)
+
+
+def build_search_index(categorized: Mapping) -> EntitySearchIndex:
+    """Index the categorized entities for searching."""
+    return EntitySearchIndex(
+        entity
+        for domain_entities in categorized["by_domain"].values()
+        for entity in domain_entities
+    )
+
+
+def search_entities(
+    categorized: Mapping, query: str, index: Optional[EntitySearchIndex] = None
+):
+    """Search for entities matching a query, best matches first.
+
+    Pass an index from build_search_index() to reuse it across searches.
+    """
     print(f"\n🔍 SEARCH RESULTS for '{query}':")
     print("=" * 50)
 
-    matches = []
-    query_lower = query.lower()
+    if index is None:
+        index = build_search_index(categorized)
+    matches = index.search(query)
+
+    if not matches:
+        print("No matches found")
+        return
+
+    for _score, entity in matches:
+        print(format_entity(entity))
 
+
+def group_by_device(categorized: Mapping) -> Dict[str, List[Dict]]:
+    """Group the categorized entities by device ID."""
+    by_device = defaultdict(list)
     for domain_entities in categorized["by_domain"].values():
         for entity in domain_entities:
-            if (
-                query_lower in entity["entity_id"].lower()
-                or query_lower in entity["name"].lower()
-                or (
-                    entity.get("device_class")
-                    and query_lower in entity["device_class"].lower()
-                )
-            ):
-                matches.append(entity)
+            if entity.get("device_id"):
+                by_device[entity["device_id"]].append(entity)
+    return dict(by_device)
 
-    if not matches:
-        print("No matches found")
+
+def print_by_device(
+    by_device: Dict[str, List[Dict]], device_names: Dict[str, str], query: str
+):
+    """Print the entities of devices whose name contains query, or with that ID."""
+    query_lower = query.lower()
+    matching = sorted(
+        (name, device_id)
+        for device_id, name in device_names.items()
+        if device_id == query or query_lower in name.lower()
+    )
+    if not matching:
+        print(f"Device '{query}' not found")
         return
 
-    for entity in sorted(matches, key=lambda x: x["entity_id"]):
-        area_str = f" | {entity['area']}" if entity["area"] != "No Area" else ""
-        unit_str = f" [{entity['unit']}]" if entity.get("unit") else ""
-        device_class_str = (
-            f" ({entity['device_class']})" if entity.get("device_class") else ""
-        )
+    for name, device_id in matching:
+        entities = by_device.get(device_id, [])
+        print(f"\n🔌 {name} ({len(entities)} entities):")
+        for entity in sorted(entities, key=lambda x: x["entity_id"]):
+            print(format_entity(entity))
+
+
+class ExplorerShell(cmd.Cmd):
+    """Answers entity queries from registries loaded once.
+
+    The categorized entities, search index and device grouping are kept
+    in memory between queries, and rebuilt by the reload command.
+    """
+
+    intro = "Home Assistant entity explorer. Type help or ? to list commands."
+    prompt = "entities> "
+
+    def __init__(self, config_path: Path, cache_dir: Optional[Path] = None):
+        """Prepare to load the registries of the config directory."""
+        super().__init__()
+        self.config_path = config_path
+        self.cache_dir = cache_dir
+        self.categorized = categorize_entities([], {})
+        self.device_names: Dict[str, str] = {}
+        self._index: Optional[EntitySearchIndex] = None
+        self._by_device: Optional[Dict[str, List[Dict]]] = None
+
+    def load(self) -> bool:
+        """(Re)load the registries, returning False if that failed."""
+        registries = load_registries(self.config_path, self.cache_dir)
+        if registries is None:
+            return False
+        entities, area_names, self.device_names = registries
+        self.categorized = categorize_entities(entities, area_names)
+        self._index = None
+        self._by_device = None
+        return True
+
+    @property
+    def index(self) -> EntitySearchIndex:
+        """The search index, built on first use."""
+        if self._index is None:
+            self._index = build_search_index(self.categorized)
+        return self._index
+
+    @property
+    def by_device(self) -> Dict[str, List[Dict]]:
+        """Entities grouped by device, built on first use."""
+        if self._by_device is None:
+            self._by_device = group_by_device(self.categorized)
+        return self._by_device
+
+    def run_batch(self, lines: Iterable[str]):
+        """Answer one command per line, skipping blank lines and comments."""
+        for line in lines:
+            line = line.strip()
+            if line and not line.startswith("#") and self.onecmd(line):
+                break
+
+    def emptyline(self) -> bool:
+        """Do nothing, rather than repeating the last command."""
+        return False
+
+    def default(self, line: str):
+        """Search for anything that isn't a command."""
+        self.do_search(line)
+
+    def do_summary(self, arg: str):
+        """Show entity counts and automation-relevant entities."""
+        print_summary(self.categorized)
+
+    def do_domain(self, arg: str):
+        """List the entities of DOMAIN, or of all domains if none is given."""
+        print_detailed_by_domain(self.categorized, arg.strip() or None)
+
+    def do_area(self, arg: str):
+        """List the entities in AREA, or in all areas if none is given."""
+        area = arg.strip()
+        # Area names are matched case-insensitively
+        for name in self.categorized.areas():
+            if name.lower() == area.lower():
+                area = name
+        print_by_area(self.categorized, area or None)
+
+    def do_search(self, arg: str):
+        """Search entities for QUERY, e.g. domain:sensor area:kitchen temp."""
+        if not arg.strip():
+            print("Usage: search QUERY")
+            return
+        search_entities(self.categorized, arg.strip(), self.index)
+
+    def do_device(self, arg: str):
+        """List the entities of devices whose name contains NAME."""
+        if not arg.strip():
+            print("Usage: device NAME")
+            return
+        print_by_device(self.by_device, self.device_names, arg.strip())
+
+    def do_reload(self, arg: str):
+        """Load the registries again, e.g. after make pull."""
+        if self.load():
+            print(f"Loaded {len(self.index)} entities")
+
+    def do_quit(self, arg: str) -> bool:
+        """Leave the explorer."""
+        return True
+
+    do_exit = do_quit
+
+    def do_EOF(self, arg: str) -> bool:
+        """Leave the explorer on end of input."""
+        print()
+        return True
+
+    def _complete_names(self, names: Iterable[str], text: str) -> List[str]:
+        """Return the names starting with text, ignoring case."""
+        return sorted(name for name in names if name.lower().startswith(text.lower()))
+
+    def complete_domain(self, text: str, line: str, begidx: int, endidx: int):
+        """Complete domain names."""
+        return self._complete_names(self.categorized.domains(), text)
+
+    def complete_area(self, text: str, line: str, begidx: int, endidx: int):
+        """Complete area names."""
+        return self._complete_names(self.categorized.areas(), text)
 
-        print(f"   {entity['entity_id']}{device_class_str}" f"{unit_str}{area_str}")
+    def complete_device(self, text: str, line: str, begidx: int, endidx: int):
+        """Complete device names."""
+        return self._complete_names(set(self.device_names.values()), text)
+
+    def complete_search(self, text: str, line: str, begidx: int, endidx: int):
+        """Complete words, entity IDs and filter values."""
+        before = line[:endidx]
+        word = before.split()[-1] if before and not before[-1].isspace() else ""
+        # Readline only replaces `text`, the end of the word being completed
+        return [
+            completion[len(word) - len(text) :]
+            for completion in self.index.complete(word)
+        ]
 
 
 def main():
@@ -277,11 +641,34 @@ def main():
     )
     parser.add_argument("--area", "-a", help="Show only entities from specific area")
     parser.add_argument(
-        "--search", "-s", help="Search entities by name/id/device_class"
+        "--search",
+        "-s",
+        help="Search entities by id, name, area, platform or device class, "
+        "e.g. 'domain:sensor area:kitchen temp'",
     )
+    parser.add_argument("--device", help="Show entities of devices matching a name")
     parser.add_argument(
         "--full", "-f", action="store_true", help="Show full detailed output"
     )
+    parser.add_argument(
+        "--interactive",
+        "-i",
+        action="store_true",
+        help="Answer queries interactively, loading the registries once",
+    )
+    parser.add_argument(
+        "--stdin",
+        action="store_true",
+        help="Answer one query per line from standard input, e.g. 'search temp'",
+    )
+    parser.add_argument(
+        "--cache-dir",
+        default=str(DEFAULT_CACHE_DIR),
+        help="Directory for the registry snapshot",
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true", help="Read the JSON registries directly"
+    )
 
     args = parser.parse_args()
 
@@ -290,13 +677,26 @@ def main():
         print(f"Error: Config directory not found: {config_path}")
         return 1
 
-    # Load data
-    registry_data = load_entity_registry(config_path)
-    if not registry_data:
+    cache_dir = None if args.no_cache else Path(args.cache_dir)
+
+    if args.interactive or args.stdin:
+        shell = ExplorerShell(config_path, cache_dir)
+        if not shell.load():
+            return 1
+        if args.stdin:
+            shell.run_batch(sys.stdin)
+        else:
+            try:
+                shell.cmdloop()
+            except KeyboardInterrupt:
+                print()
+        return 0
+
+    # Load data, from the registry snapshot unless caching is off
+    registries = load_registries(config_path, cache_dir)
+    if registries is None:
         return 1
-
-    area_names = load_area_registry(config_path)
-    entities = registry_data.get("data", {}).get("entities", [])
+    entities, area_names, device_names = registries
 
     if not entities:
         print("No entities found in registry")
@@ -312,6 +712,8 @@ def main():
         print_detailed_by_domain(categorized, args.domain)
     elif args.area:
         print_by_area(categorized, args.area)
+    elif args.device:
+        print_by_device(group_by_device(categorized), device_names, args.device)
     elif args.full:
         print_summary(categorized)
         print_detailed_by_domain(categorized)
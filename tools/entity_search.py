@@ -0,0 +1,290 @@
+"""Inverted index for searching entities by id, name, area and more.
+
+Queries are whitespace separated terms, all of which must match, plus
+optional filters on exact field values::
+
+    domain:sensor area:kitchen temp
+    class:motion area:"living room"
+
+Terms match indexed tokens exactly, by prefix, as a substring or, to
+tolerate typos, by trigram similarity, and results are ranked by how well
+each term matched.
+"""
+
+import heapq
+import re
+import shlex
+from bisect import bisect_left
+from collections import Counter, defaultdict
+from itertools import chain, islice
+from typing import (
+    Any,
+    Dict,
+    FrozenSet,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    NamedTuple,
+    Optional,
+    Set,
+    Tuple,
+    Union,
+)
+
+# Fields whose words are searchable as free text, and how much a match in
+# each counts towards an entity's score
+SEARCH_FIELDS = {
+    "entity_id": 1.0,
+    "name": 1.0,
+    "area": 0.5,
+    "platform": 0.5,
+    "device_class": 0.5,
+}
+
+# Query filter names and the fields they match
+FILTER_FIELDS = {
+    "domain": "domain",
+    "area": "area",
+    "platform": "platform",
+    "device_class": "device_class",
+    "class": "device_class",
+}
+
+# Area shown for entities without one; it can be filtered on but isn't text
+NO_AREA = "No Area"
+
+# Scores for a term matching a word, best first
+EXACT_SCORE = 3.0
+PREFIX_SCORE = 2.0
+SUBSTRING_SCORE = 1.5
+# Trigram similarity a fuzzy match needs, scored by the similarity itself
+MIN_SIMILARITY = 0.5
+
+_WORD_SPLIT = re.compile(r"[\W_]+")
+
+
+def tokenize(text: str) -> List[str]:
+    """Split text into lowercase words."""
+    return [token for token in _WORD_SPLIT.split(text.lower()) if token]
+
+
+def normalize(value: str) -> str:
+    """Normalize a filter value, so "Living Room" matches living_room."""
+    return "_".join(tokenize(value))
+
+
+def trigrams(token: str) -> Set[str]:
+    """Return the trigrams of a token padded to mark where it starts and ends."""
+    padded = f"  {token} "
+    return {padded[i : i + 3] for i in range(len(padded) - 2)}
+
+
+def parse_query(query: str) -> Tuple[List[Tuple[str, str]], List[str]]:
+    """Split a query into (field, normalized value) filters and free terms."""
+    try:
+        words = shlex.split(query)
+    except ValueError:
+        # Unbalanced quotes, search for the words as typed
+        words = query.split()
+
+    filters = []
+    terms = []
+    for word in words:
+        name, _, value = word.partition(":")
+        if value and name.lower() in FILTER_FIELDS:
+            filters.append((FILTER_FIELDS[name.lower()], normalize(value)))
+        else:
+            terms.extend(tokenize(word))
+    return filters, terms
+
+
+class _TermMatches(NamedTuple):
+    """The entities matching a query term."""
+
+    scores: Dict[int, float]
+    ranked: List[int]
+    docs: FrozenSet[int]
+
+
+class EntitySearchIndex:
+    """Token, trigram and filter indexes over a list of entities.
+
+    Entities are mappings with an entity_id and optionally the other
+    SEARCH_FIELDS. Entities are numbered in entity_id order, so ties are
+    ranked by number. Each distinct query term is resolved and ranked once
+    and remembered, so repeated and refined queries only intersect
+    precomputed sets.
+    """
+
+    def __init__(self, entities: Iterable[Mapping[str, Any]]):
+        """Index the entities."""
+        self.entities: List[Mapping[str, Any]] = sorted(
+            entities, key=lambda entity: entity["entity_id"]
+        )
+        # word -> field weight -> entities with the word in such a field
+        self._postings: Dict[str, Dict[float, Set[int]]] = defaultdict(
+            lambda: defaultdict(set)
+        )
+        self._filters: Dict[Tuple[str, str], Set[int]] = defaultdict(set)
+
+        for doc, entity in enumerate(self.entities):
+            self._filters[("domain", entity["entity_id"].split(".", 1)[0])].add(doc)
+            for field in ("area", "platform", "device_class"):
+                if entity.get(field):
+                    self._filters[(field, normalize(str(entity[field])))].add(doc)
+            for field, weight in SEARCH_FIELDS.items():
+                value = entity.get(field)
+                if not value or (field == "area" and value == NO_AREA):
+                    continue
+                for token in tokenize(str(value)):
+                    self._postings[token][weight].add(doc)
+
+        self._vocabulary = sorted(self._postings)
+        self._frequency = {
+            token: sum(map(len, fields.values()))
+            for token, fields in self._postings.items()
+        }
+        self._entity_ids = [entity["entity_id"] for entity in self.entities]
+        self._docs_by_id = {
+            entity_id: doc for doc, entity_id in enumerate(self._entity_ids)
+        }
+        self._filter_values: Dict[str, List[str]] = defaultdict(list)
+        for field, value in sorted(self._filters):
+            self._filter_values[field].append(value)
+
+        self._trigrams: Dict[str, List[str]] = defaultdict(list)
+        for token in self._vocabulary:
+            for gram in trigrams(token):
+                self._trigrams[gram].append(token)
+
+        self._term_cache: Dict[str, _TermMatches] = {}
+
+    def __len__(self) -> int:
+        """Return the number of indexed entities."""
+        return len(self.entities)
+
+    @staticmethod
+    def _prefixed(values: List[str], prefix: str) -> Iterator[str]:
+        """Yield the values of a sorted list that start with prefix."""
+        for value in values[bisect_left(values, prefix) :]:
+            if not value.startswith(prefix):
+                return
+            yield value
+
+    def _token_scores(self, term: str) -> Dict[str, float]:
+        """Score each indexed word that a query term matches."""
+        scores: Dict[str, float] = {}
+        if term in self._postings:
+            scores[term] = EXACT_SCORE
+        for token in self._prefixed(self._vocabulary, term):
+            # Prefer completions adding fewer characters
+            scores.setdefault(token, PREFIX_SCORE + len(term) / len(token) / 2)
+
+        if len(term) >= 3:
+            term_grams = trigrams(term)
+            shared: Counter = Counter()
+            for gram in term_grams:
+                shared.update(self._trigrams.get(gram, ()))
+            for token, count in shared.items():
+                if token in scores:
+                    continue
+                if term in token:
+                    scores[token] = SUBSTRING_SCORE
+                    continue
+                similarity = 2 * count / (len(term_grams) + len(token) + 1)
+                if similarity >= MIN_SIMILARITY:
+                    scores[token] = similarity
+        return scores
+
+    def _term_matches(self, term: str) -> _TermMatches:
+        """Return the entities matching a term with their scores, best first."""
+        cached = self._term_cache.get(term)
+        if cached is None:
+            weighted = [
+                (score * weight, docs)
+                for token, score in self._token_scores(term).items()
+                for weight, docs in self._postings[token].items()
+            ]
+            # Best matches first, so each entity keeps its best score
+            weighted.sort(key=lambda item: item[0], reverse=True)
+            scores: Dict[int, float] = {}
+            ranked: List[int] = []
+            for score, docs in weighted:
+                new = sorted(docs.difference(scores))
+                scores.update(dict.fromkeys(new, score))
+                ranked.extend(new)
+            cached = _TermMatches(scores, ranked, frozenset(scores))
+            self._term_cache[term] = cached
+        return cached
+
+    def search(
+        self, query: str, limit: Optional[int] = None
+    ) -> List[Tuple[float, Mapping[str, Any]]]:
+        """Return (score, entity) pairs matching a query, best first."""
+        filters, terms = parse_query(query)
+        if not filters and not terms:
+            return []
+
+        candidates: Optional[Set[int]] = None
+        if filters:
+            sets = sorted((self._filters.get(key, set()) for key in filters), key=len)
+            candidates = sets[0].intersection(*sets[1:])
+
+        results: Iterable[Tuple[float, int]]
+        matches = [self._term_matches(term) for term in terms]
+        if not matches:
+            docs = candidates or ()
+            ordered = sorted(docs) if limit is None else heapq.nsmallest(limit, docs)
+            results = ((0.0, doc) for doc in ordered)
+        elif len(matches) == 1 and (
+            candidates is None or len(candidates) * 8 > len(matches[0].ranked)
+        ):
+            # Already ranked, stop as soon as there are enough results
+            scores = matches[0].scores
+            results = (
+                (scores[doc], doc)
+                for doc in matches[0].ranked
+                if candidates is None or doc in candidates
+            )
+        else:
+            doc_sets: List[Union[FrozenSet[int], Set[int]]]
+            doc_sets = [match.docs for match in matches]
+            if candidates is not None:
+                doc_sets.append(candidates)
+            doc_sets.sort(key=len)
+            ranked = sorted(
+                (-sum(match.scores[doc] for match in matches), doc)
+                for doc in doc_sets[0].intersection(*doc_sets[1:])
+            )
+            results = ((-score, doc) for score, doc in ranked)
+
+        # A query naming an entity lists that entity first
+        exact = self._docs_by_id.get(query.strip().lower())
+        if exact is not None:
+            results = chain(
+                [(EXACT_SCORE * len(terms), exact)],
+                (result for result in results if result[1] != exact),
+            )
+
+        return [(score, self.entities[doc]) for score, doc in islice(results, limit)]
+
+    def complete(self, prefix: str, limit: int = 20) -> List[str]:
+        """Complete the last word of a query.
+
+        Completes filter values after "name:", entity IDs once the word
+        contains a dot, and otherwise indexed words, most common first.
+        """
+        name, _, value = prefix.partition(":")
+        if ":" in prefix and name.lower() in FILTER_FIELDS:
+            values = self._filter_values.get(FILTER_FIELDS[name.lower()], [])
+            matches = self._prefixed(values, normalize(value))
+            return [f"{name}:{match}" for match in matches][:limit]
+
+        word = prefix.lower()
+        if "." in word:
+            return list(islice(self._prefixed(self._entity_ids, word), limit))
+
+        tokens = list(self._prefixed(self._vocabulary, word))
+        tokens.sort(key=lambda token: (-self._frequency[token], token))
+        return tokens[:limit]
@@ -0,0 +1,329 @@
+"""Structured validation findings and machine-readable reports.
+
+Validators report problems as :class:`Finding` strings in their ``errors``
+and ``warnings`` lists. A finding reads as the message validators have
+always printed, and also records what and where the problem is, so the
+same findings can be written as JSON, NDJSON or SARIF for CI and editors.
+
+A :class:`FindingWriter` streams findings as validators report them::
+
+    writer = FindingWriter(sys.stdout, "ndjson")
+    stream_findings(validator, writer.write)
+    writer.finish(validator.validate_all())
+"""
+
+import json
+import os
+import sys
+import threading
+from pathlib import Path
+from typing import Any, Callable, Dict, Iterable, List, Optional, TextIO, Union
+
+# Output formats of the validators' --format option
+FORMATS = ("text", "json", "ndjson", "sarif")
+
+SEVERITIES = ("error", "warning")
+
+# Messages about a file start with its path, e.g. "config/scripts.yaml: ..."
+YAML_SUFFIXES = (".yaml", ".yml")
+
+SARIF_SCHEMA = "https://json.schemastore.org/sarif-2.1.0.json"
+SARIF_VERSION = "2.1.0"
+TOOL_NAME = "ha-config-validate"
+
+FindingListener = Callable[["Finding"], None]
+
+
+class Finding(str):
+    """A validation error or warning, equal to its human-readable message.
+
+    The string is ``"<file>: <message>"`` for problems in a file and just
+    the message otherwise. ``line`` and ``column`` are 1-based, ``path`` is
+    the YAML path of the offending value and ``entity`` the entity,
+    device or area ID it is about.
+    """
+
+    FIELDS = (
+        "severity",
+        "code",
+        "message",
+        "file",
+        "line",
+        "column",
+        "path",
+        "entity",
+        "validator",
+    )
+
+    severity: Optional[str]
+    code: Optional[str]
+    message: str
+    file: Optional[str]
+    line: Optional[int]
+    column: Optional[int]
+    path: Optional[str]
+    entity: Optional[str]
+    validator: Optional[str]
+
+    def __new__(
+        cls,
+        message: str,
+        *,
+        severity: Optional[str] = None,
+        code: Optional[str] = None,
+        file: Union[str, Path, None] = None,
+        line: Optional[int] = None,
+        column: Optional[int] = None,
+        path: Optional[str] = None,
+        entity: Optional[str] = None,
+        validator: Optional[str] = None,
+    ):
+        """Create a finding about a file, or about the configuration."""
+        file = None if file is None else str(file)
+        finding = super().__new__(cls, f"{file}: {message}" if file else message)
+        finding.severity = severity
+        finding.code = code
+        finding.message = message
+        finding.file = file
+        finding.line = line
+        finding.column = column
+        finding.path = path
+        finding.entity = entity
+        finding.validator = validator
+        return finding
+
+    def __reduce__(self):
+        """Pickle the finding with its fields."""
+        return (_restore_finding, (self.to_dict(),))
+
+    @classmethod
+    def from_message(cls, message: str, **fields: Any) -> "Finding":
+        """Create a finding from a plain message, taking the file from it."""
+        file, sep, rest = message.partition(": ")
+        if sep and file.endswith(YAML_SUFFIXES) and not any(map(str.isspace, file)):
+            return cls(rest, file=file, **fields)
+        return cls(message, **fields)
+
+    @classmethod
+    def from_dict(cls, data: Dict[str, Any]) -> "Finding":
+        """Create a finding from the output of to_dict()."""
+        return cls(**data)
+
+    def to_dict(self) -> Dict[str, Any]:
+        """Return the fields that are set."""
+        return {
+            field: getattr(self, field)
+            for field in self.FIELDS
+            if getattr(self, field) is not None
+        }
+
+
+def _restore_finding(data: Dict[str, Any]) -> Finding:
+    """Unpickle a finding."""
+    return Finding.from_dict(data)
+
+
+def as_finding(item: Union[str, Dict[str, Any]]) -> Finding:
+    """Return a finding, a cached finding dict or a plain message as a Finding."""
+    if isinstance(item, Finding):
+        return item
+    if isinstance(item, dict):
+        return Finding.from_dict(item)
+    return Finding.from_message(item)
+
+
+class FindingList(list):
+    """A validator's errors or warnings, as findings.
+
+    Appended messages become findings of the list's severity and validator,
+    and are passed to the listener as they are reported.
+    """
+
+    def __init__(
+        self,
+        severity: str,
+        validator: Optional[str] = None,
+        findings: Iterable[Union[str, Dict[str, Any]]] = (),
+    ):
+        """Create an empty list, or one holding findings."""
+        super().__init__()
+        self.severity = severity
+        self.validator = validator
+        self.listener: Optional[FindingListener] = None
+        self.extend(findings)
+
+    def append(self, item: Union[str, Dict[str, Any]]):
+        """Add a finding or message and report it to the listener."""
+        finding = as_finding(item)
+        if finding.severity is None:
+            finding.severity = self.severity
+        if finding.validator is None:
+            finding.validator = self.validator
+        super().append(finding)
+        if self.listener is not None:
+            self.listener(finding)
+
+    def extend(self, items: Iterable[Union[str, Dict[str, Any]]]):
+        """Add findings or messages one by one."""
+        for item in items:
+            self.append(item)
+
+    def to_dicts(self, start: int = 0) -> List[Dict[str, Any]]:
+        """Return the findings from start on as dicts, e.g. to cache them."""
+        return [finding.to_dict() for finding in self[start:]]
+
+
+def stream_findings(validator: Any, listener: FindingListener):
+    """Pass a validator's findings to listener as they're reported."""
+    for name in ("errors", "warnings"):
+        findings = getattr(validator, name)
+        if not isinstance(findings, FindingList):
+            severity = "error" if name == "errors" else "warning"
+            findings = FindingList(severity, None, findings)
+            setattr(validator, name, findings)
+        findings.listener = listener
+
+
+class FindingWriter:
+    """Writes findings to a stream as they're reported.
+
+    ``json`` writes one object with a ``findings`` array, ``ndjson`` one
+    finding per line and ``sarif`` a SARIF 2.1.0 log. All formats end with
+    the result of the run, written by finish(), and are flushed after each
+    finding so consumers can process them while validation continues.
+    Writing is thread-safe.
+    """
+
+    def __init__(self, stream: TextIO, output_format: str, tool: str = TOOL_NAME):
+        """Create a writer for one of FORMATS other than text."""
+        if output_format not in FORMATS[1:]:
+            raise ValueError(f"Unsupported findings format: {output_format}")
+        self.stream = stream
+        self.format = output_format
+        self.tool = tool
+        self.counts = dict.fromkeys(SEVERITIES, 0)
+        self._started = False
+        self._lock = threading.Lock()
+        # SARIF is written as the log around its results and invocations
+        self._sarif_parts = json.dumps(
+            {
+                "$schema": SARIF_SCHEMA,
+                "version": SARIF_VERSION,
+                "runs": [
+                    {
+                        "tool": {"driver": {"name": tool}},
+                        "results": "\0",
+                        "invocations": "\0",
+                    }
+                ],
+            }
+        ).split('"\\u0000"')
+
+    def _emit(self, text: str):
+        """Write text and flush it to the consumer."""
+        self.stream.write(text)
+        self.stream.flush()
+
+    def _start(self):
+        """Write what comes before the first finding."""
+        self._started = True
+        if self.format == "json":
+            self._emit('{"findings": [')
+        elif self.format == "sarif":
+            self._emit(self._sarif_parts[0] + "[")
+
+    def write(self, finding: Finding):
+        """Write a single finding."""
+        with self._lock:
+            first = not any(self.counts.values())
+            if not self._started:
+                self._start()
+            self.counts[finding.severity or "error"] += 1
+            if self.format == "ndjson":
+                self._emit(json.dumps(finding.to_dict()) + "\n")
+                return
+            item = finding.to_dict() if self.format == "json" else sarif_result(finding)
+            self._emit(("\n  " if first else ",\n  ") + json.dumps(item))
+
+    def finish(self, valid: bool):
+        """Write the result of the run and end the output."""
+        with self._lock:
+            if not self._started:
+                self._start()
+            summary = {
+                "valid": valid,
+                "errors": self.counts["error"],
+                "warnings": self.counts["warning"],
+            }
+            if self.format == "ndjson":
+                self._emit(json.dumps({"summary": summary}) + "\n")
+            elif self.format == "json":
+                self._emit(f"\n], {json.dumps(summary)[1:]}\n")
+            else:
+                invocation = {"executionSuccessful": True, "properties": summary}
+                self._emit(
+                    "\n]"
+                    + self._sarif_parts[1]
+                    + json.dumps([invocation])
+                    + self._sarif_parts[2]
+                    + "\n"
+                )
+
+
+def sarif_result(finding: Finding) -> Dict[str, Any]:
+    """Describe a finding as a SARIF result."""
+    result: Dict[str, Any] = {
+        "ruleId": finding.code or finding.validator or "finding",
+        "level": finding.severity or "error",
+        "message": {"text": finding.message},
+    }
+    location: Dict[str, Any] = {}
+    if finding.file:
+        physical: Dict[str, Any] = {"artifactLocation": {"uri": _uri(finding.file)}}
+        if finding.line:
+            physical["region"] = {"startLine": finding.line}
+            if finding.column:
+                physical["region"]["startColumn"] = finding.column
+        location["physicalLocation"] = physical
+    if finding.path:
+        location["logicalLocations"] = [{"fullyQualifiedName": finding.path}]
+    if location:
+        result["locations"] = [location]
+    if finding.entity:
+        result["properties"] = {"entity": finding.entity}
+    return result
+
+
+def _uri(file: str) -> str:
+    """Return a file's path relative to the working directory, if inside it."""
+    path = os.path.abspath(file)
+    relative = os.path.relpath(path)
+    if relative.startswith(os.pardir):
+        return Path(path).as_uri()
+    return Path(relative).as_posix()
+
+
+def add_format_argument(parser: Any):
+    """Add the --format option to a validator's argument parser."""
+    parser.add_argument(
+        "--format",
+        choices=FORMATS,
+        default="text",
+        help="Output format; json, ndjson and sarif stream structured findings",
+    )
+
+
+def run_with_format(
+    validator: Any, validate: Callable[[], bool], output_format: str
+) -> bool:
+    """Run a validation, printing results in the requested format."""
+    if output_format == "text":
+        is_valid = validate()
+        validator.print_results()
+        return is_valid
+
+    writer = FindingWriter(sys.stdout, output_format)
+    stream_findings(validator, writer.write)
+    is_valid = validate()
+    writer.finish(is_valid)
+    return is_valid
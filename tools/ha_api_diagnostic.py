@@ -5,40 +5,44 @@ Comprehensive testing of various API endpoints and entity operations.
 Combines functionality from multiple diagnostic scripts.
 """
 
-import json
-import os
-from pathlib import Path
-
-import requests
-
-
-# Load environment variables from .env file
-def load_env_file():
-    """Load environment variables from .env file."""
-    env_file = Path(".env")
-    if env_file.exists():
-        with open(env_file) as f:
-            for line in f:
-                line = line.strip()
-                if line and not line.startswith("#") and "=" in line:
-                    key, value = line.split("=", 1)
-                    os.environ[key.strip()] = value.strip().strip('"').strip("'")
-
-
-# Load .env file
-load_env_file()
-
-# Configuration
-HA_URL = os.getenv("HA_URL", "http://homeassistant.local:8123")
-TOKEN = os.getenv("HA_TOKEN", "")
-
-
-def test_api_connection():
+import asyncio
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import TYPE_CHECKING, Any, Dict, List, Union
+
+if TYPE_CHECKING or __package__:
+    from tools.ha_client import HAClient, Result
+    from tools.ha_websocket import WebSocketError, fetch, websocket_url
+else:  # Executed as a script from the tools directory
+    from ha_client import HAClient, Result
+    from ha_websocket import WebSocketError, fetch, websocket_url
+
+# Registries and states fetched over the WebSocket API, or why they weren't
+Registries = Union[Dict[str, List[Dict[str, Any]]], Exception]
+
+ENDPOINTS_TO_TEST = [
+    ("/api/config/entity_registry", "Entity Registry"),
+    ("/api/config/entity_registry/list", "Entity Registry List"),
+    ("/api/states", "Entity States"),
+    ("/api/config", "Configuration"),
+    ("/api/config/core", "Core Configuration"),
+    ("/api/hassio/supervisor/api/config", "Supervisor Config"),
+    ("/api/template", "Template API"),
+]
+
+# Entities looked up in the registry and states
+TARGET_ENTITIES = [
+    "binary_sensor.basement",
+    "media_player.kitchen",
+    "camera.driveway_live_view",
+]
+
+
+def test_api_connection(client: HAClient):
     """Test basic API connection."""
     print("🔗 Testing API Connection...")
     try:
-        headers = {"Authorization": f"Bearer {TOKEN}"}
-        response = requests.get(f"{HA_URL}/api/", headers=headers, timeout=10)
+        response = client.get("/api/")
 
         print(f"   Status: {response.status_code}")
         if response.status_code == 200:
@@ -53,123 +57,104 @@ def test_api_connection():
         return False
 
 
-def test_api_endpoints():
-    """Test various API endpoints to find entity registry access."""
-    print("\n🔍 Testing Various API Endpoints...")
+def fetch_endpoints(client: HAClient) -> Dict[str, Result]:
+    """Request every endpoint to test at once."""
+    paths = [endpoint for endpoint, _description in ENDPOINTS_TO_TEST]
+    return dict(zip(paths, client.get_all(paths)))
 
-    headers = {"Authorization": f"Bearer {TOKEN}"}
 
-    endpoints_to_test = [
-        ("/api/config/entity_registry", "Entity Registry"),
-        ("/api/config/entity_registry/list", "Entity Registry List"),
-        ("/api/states", "Entity States"),
-        ("/api/config", "Configuration"),
-        ("/api/config/core", "Core Configuration"),
-        ("/api/hassio/supervisor/api/config", "Supervisor Config"),
-        ("/api/template", "Template API"),
-    ]
+def test_api_endpoints(responses: Dict[str, Result]):
+    """Test various API endpoints to find entity registry access."""
+    print("\n🔍 Testing Various API Endpoints...")
 
     successful_endpoints = []
 
-    for endpoint, description in endpoints_to_test:
-        try:
-            print(f"\n   Testing: {endpoint} ({description})")
-            response = requests.get(f"{HA_URL}{endpoint}", headers=headers, timeout=10)
-            print(f"   Status: {response.status_code}")
-
-            if response.status_code == 200:
-                successful_endpoints.append(endpoint)
-                try:
-                    data = response.json()
-                    if isinstance(data, list):
-                        print(f"   ✅ List with {len(data)} items")
-                        if len(data) > 0:
-                            print(f"      Sample type: {type(data[0])}")
-                    elif isinstance(data, dict):
-                        keys = list(data.keys())[:5]
-                        print(f"   ✅ Dict with keys: {keys}")
-                    else:
-                        print(f"   ✅ {type(data)}")
-                except Exception:
-                    print(f"   ✅ Non-JSON response ({len(response.text)} chars)")
-            else:
-                print(f"   ❌ {response.text[:100]}")
-
-        except Exception as e:
-            print(f"   ❌ Exception: {e}")
+    for endpoint, description in ENDPOINTS_TO_TEST:
+        print(f"\n   Testing: {endpoint} ({description})")
+        response = responses[endpoint]
+        if isinstance(response, Exception):
+            print(f"   ❌ Exception: {response}")
+            continue
+        print(f"   Status: {response.status_code}")
+
+        if response.status_code == 200:
+            successful_endpoints.append(endpoint)
+            try:
+                data = response.json()
+                if isinstance(data, list):
+                    print(f"   ✅ List with {len(data)} items")
+                    if len(data) > 0:
+                        print(f"      Sample type: {type(data[0])}")
+                elif isinstance(data, dict):
+                    keys = list(data.keys())[:5]
+                    print(f"   ✅ Dict with keys: {keys}")
+                else:
+                    print(f"   ✅ {type(data)}")
+            except Exception:
+                print(f"   ✅ Non-JSON response ({len(response.text)} chars)")
+        else:
+            print(f"   ❌ {response.text[:100]}")
 
     return successful_endpoints
 
 
-def test_entity_registry_read():
+def fetch_websocket_registries(client: HAClient) -> Registries:
+    """Fetch the registries and states over the WebSocket API."""
+    try:
+        return asyncio.run(fetch(client.url, client.token))
+    except TimeoutError:
+        return TimeoutError("Timed out waiting for Home Assistant")
+    except WebSocketError as e:
+        return e
+
+
+def test_entity_registry_read(registries: Registries):
     """Test reading entity registry."""
     print("\n📋 Testing Entity Registry Read Access...")
-    try:
-        headers = {"Authorization": f"Bearer {TOKEN}"}
-        response = requests.get(
-            f"{HA_URL}/api/config/entity_registry", headers=headers, timeout=10
-        )
+    if isinstance(registries, Exception):
+        print(f"   ❌ Exception: {registries}")
+        return []
 
-        print(f"   Status: {response.status_code}")
-        if response.status_code == 200:
-            data = response.json()
-            print(f"   ✅ Found {len(data)} entities")
-
-            # Look for target entities
-            target_entities = [
-                "binary_sensor.basement",
-                "media_player.kitchen",
-                "camera.driveway_live_view",
-            ]
-            found_entities = []
+    data = registries["entities"]
+    print(f"   ✅ Found {len(data)} entities")
 
-            for entity in data:
-                entity_id = entity.get("entity_id")
-                if entity_id in target_entities:
-                    found_entities.append(entity)
-                    print(f"   ✅ Found: {entity_id}")
-                    print(f"      Platform: {entity.get('platform')}")
-                    print(f"      Device ID: {entity.get('device_id')}")
-                    print(f"      Unique ID: {entity.get('unique_id')}")
+    found_entities = []
 
-            return found_entities
-        else:
-            print(f"   ❌ Error: {response.text}")
-            return []
-    except Exception as e:
-        print(f"   ❌ Exception: {e}")
-        return []
+    for entity in data:
+        entity_id = entity.get("entity_id")
+        if entity_id in TARGET_ENTITIES:
+            found_entities.append(entity)
+            print(f"   ✅ Found: {entity_id}")
+            print(f"      Platform: {entity.get('platform')}")
+            print(f"      Device ID: {entity.get('device_id')}")
+            print(f"      Unique ID: {entity.get('unique_id')}")
+
+    return found_entities
 
 
-def test_states_endpoint():
+def test_states_endpoint(response: Result):
     """Test the /api/states endpoint to see entity data."""
     print("\n📊 Testing States Endpoint for Entity Info...")
     try:
-        headers = {"Authorization": f"Bearer {TOKEN}"}
-        response = requests.get(f"{HA_URL}/api/states", headers=headers, timeout=10)
+        if isinstance(response, Exception):
+            raise response
 
         print(f"   Status: {response.status_code}")
         if response.status_code == 200:
             states = response.json()
             print(f"   ✅ Found {len(states)} states")
 
-            # Look for our target entities
-            target_entities = [
-                "binary_sensor.basement",
-                "media_player.kitchen",
-                "camera.driveway_live_view",
-            ]
             found_entities = []
 
             for state in states:
                 entity_id = state.get("entity_id")
-                if entity_id in target_entities:
+                if entity_id in TARGET_ENTITIES:
                     found_entities.append(entity_id)
                     print(f"   ✅ Found: {entity_id}")
                     attrs = list(state.get("attributes", {}).keys())[:5]
                     print(f"      Attributes: {attrs}")
 
-            return len(found_entities) == len(target_entities)
+            return len(found_entities) == len(TARGET_ENTITIES)
         else:
             print(f"   ❌ Error: {response.text}")
             return False
@@ -178,7 +163,7 @@ def test_states_endpoint():
         return False
 
 
-def test_entity_rename(entity_data_list):
+def test_entity_rename(client: HAClient, entity_data_list):
     """Test renaming a single entity using multiple methods."""
     print("\n🔄 Testing Entity Rename Methods...")
 
@@ -192,21 +177,11 @@ def test_entity_rename(entity_data_list):
 
     print(f"   Testing rename: {old_id} → {new_id}")
 
-    headers = {
-        "Authorization": f"Bearer {TOKEN}",
-        "Content-Type": "application/json",
-    }
-
     # Method 1: Direct entity registry update
     try:
         print("\n   Method 1: Direct registry update...")
         data = {"new_entity_id": new_id}
-        response = requests.post(
-            f"{HA_URL}/api/config/entity_registry/{old_id}",
-            headers=headers,
-            json=data,
-            timeout=10,
-        )
+        response = client.post(f"/api/config/entity_registry/{old_id}", json=data)
 
         print(f"   Status: {response.status_code}")
         if response.status_code == 200:
@@ -221,11 +196,9 @@ def test_entity_rename(entity_data_list):
     # Method 2: Update endpoint
     try:
         print("\n   Method 2: Update endpoint...")
-        response = requests.post(
-            f"{HA_URL}/api/config/entity_registry/update",
-            headers=headers,
+        response = client.post(
+            "/api/config/entity_registry/update",
             json={"entity_id": old_id, "new_entity_id": new_id},
-            timeout=10,
         )
 
         print(f"   Status: {response.status_code}")
@@ -241,15 +214,10 @@ def test_entity_rename(entity_data_list):
     return False
 
 
-def test_service_call_method():
+def test_service_call_method(client: HAClient):
     """Test if we can rename via service calls."""
     print("\n🔧 Testing Service Call Method...")
 
-    headers = {
-        "Authorization": f"Bearer {TOKEN}",
-        "Content-Type": "application/json",
-    }
-
     # Test calling homeassistant.update_entity service
     try:
         service_data = {
@@ -258,11 +226,8 @@ def test_service_call_method():
             "name": "SF Basement Motion Test",
         }
 
-        response = requests.post(
-            f"{HA_URL}/api/services/homeassistant/update_entity",
-            headers=headers,
-            json=service_data,
-            timeout=10,
+        response = client.post(
+            "/api/services/homeassistant/update_entity", json=service_data
         )
 
         print(f"   Status: {response.status_code}")
@@ -276,27 +241,20 @@ def test_service_call_method():
         print(f"   ❌ Exception: {e}")
 
 
-def show_websocket_info():
-    """Show information about WebSocket method."""
-    print("\n🌐 WebSocket API Information...")
-    print("   Entity registry operations likely require WebSocket API:")
-    print("   • WebSocket URL: ws://homeassistant.local:8123/api/websocket")
-    print("   • Auth: Send auth message with Bearer token")
-    print("   • List entities: {'type': 'config/entity_registry/list'}")
+def test_websocket_api(client: HAClient, registries: Registries, elapsed: float):
+    """Report what the WebSocket API returned."""
+    print("\n🌐 Testing WebSocket API...")
+    print(f"   URL: {websocket_url(client.url)}")
+    if isinstance(registries, Exception):
+        print(f"   ❌ {registries}")
+        return False
     print(
-        "   • Update entity: {'type': 'config/entity_registry/update', "
-        "'entity_id': '...', 'new_entity_id': '...'}"
+        f"   ✅ {len(registries['entities'])} entities, "
+        f"{len(registries['devices'])} devices, {len(registries['areas'])} areas "
+        f"and {len(registries['states'])} states in {elapsed:.2f}s"
     )
-
-    websocket_example = {
-        "id": 1,
-        "type": "config/entity_registry/update",
-        "entity_id": "binary_sensor.basement",
-        "new_entity_id": "binary_sensor.sf_basement_motion",
-    }
-
-    print("\n   Example WebSocket command:")
-    print(f"   {json.dumps(websocket_example, indent=2)}")
+    print("   Refresh the local registries with: python tools/ha_websocket.py")
+    return True
 
 
 def main():
@@ -304,43 +262,55 @@ def main():
     print("🏠 Home Assistant API Diagnostic Tool")
     print("=" * 60)
 
-    if not TOKEN:
+    client = HAClient.from_env()
+    if not client.token:
         print("❌ No HA_TOKEN found in .env file!")
         print("   Create a .env file with: HA_TOKEN=your_long_lived_access_token")
         return
 
-    print(f"🔗 Testing connection to: {HA_URL}")
+    print(f"🔗 Testing connection to: {client.url}")
 
-    # Test 1: Basic connection
-    if not test_api_connection():
-        print("❌ Basic connection failed - stopping tests")
-        return
+    with client:
+        # Test 1: Basic connection
+        if not test_api_connection(client):
+            print("❌ Basic connection failed - stopping tests")
+            return
+
+        # Tests 2-4 and 7 read endpoints and the WebSocket API, all at once
+        start = time.perf_counter()
+        with ThreadPoolExecutor(1) as executor:
+            websocket = executor.submit(fetch_websocket_registries, client)
+            responses = fetch_endpoints(client)
+            registries = websocket.result()
+        elapsed = time.perf_counter() - start
 
-    # Test 2: Explore available endpoints
-    successful_endpoints = test_api_endpoints()
+        # Test 2: Explore available endpoints
+        successful_endpoints = test_api_endpoints(responses)
 
-    # Test 3: Entity registry read
-    entity_data = test_entity_registry_read()
+        # Test 3: Entity registry read
+        entity_data = test_entity_registry_read(registries)
 
-    # Test 4: States endpoint
-    states_work = test_states_endpoint()
+        # Test 4: States endpoint
+        states_work = test_states_endpoint(responses["/api/states"])
 
-    # Test 5: Entity rename attempts
-    test_entity_rename(entity_data)
+        # Test 5: Entity rename attempts
+        test_entity_rename(client, entity_data)
 
-    # Test 6: Service call method
-    test_service_call_method()
+        # Test 6: Service call method
+        test_service_call_method(client)
 
-    # Test 7: WebSocket method info
-    show_websocket_info()
+    # Test 7: WebSocket API
+    websocket_works = test_websocket_api(client, registries, elapsed)
 
     # Summary
     print("\n" + "=" * 60)
     print("🎯 DIAGNOSTIC SUMMARY")
     print("=" * 60)
     print(f"✅ Working endpoints: {len(successful_endpoints)}")
-    registry_access = "Yes" if entity_data else "No (likely WebSocket only)"
+    registry_access = "Yes" if entity_data else "No"
     print(f"✅ Entity registry access: {registry_access}")
+    websocket_status = "Yes" if websocket_works else "No"
+    print(f"✅ WebSocket API: {websocket_status}")
     states_status = "Yes" if states_work else "No"
     print(f"✅ States endpoint: {states_status}")
     print("✅ Entity renaming: Requires WebSocket API or UI")
@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""Run Home Assistant's config check and report structured problems.
+
+``check_config`` prints a colored report meant for people. Rather than
+parsing it, the check is run through Home Assistant's Python API, which
+returns the problems per integration, and each problem is reported with the
+file and line Home Assistant names in its message::
+
+    {"severity": "error", "domain": "light", "message": "Invalid config ...",
+     "file": "/config/configuration.yaml", "line": 12}
+
+Run as a script, the problems are written one per line once the check has
+finished, as Home Assistant returns them all at once, followed by a summary
+line, so the validators can read them from a separate interpreter::
+
+    {"summary": {"returncode": 1}}
+
+Usage: python tools/ha_check.py CONFIG_DIR [--domains DOMAIN ...]
+"""
+
+import argparse
+import collections
+import inspect
+import json
+import os
+import re
+import subprocess
+import sys
+import threading
+from contextlib import contextmanager, redirect_stderr, redirect_stdout
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterator, List, Optional, Tuple
+
+if TYPE_CHECKING or __package__:
+    from tools.findings import Finding
+else:  # Executed as a script from the tools directory
+    from findings import Finding
+
+CHECK_TIMEOUT = 120
+
+# Domain check_config files errors not tied to an integration under
+GENERAL_ERRORS = "General Errors"
+
+NOT_INSTALLED = (
+    "Home Assistant not found. Please install with: pip install homeassistant"
+)
+
+# "... at packages/lights.yaml, line 12: ..." since Home Assistant 2023.12,
+# "... (See /config/configuration.yaml, line 12)." before
+LOCATION_PATTERN = re.compile(
+    r"(?:\bat |\(See )(?P<file>[^,()]+?\.ya?ml), line (?P<line>\d+)"
+)
+
+# Lines of the check's stderr kept to explain a crash
+STDERR_TAIL = 20
+
+Problem = Dict[str, Any]
+
+
+def _forget_custom_components():
+    """Make custom integrations load again, as they may have changed."""
+    for name in list(sys.modules):
+        if name == "custom_components" or name.startswith("custom_components."):
+            del sys.modules[name]
+
+
+@contextmanager
+def _only_domains(domains: List[str]) -> Iterator[None]:
+    """Drop all but the given domains from configurations being checked.
+
+    Home Assistant's config check merges packages into the configuration
+    before it validates each domain in it, so the merged configuration is
+    pruned right after that step.
+    """
+    from homeassistant.helpers import check_config as ha_check_config
+    from homeassistant.helpers import config_validation as cv
+
+    merge_packages = ha_check_config.merge_packages_config
+    wanted = set(domains)
+
+    def prune(config: Dict[str, Any]):
+        for key in list(config):
+            if cv.domain_key(key) not in wanted:
+                del config[key]
+
+    async def async_scoped_merge(hass, config, *args, **kwargs):
+        result = await merge_packages(hass, config, *args, **kwargs)
+        prune(config)
+        return result
+
+    def scoped_merge(hass, config, *args, **kwargs):
+        result = merge_packages(hass, config, *args, **kwargs)
+        prune(config)
+        return result
+
+    # Wrap merge_packages_config the way this Home Assistant version calls it
+    if inspect.iscoroutinefunction(merge_packages):
+        ha_check_config.merge_packages_config = async_scoped_merge
+    else:
+        ha_check_config.merge_packages_config = scoped_merge
+    try:
+        yield
+    finally:
+        ha_check_config.merge_packages_config = merge_packages
+
+
+def problem_location(
+    message: str, config_dir: str
+) -> Tuple[Optional[str], Optional[int]]:
+    """Return the file and line a check_config message points at."""
+    match = LOCATION_PATTERN.search(message)
+    if match is None or match.group("file") == "?":
+        return None, None
+    return os.path.join(config_dir, match.group("file")), int(match.group("line"))
+
+
+def result_problems(result: Dict[str, Any], config_dir: str) -> Iterator[Problem]:
+    """Return the problems in the result of Home Assistant's check()."""
+    for severity, key in (("error", "except"), ("warning", "warn")):
+        for domain, items in (result.get(key) or {}).items():
+            # Messages are followed by the offending configuration
+            for item in items:
+                if not isinstance(item, str):
+                    continue
+                file, line = problem_location(item, config_dir)
+                yield {
+                    "severity": severity,
+                    "domain": None if domain == GENERAL_ERRORS else domain,
+                    "message": item,
+                    "file": file,
+                    "line": line,
+                }
+
+
+def check_problems(
+    config_dir: str, domains: Optional[List[str]] = None
+) -> Iterator[Problem]:
+    """Check a configuration in this process and return its problems.
+
+    The problems are only known once the whole check has finished. With
+    domains, only those integrations are loaded and validated with their
+    schemas; the core configuration is always validated. Raises ImportError
+    without Home Assistant.
+    """
+    from homeassistant.scripts import check_config
+
+    # Home Assistant's own modules stay loaded
+    _forget_custom_components()
+
+    # What the check prints is covered by the problems it returns
+    with open(os.devnull, "w", encoding="utf-8") as devnull:
+        with redirect_stdout(devnull), redirect_stderr(devnull):
+            if domains is None:
+                result = check_config.check(config_dir)
+            else:
+                with _only_domains(domains):
+                    result = check_config.check(config_dir)
+    return result_problems(result, config_dir)
+
+
+def run_check(config_dir: str, domains: Optional[List[str]] = None) -> Dict[str, Any]:
+    """Check a configuration in this process, see check_problems()."""
+    problems = list(check_problems(config_dir, domains))
+    errors = {
+        problem["domain"] for problem in problems if problem["severity"] == "error"
+    }
+    return {
+        "returncode": len(errors),
+        "domains": None if domains is None else sorted(domains),
+        "problems": problems,
+    }
+
+
+def stream_check(
+    config_dir: Path,
+    domains: Optional[List[str]] = None,
+    timeout: float = CHECK_TIMEOUT,
+) -> Iterator[Dict[str, Any]]:
+    """Check a configuration in a separate interpreter.
+
+    Yields the problems once the check has finished, and finally a summary
+    ``{"summary": {"returncode": N}}``, which has an ``error`` when the
+    check couldn't run. Raises subprocess.TimeoutExpired if the check takes
+    longer than timeout seconds.
+    """
+    config_dir = Path(config_dir).resolve()
+    cmd = [sys.executable, str(Path(__file__).resolve()), str(config_dir)]
+    if domains is not None:
+        cmd += ["--domains", *domains]
+    process = subprocess.Popen(
+        cmd,
+        stdin=subprocess.DEVNULL,
+        stdout=subprocess.PIPE,
+        stderr=subprocess.PIPE,
+        text=True,
+        cwd=str(config_dir),
+    )
+    assert process.stdout is not None and process.stderr is not None
+
+    # Home Assistant logs to stderr; only its end is kept, and it's drained
+    # concurrently so neither pipe fills up
+    stderr_tail: collections.deque = collections.deque(maxlen=STDERR_TAIL)
+    drain = threading.Thread(target=stderr_tail.extend, args=(process.stderr,))
+    drain.start()
+    timed_out = threading.Event()
+
+    def kill():
+        timed_out.set()
+        process.kill()
+
+    timer = threading.Timer(timeout, kill)
+    timer.start()
+
+    summary = None
+    try:
+        for line in process.stdout:
+            try:
+                item = json.loads(line)
+            except ValueError:
+                # Printed around the protocol, e.g. by an integration
+                continue
+            if not isinstance(item, dict):
+                continue
+            if "summary" in item:
+                summary = item
+            else:
+                yield item
+        returncode = process.wait()
+    finally:
+        timer.cancel()
+        if process.poll() is None:
+            process.kill()
+            process.wait()
+        drain.join()
+        process.stdout.close()
+        process.stderr.close()
+
+    if timed_out.is_set():
+        raise subprocess.TimeoutExpired(cmd, timeout)
+    if summary is None:
+        reason = stderr_tail[-1].strip() if stderr_tail else "no output"
+        summary = {
+            "summary": {
+                "returncode": returncode or 1,
+                "error": f"check_config exited with code {returncode}: {reason}",
+            }
+        }
+    yield summary
+
+
+def problem_finding(problem: Problem) -> Finding:
+    """Return a check problem as a validator finding."""
+    return Finding(
+        f"HA Check: {problem['message']}",
+        code="ha-config",
+        file=problem.get("file"),
+        line=problem.get("line"),
+        path=problem.get("domain"),
+    )
+
+
+def main():
+    """Check a configuration, writing one JSON problem per line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("config_dir", help="Configuration directory to check")
+    parser.add_argument("--domains", nargs="+", help="Only validate these integrations")
+    args = parser.parse_args()
+
+    # Keep stray prints of Home Assistant and integrations off the protocol
+    out = sys.stdout
+    sys.stdout = sys.stderr
+    errors = set()
+    try:
+        for problem in check_problems(args.config_dir, args.domains):
+            if problem["severity"] == "error":
+                errors.add(problem["domain"])
+            out.write(json.dumps(problem) + "\n")
+            out.flush()
+        summary: Dict[str, Any] = {"returncode": len(errors)}
+    except Exception as e:
+        if isinstance(e, ModuleNotFoundError) and e.name == "homeassistant":
+            error = NOT_INSTALLED
+        else:
+            error = f"check_config failed: {e}"
+        summary = {"returncode": 1, "error": error}
+    out.write(json.dumps({"summary": summary}) + "\n")
+    out.flush()
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,331 @@
+#!/usr/bin/env python3
+"""Persistent worker running Home Assistant's check_config on request.
+
+Running ``python -m homeassistant --script check_config`` imports Home
+Assistant and every configured integration from scratch, which takes tens
+of seconds. The worker imports them once and keeps them loaded, and checks
+configurations on request over a Unix socket using a JSON-lines protocol::
+
+    {"command": "status"}
+    {"command": "check", "config_dir": "/path/to/config"}
+    {"command": "check", "config_dir": "/path/to/config", "domains": ["template"]}
+    {"command": "shutdown"}
+
+:class:`CheckConfigClient` starts the worker when it isn't running and
+replaces it when the installed Home Assistant version changes. The worker
+exits after being idle for an hour.
+
+Usage: python tools/ha_check_worker.py [serve|status|stop] [--socket PATH]
+"""
+
+import argparse
+import importlib.metadata
+import json
+import os
+import socket
+import socketserver
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Callable, Dict, List, Optional
+
+if TYPE_CHECKING or __package__:
+    from tools.ha_check import CHECK_TIMEOUT, run_check
+    from tools.validation_cache import DEFAULT_CACHE_DIR
+else:  # Executed as a script from the tools directory
+    from ha_check import CHECK_TIMEOUT, run_check
+    from validation_cache import DEFAULT_CACHE_DIR
+
+DEFAULT_SOCKET_PATH = DEFAULT_CACHE_DIR / "check_config.sock"
+
+# Importing Home Assistant and loading integrations the first time is slow
+START_TIMEOUT = 120
+IDLE_TIMEOUT = 3600
+
+CheckFunction = Callable[[str, Optional[List[str]]], Dict[str, Any]]
+
+
+class WorkerError(Exception):
+    """The worker couldn't be started or didn't answer."""
+
+
+def installed_ha_version() -> Optional[str]:
+    """Return the installed Home Assistant version without importing it."""
+    try:
+        return importlib.metadata.version("homeassistant")
+    except importlib.metadata.PackageNotFoundError:
+        return None
+
+
+class CheckConfigWorker:
+    """Answers worker requests, running one check at a time."""
+
+    def __init__(
+        self,
+        check: CheckFunction = run_check,
+        version: Optional[str] = None,
+    ):
+        """Create a worker running checks with `check`."""
+        self.check = check
+        self.version = version if version is not None else installed_ha_version()
+        self.checks = 0
+        self.last_request = time.monotonic()
+        self.stopping = threading.Event()
+        # check_config patches Home Assistant's loaders while it runs
+        self._lock = threading.Lock()
+
+    def handle_request(self, request: Any) -> Dict[str, Any]:
+        """Answer a single socket request."""
+        self.last_request = time.monotonic()
+        if not isinstance(request, dict):
+            return {"ok": False, "error": "Request must be a JSON object"}
+
+        command = request.get("command")
+        if command == "status":
+            return {
+                "ok": True,
+                "version": self.version,
+                "pid": os.getpid(),
+                "checks": self.checks,
+            }
+        if command == "check":
+            config_dir = request.get("config_dir")
+            if not isinstance(config_dir, str) or not os.path.isdir(config_dir):
+                return {"ok": False, "error": f"Not a directory: {config_dir}"}
+            domains = request.get("domains")
+            if domains is not None and not isinstance(domains, list):
+                return {"ok": False, "error": "domains must be a list"}
+            start = time.perf_counter()
+            with self._lock:
+                try:
+                    response = {"ok": True, **self.check(config_dir, domains)}
+                except Exception as e:
+                    response = {"ok": False, "error": f"check_config failed: {e}"}
+                self.checks += 1
+            response["duration_ms"] = (time.perf_counter() - start) * 1000
+            return response
+        if command == "shutdown":
+            self.stopping.set()
+            return {"ok": True}
+        return {"ok": False, "error": f"Unknown command: {command}"}
+
+
+class WorkerHandler(socketserver.StreamRequestHandler):
+    """Serves JSON-lines requests on one socket connection."""
+
+    def handle(self):
+        """Answer each request line with one response line."""
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                response = self.server.worker.handle_request(json.loads(line))
+            except ValueError as e:
+                response = {"ok": False, "error": f"Invalid request: {e}"}
+            self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+
+if hasattr(socket, "AF_UNIX"):
+
+    class WorkerServer(socketserver.ThreadingUnixStreamServer):
+        """Unix socket server exposing a CheckConfigWorker."""
+
+        daemon_threads = True
+
+        def __init__(self, socket_path: Path, worker: CheckConfigWorker):
+            """Bind to socket_path, replacing a stale socket file."""
+            self.worker = worker
+            self.socket_path = Path(socket_path)
+            self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+            if self.socket_path.exists():
+                self.socket_path.unlink()
+            super().__init__(str(self.socket_path), WorkerHandler)
+            self._socket_inode = self.socket_path.stat().st_ino
+
+        def serve_until_idle(self, idle_timeout: float = IDLE_TIMEOUT):
+            """Serve until shut down or idle for idle_timeout seconds."""
+            self.timeout = 0.5
+            worker = self.worker
+            while not worker.stopping.is_set():
+                self.handle_request()
+                if time.monotonic() - worker.last_request > idle_timeout:
+                    break
+
+        def server_close(self):
+            """Close the socket and remove the socket file.
+
+            The file is left alone if a replacement worker has bound to
+            the same path in the meantime.
+            """
+            super().server_close()
+            try:
+                if self.socket_path.stat().st_ino == self._socket_inode:
+                    self.socket_path.unlink()
+            except OSError:
+                pass
+
+
+class CheckConfigClient:
+    """Talks to the worker, starting or replacing it as needed."""
+
+    def __init__(self, socket_path: Path = DEFAULT_SOCKET_PATH):
+        """Create a client for the worker listening on socket_path."""
+        self.socket_path = Path(socket_path)
+
+    def request(
+        self, request: Dict[str, Any], timeout: float = CHECK_TIMEOUT
+    ) -> Dict[str, Any]:
+        """Send one request and return the response."""
+        try:
+            with socket.socket(socket.AF_UNIX, socket.SOCK_STREAM) as client:
+                client.settimeout(timeout)
+                client.connect(str(self.socket_path))
+                client.sendall(json.dumps(request).encode("utf-8") + b"\n")
+                with client.makefile("rb") as reader:
+                    line = reader.readline()
+        except (OSError, AttributeError) as e:
+            raise WorkerError(f"check_config worker unavailable: {e}") from e
+        if not line:
+            raise WorkerError("check_config worker closed the connection")
+        try:
+            return json.loads(line)
+        except ValueError as e:
+            raise WorkerError(f"check_config worker sent a bad response: {e}") from e
+
+    def status(self) -> Optional[Dict[str, Any]]:
+        """Return the worker's status, or None if it isn't running."""
+        try:
+            return self.request({"command": "status"}, timeout=5)
+        except WorkerError:
+            return None
+
+    def shutdown(self):
+        """Stop the worker if it's running."""
+        try:
+            self.request({"command": "shutdown"}, timeout=5)
+        except WorkerError:
+            return
+        deadline = time.monotonic() + 5
+        while self.socket_path.exists() and time.monotonic() < deadline:
+            time.sleep(0.05)
+
+    def ensure_running(self) -> Dict[str, Any]:
+        """Start the worker, or restart it for a new Home Assistant version."""
+        version = installed_ha_version()
+        if version is None:
+            raise WorkerError("Home Assistant is not installed")
+
+        status = self.status()
+        if status is not None and status.get("version") == version:
+            return status
+        if status is not None:
+            self.shutdown()
+
+        process = self._spawn()
+        deadline = time.monotonic() + START_TIMEOUT
+        while time.monotonic() < deadline:
+            status = self.status()
+            if status is not None:
+                return status
+            if process is not None and process.poll() is not None:
+                raise WorkerError(
+                    f"check_config worker exited, see "
+                    f"{self.socket_path.with_suffix('.log')}"
+                )
+            time.sleep(0.1)
+        raise WorkerError(
+            f"check_config worker didn't start within {START_TIMEOUT} seconds"
+        )
+
+    def _spawn(self) -> Optional[subprocess.Popen]:
+        """Start a worker process that outlives this one."""
+        self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+        log_path = self.socket_path.with_suffix(".log")
+        with open(log_path, "ab") as log:
+            return subprocess.Popen(
+                [
+                    sys.executable,
+                    str(Path(__file__).resolve()),
+                    "serve",
+                    "--socket",
+                    str(self.socket_path),
+                ],
+                stdin=subprocess.DEVNULL,
+                stdout=log,
+                stderr=log,
+                start_new_session=True,
+            )
+
+    def check(
+        self, config_dir: Path, domains: Optional[List[str]] = None
+    ) -> Dict[str, Any]:
+        """Check a configuration directory, or some of its domains."""
+        self.ensure_running()
+        request: Dict[str, Any] = {
+            "command": "check",
+            "config_dir": str(Path(config_dir).resolve()),
+        }
+        if domains is not None:
+            request["domains"] = domains
+        response = self.request(request)
+        if not response.get("ok"):
+            raise WorkerError(response.get("error", "check_config failed"))
+        return response
+
+
+def serve(socket_path: Path, idle_timeout: float):
+    """Import Home Assistant and serve checks until idle."""
+    # Pay for the imports once, before accepting requests
+    from homeassistant.scripts import check_config  # noqa: F401
+
+    server = WorkerServer(socket_path, CheckConfigWorker())
+    try:
+        server.serve_until_idle(idle_timeout)
+    finally:
+        server.server_close()
+
+
+def main():
+    """Run, query or stop the worker from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument(
+        "command",
+        nargs="?",
+        default="serve",
+        choices=["serve", "status", "stop"],
+        help="Run the worker, show its status or stop it",
+    )
+    parser.add_argument(
+        "--socket", default=str(DEFAULT_SOCKET_PATH), help="Unix socket path"
+    )
+    parser.add_argument(
+        "--idle-timeout",
+        type=float,
+        default=IDLE_TIMEOUT,
+        help="Seconds without requests after which the worker exits",
+    )
+    args = parser.parse_args()
+
+    if args.command == "serve":
+        serve(Path(args.socket), args.idle_timeout)
+        return
+
+    client = CheckConfigClient(Path(args.socket))
+    if args.command == "stop":
+        client.shutdown()
+        return
+    status = client.status()
+    if status is None:
+        print("check_config worker is not running")
+        sys.exit(1)
+    print(
+        f"check_config worker {status['pid']} running Home Assistant "
+        f"{status['version']}, {status['checks']} checks"
+    )
+
+
+if __name__ == "__main__":
+    main()
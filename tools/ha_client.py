@@ -0,0 +1,137 @@
+"""Client for the Home Assistant REST API shared by the tools.
+
+All requests go through one ``requests`` session, so connections to Home
+Assistant are pooled and kept alive between requests. Requests that fail
+with a connection error or a 502/503/504 response are retried with
+exponential backoff, except for non-idempotent ones like service calls.
+:meth:`HAClient.get_all` fetches several endpoints concurrently, so probing
+a slow instance takes about as long as its slowest response::
+
+    with HAClient.from_env() as client:
+        config, states = client.get_all(["/api/config", "/api/states"])
+"""
+
+import os
+from concurrent.futures import ThreadPoolExecutor
+from pathlib import Path
+from typing import Any, List, Optional, Union
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+DEFAULT_URL = "http://homeassistant.local:8123"
+DEFAULT_TIMEOUT = 10
+# Concurrent requests, and connections kept open to Home Assistant
+DEFAULT_CONCURRENCY = 8
+DEFAULT_RETRIES = 3
+DEFAULT_BACKOFF = 0.5
+RETRY_STATUSES = (502, 503, 504)
+
+# What get_all() returns for each endpoint
+Result = Union[requests.Response, requests.RequestException]
+
+
+def load_env_file(env_file: Optional[Path] = None):
+    """Load environment variables from a .env file, by default ./.env."""
+    if env_file is None:
+        env_file = Path(".env")
+    if env_file.exists():
+        with open(env_file) as f:
+            for line in f:
+                line = line.strip()
+                if line and not line.startswith("#") and "=" in line:
+                    key, value = line.split("=", 1)
+                    os.environ[key.strip()] = value.strip().strip('"').strip("'")
+
+
+class HAClient:
+    """A pooled, retrying session for one Home Assistant instance."""
+
+    def __init__(
+        self,
+        url: str = DEFAULT_URL,
+        token: str = "",
+        timeout: float = DEFAULT_TIMEOUT,
+        concurrency: int = DEFAULT_CONCURRENCY,
+        retries: int = DEFAULT_RETRIES,
+        backoff: float = DEFAULT_BACKOFF,
+    ):
+        """Create a client for the instance at url, authenticated by token.
+
+        backoff is the delay before the first retry in seconds, doubling
+        with each further retry.
+        """
+        self.url = url.rstrip("/")
+        self.token = token
+        self.timeout = timeout
+        self.concurrency = concurrency
+
+        retry = Retry(
+            total=retries,
+            backoff_factor=backoff,
+            status_forcelist=RETRY_STATUSES,
+            # Hand the last response to the caller rather than raising
+            raise_on_status=False,
+        )
+        adapter = HTTPAdapter(
+            pool_connections=1, pool_maxsize=concurrency, max_retries=retry
+        )
+        self.session = requests.Session()
+        self.session.mount("http://", adapter)
+        self.session.mount("https://", adapter)
+        if token:
+            self.session.headers["Authorization"] = f"Bearer {token}"
+
+    @classmethod
+    def from_env(cls, **kwargs: Any) -> "HAClient":
+        """Create a client for HA_URL and HA_TOKEN, loading .env first."""
+        load_env_file()
+        return cls(
+            os.getenv("HA_URL", DEFAULT_URL), os.getenv("HA_TOKEN", ""), **kwargs
+        )
+
+    def __enter__(self) -> "HAClient":
+        """Use the client as a context manager closing its connections."""
+        return self
+
+    def __exit__(self, *exc_info: Any):
+        """Close the client's connections."""
+        self.close()
+
+    def close(self):
+        """Close the pooled connections."""
+        self.session.close()
+
+    def request(self, method: str, path: str, **kwargs: Any) -> requests.Response:
+        """Send a request to an API path like /api/states."""
+        kwargs.setdefault("timeout", self.timeout)
+        return self.session.request(method, f"{self.url}{path}", **kwargs)
+
+    def get(self, path: str, **kwargs: Any) -> requests.Response:
+        """Send a GET request."""
+        return self.request("GET", path, **kwargs)
+
+    def post(
+        self, path: str, json: Optional[Any] = None, **kwargs: Any
+    ) -> requests.Response:
+        """Send a POST request with a JSON body."""
+        return self.request("POST", path, json=json, **kwargs)
+
+    def get_all(self, paths: List[str], **kwargs: Any) -> List[Result]:
+        """GET several paths concurrently.
+
+        Returns the response for each path in order, or the exception its
+        request failed with.
+        """
+
+        def fetch(path: str) -> Result:
+            try:
+                return self.get(path, **kwargs)
+            except requests.RequestException as e:
+                return e
+
+        if len(paths) <= 1 or self.concurrency <= 1:
+            return [fetch(path) for path in paths]
+        with ThreadPoolExecutor(min(self.concurrency, len(paths))) as executor:
+            return list(executor.map(fetch, paths))
@@ -5,85 +5,40 @@ This script performs deep validation using Home Assistant's own
 configuration checking.
 """
 
+import argparse
 import subprocess
 import sys
 from pathlib import Path
-from typing import Any, Dict, List
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
 
 import yaml
 
-
-class HAYamlLoader(yaml.SafeLoader):
-    """Custom YAML loader that handles Home Assistant specific tags."""
-
-    pass
-
-
-def include_constructor(loader, node):
-    """Handle !include tag."""
-    filename = loader.construct_scalar(node)
-    return f"!include {filename}"
-
-def include_dir_named_constructor(loader, node):
-    """Handle !include_dir_named tag."""
-    dirname = loader.construct_scalar(node)
-    return f"!include_dir_named {dirname}"
-
-def include_dir_merge_named_constructor(loader, node):
-    """Handle !include_dir_merge_named tag."""
-    dirname = loader.construct_scalar(node)
-    return f"!include_dir_merge_named {dirname}"
-
-
-def include_dir_merge_list_constructor(loader, node):
-    """Handle !include_dir_merge_list tag."""
-    dirname = loader.construct_scalar(node)
-    return f"!include_dir_merge_list {dirname}"
-
-
-def include_dir_list_constructor(loader, node):
-    """Handle !include_dir_list tag."""
-    dirname = loader.construct_scalar(node)
-    return f"!include_dir_list {dirname}"
-
-
-def input_constructor(loader, node):
-    """Handle !input tag for blueprints."""
-    input_name = loader.construct_scalar(node)
-    return f"!input {input_name}"
-
-
-def secret_constructor(loader, node):
-    """Handle !secret tag."""
-    secret_name = loader.construct_scalar(node)
-    return f"!secret {secret_name}"
-
-
-# Register custom constructors
-HAYamlLoader.add_constructor("!include", include_constructor)
-HAYamlLoader.add_constructor(
-    "!include_dir_named", include_dir_named_constructor
-)
-HAYamlLoader.add_constructor(
-    "!include_dir_merge_named", include_dir_merge_named_constructor
-)
-HAYamlLoader.add_constructor(
-    "!include_dir_merge_list", include_dir_merge_list_constructor
-)
-HAYamlLoader.add_constructor("!include_dir_list", include_dir_list_constructor)
-HAYamlLoader.add_constructor("!input", input_constructor)
-HAYamlLoader.add_constructor("!secret", secret_constructor)
+if TYPE_CHECKING or __package__:
+    from tools.change_set import affected_domains
+    from tools.findings import FindingList, add_format_argument, run_with_format
+    from tools.ha_check import problem_finding, stream_check
+    from tools.ha_yaml import DocumentCache, HAYamlLoader, IncludeResolver
+else:  # Executed as a script from the tools directory
+    from change_set import affected_domains
+    from findings import FindingList, add_format_argument, run_with_format
+    from ha_check import problem_finding, stream_check
+    from ha_yaml import DocumentCache, HAYamlLoader, IncludeResolver
 
 
 class HAConfigValidator:
     """Validates Home Assistant configuration using HA's check_config tool."""
 
-    def __init__(self, config_dir: str = "config"):
+    def __init__(
+        self,
+        config_dir: str = "config",
+        document_cache: Optional[DocumentCache] = None,
+    ):
         """Initialize the validator with config directory."""
         self.config_dir = Path(config_dir).resolve()
-        self.errors: List[str] = []
-        self.warnings: List[str] = []
+        self.errors = FindingList("error", "ha_config_validator")
+        self.warnings = FindingList("warning", "ha_config_validator")
         self.info: List[str] = []
+        self.document_cache = document_cache or DocumentCache(HAYamlLoader)
 
     def check_ha_installation(self) -> bool:
         """Check if Home Assistant is available for configuration checking."""
@@ -120,87 +75,42 @@ class HAConfigValidator:
         )
         return False
 
-    def run_ha_check_config(self) -> bool:
-        """Run Home Assistant's check_config script."""
-        if not self.check_ha_installation():
-            return self.run_basic_validation()
+    def run_ha_check_config(
+        self, domains: Optional[List[str]] = None
+    ) -> Optional[bool]:
+        """Run Home Assistant's check_config script, on some domains if given.
 
+        Returns None for a scoped check Home Assistant can't run, in which
+        case the whole configuration must be checked.
+        """
+        if domains is not None:
+            self.info.append(f"HA Check: validating {', '.join(domains)} only")
         try:
-            # First try the hass command
-            cmd = [
-                "hass",
-                "--config",
-                str(self.config_dir),
-                "--script",
-                "check_config",
-            ]
-            result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
-
-            if result.returncode != 0 and "No module named" in result.stderr:
-                # Try alternative command
-                cmd = [
-                    "python",
-                    "-m",
-                    "homeassistant",
-                    "--config",
-                    str(self.config_dir),
-                    "--script",
-                    "check_config",
-                ]
-                result = subprocess.run(cmd, capture_output=True, text=True, timeout=60)
-
-            # Parse output
-            if result.stdout:
-                self.parse_check_config_output(result.stdout)
-
-            if result.stderr:
-                self.parse_check_config_errors(result.stderr)
-
-            return result.returncode == 0
-
+            for item in stream_check(self.config_dir, domains, timeout=60):
+                if "summary" in item:
+                    summary = item["summary"]
+                elif item["severity"] == "error":
+                    self.errors.append(problem_finding(item))
+                else:
+                    self.warnings.append(problem_finding(item))
         except subprocess.TimeoutExpired:
             self.errors.append("Home Assistant configuration check timed out")
             return False
-        except Exception as e:
+        except OSError as e:
             self.errors.append(f"Failed to run HA config check: {e}")
             return self.run_basic_validation()
 
-    def parse_check_config_output(self, output: str):
-        """Parse Home Assistant check_config output."""
-        lines = output.split("\n")
-
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-
-            # Look for common patterns
-            if line.startswith("ERROR"):
-                self.errors.append(f"HA Check: {line}")
-            elif line.startswith("WARNING"):
-                self.warnings.append(f"HA Check: {line}")
-            elif "successful" in line.lower():
-                self.info.append(f"HA Check: {line}")
-            elif "error" in line.lower():
-                self.errors.append(f"HA Check: {line}")
-            elif "warning" in line.lower():
-                self.warnings.append(f"HA Check: {line}")
-
-    def parse_check_config_errors(self, stderr: str):
-        """Parse Home Assistant check_config error output."""
-        lines = stderr.split("\n")
-
-        for line in lines:
-            line = line.strip()
-            if not line:
-                continue
-
-            # Filter out common non-error messages
-            if any(x in line.lower() for x in ["debug", "info", "starting"]):
-                continue
-
-            if line:
-                self.errors.append(f"HA Error: {line}")
+        if "error" in summary:
+            if domains is not None:
+                # An older Home Assistant that checks differently
+                self.info.append(
+                    f"HA Check: scoped check unavailable ({summary['error']})"
+                )
+                return None
+            # Home Assistant is installed for another interpreter, or broke
+            self.warnings.append(f"HA config check unavailable: {summary['error']}")
+            return self.run_basic_validation()
+        return summary["returncode"] == 0
 
     def run_basic_validation(self) -> bool:
         """Run basic configuration validation without HA."""
@@ -214,8 +124,7 @@ class HAConfigValidator:
 
         # Validate configuration.yaml syntax and basic structure
         try:
-            with open(config_file, "r") as f:
-                config = yaml.safe_load(f)
+            config = self.document_cache.load(config_file)
 
             if not isinstance(config, dict):
                 self.errors.append("configuration.yaml must contain a dictionary")
@@ -314,8 +223,7 @@ class HAConfigValidator:
             return
 
         try:
-            with open(automations_file, "r") as f:
-                automations = yaml.safe_load(f)
+            automations = self.document_cache.load(automations_file)
 
             if automations is not None and not isinstance(automations, list):
                 self.errors.append("automations.yaml must contain a list")
@@ -351,8 +259,7 @@ class HAConfigValidator:
             return
 
         try:
-            with open(scripts_file, "r") as f:
-                scripts = yaml.safe_load(f)
+            scripts = self.document_cache.load(scripts_file)
 
             if scripts is not None and not isinstance(scripts, dict):
                 self.errors.append("scripts.yaml must contain a dictionary")
@@ -388,8 +295,7 @@ class HAConfigValidator:
             return
 
         try:
-            with open(secrets_file, "r") as f:
-                secrets = yaml.safe_load(f)
+            secrets = self.document_cache.load(secrets_file)
 
             if secrets is not None and not isinstance(secrets, dict):
                 self.errors.append("secrets.yaml must contain a dictionary")
@@ -401,14 +307,35 @@ class HAConfigValidator:
         except Exception as e:
             self.errors.append(f"Error reading secrets.yaml: {e}")
 
-    def validate_all(self) -> bool:
-        """Run all validation checks."""
+    def validate_all(self, files: Optional[List[Path]] = None) -> bool:
+        """Run all validation checks.
+
+        With the list of changed files, Home Assistant only validates the
+        integrations configured in them.
+        """
         if not self.config_dir.exists():
             self.errors.append(f"Config directory {self.config_dir} does not exist")
             return False
 
         # Try HA's built-in validation first
-        return self.run_ha_check_config()
+        if not self.check_ha_installation():
+            return self.run_basic_validation()
+
+        if files is not None:
+            domains = affected_domains(
+                self.config_dir,
+                files,
+                IncludeResolver(self.config_dir, self.document_cache),
+            )
+            if domains is not None and not domains:
+                self.info.append("HA Check: no integration configuration changed")
+                return True
+            if domains is not None:
+                is_valid = self.run_ha_check_config(sorted(domains))
+                if is_valid is not None:
+                    return is_valid
+
+        return bool(self.run_ha_check_config())
 
     def print_results(self):
         """Print validation results."""
@@ -440,11 +367,24 @@ class HAConfigValidator:
 
 def main():
     """Run main function for command line usage."""
-    config_dir = sys.argv[1] if len(sys.argv) > 1 else "config"
-
-    validator = HAConfigValidator(config_dir)
-    is_valid = validator.validate_all()
-    validator.print_results()
+    parser = argparse.ArgumentParser(
+        description="Validate Home Assistant configuration with check_config"
+    )
+    parser.add_argument("config_dir", nargs="?", default="config")
+    parser.add_argument(
+        "--changed-files",
+        nargs="*",
+        type=Path,
+        metavar="FILE",
+        help="Only validate the integrations configured in these files",
+    )
+    add_format_argument(parser)
+    args = parser.parse_args()
+
+    validator = HAConfigValidator(args.config_dir)
+    is_valid = run_with_format(
+        validator, lambda: validator.validate_all(args.changed_files), args.format
+    )
 
     sys.exit(0 if is_valid else 1)
 
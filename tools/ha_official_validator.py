@@ -5,123 +5,103 @@ This leverages Home Assistant's own validation tools for the most
 accurate results.
 """
 
+import argparse
 import subprocess
 import sys
 from pathlib import Path
-from typing import List
+from typing import TYPE_CHECKING, Any, Dict, List, Optional
+
+if TYPE_CHECKING or __package__:
+    from tools.change_set import affected_domains
+    from tools.findings import FindingList, add_format_argument, run_with_format
+    from tools.ha_check import problem_finding, stream_check
+    from tools.ha_check_worker import (
+        DEFAULT_SOCKET_PATH,
+        CheckConfigClient,
+        WorkerError,
+    )
+    from tools.ha_yaml import IncludeResolver
+else:  # Executed as a script from the tools directory
+    from change_set import affected_domains
+    from findings import FindingList, add_format_argument, run_with_format
+    from ha_check import problem_finding, stream_check
+    from ha_check_worker import DEFAULT_SOCKET_PATH, CheckConfigClient, WorkerError
+    from ha_yaml import IncludeResolver
 
 
 class HAOfficialValidator:
     """Validates Home Assistant configuration using the official HA package."""
 
-    def __init__(self, config_dir: str = "config"):
-        """Initialize the HAOfficialValidator."""
+    def __init__(
+        self, config_dir: str = "config", worker_socket: Optional[Path] = None
+    ):
+        """Initialize the HAOfficialValidator.
+
+        With a worker_socket, checks run in a persistent check_config worker
+        listening there, which is started if needed.
+        """
         self.config_dir = Path(config_dir).resolve()
-        self.errors: List[str] = []
-        self.warnings: List[str] = []
+        self.errors = FindingList("error", "ha_official_validator")
+        self.warnings = FindingList("warning", "ha_official_validator")
         self.info: List[str] = []
+        self.worker_socket = worker_socket
+
+    def run_ha_check_config(
+        self, domains: Optional[List[str]] = None
+    ) -> Optional[bool]:
+        """Run Home Assistant's config check, on some domains if given.
+
+        Returns None for a scoped check Home Assistant can't run, in which
+        case the whole configuration must be checked.
+        """
+        if domains is not None:
+            self.info.append(f"HA Check: validating {', '.join(domains)} only")
+        if self.worker_socket is not None:
+            try:
+                client = CheckConfigClient(self.worker_socket)
+                result = client.check(self.config_dir, domains)
+            except WorkerError as e:
+                self.info.append(f"Running check_config directly: {e}")
+            else:
+                for problem in result["problems"]:
+                    self.add_check_problem(problem)
+                return result["returncode"] == 0
 
-    def run_ha_check_config(self) -> bool:
-        """Run Home Assistant's official check_config script."""
         try:
-            # Use the hass command to check configuration
-            cmd = [
-                sys.executable,
-                "-m",
-                "homeassistant",
-                "--config",
-                str(self.config_dir),
-                "--script",
-                "check_config",
-            ]
-
-            # Run the command
-            result = subprocess.run(
-                cmd,
-                capture_output=True,
-                text=True,
-                timeout=120,
-                cwd=str(self.config_dir),
-            )
-
-            # Parse the output
-            self.parse_check_config_output(result.stdout, result.stderr)
-
-            # Return success if exit code is 0
-            return result.returncode == 0
-
+            for item in stream_check(self.config_dir, domains):
+                if "summary" in item:
+                    summary = item["summary"]
+                else:
+                    self.add_check_problem(item)
         except subprocess.TimeoutExpired:
             self.errors.append("Home Assistant configuration check timed out")
             return False
-        except FileNotFoundError:
-            self.errors.append(
-                "Home Assistant not found. "
-                "Please install with: pip install homeassistant"
-            )
-            return False
-        except Exception as e:
+        except OSError as e:
             self.errors.append(f"Failed to run Home Assistant config check: {e}")
             return False
 
-    def parse_check_config_output(self, stdout: str, stderr: str):
-        """Parse Home Assistant check_config output."""
-        # Parse stdout
-        if stdout:
-            lines = stdout.split("\n")
-            for line in lines:
-                line = line.strip()
-                if not line:
-                    continue
-
-                # Look for specific patterns
-                if "Testing configuration at" in line:
-                    self.info.append(f"HA Check: {line}")
-                elif "Configuration check successful!" in line:
-                    self.info.append(f"HA Check: {line}")
-                elif "errors" in line.lower() and "found" in line.lower():
-                    if "0 errors" in line.lower():
-                        self.info.append(f"HA Check: {line}")
-                    else:
-                        self.errors.append(f"HA Check: {line}")
-                elif "ERROR" in line or "Error" in line:
-                    self.errors.append(f"HA Check: {line}")
-                elif "WARNING" in line or "Warning" in line:
-                    self.warnings.append(f"HA Check: {line}")
-                else:
-                    # Include other informational lines
-                    if line and not line.startswith("INFO:"):
-                        self.info.append(f"HA Check: {line}")
-
-        # Parse stderr for actual errors
-        if stderr:
-            lines = stderr.split("\n")
-            for line in lines:
-                line = line.strip()
-                if not line:
-                    continue
-
-                # Filter out debug/info messages
-                if any(x in line.lower() for x in ["debug", "info:", "starting"]):
-                    continue
-
-                # Skip common non-error messages
-                if any(
-                    x in line.lower()
-                    for x in [
-                        "voluptuous",
-                        "setup of domain",
-                        "setup of platform",
-                        "loading",
-                        "initialized",
-                    ]
-                ):
-                    continue
-
-                # This is likely an actual error
-                self.errors.append(f"HA Error: {line}")
-
-    def validate_all(self) -> bool:
-        """Run complete validation using Home Assistant."""
+        if "error" in summary:
+            if domains is not None:
+                # An older Home Assistant that checks differently
+                self.info.append(
+                    f"HA Check: scoped check unavailable ({summary['error']})"
+                )
+                return None
+            self.errors.append(summary["error"])
+            return False
+        return summary["returncode"] == 0
+
+    def add_check_problem(self, problem: Dict[str, Any]):
+        """Add an error or warning found by Home Assistant's check."""
+        findings = self.errors if problem["severity"] == "error" else self.warnings
+        findings.append(problem_finding(problem))
+
+    def validate_all(self, files: Optional[List[Path]] = None) -> bool:
+        """Run validation using Home Assistant.
+
+        With the list of changed files, only the integrations configured in
+        them are validated.
+        """
         if not self.config_dir.exists():
             self.errors.append(f"Config directory {self.config_dir} does not exist")
             return False
@@ -132,8 +112,20 @@ class HAOfficialValidator:
             self.errors.append("configuration.yaml not found")
             return False
 
+        if files is not None:
+            domains = affected_domains(
+                self.config_dir, files, IncludeResolver(self.config_dir)
+            )
+            if domains is not None and not domains:
+                self.info.append("HA Check: no integration configuration changed")
+                return True
+            if domains is not None:
+                is_valid = self.run_ha_check_config(sorted(domains))
+                if is_valid is not None:
+                    return is_valid
+
         # Run the official Home Assistant validation
-        return self.run_ha_check_config()
+        return bool(self.run_ha_check_config())
 
     def print_results(self):
         """Print validation results."""
@@ -165,11 +157,35 @@ class HAOfficialValidator:
 
 def main():
     """Run Home Assistant configuration validation from command line."""
-    config_dir = sys.argv[1] if len(sys.argv) > 1 else "config"
-
-    validator = HAOfficialValidator(config_dir)
-    is_valid = validator.validate_all()
-    validator.print_results()
+    parser = argparse.ArgumentParser(
+        description="Validate configuration with the official Home Assistant package"
+    )
+    parser.add_argument("config_dir", nargs="?", default="config")
+    parser.add_argument(
+        "--worker",
+        action="store_true",
+        help="Check in a persistent worker that keeps Home Assistant loaded",
+    )
+    parser.add_argument(
+        "--worker-socket",
+        default=str(DEFAULT_SOCKET_PATH),
+        help="Unix socket of the check_config worker",
+    )
+    parser.add_argument(
+        "--changed-files",
+        nargs="*",
+        type=Path,
+        metavar="FILE",
+        help="Only validate the integrations configured in these files",
+    )
+    add_format_argument(parser)
+    args = parser.parse_args()
+
+    worker_socket = Path(args.worker_socket) if args.worker else None
+    validator = HAOfficialValidator(args.config_dir, worker_socket)
+    is_valid = run_with_format(
+        validator, lambda: validator.validate_all(args.changed_files), args.format
+    )
 
     sys.exit(0 if is_valid else 1)
 
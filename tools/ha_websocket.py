@@ -0,0 +1,449 @@
+#!/usr/bin/env python3
+"""Fetch registries and states over the Home Assistant WebSocket API.
+
+The entity, device and area registries are only exposed over the WebSocket
+API. :class:`HAWebSocketClient` authenticates once and pipelines commands
+over a single connection, sending all of them before reading any response,
+so fetching the three registries and every state takes one round trip::
+
+    async with HAWebSocketClient(url, token) as client:
+        registries = await client.fetch_registries()
+
+The registries can then be written to ``.storage`` in the format the other
+tools read, refreshing them without copying the files from the instance.
+
+Only the standard library is used: the client speaks just as much of the
+WebSocket protocol (RFC 6455) as Home Assistant's JSON messages need.
+
+Usage: python tools/ha_websocket.py [config_dir] [--write-storage]
+"""
+
+import argparse
+import asyncio
+import base64
+import hashlib
+import json
+import os
+import ssl
+import struct
+import sys
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+from urllib.parse import urlsplit, urlunsplit
+
+if TYPE_CHECKING or __package__:
+    from tools.ha_client import DEFAULT_URL, load_env_file
+else:  # Executed as a script from the tools directory
+    from ha_client import DEFAULT_URL, load_env_file
+
+DEFAULT_TIMEOUT = 30
+# States of a large instance run to tens of megabytes
+MAX_MESSAGE_SIZE = 256 << 20
+
+# Fetched by fetch_registries(), by the key of its result
+REGISTRY_COMMANDS = {
+    "entities": "config/entity_registry/list",
+    "devices": "config/device_registry/list",
+    "areas": "config/area_registry/list",
+    "states": "get_states",
+}
+
+# .storage file and collection of each registry
+STORAGE_FILES = {
+    "entities": ("core.entity_registry", "entities"),
+    "devices": ("core.device_registry", "devices"),
+    "areas": ("core.area_registry", "areas"),
+}
+
+_HANDSHAKE_GUID = "258EAFA5-E914-47DA-95CA-C5AB0DC85B11"
+
+OP_CONTINUATION = 0x0
+OP_TEXT = 0x1
+OP_BINARY = 0x2
+OP_CLOSE = 0x8
+OP_PING = 0x9
+OP_PONG = 0xA
+
+
+class WebSocketError(Exception):
+    """The WebSocket connection failed or was closed."""
+
+
+class AuthenticationError(WebSocketError):
+    """Home Assistant rejected the access token."""
+
+
+class CommandError(WebSocketError):
+    """Home Assistant answered a command with an error."""
+
+    def __init__(self, command: str, code: Optional[str], message: str):
+        """Describe the error of a command."""
+        # Keeping the arguments in args lets the error be pickled and copied
+        super().__init__(command, code, message)
+        self.command = command
+        self.code = code
+        self.message = message
+
+    def __str__(self) -> str:
+        """Name the failed command and Home Assistant's error."""
+        return f"{self.command} failed: {self.message} ({self.code})"
+
+
+def websocket_url(url: str) -> str:
+    """Return the WebSocket API URL of an instance's HTTP URL."""
+    parts = urlsplit(url)
+    scheme = {"http": "ws", "https": "wss"}.get(parts.scheme, parts.scheme)
+    path = parts.path.rstrip("/")
+    if not path.endswith("/api/websocket"):
+        path += "/api/websocket"
+    return urlunsplit((scheme, parts.netloc, path, "", ""))
+
+
+def accept_key(key: str) -> str:
+    """Return the Sec-WebSocket-Accept answer to a handshake key."""
+    digest = hashlib.sha1((key + _HANDSHAKE_GUID).encode("ascii")).digest()
+    return base64.b64encode(digest).decode("ascii")
+
+
+def _apply_mask(data: bytes, mask: bytes) -> bytes:
+    """XOR data with a repeated 4-byte mask."""
+    if not data:
+        return data
+    # One integer operation, rather than a Python loop over every byte
+    repeated = (mask * (len(data) // 4 + 1))[: len(data)]
+    masked = int.from_bytes(data, "big") ^ int.from_bytes(repeated, "big")
+    return masked.to_bytes(len(data), "big")
+
+
+def encode_frame(opcode: int, payload: bytes, masked: bool = True) -> bytes:
+    """Encode a final frame; clients must mask the frames they send."""
+    header = bytearray([0x80 | opcode])
+    mask_bit = 0x80 if masked else 0
+    if len(payload) < 126:
+        header.append(mask_bit | len(payload))
+    elif len(payload) < 1 << 16:
+        header.append(mask_bit | 126)
+        header += struct.pack("!H", len(payload))
+    else:
+        header.append(mask_bit | 127)
+        header += struct.pack("!Q", len(payload))
+    if not masked:
+        return bytes(header) + payload
+    mask = os.urandom(4)
+    return bytes(header) + mask + _apply_mask(payload, mask)
+
+
+async def read_frame(
+    reader: asyncio.StreamReader, max_size: int = MAX_MESSAGE_SIZE
+) -> Tuple[bool, int, bytes]:
+    """Read one frame and return whether it's final, its opcode and payload."""
+    first, second = await reader.readexactly(2)
+    length = second & 0x7F
+    if length == 126:
+        (length,) = struct.unpack("!H", await reader.readexactly(2))
+    elif length == 127:
+        (length,) = struct.unpack("!Q", await reader.readexactly(8))
+    if length > max_size:
+        raise WebSocketError(f"WebSocket frame of {length} bytes is too large")
+    mask = await reader.readexactly(4) if second & 0x80 else b""
+    payload = await reader.readexactly(length)
+    if mask:
+        payload = _apply_mask(payload, mask)
+    return bool(first & 0x80), first & 0x0F, payload
+
+
+class WebSocket:
+    """A client WebSocket connection exchanging text messages."""
+
+    def __init__(
+        self,
+        reader: asyncio.StreamReader,
+        writer: asyncio.StreamWriter,
+        max_size: int = MAX_MESSAGE_SIZE,
+    ):
+        """Wrap an upgraded connection."""
+        self.reader = reader
+        self.writer = writer
+        self.max_size = max_size
+
+    @classmethod
+    async def connect(cls, url: str) -> "WebSocket":
+        """Open a connection to a ws:// or wss:// URL."""
+        parts = urlsplit(url)
+        secure = parts.scheme == "wss"
+        try:
+            reader, writer = await asyncio.open_connection(
+                parts.hostname,
+                parts.port or (443 if secure else 80),
+                ssl=ssl.create_default_context() if secure else None,
+            )
+        except OSError as e:
+            raise WebSocketError(f"Cannot connect to {url}: {e}") from e
+
+        key = base64.b64encode(os.urandom(16)).decode("ascii")
+        writer.write(
+            (
+                f"GET {parts.path or '/'} HTTP/1.1\r\n"
+                f"Host: {parts.netloc}\r\n"
+                "Upgrade: websocket\r\n"
+                "Connection: Upgrade\r\n"
+                f"Sec-WebSocket-Key: {key}\r\n"
+                "Sec-WebSocket-Version: 13\r\n"
+                "\r\n"
+            ).encode("ascii")
+        )
+        await writer.drain()
+
+        status = (await reader.readline()).decode("latin-1").strip()
+        headers = {}
+        while True:
+            line = (await reader.readline()).decode("latin-1").strip()
+            if not line:
+                break
+            name, _sep, value = line.partition(":")
+            headers[name.strip().lower()] = value.strip()
+        if status.split(" ")[1:2] != ["101"]:
+            writer.close()
+            raise WebSocketError(f"WebSocket upgrade refused: {status or 'no answer'}")
+        if headers.get("sec-websocket-accept") != accept_key(key):
+            writer.close()
+            raise WebSocketError("WebSocket upgrade answered with a wrong key")
+        return cls(reader, writer)
+
+    async def send(self, *messages: str):
+        """Send text messages, flushing them together."""
+        for message in messages:
+            self.writer.write(encode_frame(OP_TEXT, message.encode("utf-8")))
+        await self.writer.drain()
+
+    async def receive(self) -> str:
+        """Return the next text message, answering pings on the way."""
+        fragments: List[bytes] = []
+        size = 0
+        try:
+            while True:
+                fin, opcode, payload = await read_frame(self.reader, self.max_size)
+                if opcode == OP_PING:
+                    self.writer.write(encode_frame(OP_PONG, payload))
+                    continue
+                if opcode == OP_PONG:
+                    continue
+                if opcode == OP_CLOSE:
+                    raise WebSocketError("WebSocket closed by Home Assistant")
+                if opcode not in (OP_TEXT, OP_BINARY, OP_CONTINUATION):
+                    raise WebSocketError(f"Unexpected WebSocket opcode {opcode}")
+                size += len(payload)
+                if size > self.max_size:
+                    raise WebSocketError(f"WebSocket message over {size} bytes")
+                fragments.append(payload)
+                if fin:
+                    return b"".join(fragments).decode("utf-8")
+        except asyncio.IncompleteReadError as e:
+            raise WebSocketError("WebSocket connection lost") from e
+
+    async def close(self):
+        """Close the connection, telling the server first."""
+        try:
+            self.writer.write(encode_frame(OP_CLOSE, struct.pack("!H", 1000)))
+            await self.writer.drain()
+        except (OSError, RuntimeError):
+            pass
+        self.writer.close()
+        try:
+            await self.writer.wait_closed()
+        except OSError:
+            pass
+
+
+class HAWebSocketClient:
+    """An authenticated connection to Home Assistant's WebSocket API."""
+
+    def __init__(self, url: str, token: str, timeout: float = DEFAULT_TIMEOUT):
+        """Create a client for the instance at an http(s):// or ws(s):// URL."""
+        self.url = websocket_url(url)
+        self.token = token
+        self.timeout = timeout
+        self.ha_version: Optional[str] = None
+        self._socket: Optional[WebSocket] = None
+        self._next_id = 1
+
+    async def __aenter__(self) -> "HAWebSocketClient":
+        """Connect and authenticate."""
+        await self.connect()
+        return self
+
+    async def __aexit__(self, *exc_info: Any):
+        """Close the connection."""
+        await self.close()
+
+    async def connect(self):
+        """Connect and authenticate with the access token."""
+        async with asyncio.timeout(self.timeout):
+            self._socket = await WebSocket.connect(self.url)
+            try:
+                (message,) = await self._receive()
+                if message.get("type") != "auth_required":
+                    raise WebSocketError(f"Unexpected greeting: {message}")
+                await self._socket.send(
+                    json.dumps({"type": "auth", "access_token": self.token})
+                )
+                (message,) = await self._receive()
+            except BaseException:
+                await self.close()
+                raise
+        if message.get("type") != "auth_ok":
+            await self.close()
+            raise AuthenticationError(message.get("message", "Invalid access token"))
+        self.ha_version = message.get("ha_version")
+
+    async def close(self):
+        """Close the connection if it's open."""
+        if self._socket is not None:
+            await self._socket.close()
+            self._socket = None
+
+    async def _receive(self) -> List[Dict[str, Any]]:
+        """Return the messages of the next frame, which may hold several."""
+        assert self._socket is not None, "Not connected"
+        data = json.loads(await self._socket.receive())
+        return data if isinstance(data, list) else [data]
+
+    async def commands(self, commands: List[Dict[str, Any]]) -> List[Any]:
+        """Send commands at once and return their results in order.
+
+        Raises CommandError for the first command that failed.
+        """
+        if self._socket is None:
+            raise WebSocketError("Not connected")
+        ids = list(range(self._next_id, self._next_id + len(commands)))
+        self._next_id += len(commands)
+        await self._socket.send(
+            *(json.dumps({**command, "id": id_}) for id_, command in zip(ids, commands))
+        )
+
+        responses: Dict[int, Dict[str, Any]] = {}
+        async with asyncio.timeout(self.timeout):
+            while len(responses) < len(ids):
+                for message in await self._receive():
+                    if message.get("type") == "result" and message.get("id") in ids:
+                        responses[message["id"]] = message
+
+        results = []
+        for id_, command in zip(ids, commands):
+            response = responses[id_]
+            if not response.get("success"):
+                error = response.get("error") or {}
+                raise CommandError(
+                    command["type"], error.get("code"), error.get("message", "")
+                )
+            results.append(response.get("result"))
+        return results
+
+    async def command(self, command_type: str, **data: Any) -> Any:
+        """Send one command and return its result."""
+        (result,) = await self.commands([{"type": command_type, **data}])
+        return result
+
+    async def fetch_registries(self) -> Dict[str, List[Dict[str, Any]]]:
+        """Return the entity, device and area registries and all states."""
+        results = await self.commands(
+            [{"type": command} for command in REGISTRY_COMMANDS.values()]
+        )
+        return dict(zip(REGISTRY_COMMANDS, results))
+
+
+def storage_registries(
+    registries: Dict[str, List[Dict[str, Any]]],
+) -> Dict[str, List[Dict[str, Any]]]:
+    """Convert fetched registries to the entries of their .storage files.
+
+    The WebSocket API leaves out some fields of entity registry entries;
+    the device class and unit are taken from the entity's state instead.
+    """
+    attributes = {
+        state["entity_id"]: state.get("attributes") or {}
+        for state in registries.get("states", [])
+    }
+    entities = []
+    for entity in registries["entities"]:
+        state = attributes.get(entity["entity_id"], {})
+        entity = dict(entity)
+        if entity.get("device_class") is None:
+            entity.setdefault("original_device_class", state.get("device_class"))
+        entity.setdefault("unit_of_measurement", state.get("unit_of_measurement"))
+        entities.append(entity)
+    areas = [
+        {**area, "id": area.get("id", area.get("area_id"))}
+        for area in registries["areas"]
+    ]
+    return {"entities": entities, "devices": registries["devices"], "areas": areas}
+
+
+def write_storage(
+    registries: Dict[str, List[Dict[str, Any]]], storage_dir: Path
+) -> List[Path]:
+    """Write fetched registries to .storage, replacing the files there."""
+    storage_dir.mkdir(parents=True, exist_ok=True)
+    written = []
+    for kind, entries in storage_registries(registries).items():
+        name, collection = STORAGE_FILES[kind]
+        path = storage_dir / name
+        data = {
+            "version": 1,
+            "minor_version": 1,
+            "key": name,
+            "data": {collection: entries},
+        }
+        tmp_path = path.with_name(f"{name}.{os.getpid()}.tmp")
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp_path, path)
+        written.append(path)
+    return written
+
+
+async def fetch(url: str, token: str) -> Dict[str, List[Dict[str, Any]]]:
+    """Connect to an instance and fetch its registries and states."""
+    async with HAWebSocketClient(url, token) as client:
+        return await client.fetch_registries()
+
+
+def main():
+    """Fetch the registries from the command line."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("config_dir", nargs="?", default="config")
+    parser.add_argument(
+        "--write-storage",
+        action="store_true",
+        help="Replace the registries in the configuration's .storage directory",
+    )
+    args = parser.parse_args()
+
+    load_env_file()
+    url = os.getenv("HA_URL", DEFAULT_URL)
+    token = os.getenv("HA_TOKEN", "")
+    if not token:
+        print("❌ No HA_TOKEN found in environment or .env file")
+        sys.exit(1)
+
+    start = time.perf_counter()
+    try:
+        registries = asyncio.run(fetch(url, token))
+    except (WebSocketError, TimeoutError) as e:
+        print(f"❌ {str(e) or 'Timed out waiting for Home Assistant'}")
+        sys.exit(1)
+    elapsed = time.perf_counter() - start
+
+    print(
+        f"Fetched {len(registries['entities'])} entities, "
+        f"{len(registries['devices'])} devices, {len(registries['areas'])} areas "
+        f"and {len(registries['states'])} states in {elapsed:.2f}s"
+    )
+    if args.write_storage:
+        for path in write_storage(registries, Path(args.config_dir) / ".storage"):
+            print(f"Wrote {path}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,563 @@
+"""Shared YAML document handling for the Home Assistant validation tools.
+
+Every validator used to open and parse the same file several times per run.
+The :class:`DocumentCache` reads, decodes and parses each file once and hands
+the same parsed document to every consumer.
+
+:class:`HAYamlLoader` understands the Home Assistant specific tags listed in
+``HA_TAGS`` and is backed by libyaml when PyYAML was built with it. All
+validators discover files with :func:`get_yaml_files` and load them through
+this module, so there is a single parse path to tune.
+"""
+
+import fnmatch
+import hashlib
+import os
+from array import array
+from collections import deque
+from dataclasses import dataclass
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Deque,
+    Dict,
+    List,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+    Union,
+)
+
+import yaml
+
+if TYPE_CHECKING or __package__:
+    from tools.validation_cache import ValidationCache, source_fingerprint
+else:  # Executed as a script from the tools directory
+    from validation_cache import ValidationCache, source_fingerprint
+
+LIBYAML_AVAILABLE: bool = yaml.__with_libyaml__
+# The libyaml-based SafeLoader, unless PyYAML was built without libyaml
+FastSafeLoader: Any = yaml.CSafeLoader if LIBYAML_AVAILABLE else yaml.SafeLoader
+
+
+# A 1-based (line, column) in a file
+Position = Tuple[int, int]
+
+# Positions are packed into one int, the line above the column bits
+_COLUMN_BITS = 20
+_COLUMN_MASK = (1 << _COLUMN_BITS) - 1
+
+
+class PositionTable:
+    """Where the values of a document's mappings and sequences start.
+
+    Rather than wrapping every scalar, the loader records one packed
+    position per child of each container: a key -> position dict for
+    mappings and an array for sequences, keyed by the container's id().
+    The table is only valid while the document's data is alive.
+    """
+
+    def __init__(self):
+        """Create an empty table."""
+        self._containers: Dict[int, Any] = {}
+
+    def add(self, container: Any, positions: Any):
+        """Record the packed positions of a container's children."""
+        self._containers[id(container)] = positions
+
+    def get(self, container: Any, key: Any) -> Optional[Position]:
+        """Return the 1-based (line, column) of container[key], if known."""
+        positions = self._containers.get(id(container))
+        if positions is None:
+            return None
+        try:
+            packed = positions[key]
+        except (KeyError, IndexError, TypeError):
+            return None
+        return (packed >> _COLUMN_BITS) + 1, (packed & _COLUMN_MASK) + 1
+
+
+def _pack_mark(mark: Any) -> int:
+    """Pack a node's start mark into an int."""
+    return mark.line << _COLUMN_BITS | min(mark.column, _COLUMN_MASK)
+
+
+class PositionTrackingMixin:
+    """Records a PositionTable of the loaded document in ``positions``."""
+
+    positions: PositionTable
+    constructed_objects: Dict[Any, Any]
+
+    def construct_tracked_mapping(self, node):
+        """Construct a mapping, recording where its values start."""
+        data: Dict[Any, Any] = {}
+        yield data
+        data.update(self.construct_mapping(node))
+        # Keys were constructed above, and flatten_mapping merged any << keys
+        constructed = self.constructed_objects
+        positions = {}
+        for key_node, value_node in node.value:
+            positions[constructed[key_node]] = _pack_mark(value_node.start_mark)
+        self.positions.add(data, positions)
+
+    def construct_tracked_sequence(self, node):
+        """Construct a sequence, recording where its items start."""
+        data: List[Any] = []
+        yield data
+        data.extend(self.construct_sequence(node))
+        self.positions.add(
+            data, array("Q", [_pack_mark(item.start_mark) for item in node.value])
+        )
+
+
+class HAYamlLoader(PositionTrackingMixin, FastSafeLoader):
+    """YAML loader that handles Home Assistant specific tags."""
+
+    def __init__(self, stream):
+        """Create a loader with an empty position table."""
+        super().__init__(stream)
+        self.positions = PositionTable()
+
+
+class PureHAYamlLoader(PositionTrackingMixin, yaml.SafeLoader):
+    """Pure-Python equivalent of HAYamlLoader, e.g. for benchmarks."""
+
+    def __init__(self, stream):
+        """Create a loader with an empty position table."""
+        super().__init__(stream)
+        self.positions = PositionTable()
+
+
+# Home Assistant tags, loaded as HATag placeholder strings
+INCLUDE_TAGS = frozenset(
+    [
+        "!include",
+        "!include_dir_list",
+        "!include_dir_named",
+        "!include_dir_merge_list",
+        "!include_dir_merge_named",
+    ]
+)
+HA_TAGS = (
+    "!include",
+    "!include_dir_list",
+    "!include_dir_named",
+    "!include_dir_merge_list",
+    "!include_dir_merge_named",
+    "!secret",
+    "!input",  # Blueprint inputs
+)
+
+YAML_PATTERNS = ("*.yaml", "*.yml")
+
+
+class HATag(str):
+    """A Home Assistant tag, equal to its ``"<tag> <value>"`` string.
+
+    The tag and its argument are kept separately so includes can be resolved
+    without parsing the placeholder string again.
+    """
+
+    tag: str
+    value: str
+
+    def __new__(cls, tag: str, value: str):
+        """Create the placeholder string for a tag and its argument."""
+        placeholder = super().__new__(cls, f"{tag} {value}")
+        placeholder.tag = tag
+        placeholder.value = value
+        return placeholder
+
+
+def construct_ha_tag(loader, node) -> HATag:
+    """Handle a Home Assistant tag such as !include or !secret."""
+    return HATag(node.tag, loader.construct_scalar(node))
+
+
+def register_ha_tags(loader_class: Type[Any]):
+    """Register the Home Assistant tags on a loader class."""
+    for tag in HA_TAGS:
+        loader_class.add_constructor(tag, construct_ha_tag)
+
+
+def register_position_tracking(loader_class: Type[Any]):
+    """Record the positions of mappings and sequences on a loader class."""
+    loader_class.add_constructor(
+        "tag:yaml.org,2002:map", PositionTrackingMixin.construct_tracked_mapping
+    )
+    loader_class.add_constructor(
+        "tag:yaml.org,2002:seq", PositionTrackingMixin.construct_tracked_sequence
+    )
+
+
+for _loader_class in (HAYamlLoader, PureHAYamlLoader):
+    register_ha_tags(_loader_class)
+    register_position_tracking(_loader_class)
+
+
+def get_yaml_files(config_dir: Union[str, Path]) -> List[Path]:
+    """Return the YAML files at the top level of a config directory.
+
+    Subdirectories such as blueprints/ hold templates and are not included.
+    """
+    config_dir = Path(config_dir)
+    yaml_files: List[Path] = []
+    for pattern in YAML_PATTERNS:
+        yaml_files.extend(config_dir.glob(pattern))
+    return yaml_files
+
+
+@dataclass(frozen=True)
+class ParsedDocument:
+    """Result of reading and parsing a single YAML file.
+
+    ``data`` is shared between all consumers of the cache and must be
+    treated as read-only.
+    """
+
+    path: Path
+    digest: str
+    data: Any = None
+    error: Optional[Exception] = None
+    # Where the values in data start, if the loader tracks positions
+    positions: Optional[PositionTable] = None
+
+    @property
+    def ok(self) -> bool:
+        """Return True if the file was read, decoded and parsed."""
+        return self.error is None
+
+
+class DocumentCache:
+    """Content-hash keyed cache of parsed YAML documents.
+
+    Files are read once per run and re-read only when their size or
+    modification time changes. Parsing is keyed by the SHA-256 of the raw
+    bytes, so identical content is never parsed twice. A parse is dropped
+    once no cached file has that content any more.
+    """
+
+    def __init__(self, loader: Type[Any] = HAYamlLoader):
+        """Initialize the cache with the loader used for parsing."""
+        self.loader = loader
+        self._by_path: Dict[str, Tuple[Tuple[int, int], ParsedDocument]] = {}
+        self._by_digest: Dict[
+            str, Tuple[Any, Optional[Exception], Optional[PositionTable]]
+        ] = {}
+        self.reads = 0
+        self.parses = 0
+
+    def get(self, file_path: Union[str, Path]) -> ParsedDocument:
+        """Return the parsed document for a file, reading it if needed."""
+        key = os.path.abspath(file_path)
+        try:
+            stat = os.stat(key)
+        except OSError as e:
+            self._forget(key)
+            return ParsedDocument(Path(file_path), "", error=e)
+
+        signature = (stat.st_mtime_ns, stat.st_size)
+        cached = self._by_path.get(key)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+
+        document = self._read(Path(file_path))
+        self._by_path[key] = (signature, document)
+        if cached is not None:
+            self._release(cached[1].digest)
+        return document
+
+    def load(self, file_path: Union[str, Path]) -> Any:
+        """Return the parsed data for a file, raising its read/parse error."""
+        document = self.get(file_path)
+        if document.error is not None:
+            raise document.error
+        return document.data
+
+    def invalidate(self, file_path: Optional[Union[str, Path]] = None):
+        """Forget a single file, or every file if no path is given."""
+        if file_path is None:
+            self._by_path.clear()
+            self._by_digest.clear()
+        else:
+            self._forget(os.path.abspath(file_path))
+
+    def _forget(self, key: str):
+        """Drop a file from the cache."""
+        cached = self._by_path.pop(key, None)
+        if cached is not None:
+            self._release(cached[1].digest)
+
+    def _release(self, digest: str):
+        """Drop a parse unless a cached file still has that content."""
+        if all(document.digest != digest for _sig, document in self._by_path.values()):
+            self._by_digest.pop(digest, None)
+
+    def _read(self, file_path: Path) -> ParsedDocument:
+        """Read, decode and parse a file, reusing parses of identical content."""
+        try:
+            with open(file_path, "rb") as f:
+                raw = f.read()
+        except OSError as e:
+            return ParsedDocument(file_path, "", error=e)
+        self.reads += 1
+
+        digest = hashlib.sha256(raw).hexdigest()
+        parsed = self._by_digest.get(digest)
+        if parsed is None:
+            parsed = self._parse(raw)
+            self._by_digest[digest] = parsed
+
+        data, error, positions = parsed
+        return ParsedDocument(file_path, digest, data, error, positions)
+
+    def _parse(
+        self, raw: bytes
+    ) -> Tuple[Any, Optional[Exception], Optional[PositionTable]]:
+        """Decode and parse raw file content."""
+        try:
+            text = raw.decode("utf-8")
+        except UnicodeDecodeError as e:
+            return None, e, None
+
+        self.parses += 1
+        loader = self.loader(text)
+        try:
+            data = loader.get_single_data()
+        except Exception as e:
+            return None, e, None
+        finally:
+            loader.dispose()
+        return data, None, getattr(loader, "positions", None)
+
+
+class IncludeResolver:
+    """Resolves ``!include`` and ``!include_dir_*`` tags over a config directory.
+
+    The include graph is built lazily: each file's include tags are found
+    once per file version (and kept in the validation cache if one is given,
+    so unchanged files are not parsed again), and resolved documents are
+    memoized by path. Include cycles and missing targets are recorded in
+    ``errors`` and left as placeholders.
+    """
+
+    def __init__(
+        self,
+        config_dir: Union[str, Path],
+        document_cache: Optional[DocumentCache] = None,
+        validation_cache: Optional[ValidationCache] = None,
+    ):
+        """Initialize the resolver for a config directory."""
+        self.config_dir = Path(config_dir)
+        self.document_cache = document_cache or DocumentCache()
+        self.validation_cache = validation_cache
+        self.errors: List[str] = []
+        self._tags: Dict[Path, Tuple[Tuple[int, int], List[Tuple[str, str]]]] = {}
+        self._resolved: Dict[Path, Any] = {}
+        self._source_fp = source_fingerprint(__file__) if validation_cache else ""
+
+    @staticmethod
+    def _normalize(file_path: Union[str, Path]) -> Path:
+        """Return a normalized path so each file has a single graph node."""
+        return Path(os.path.normpath(file_path))
+
+    def _error(self, message: str):
+        """Record a resolution problem once."""
+        if message not in self.errors:
+            self.errors.append(message)
+
+    def targets(self, tag: str, value: str, base_dir: Path) -> List[Path]:
+        """Return the files an include tag refers to."""
+        target = self._normalize(base_dir / value)
+        if tag == "!include":
+            return [target]
+        if not target.is_dir():
+            return []
+
+        # Home Assistant walks directories recursively, skipping hidden ones
+        files = []
+        for root, dirs, names in os.walk(target):
+            dirs[:] = [name for name in dirs if not name.startswith(".")]
+            for name in fnmatch.filter(names, "*.yaml"):
+                if name != "secrets.yaml":
+                    files.append(self._normalize(Path(root) / name))
+        return sorted(files)
+
+    def includes(self, file_path: Union[str, Path]) -> List[Path]:
+        """Return the files directly included by a file."""
+        file_path = self._normalize(file_path)
+        found: List[Path] = []
+        for tag, value in self.include_tags(file_path):
+            for target in self.targets(tag, value, file_path.parent):
+                if target not in found:
+                    found.append(target)
+        return found
+
+    def node_includes(self, node: Any, file_path: Union[str, Path]) -> List[Path]:
+        """Return the files directly included below a node of a file."""
+        base_dir = self._normalize(file_path).parent
+        found: List[Path] = []
+        for tag in self._find_tags(node):
+            for target in self.targets(tag.tag, tag.value, base_dir):
+                if target not in found:
+                    found.append(target)
+        return found
+
+    def include_tags(self, file_path: Path) -> List[Tuple[str, str]]:
+        """Return a file's include tags, memoized per file version."""
+        try:
+            stat = os.stat(file_path)
+        except OSError:
+            return []
+        signature = (stat.st_mtime_ns, stat.st_size)
+        cached = self._tags.get(file_path)
+        if cached is not None and cached[0] == signature:
+            return cached[1]
+
+        tags = None
+        if self.validation_cache is not None:
+            stored = self.validation_cache.get("includes", file_path, self._source_fp)
+            if stored is not None:
+                tags = [(tag, value) for tag, value in stored]
+
+        if tags is None:
+            document = self.document_cache.get(file_path)
+            tags = [(tag.tag, tag.value) for tag in self._find_tags(document.data)]
+            if self.validation_cache is not None and document.ok:
+                self.validation_cache.put("includes", file_path, tags, self._source_fp)
+
+        self._tags[file_path] = (signature, tags)
+        return tags
+
+    @staticmethod
+    def _find_tags(data: Any) -> List[HATag]:
+        """Return the include tags in a document, in document order."""
+        tags: List[HATag] = []
+        stack = [data]
+        while stack:
+            node = stack.pop()
+            if isinstance(node, HATag):
+                if node.tag in INCLUDE_TAGS:
+                    tags.append(node)
+            elif isinstance(node, dict):
+                stack.extend(reversed(list(node.values())))
+            elif isinstance(node, list):
+                stack.extend(reversed(node))
+        return tags
+
+    def include_closure(self, roots: List[Path]) -> List[Path]:
+        """Return the roots followed by every file they include, transitively."""
+        closure: List[Path] = []
+        seen: Set[Path] = set()
+        queue: Deque[Tuple[Path, Optional[Path]]] = deque(
+            (self._normalize(root), None) for root in roots
+        )
+        while queue:
+            file_path, included_from = queue.popleft()
+            if file_path in seen:
+                continue
+            seen.add(file_path)
+            if not file_path.is_file():
+                self._error(f"{included_from}: Included file not found: {file_path}")
+                continue
+            closure.append(file_path)
+            queue.extend((target, file_path) for target in self.includes(file_path))
+        return closure
+
+    def resolve(self, file_path: Union[str, Path]) -> Any:
+        """Return a file's data with all includes replaced by their content.
+
+        The result shares unchanged subtrees with the cached documents and
+        must be treated as read-only.
+        """
+        return self._resolve_file(self._normalize(file_path), set())
+
+    def invalidate(self):
+        """Forget resolved documents, e.g. after files changed."""
+        self._resolved.clear()
+        self.errors = []
+
+    def _resolve_file(self, file_path: Path, active: Set[Path]) -> Any:
+        """Resolve a single file, guarding against include cycles."""
+        if file_path in self._resolved:
+            return self._resolved[file_path]
+
+        document = self.document_cache.get(file_path)
+        if not document.ok:
+            return None
+
+        active.add(file_path)
+        try:
+            resolved = self._substitute(document.data, file_path, active)
+        finally:
+            active.discard(file_path)
+        self._resolved[file_path] = resolved
+        return resolved
+
+    def _substitute(self, node: Any, file_path: Path, active: Set[Path]) -> Any:
+        """Replace include tags below node, copying only containers that change."""
+        if isinstance(node, HATag):
+            if node.tag not in INCLUDE_TAGS:
+                return node
+            return self._resolve_tag(node, file_path, active)
+
+        if isinstance(node, dict):
+            result = node
+            for key, value in node.items():
+                new_value = self._substitute(value, file_path, active)
+                if new_value is not value:
+                    if result is node:
+                        result = dict(node)
+                    result[key] = new_value
+            return result
+
+        if isinstance(node, list):
+            result_list = node
+            for index, value in enumerate(node):
+                new_value = self._substitute(value, file_path, active)
+                if new_value is not value:
+                    if result_list is node:
+                        result_list = list(node)
+                    result_list[index] = new_value
+            return result_list
+
+        return node
+
+    def _resolve_tag(self, tag: HATag, file_path: Path, active: Set[Path]) -> Any:
+        """Return the content an include tag stands for."""
+        targets = self.targets(tag.tag, tag.value, file_path.parent)
+        if tag.tag == "!include" and not targets[0].is_file():
+            self._error(f"{file_path}: Included file not found: {targets[0]}")
+            return tag
+
+        contents = []
+        for target in targets:
+            if target in active:
+                self._error(f"{file_path}: Include cycle through {target}")
+                return tag
+            contents.append((target, self._resolve_file(target, active)))
+
+        if tag.tag == "!include":
+            return contents[0][1]
+        if tag.tag == "!include_dir_list":
+            return [content for _target, content in contents if content is not None]
+        if tag.tag == "!include_dir_named":
+            return {
+                target.stem: content
+                for target, content in contents
+                if content is not None
+            }
+        if tag.tag == "!include_dir_merge_list":
+            merged_list: List[Any] = []
+            for _target, content in contents:
+                if isinstance(content, list):
+                    merged_list.extend(content)
+            return merged_list
+
+        merged: Dict[Any, Any] = {}
+        for _target, content in contents:
+            if isinstance(content, dict):
+                merged.update(content)
+        return merged
@@ -4,13 +4,83 @@
 Validates that all entity references in configuration files actually exist.
 """
 
-import json
+import argparse
 import re
 import sys
+from dataclasses import dataclass, field
+from functools import lru_cache
 from pathlib import Path
-from typing import Any, Dict, List, Optional, Set, TypedDict
+from typing import (
+    TYPE_CHECKING,
+    Any,
+    Dict,
+    FrozenSet,
+    List,
+    Mapping,
+    Optional,
+    Set,
+    Tuple,
+    Type,
+    TypedDict,
+)
 
-import yaml
+if TYPE_CHECKING or __package__:
+    from tools.findings import (
+        Finding,
+        FindingList,
+        add_format_argument,
+        run_with_format,
+    )
+    from tools.ha_yaml import (
+        DocumentCache,
+        HAYamlLoader,
+        IncludeResolver,
+        Position,
+        PositionTable,
+        get_yaml_files,
+    )
+    from tools.registry import (
+        AreaRecord,
+        DeviceRecord,
+        EntityRecord,
+        RegistryIndex,
+        RegistryRecord,
+        load_registry,
+    )
+    from tools.registry_snapshot import RegistrySnapshot, SnapshotTable, load_snapshot
+    from tools.validation_cache import (
+        DEFAULT_CACHE_DIR,
+        ValidationCache,
+        fingerprint,
+        registry_fingerprint,
+        source_fingerprint,
+    )
+else:  # Executed as a script from the tools directory
+    from findings import Finding, FindingList, add_format_argument, run_with_format
+    from ha_yaml import (
+        DocumentCache,
+        HAYamlLoader,
+        IncludeResolver,
+        Position,
+        PositionTable,
+        get_yaml_files,
+    )
+    from registry import (
+        AreaRecord,
+        DeviceRecord,
+        EntityRecord,
+        RegistryIndex,
+        RegistryRecord,
+        load_registry,
+    )
+    from registry_snapshot import RegistrySnapshot, SnapshotTable, load_snapshot
+    from validation_cache import (
+        DEFAULT_CACHE_DIR,
+        ValidationCache,
+        fingerprint,
+        registry_fingerprint,
+        source_fingerprint,
+    )
 
 
 class DomainSummary(TypedDict):
@@ -22,68 +92,149 @@ class DomainSummary(TypedDict):
     examples: List[str]
 
 
-class HAYamlLoader(yaml.SafeLoader):
-    """Custom YAML loader that handles Home Assistant specific tags."""
-
-    pass
-
-
-def include_constructor(loader, node):
-    """Handle !include tag."""
-    filename = loader.construct_scalar(node)
-    return f"!include {filename}"
-
-
-def include_dir_named_constructor(loader, node):
-    """Handle !include_dir_named tag."""
-    dirname = loader.construct_scalar(node)
-    return f"!include_dir_named {dirname}"
-
-
-def include_dir_merge_named_constructor(loader, node):
-    """Handle !include_dir_merge_named tag."""
-    dirname = loader.construct_scalar(node)
-    return f"!include_dir_merge_named {dirname}"
-
-
-def include_dir_merge_list_constructor(loader, node):
-    """Handle !include_dir_merge_list tag."""
-    dirname = loader.construct_scalar(node)
-    return f"!include_dir_merge_list {dirname}"
-
-
-def include_dir_list_constructor(loader, node):
-    """Handle !include_dir_list tag."""
-    dirname = loader.construct_scalar(node)
-    return f"!include_dir_list {dirname}"
-
-
-def input_constructor(loader, node):
-    """Handle !input tag for blueprints."""
-    input_name = loader.construct_scalar(node)
-    return f"!input {input_name}"
-
-
-def secret_constructor(loader, node):
-    """Handle !secret tag."""
-    secret_name = loader.construct_scalar(node)
-    return f"!secret {secret_name}"
-
-
-# Register custom constructors
-HAYamlLoader.add_constructor("!include", include_constructor)
-HAYamlLoader.add_constructor(
-    "!include_dir_named", include_dir_named_constructor
-)
-HAYamlLoader.add_constructor(
-    "!include_dir_merge_named", include_dir_merge_named_constructor
+# Reference kinds collected by ReferenceValidator.collect_references
+ENTITY_REFS = 1
+DEVICE_REFS = 2
+AREA_REFS = 4
+REGISTRY_ID_REFS = 8
+ALL_REFS = ENTITY_REFS | DEVICE_REFS | AREA_REFS | REGISTRY_ID_REFS
+
+ENTITY_KEYS = frozenset(["entity_id", "entity_ids", "entities"])
+DEVICE_KEYS = frozenset(["device_id", "device_ids"])
+AREA_KEYS = frozenset(["area_id", "area_ids"])
+
+# Template functions whose first argument is an entity ID or an area
+TEMPLATE_ENTITY_FUNCTIONS = (
+    "states",
+    "is_state",
+    "state_attr",
+    "is_state_attr",
+    "state_translated",
+    "has_value",
+    "expand",
 )
-HAYamlLoader.add_constructor(
-    "!include_dir_merge_list", include_dir_merge_list_constructor
+TEMPLATE_AREA_FUNCTIONS = ("area_entities", "area_devices")
+
+# One alternation for every template reference form, e.g. states('x.y'),
+# is_state("x.y", ...), area_entities('kitchen') and states.x.y
+TEMPLATE_REFERENCE_PATTERN = re.compile(
+    r"\b(?P<function>"
+    + "|".join(TEMPLATE_ENTITY_FUNCTIONS + TEMPLATE_AREA_FUNCTIONS)
+    + r")\(\s*(?:'(?P<single>[^']+)'|\"(?P<double>[^\"]+)\")"
+    r"|\bstates\.(?P<dotted>[a-zA-Z_][a-zA-Z0-9_]*\.[a-zA-Z_][a-zA-Z0-9_]*)"
 )
-HAYamlLoader.add_constructor("!include_dir_list", include_dir_list_constructor)
-HAYamlLoader.add_constructor("!input", input_constructor)
-HAYamlLoader.add_constructor("!secret", secret_constructor)
+TEMPLATE_PATTERN = re.compile(r"\{\{.*?\}\}")
+UUID_PATTERN = re.compile(r"^[a-f0-9]{32}$")
+
+
+@lru_cache(maxsize=8192)
+def extract_template_references(
+    template: str,
+) -> Tuple[FrozenSet[str], FrozenSet[str]]:
+    """Return the entity IDs and areas referenced by a template string.
+
+    Results are memoized, since the same templates tend to be repeated
+    across automations and dashboard cards.
+    """
+    entities = set()
+    areas = set()
+    for match in TEMPLATE_REFERENCE_PATTERN.finditer(template):
+        dotted = match.group("dotted")
+        if dotted is not None:
+            entities.add(dotted)
+            continue
+
+        argument = match.group("single") or match.group("double")
+        if match.group("function") in TEMPLATE_AREA_FUNCTIONS:
+            areas.add(argument)
+        elif argument.count(".") == 1:
+            # Validate entity ID format
+            entities.add(argument)
+    return frozenset(entities), frozenset(areas)
+
+
+# A YAML path is stored as a linked (parent, key, is_list_index) tuple so
+# that descending into a node doesn't build a new string at every level.
+YamlPath = Optional[Tuple[Any, Any, bool]]
+
+
+def format_yaml_path(path: YamlPath) -> str:
+    """Render a linked YAML path as e.g. ``[0].triggers[1].entity_id``."""
+    parts = []
+    while path is not None:
+        path, key, is_index = path
+        parts.append((key, is_index))
+
+    rendered = ""
+    for key, is_index in reversed(parts):
+        if is_index:
+            rendered += f"[{key}]"
+        elif rendered:
+            rendered += f".{key}"
+        else:
+            rendered = str(key)
+    return rendered
+
+
+REFERENCE_KINDS = ("entities", "devices", "areas", "registry_ids", "template_areas")
+
+# A file's references as cached: each kind maps references to their rendered
+# paths, and "positions" maps kinds to references to their [line, column]s
+FileReferences = Dict[str, Dict[str, Any]]
+
+
+@dataclass
+class ReferenceCollection:
+    """References found in a document, each mapped to the paths using it.
+
+    ``positions`` holds the (line, column) of each use, in the same order as
+    its paths, when the document was loaded with a position table.
+    """
+
+    entities: Dict[str, List[YamlPath]] = field(default_factory=dict)
+    devices: Dict[str, List[YamlPath]] = field(default_factory=dict)
+    areas: Dict[str, List[YamlPath]] = field(default_factory=dict)
+    registry_ids: Dict[str, List[YamlPath]] = field(default_factory=dict)
+    # Areas passed to template functions, by area ID or name
+    template_areas: Dict[str, List[YamlPath]] = field(default_factory=dict)
+    positions: Dict[str, Dict[str, List[Optional[Position]]]] = field(
+        default_factory=dict
+    )
+
+    def add(
+        self,
+        kind: str,
+        reference: str,
+        path: YamlPath,
+        position: Optional[Position] = None,
+    ):
+        """Record a use of a reference of one of REFERENCE_KINDS."""
+        getattr(self, kind).setdefault(reference, []).append(path)
+        self.positions.setdefault(kind, {}).setdefault(reference, []).append(position)
+
+    def to_dict(self) -> FileReferences:
+        """Return the references with rendered paths, ordered by reference.
+
+        Positions are included under "positions" as [line, column] lists.
+        """
+        references: FileReferences = {
+            kind: {
+                reference: [format_yaml_path(path) for path in paths]
+                for reference, paths in sorted(getattr(self, kind).items())
+            }
+            for kind in REFERENCE_KINDS
+        }
+        # Only references with known positions, to keep cached entries small
+        references["positions"] = {}
+        for kind, uses_by_reference in self.positions.items():
+            known = {
+                reference: [list(position) if position else None for position in uses]
+                for reference, uses in sorted(uses_by_reference.items())
+                if any(uses)
+            }
+            if known:
+                references["positions"][kind] = known
+        return references
 
 
 class ReferenceValidator:
@@ -92,78 +243,123 @@ class ReferenceValidator:
     # Special keywords that are not entity IDs
     SPECIAL_KEYWORDS = {"all", "none"}
 
-    def __init__(self, config_dir: str = "config"):
+    def __init__(
+        self,
+        config_dir: str = "config",
+        document_cache: Optional[DocumentCache] = None,
+        validation_cache: Optional[ValidationCache] = None,
+    ):
         """Initialize the ReferenceValidator."""
         self.config_dir = Path(config_dir)
         self.storage_dir = self.config_dir / ".storage"
-        self.errors: List[str] = []
-        self.warnings: List[str] = []
+        self.errors = FindingList("error", "reference_validator")
+        self.warnings = FindingList("warning", "reference_validator")
+        self.failed_files: List[Path] = []
+        self.document_cache = document_cache or DocumentCache(HAYamlLoader)
+
+        # Persistent cache, results are keyed on this module's source
+        self.validation_cache = validation_cache
+        self._source_fp = source_fingerprint(__file__) if validation_cache else ""
+        self.include_resolver = IncludeResolver(
+            self.config_dir, self.document_cache, validation_cache
+        )
 
         # Cache for loaded registries
-        self._entities: Optional[Dict[str, Any]] = None
-        self._devices: Optional[Dict[str, Any]] = None
-        self._areas: Optional[Dict[str, Any]] = None
+        self._entities: Optional[Mapping[str, Any]] = None
+        self._devices: Optional[Mapping[str, Any]] = None
+        self._areas: Optional[Mapping[str, Any]] = None
+        self._registry_index: Optional[RegistryIndex] = None
+        self._snapshot: Optional[RegistrySnapshot] = None
+        self._snapshot_loaded = False
 
         # Cache for YAML-defined entities
         self._yaml_entities: Optional[Set[str]] = None
 
-    def load_entity_registry(self) -> Dict[str, Any]:
+    def invalidate_registries(self):
+        """Forget the loaded registries so they are read again."""
+        self._entities = None
+        self._devices = None
+        self._areas = None
+        self._registry_index = None
+        self._snapshot = None
+        self._snapshot_loaded = False
+
+    def invalidate_yaml_entities(self):
+        """Forget YAML-defined entities and resolved includes."""
+        self._yaml_entities = None
+        self.include_resolver.invalidate()
+
+    def _get_registry_snapshot(self) -> Optional[RegistrySnapshot]:
+        """Get the memory-mapped registry snapshot if the cache is enabled."""
+        if self.validation_cache is not None and not self._snapshot_loaded:
+            self._snapshot = load_snapshot(
+                self.storage_dir, self.validation_cache.cache_dir
+            )
+            self._snapshot_loaded = True
+        return self._snapshot
+
+    def _read_registry(
+        self,
+        registry_file: Path,
+        collection: str,
+        record_class: Type[RegistryRecord],
+        key: str = "id",
+    ) -> Mapping[str, Any]:
+        """Read a registry from the snapshot, or from its JSON file."""
+        snapshot = self._get_registry_snapshot()
+        if snapshot is not None:
+            return snapshot.tables[collection]
+        return load_registry(registry_file, collection, record_class, key=key)
+
+    def load_entity_registry(self) -> Mapping[str, Any]:
         """Load and cache entity registry."""
         if self._entities is None:
             registry_file = self.storage_dir / "core.entity_registry"
             if not registry_file.exists():
                 self.errors.append(f"Entity registry not found: {registry_file}")
-                return {}
+                self._entities = {}
+                return self._entities
 
             try:
-                with open(registry_file, "r") as f:
-                    data = json.load(f)
-                    self._entities = {
-                        entity["entity_id"]: entity
-                        for entity in data.get("data", {}).get("entities", [])
-                    }
+                self._entities = self._read_registry(
+                    registry_file, "entities", EntityRecord, key="entity_id"
+                )
             except Exception as e:
                 self.errors.append(f"Failed to load entity registry: {e}")
                 return {}
 
         return self._entities
 
-    def load_device_registry(self) -> Dict[str, Any]:
+    def load_device_registry(self) -> Mapping[str, Any]:
         """Load and cache device registry."""
         if self._devices is None:
             registry_file = self.storage_dir / "core.device_registry"
             if not registry_file.exists():
                 self.errors.append(f"Device registry not found: {registry_file}")
-                return {}
+                self._devices = {}
+                return self._devices
 
             try:
-                with open(registry_file, "r") as f:
-                    data = json.load(f)
-                    self._devices = {
-                        device["id"]: device
-                        for device in data.get("data", {}).get("devices", [])
-                    }
+                self._devices = self._read_registry(
+                    registry_file, "devices", DeviceRecord
+                )
             except Exception as e:
                 self.errors.append(f"Failed to load device registry: {e}")
                 return {}
 
         return self._devices
 
-    def load_area_registry(self) -> Dict[str, Any]:
+    def load_area_registry(self) -> Mapping[str, Any]:
         """Load and cache area registry."""
         if self._areas is None:
             registry_file = self.storage_dir / "core.area_registry"
             if not registry_file.exists():
                 self.warnings.append(f"Area registry not found: {registry_file}")
-                return {}
+                self._areas = {}
+                return self._areas
 
             try:
-                with open(registry_file, "r") as f:
-                    data = json.load(f)
-                    self._areas = {
-                        area["id"]: area
-                        for area in data.get("data", {}).get("areas", [])
-                    }
+                self._areas = self._read_registry(registry_file, "areas", AreaRecord)
             except Exception as e:
                 self.warnings.append(f"Failed to load area registry: {e}")
                 return {}
@@ -178,20 +374,8 @@ class ReferenceValidator:
         yaml_entities = set()
 
         # Parse configuration.yaml and extract YAML-defined entities
-        for yaml_file in self.get_yaml_files():
-            try:
-                with open(yaml_file, "r", encoding="utf-8") as f:
-                    data = yaml.load(f, Loader=HAYamlLoader)
-
-                if data is None:
-                    continue
-
-                # Extract template sensors
-                yaml_entities.update(self._extract_yaml_entities_from_config(data))
-
-            except Exception:
-                # Silently skip files that can't be parsed
-                pass
+        for yaml_file in get_yaml_files(self.config_dir):
+            yaml_entities.update(self._get_file_yaml_entities(yaml_file))
 
         # Extract entities created by Python scripts
         yaml_entities.update(self._extract_python_script_entities())
@@ -199,9 +383,53 @@ class ReferenceValidator:
         self._yaml_entities = yaml_entities
         return yaml_entities
 
+    def _get_file_yaml_entities(self, yaml_file: Path) -> List[str]:
+        """Get entities defined in a file and its includes, using the cache."""
+        context = self._source_fp
+        if self.validation_cache is not None:
+            # Entries depend on every file the configuration includes
+            included = self.include_resolver.include_closure([yaml_file])[1:]
+            if included:
+                context = fingerprint(
+                    self._source_fp,
+                    [
+                        [str(path), self.validation_cache.file_digest(path)]
+                        for path in included
+                    ],
+                )
+            cached = self.validation_cache.get("yaml_entities", yaml_file, context)
+            if cached is not None:
+                return cached
+
+        if not self.document_cache.get(yaml_file).ok:
+            # Silently skip files that can't be parsed
+            return []
+
+        data = self.include_resolver.resolve(yaml_file)
+        found = self._extract_yaml_entities_from_config(data)
+        for package in self._get_packages(data):
+            found.update(self._extract_yaml_entities_from_config(package))
+        entities = sorted(found)
+
+        if self.validation_cache is not None:
+            self.validation_cache.put("yaml_entities", yaml_file, entities, context)
+        return entities
+
+    def _get_packages(self, config: Any) -> List[Any]:
+        """Return the package configurations of a resolved configuration."""
+        if not isinstance(config, dict):
+            return []
+        homeassistant = config.get("homeassistant")
+        if not isinstance(homeassistant, dict):
+            return []
+        packages = homeassistant.get("packages")
+        if not isinstance(packages, dict):
+            return []
+        return list(packages.values())
+
     def _extract_python_script_entities(self) -> Set[str]:
         """Extract entities created by Python scripts."""
-        entities = set()
+        entities: Set[str] = set()
         python_scripts_dir = self.config_dir / "python_scripts"
 
         if not python_scripts_dir.exists():
@@ -209,24 +437,39 @@ class ReferenceValidator:
 
         # Scan all .py files for hass.states.set() calls
         for script_file in python_scripts_dir.glob("*.py"):
+            if self.validation_cache is not None:
+                cached = self.validation_cache.get(
+                    "script_entities", script_file, self._source_fp
+                )
+                if cached is not None:
+                    entities.update(cached)
+                    continue
+
             try:
                 with open(script_file, "r", encoding="utf-8") as f:
                     content = f.read()
-
-                # Look for hass.states.set('entity.id', ...) patterns
-                import re
-                patterns = [
-                    r"hass\.states\.set\(['\"]([a-z_]+\.[a-z0-9_]+)['\"]",
-                    r'hass\.states\.set\("([a-z_]+\.[a-z0-9_]+)"',
-                ]
-
-                for pattern in patterns:
-                    matches = re.findall(pattern, content)
-                    entities.update(matches)
-
             except Exception:
                 # Skip files that can't be read
-                pass
+                continue
+
+            # Look for hass.states.set('entity.id', ...) patterns
+            patterns = [
+                r"hass\.states\.set\(['\"]([a-z_]+\.[a-z0-9_]+)['\"]",
+                r'hass\.states\.set\("([a-z_]+\.[a-z0-9_]+)"',
+            ]
+
+            script_entities: Set[str] = set()
+            for pattern in patterns:
+                script_entities.update(re.findall(pattern, content))
+            entities.update(script_entities)
+
+            if self.validation_cache is not None:
+                self.validation_cache.put(
+                    "script_entities",
+                    script_file,
+                    sorted(script_entities),
+                    self._source_fp,
+                )
 
         return entities
 
@@ -334,13 +577,12 @@ class ReferenceValidator:
     def is_uuid_format(self, value: str) -> bool:
         """Check if a string matches UUID format (32 hex characters)."""
         # UUID format: 8-4-4-4-12 hex digits, but HA often stores without hyphens
-        uuid_pattern = r"^[a-f0-9]{32}$"
-        return bool(re.match(uuid_pattern, value))
+        return UUID_PATTERN.match(value) is not None
 
     def is_template(self, value: str) -> bool:
         """Check if value is a Jinja2 template expression."""
         # Match template expressions like {{ ... }}
-        return bool(re.search(r"\{\{.*?\}\}", value))
+        return "{{" in value and TEMPLATE_PATTERN.search(value) is not None
 
     def should_skip_entity_validation(self, value: str) -> bool:
         """Check if entity reference should be skipped during validation."""
@@ -352,183 +594,243 @@ class ReferenceValidator:
             in self.SPECIAL_KEYWORDS  # Special keywords like "all", "none"
         )
 
-    def extract_entity_references(self, data: Any, path: str = "") -> Set[str]:
-        """Extract entity references from configuration data."""
-        entities = set()
+    def collect_references(
+        self,
+        data: Any,
+        kinds: int = ALL_REFS,
+        positions: Optional[PositionTable] = None,
+    ) -> ReferenceCollection:
+        """Collect entity, device, area and registry ID references in one pass.
+
+        The document is walked iteratively with an explicit stack, so deeply
+        nested configurations can't hit the recursion limit. Each stack entry
+        carries the reference kinds still being looked for below that node;
+        e.g. values under ``device_id`` are not searched for entities. With
+        the document's position table, each use also records where it is.
+        """
+        references = ReferenceCollection()
+        stack: List[Tuple[Any, int, YamlPath]] = [(data, kinds, None)]
+
+        while stack:
+            node, active, path = stack.pop()
+
+            # Children are pushed in reverse so they are visited in order
+            if isinstance(node, list):
+                for index in range(len(node) - 1, -1, -1):
+                    item = node[index]
+                    if isinstance(item, (dict, list)):
+                        stack.append((item, active, (path, index, True)))
+                continue
 
-        if isinstance(data, dict):
-            for key, value in data.items():
-                current_path = f"{path}.{key}" if path else key
-
-                # Common entity reference keys
-                if key in ["entity_id", "entity_ids", "entities"]:
-                    if isinstance(value, str):
-                        if not self.should_skip_entity_validation(value):
-                            entities.add(value)
-                    elif isinstance(value, list):
-                        for entity in value:
-                            if isinstance(
-                                entity, str
-                            ) and not self.should_skip_entity_validation(entity):
-                                entities.add(entity)
-
-                # Device-related keys
-                elif key in ["device_id", "device_ids"]:
-                    # Device IDs are handled separately
-                    pass
-
-                # Area-related keys
-                elif key in ["area_id", "area_ids"]:
-                    # Area IDs are handled separately
-                    pass
-
-                # Service data might contain entity references
-                elif key == "data" and isinstance(value, dict):
-                    entities.update(self.extract_entity_references(value, current_path))
-
-                # Templates might contain entity references
-                elif isinstance(value, str) and any(
-                    x in value for x in ["state_attr(", "states(", "is_state("]
-                ):
-                    entities.update(self.extract_entities_from_template(value))
+            if not isinstance(node, dict):
+                continue
 
-                # Recursive search
-                else:
-                    entities.update(self.extract_entity_references(value, current_path))
+            children: List[Tuple[Any, int, YamlPath]] = []
+            for key, value in node.items():
+                child_path = (path, key, False)
+                child_active = active
+
+                if active & ENTITY_REFS:
+                    if key in ENTITY_KEYS:
+                        for entity_id, position in self._reference_strings(
+                            value, positions, node, key
+                        ):
+                            if not self.should_skip_entity_validation(entity_id):
+                                references.add(
+                                    "entities", entity_id, child_path, position
+                                )
+                        child_active &= ~ENTITY_REFS
+                    elif key in DEVICE_KEYS or key in AREA_KEYS:
+                        # Device and area IDs are handled separately
+                        child_active &= ~ENTITY_REFS
+                    elif isinstance(value, str) and (
+                        "(" in value or "states." in value
+                    ):
+                        # Templates might contain entity and area references
+                        entities, areas = extract_template_references(value)
+                        if entities or areas:
+                            position = positions.get(node, key) if positions else None
+                            for entity_id in entities:
+                                references.add(
+                                    "entities", entity_id, child_path, position
+                                )
+                            for area in areas:
+                                references.add(
+                                    "template_areas", area, child_path, position
+                                )
+
+                if active & DEVICE_REFS and key in DEVICE_KEYS:
+                    for device_id, position in self._tag_free_strings(
+                        value, True, positions, node, key
+                    ):
+                        references.add("devices", device_id, child_path, position)
+                    child_active &= ~DEVICE_REFS
+
+                if active & AREA_REFS and key in AREA_KEYS:
+                    # Templates are only skipped for single area IDs
+                    for area_id, position in self._tag_free_strings(
+                        value, False, positions, node, key
+                    ):
+                        references.add("areas", area_id, child_path, position)
+                    child_active &= ~AREA_REFS
+
+                if (
+                    active & REGISTRY_ID_REFS
+                    and key == "entity_id"
+                    and isinstance(value, str)
+                    and self.is_uuid_format(value)
+                ):
+                    # entity_id fields containing UUIDs (device-based automations)
+                    references.add(
+                        "registry_ids",
+                        value,
+                        child_path,
+                        positions.get(node, key) if positions else None,
+                    )
 
-        elif isinstance(data, list):
-            for i, item in enumerate(data):
-                current_path = f"{path}[{i}]" if path else f"[{i}]"
-                entities.update(self.extract_entity_references(item, current_path))
+                if child_active and isinstance(value, (dict, list)):
+                    children.append((value, child_active, child_path))
+
+            stack.extend(reversed(children))
+
+        return references
+
+    def _reference_strings(
+        self,
+        value: Any,
+        positions: Optional[PositionTable],
+        parent: Any,
+        key: Any,
+    ) -> List[Tuple[str, Optional[Position]]]:
+        """Return the strings of a reference value or list, with their positions.
+
+        parent[key] is the value, used to look up positions in the table.
+        """
+        if isinstance(value, str):
+            return [(value, positions.get(parent, key) if positions else None)]
+        if isinstance(value, list):
+            return [
+                (item, positions.get(value, index) if positions else None)
+                for index, item in enumerate(value)
+                if isinstance(item, str)
+            ]
+        return []
+
+    def _tag_free_strings(
+        self,
+        value: Any,
+        skip_listed_templates: bool,
+        positions: Optional[PositionTable] = None,
+        parent: Any = None,
+        key: Any = None,
+    ) -> List[Tuple[str, Optional[Position]]]:
+        """Return the ID strings under a device/area key, skipping HA tags."""
+        strings = self._reference_strings(value, positions, parent, key)
+        if isinstance(value, str):
+            return [
+                (string, position)
+                for string, position in strings
+                if not string.startswith("!") and not self.is_template(string)
+            ]
+        return [
+            (string, position)
+            for string, position in strings
+            if not string.startswith("!")
+            and not (skip_listed_templates and self.is_template(string))
+        ]
 
-        return entities
+    def extract_entity_references(self, data: Any, path: str = "") -> Set[str]:
+        """Extract entity references from configuration data."""
+        return set(self.collect_references(data, ENTITY_REFS).entities)
 
     def extract_entities_from_template(self, template: str) -> Set[str]:
         """Extract entity references from Jinja2 templates."""
-        entities = set()
-
-        # Common patterns for entity references in templates
-        patterns = [
-            r"states\('([^']+)'\)",  # states('entity.id')
-            r'states\("([^"]+)"\)',  # states("entity.id")
-            # states.domain.entity
-            r"states\.([a-zA-Z_][a-zA-Z0-9_]*\.[a-zA-Z_][a-zA-Z0-9_]*)",
-            r"is_state\('([^']+)'",  # is_state('entity.id', ...)
-            r'is_state\("([^"]+)"',  # is_state("entity.id", ...)
-            r"state_attr\('([^']+)'",  # state_attr('entity.id', ...)
-            r'state_attr\("([^"]+)"',  # state_attr("entity.id", ...)
-        ]
-
-        for pattern in patterns:
-            matches = re.findall(pattern, template)
-            for match in matches:
-                # Validate entity ID format
-                if "." in match and len(match.split(".")) == 2:
-                    entities.add(match)
-
-        return entities
+        return set(extract_template_references(template)[0])
 
     def extract_device_references(self, data: Any) -> Set[str]:
         """Extract device references from configuration data."""
-        devices = set()
-
-        if isinstance(data, dict):
-            for key, value in data.items():
-                if key in ["device_id", "device_ids"]:
-                    if isinstance(value, str):
-                        # Skip blueprint inputs and other HA tags
-                        if not value.startswith("!") and not self.is_template(value):
-                            devices.add(value)
-                    elif isinstance(value, list):
-                        for device in value:
-                            if isinstance(device, str) and not device.startswith("!") and not self.is_template(device):
-                                devices.add(device)
-                else:
-                    devices.update(self.extract_device_references(value))
-
-        elif isinstance(data, list):
-            for item in data:
-                devices.update(self.extract_device_references(item))
-
-        return devices
+        return set(self.collect_references(data, DEVICE_REFS).devices)
 
     def extract_area_references(self, data: Any) -> Set[str]:
         """Extract area references from configuration data."""
-        areas = set()
-
-        if isinstance(data, dict):
-            for key, value in data.items():
-                if key in ["area_id", "area_ids"]:
-                    if isinstance(value, str):
-                        # Skip blueprint inputs and other HA tags
-                        if not value.startswith("!") and not self.is_template(value):
-                            areas.add(value)
-                    elif isinstance(value, list):
-                        for area in value:
-                            if isinstance(area, str) and not area.startswith("!"):
-                                areas.add(area)
-                else:
-                    areas.update(self.extract_area_references(value))
-
-        elif isinstance(data, list):
-            for item in data:
-                areas.update(self.extract_area_references(item))
-
-        return areas
+        return set(self.collect_references(data, AREA_REFS).areas)
 
     def extract_entity_registry_ids(self, data: Any) -> Set[str]:
         """Extract entity registry UUID references from configuration data."""
-        entity_registry_ids = set()
-
-        if isinstance(data, dict):
-            for key, value in data.items():
-                # Look for entity_id fields containing UUIDs (device-based automations)
-                if key == "entity_id" and isinstance(value, str):
-                    if self.is_uuid_format(value):
-                        entity_registry_ids.add(value)
-                else:
-                    entity_registry_ids.update(self.extract_entity_registry_ids(value))
-        elif isinstance(data, list):
-            for item in data:
-                entity_registry_ids.update(self.extract_entity_registry_ids(item))
-
-        return entity_registry_ids
+        return set(self.collect_references(data, REGISTRY_ID_REFS).registry_ids)
+
+    def get_registry_index(self) -> RegistryIndex:
+        """Get the entity registry lookup index, building it once."""
+        if self._registry_index is None:
+            entities = self.load_entity_registry()
+            snapshot = self._snapshot
+            if isinstance(entities, SnapshotTable) and snapshot is not None:
+                self._registry_index = snapshot.registry_index()
+            else:
+                self._registry_index = RegistryIndex(entities.values())
+        return self._registry_index
 
     def get_entity_registry_id_mapping(self) -> Dict[str, str]:
         """Get mapping from entity registry ID to entity_id."""
-        entities = self.load_entity_registry()
-        return {
-            entity_data["id"]: entity_data["entity_id"]
-            for entity_data in entities.values()
-            if "id" in entity_data
-        }
+        return self.get_registry_index().registry_ids
+
+    def get_file_references(self, file_path: Path) -> Optional[FileReferences]:
+        """Extract all entity, device and area references from a single file.
+
+        Maps each kind of reference to the referenced IDs and the YAML paths
+        they appear at. Returns None if the file can't be loaded.
+        """
+        if self.validation_cache is not None:
+            cached = self.validation_cache.get("references", file_path, self._source_fp)
+            if cached is not None:
+                return cached
+
+        document = self.document_cache.get(file_path)
+        if not document.ok:
+            return None
+
+        references = self.collect_references(
+            document.data, positions=document.positions
+        ).to_dict()
+
+        if self.validation_cache is not None:
+            self.validation_cache.put(
+                "references", file_path, references, self._source_fp
+            )
+        return references
 
     def validate_file_references(self, file_path: Path) -> bool:
         """Validate all references in a single file."""
         if file_path.name == "secrets.yaml":
             return True  # Skip secrets file
 
-        try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                data = yaml.load(f, Loader=HAYamlLoader)
-        except Exception as e:
-            self.errors.append(f"{file_path}: Failed to load YAML - {e}")
+        references = self.get_file_references(file_path)
+        if references is None:
+            error = self.document_cache.get(file_path).error
+            self.errors.append(f"{file_path}: Failed to load YAML - {error}")
             return False
 
-        if data is None:
-            return True  # Empty file is valid
+        if not any(references.values()):
+            return True  # Nothing to validate (e.g. empty file)
+
+        return self.check_file_references(file_path, references)
 
-        # Extract references
-        entity_refs = self.extract_entity_references(data)
-        device_refs = self.extract_device_references(data)
-        area_refs = self.extract_area_references(data)
-        entity_registry_ids = self.extract_entity_registry_ids(data)
+    def check_file_references(
+        self, file_path: Path, references: FileReferences
+    ) -> bool:
+        """Check extracted references against the registries."""
+        entity_refs = references["entities"]
+        device_refs = references["devices"]
+        area_refs = references["areas"]
+        template_area_refs = references["template_areas"]
+        entity_registry_ids = references["registry_ids"]
+        # Cached references from before positions were tracked have none
+        positions = references.get("positions", {})
 
         # Load registries
-        entities = self.load_entity_registry()
+        registry = self.get_registry_index()
         devices = self.load_device_registry()
         areas = self.load_area_registry()
-        entity_id_mapping = self.get_entity_registry_id_mapping()
 
         all_valid = True
 
@@ -536,94 +838,241 @@ class ReferenceValidator:
         yaml_entities = self.load_yaml_entities()
 
         # Validate entity references (normal entity_id format)
-        for entity_id in entity_refs:
+        for entity_id, paths in entity_refs.items():
             # Skip UUID-format entity IDs, they're handled separately
             if self.is_uuid_format(entity_id):
                 continue
 
-            if entity_id not in entities:
-                # Check if it's a disabled entity
-                disabled_entities = {
-                    e["entity_id"]: e
-                    for e in entities.values()
-                    if e.get("disabled_by") is not None
-                }
-
-                if entity_id in disabled_entities:
+            if entity_id in registry:
+                if registry.is_disabled(entity_id):
                     self.warnings.append(
-                        f"{file_path}: References disabled entity " f"'{entity_id}'"
+                        self._finding(
+                            file_path,
+                            f"References disabled entity '{entity_id}'",
+                            "disabled-entity",
+                            entity_id,
+                            paths,
+                            positions.get("entities", {}).get(entity_id),
+                        )
                     )
-                elif entity_id in yaml_entities:
-                    # Entity is defined in YAML config, not an error
-                    self.warnings.append(
-                        f"{file_path}: References YAML-defined entity '{entity_id}' "
-                        f"(not in entity registry)"
+            elif entity_id in yaml_entities:
+                # Entity is defined in YAML config, not an error
+                self.warnings.append(
+                    self._finding(
+                        file_path,
+                        f"References YAML-defined entity '{entity_id}' "
+                        f"(not in entity registry)",
+                        "yaml-entity",
+                        entity_id,
+                        paths,
+                        positions.get("entities", {}).get(entity_id),
                     )
-                else:
-                    self.errors.append(f"{file_path}: Unknown entity '{entity_id}'")
-                    all_valid = False
+                )
+            else:
+                self.errors.append(
+                    self._finding(
+                        file_path,
+                        f"Unknown entity '{entity_id}'",
+                        "unknown-entity",
+                        entity_id,
+                        paths,
+                        positions.get("entities", {}).get(entity_id),
+                    )
+                )
+                all_valid = False
 
         # Validate entity registry ID references (UUID format)
-        for registry_id in entity_registry_ids:
-            if registry_id not in entity_id_mapping:
+        for registry_id, paths in entity_registry_ids.items():
+            actual_entity_id = registry.resolve_registry_id(registry_id)
+            if actual_entity_id is None:
                 self.errors.append(
-                    f"{file_path}: Unknown entity registry ID '{registry_id}'"
+                    self._finding(
+                        file_path,
+                        f"Unknown entity registry ID '{registry_id}'",
+                        "unknown-registry-id",
+                        registry_id,
+                        paths,
+                        positions.get("registry_ids", {}).get(registry_id),
+                    )
                 )
                 all_valid = False
-            else:
-                # Check if the mapped entity is disabled
-                actual_entity_id = entity_id_mapping[registry_id]
-                if actual_entity_id in entities:
-                    entity_data = entities[actual_entity_id]
-                    if entity_data.get("disabled_by") is not None:
-                        self.warnings.append(
-                            f"{file_path}: Entity registry ID '{registry_id}' "
-                            f"references disabled entity '{actual_entity_id}'"
-                        )
+            elif registry.is_disabled(actual_entity_id):
+                # The mapped entity is disabled
+                self.warnings.append(
+                    self._finding(
+                        file_path,
+                        f"Entity registry ID '{registry_id}' "
+                        f"references disabled entity '{actual_entity_id}'",
+                        "disabled-entity",
+                        actual_entity_id,
+                        paths,
+                        positions.get("registry_ids", {}).get(registry_id),
+                    )
+                )
 
         # Validate device references
-        for device_id in device_refs:
+        for device_id, paths in device_refs.items():
             if device_id not in devices:
-                self.errors.append(f"{file_path}: Unknown device '{device_id}'")
+                self.errors.append(
+                    self._finding(
+                        file_path,
+                        f"Unknown device '{device_id}'",
+                        "unknown-device",
+                        device_id,
+                        paths,
+                        positions.get("devices", {}).get(device_id),
+                    )
+                )
                 all_valid = False
 
         # Validate area references
-        for area_id in area_refs:
+        for area_id, paths in area_refs.items():
             if area_id not in areas:
-                self.warnings.append(f"{file_path}: Unknown area '{area_id}'")
+                self.warnings.append(
+                    self._finding(
+                        file_path,
+                        f"Unknown area '{area_id}'",
+                        "unknown-area",
+                        area_id,
+                        paths,
+                        positions.get("areas", {}).get(area_id),
+                    )
+                )
+
+        # Template functions such as area_entities() also accept area names
+        if template_area_refs:
+            area_names = {str(area.get("name", "")).lower() for area in areas.values()}
+            for area, paths in template_area_refs.items():
+                if area not in areas and area.lower() not in area_names:
+                    self.warnings.append(
+                        self._finding(
+                            file_path,
+                            f"Unknown area '{area}'",
+                            "unknown-area",
+                            area,
+                            paths,
+                            positions.get("template_areas", {}).get(area),
+                        )
+                    )
 
         return all_valid
 
-    def get_yaml_files(self) -> List[Path]:
-        """Get all YAML files to validate."""
-        yaml_files: List[Path] = []
-        for pattern in ["*.yaml", "*.yml"]:
-            yaml_files.extend(self.config_dir.glob(pattern))
+    def _finding(
+        self,
+        file_path: Path,
+        message: str,
+        code: str,
+        reference: str,
+        paths: List[str],
+        positions: Optional[List[Optional[List[int]]]] = None,
+    ) -> Finding:
+        """Describe a problem with a reference used at paths in a file."""
+        line, column = (positions[0] if positions else None) or (None, None)
+        return Finding(
+            f"{message}{self._location(paths, line)}",
+            code=code,
+            file=file_path,
+            line=line,
+            column=column,
+            path=paths[0] if paths and paths[0] else None,
+            entity=reference,
+        )
 
-        # Skip blueprints directory - these are templates with !input tags
-        return yaml_files
+    def _location(self, paths: List[str], line: Optional[int] = None) -> str:
+        """Describe where in a file a reference is used."""
+        if not paths or not paths[0]:
+            return f" on line {line}" if line else ""
+        more = f" and {len(paths) - 1} more" if len(paths) > 1 else ""
+        at_line = f" (line {line})" if line else ""
+        return f" at {paths[0]}{at_line}{more}"
 
-    def validate_all(self) -> bool:
-        """Validate all references in the config directory."""
+    def get_yaml_files(self) -> List[Path]:
+        """Get all YAML files to validate, including included files."""
+        return self.include_resolver.include_closure(get_yaml_files(self.config_dir))
+
+    def get_entity_dependents(
+        self, entity_ids: Set[str], files: List[Path]
+    ) -> List[Path]:
+        """Return the files among `files` that reference any of the entities."""
+        dependents = []
+        for file_path in files:
+            references = self.get_file_references(file_path)
+            if references is not None and not entity_ids.isdisjoint(
+                references["entities"]
+            ):
+                dependents.append(file_path)
+        return dependents
+
+    def validate_all(self, files: Optional[List[Path]] = None) -> bool:
+        """Validate all references in the config directory, or only `files`."""
         if not self.config_dir.exists():
             self.errors.append(f"Config directory {self.config_dir} does not exist")
             return False
 
-        yaml_files = self.get_yaml_files()
+        yaml_files = self.get_yaml_files() if files is None else files
         if not yaml_files:
-            self.warnings.append("No YAML files found in config directory")
+            if files is None:
+                self.warnings.append("No YAML files found in config directory")
             return True
 
         all_valid = True
 
+        # Findings depend on the registries and on YAML-defined entities
+        findings_context = None
+        if self.validation_cache is not None:
+            registry_fp = registry_fingerprint(self.storage_dir)
+            if registry_fp is not None:
+                findings_context = fingerprint(
+                    self._source_fp, registry_fp, sorted(self.load_yaml_entities())
+                )
+
         for file_path in yaml_files:
-            if not self.validate_file_references(file_path):
-                all_valid = False
+            if self.validation_cache is not None and findings_context is not None:
+                cached = self.validation_cache.get(
+                    "findings", file_path, findings_context
+                )
+                if cached is not None:
+                    self.errors.extend(cached["errors"])
+                    self.warnings.extend(cached["warnings"])
+                    all_valid = all_valid and cached["valid"]
+                    if cached["errors"]:
+                        self.failed_files.append(file_path)
+                    continue
+
+            errors_before = len(self.errors)
+            warnings_before = len(self.warnings)
+            file_valid = self.validate_file_references(file_path)
+            all_valid = all_valid and file_valid
+            if len(self.errors) > errors_before:
+                self.failed_files.append(file_path)
+
+            if self.validation_cache is not None and findings_context is not None:
+                self.validation_cache.put(
+                    "findings",
+                    file_path,
+                    {
+                        "valid": file_valid,
+                        "errors": self.errors.to_dicts(errors_before),
+                        "warnings": self.warnings.to_dicts(warnings_before),
+                    },
+                    findings_context,
+                )
+
+        if self.validation_cache is not None:
+            self.validation_cache.save()
 
         return all_valid
 
     def get_entity_summary(self) -> Dict[str, DomainSummary]:
         """Get summary of available entities by domain."""
+        registry_file = self.storage_dir / "core.entity_registry"
+        if self.validation_cache is not None:
+            cached = self.validation_cache.get(
+                "summary", registry_file, self._source_fp
+            )
+            if cached is not None:
+                return cached
+
         entities = self.load_entity_registry()
 
         summary: Dict[str, DomainSummary] = {}
@@ -647,6 +1096,11 @@ class ReferenceValidator:
             if len(summary[domain]["examples"]) < 3:
                 summary[domain]["examples"].append(entity_id)
 
+        if self.validation_cache is not None and entities:
+            self.validation_cache.put(
+                "summary", registry_file, summary, self._source_fp
+            )
+            self.validation_cache.save()
         return summary
 
     def print_results(self):
@@ -688,11 +1142,24 @@ class ReferenceValidator:
 
 def main():
     """Run entity and device reference validation from command line."""
-    config_dir = sys.argv[1] if len(sys.argv) > 1 else "config"
-
-    validator = ReferenceValidator(config_dir)
-    is_valid = validator.validate_all()
-    validator.print_results()
+    parser = argparse.ArgumentParser(
+        description="Validate entity, device and area references"
+    )
+    parser.add_argument("config_dir", nargs="?", default="config")
+    parser.add_argument(
+        "--cache-dir",
+        default=str(DEFAULT_CACHE_DIR),
+        help="Directory for the persistent validation cache",
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true", help="Revalidate every file from scratch"
+    )
+    add_format_argument(parser)
+    args = parser.parse_args()
+
+    validation_cache = None if args.no_cache else ValidationCache(args.cache_dir)
+    validator = ReferenceValidator(args.config_dir, validation_cache=validation_cache)
+    is_valid = run_with_format(validator, validator.validate_all, args.format)
 
     sys.exit(0 if is_valid else 1)
 
@@ -0,0 +1,356 @@
+"""Loading and precomputed lookup tables for Home Assistant registries.
+
+Registry files are read with a streaming JSON parser that decodes one entry
+at a time and keeps only the fields the tools use, in compact ``__slots__``
+records. Sections that aren't needed, such as ``deleted_entities``, are
+skipped without being decoded.
+"""
+
+import json
+import re
+from collections import defaultdict
+from collections.abc import Mapping as MappingABC
+from pathlib import Path
+from typing import (
+    IO,
+    Any,
+    Dict,
+    Iterable,
+    Iterator,
+    List,
+    Mapping,
+    Optional,
+    Sequence,
+    Set,
+    Tuple,
+    Type,
+)
+
+# Characters read from a registry file at a time
+CHUNK_SIZE = 1 << 16
+
+_WHITESPACE = re.compile(r"[ \t\n\r]*")
+_STRUCTURE = re.compile(r'["\[\]{}]')
+_STRING_REST = re.compile(r'[^"\\]*(?:\\.[^"\\]*)*"', re.DOTALL)
+
+
+class _JsonStream:
+    """Reads a JSON document from a file one value at a time."""
+
+    def __init__(self, file: IO[str], chunk_size: int = CHUNK_SIZE):
+        """Read from an open text file in chunks of chunk_size characters."""
+        self._file = file
+        self._chunk_size = chunk_size
+        self._decoder = json.JSONDecoder()
+        self._buffer = ""
+        self._pos = 0
+
+    def _fill(self) -> bool:
+        """Append the next chunk, dropping what was consumed already."""
+        chunk = self._file.read(self._chunk_size)
+        if not chunk:
+            return False
+        self._buffer = self._buffer[self._pos :] + chunk
+        self._pos = 0
+        return True
+
+    def peek(self) -> str:
+        """Return the next non-whitespace character, or "" at the end."""
+        while True:
+            match = _WHITESPACE.match(self._buffer, self._pos)
+            assert match is not None  # The pattern matches the empty string
+            self._pos = match.end()
+            if self._pos < len(self._buffer):
+                return self._buffer[self._pos]
+            if not self._fill():
+                return ""
+
+    def expect(self, char: str):
+        """Consume `char`, raising ValueError if something else comes next."""
+        found = self.peek()
+        if found != char:
+            raise ValueError(f"Expected {char!r} but found {found or 'end of file'!r}")
+        self._pos += 1
+
+    def decode(self) -> Any:
+        """Decode the next value."""
+        self.peek()
+        while True:
+            try:
+                value, end = self._decoder.raw_decode(self._buffer, self._pos)
+            except json.JSONDecodeError:
+                if not self._fill():
+                    raise
+                continue
+            # A number ending the buffer may continue in the next chunk
+            if end < len(self._buffer) or not self._fill():
+                self._pos = end
+                return value
+
+    def skip(self):
+        """Skip the next value without building it."""
+        if self.peek() not in ("[", "{"):
+            self.decode()
+            return
+        depth = 0
+        while True:
+            match = _STRUCTURE.search(self._buffer, self._pos)
+            if match is None:
+                self._pos = len(self._buffer)
+                if not self._fill():
+                    raise ValueError("Unexpected end of file")
+                continue
+            self._pos = match.end()
+            token = match.group()
+            if token == '"':
+                while True:
+                    match = _STRING_REST.match(self._buffer, self._pos)
+                    if match is not None:
+                        self._pos = match.end()
+                        break
+                    if not self._fill():
+                        raise ValueError("Unterminated string")
+            elif token in ("[", "{"):
+                depth += 1
+            else:
+                depth -= 1
+                if depth == 0:
+                    return
+
+    def _separator(self, close: str) -> bool:
+        """Consume a comma or `close`, returning True if more items follow."""
+        found = self.peek()
+        self._pos += 1
+        if found == close:
+            return False
+        if found != ",":
+            raise ValueError(f"Expected ',' or {close!r} but found {found!r}")
+        return True
+
+    def items(self) -> Iterator[Any]:
+        """Decode the items of the next array one at a time."""
+        self.expect("[")
+        if self.peek() == "]":
+            self._pos += 1
+            return
+        more = True
+        while more:
+            yield self.decode()
+            more = self._separator("]")
+
+    def keys(self) -> Iterator[str]:
+        """Yield the keys of the next object.
+
+        The caller consumes each key's value before asking for the next key.
+        """
+        self.expect("{")
+        if self.peek() == "}":
+            self._pos += 1
+            return
+        more = True
+        while more:
+            key = self.decode()
+            self.expect(":")
+            yield key
+            more = self._separator("}")
+
+
+def iter_json_array(
+    file: IO[str], path: Sequence[str], chunk_size: int = CHUNK_SIZE
+) -> Iterator[Any]:
+    """Yield the items of the array at `path` in a JSON document one by one.
+
+    Objects along the path are walked key by key and other values skipped
+    without being decoded. Reading stops once the array ends, so content
+    after it isn't looked at. Nothing is yielded if the path doesn't exist.
+    """
+    stream = _JsonStream(file, chunk_size)
+
+    def descend(depth: int) -> Iterator[Any]:
+        for key in stream.keys():
+            if key != path[depth]:
+                stream.skip()
+            elif depth == len(path) - 1:
+                yield from stream.items()
+                return
+            else:
+                yield from descend(depth + 1)
+                return
+
+    return descend(0)
+
+
+class RegistryRecord(MappingABC):
+    """A read-only registry entry holding only the fields listed in FIELDS.
+
+    Fields missing from the registry entry are None. Records behave like
+    mappings, so code written against the raw JSON entries keeps working.
+    """
+
+    __slots__ = ()
+    FIELDS: Tuple[str, ...] = ()
+
+    def __init__(self, entry: Mapping[str, Any]):
+        """Copy the known fields out of a raw registry entry."""
+        for name in self.FIELDS:
+            object.__setattr__(self, name, entry.get(name))
+
+    @classmethod
+    def from_values(cls, values: Iterable[Any]) -> "RegistryRecord":
+        """Build a record from field values given in FIELDS order."""
+        record = cls.__new__(cls)
+        for name, value in zip(cls.FIELDS, values):
+            object.__setattr__(record, name, value)
+        return record
+
+    def __getitem__(self, key: str) -> Any:
+        """Return a field by name."""
+        if key not in self.FIELDS:
+            raise KeyError(key)
+        return getattr(self, key)
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over the field names."""
+        return iter(self.FIELDS)
+
+    def __len__(self) -> int:
+        """Return the number of fields."""
+        return len(self.FIELDS)
+
+    def __setattr__(self, name: str, value: Any):
+        """Refuse to set attributes, records are immutable."""
+        raise AttributeError(f"{type(self).__name__} is read-only")
+
+    def __repr__(self) -> str:
+        """Show the record's fields."""
+        return f"{type(self).__name__}({dict(self)!r})"
+
+
+class EntityRecord(RegistryRecord):
+    """An entity registry entry."""
+
+    __slots__ = FIELDS = (
+        "entity_id",
+        "id",
+        "platform",
+        "disabled_by",
+        "hidden_by",
+        "area_id",
+        "device_id",
+        "device_class",
+        "original_device_class",
+        "name",
+        "original_name",
+        "unit_of_measurement",
+    )
+
+
+class DeviceRecord(RegistryRecord):
+    """A device registry entry."""
+
+    __slots__ = FIELDS = ("id", "name", "name_by_user", "area_id", "disabled_by")
+
+
+class AreaRecord(RegistryRecord):
+    """An area registry entry."""
+
+    __slots__ = FIELDS = ("id", "name")
+
+
+def load_registry(
+    registry_file: Path,
+    collection: str,
+    record_class: Type[RegistryRecord],
+    key: str = "id",
+) -> Dict[str, RegistryRecord]:
+    """Load the `collection` section of a registry file, keyed by `key`.
+
+    Raises OSError if the file can't be read and ValueError if it isn't
+    valid JSON.
+    """
+    with open(registry_file, "r", encoding="utf-8") as f:
+        return {
+            entry[key]: record_class(entry)
+            for entry in iter_json_array(f, ("data", collection))
+        }
+
+
+class RegistryIndex:
+    """Entity registry lookups, built once when the registry is loaded.
+
+    Every lookup is a dict or set membership test, so validating a reference
+    costs the same regardless of registry size.
+    """
+
+    def __init__(self, entities: Iterable[Mapping[str, Any]]):
+        """Build the index from entity registry entries."""
+        entries: Dict[str, Mapping[str, Any]] = {}
+        self.entities: Mapping[str, Mapping[str, Any]] = entries
+        self.registry_ids: Dict[str, str] = {}
+        self.disabled: Set[str] = set()
+        self.hidden: Set[str] = set()
+        self.by_domain: Dict[str, List[str]] = defaultdict(list)
+
+        for entity in entities:
+            entity_id = entity["entity_id"]
+            entries[entity_id] = entity
+            if entity.get("id") is not None:
+                self.registry_ids[entity["id"]] = entity_id
+            if entity.get("disabled_by") is not None:
+                self.disabled.add(entity_id)
+            if entity.get("hidden_by") is not None:
+                self.hidden.add(entity_id)
+            self.by_domain[entity_id.split(".", 1)[0]].append(entity_id)
+
+    @classmethod
+    def from_columns(
+        cls,
+        entities: Mapping[str, Mapping[str, Any]],
+        entity_ids: Sequence[str],
+        registry_ids: Sequence[Optional[str]],
+        disabled_by: Sequence[Optional[str]],
+        hidden_by: Sequence[Optional[str]],
+    ) -> "RegistryIndex":
+        """Build the index from per-field columns, without visiting entries.
+
+        `entities` maps entity IDs to entries, the columns hold one value per
+        entity in the same order.
+        """
+        index = cls(())
+        index.entities = entities
+        index.registry_ids = {
+            registry_id: entity_id
+            for registry_id, entity_id in zip(registry_ids, entity_ids)
+            if registry_id is not None
+        }
+        index.disabled = {
+            entity_id
+            for entity_id, by in zip(entity_ids, disabled_by)
+            if by is not None
+        }
+        index.hidden = {
+            entity_id for entity_id, by in zip(entity_ids, hidden_by) if by is not None
+        }
+        for entity_id in entity_ids:
+            index.by_domain[entity_id.split(".", 1)[0]].append(entity_id)
+        return index
+
+    def __contains__(self, entity_id: object) -> bool:
+        """Return True if the entity is in the registry."""
+        return entity_id in self.entities
+
+    def __len__(self) -> int:
+        """Return the number of registered entities."""
+        return len(self.entities)
+
+    def is_disabled(self, entity_id: str) -> bool:
+        """Return True if the entity is registered but disabled."""
+        return entity_id in self.disabled
+
+    def is_hidden(self, entity_id: str) -> bool:
+        """Return True if the entity is registered but hidden."""
+        return entity_id in self.hidden
+
+    def resolve_registry_id(self, registry_id: str) -> Optional[str]:
+        """Map an entity registry UUID to its entity_id."""
+        return self.registry_ids.get(registry_id)
@@ -0,0 +1,408 @@
+#!/usr/bin/env python3
+"""Compile the Home Assistant registries into a memory-mappable snapshot.
+
+The entity, device and area registries are stored column by column: every
+distinct string is written once to a string table, and each table column is
+an array of 32-bit string indexes. Loading the snapshot maps the file and
+decodes strings only as they are used, so tools start in milliseconds
+instead of parsing the JSON registries on every run.
+
+The snapshot records the size and mtime of the registry files it was built
+from and is rebuilt as soon as one of them changes.
+
+Usage: python tools/registry_snapshot.py [config_dir] [--cache-dir DIR] [--force]
+"""
+
+import argparse
+import mmap
+import os
+import struct
+import sys
+import time
+import zlib
+from array import array
+from collections.abc import Mapping as MappingABC
+from pathlib import Path
+from typing import (
+    TYPE_CHECKING,
+    Dict,
+    Iterator,
+    List,
+    Optional,
+    Sequence,
+    Tuple,
+    Type,
+    cast,
+)
+
+if TYPE_CHECKING or __package__:
+    from tools.registry import (
+        AreaRecord,
+        DeviceRecord,
+        EntityRecord,
+        RegistryIndex,
+        RegistryRecord,
+        load_registry,
+    )
+    from tools.validation_cache import DEFAULT_CACHE_DIR
+else:  # Executed as a script from the tools directory
+    from registry import (
+        AreaRecord,
+        DeviceRecord,
+        EntityRecord,
+        RegistryIndex,
+        RegistryRecord,
+        load_registry,
+    )
+    from validation_cache import DEFAULT_CACHE_DIR
+
+SNAPSHOT_NAME = "registry.snapshot"
+SNAPSHOT_MAGIC = b"HAREGSNP"
+
+# Bump when the file layout changes
+SNAPSHOT_VERSION = 1
+
+# (registry file, collection, record class, key field)
+TABLES: List[Tuple[str, str, Type[RegistryRecord], str]] = [
+    ("core.entity_registry", "entities", EntityRecord, "entity_id"),
+    ("core.device_registry", "devices", DeviceRecord, "id"),
+    ("core.area_registry", "areas", AreaRecord, "id"),
+]
+
+# String index standing for None
+NONE = 0xFFFFFFFF
+
+_HEADER = struct.Struct("<8sII")
+_SOURCE = struct.Struct("<qq")
+_COUNTS = struct.Struct("<II")
+
+
+def _layout_checksum() -> int:
+    """Checksum of the stored fields, so changing them invalidates snapshots."""
+    fields = ";".join(",".join(table[2].FIELDS) for table in TABLES)
+    return zlib.crc32(fields.encode("utf-8"))
+
+
+def source_signatures(storage_dir: Path) -> List[Tuple[int, int]]:
+    """Return (mtime_ns, size) of each registry file, (-1, -1) if missing."""
+    signatures = []
+    for name, _collection, _record_class, _key in TABLES:
+        try:
+            stat = (storage_dir / name).stat()
+        except OSError:
+            signatures.append((-1, -1))
+            continue
+        signatures.append((stat.st_mtime_ns, stat.st_size))
+    return signatures
+
+
+def _u32_array(values: Sequence[int]) -> bytes:
+    """Encode values as little-endian 32-bit unsigned integers."""
+    encoded = array("I", values)
+    if sys.byteorder != "little":
+        encoded.byteswap()
+    return encoded.tobytes()
+
+
+def build_snapshot(storage_dir: Path, snapshot_path: Path):
+    """Compile the registries in storage_dir into a snapshot file.
+
+    Raises OSError if a registry can't be read and ValueError if one isn't
+    valid JSON. Missing registries are stored as empty tables.
+    """
+    signatures = source_signatures(storage_dir)
+    strings: Dict[str, int] = {}
+
+    def intern(value) -> int:
+        if value is None:
+            return NONE
+        return strings.setdefault(str(value), len(strings))
+
+    tables = []
+    for (name, collection, record_class, key), signature in zip(TABLES, signatures):
+        records = {}
+        if signature != (-1, -1):
+            records = load_registry(storage_dir / name, collection, record_class, key)
+        columns = [
+            [intern(getattr(record, field)) for record in records.values()]
+            for field in record_class.FIELDS
+        ]
+        tables.append((len(records), columns))
+
+    blob = bytearray()
+    offsets = [0]
+    for string in strings:
+        blob += string.encode("utf-8")
+        offsets.append(len(blob))
+    blob += b"\0" * (-len(blob) % 4)
+
+    parts = [_HEADER.pack(SNAPSHOT_MAGIC, SNAPSHOT_VERSION, _layout_checksum())]
+    parts += [_SOURCE.pack(*signature) for signature in signatures]
+    parts += [_COUNTS.pack(len(strings), len(blob)), _u32_array(offsets), bytes(blob)]
+    for rows, columns in tables:
+        parts.append(_COUNTS.pack(rows, len(columns)))
+        parts += [_u32_array(column) for column in columns]
+
+    snapshot_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = snapshot_path.with_name(f"{snapshot_path.name}.{os.getpid()}.tmp")
+    with open(tmp_path, "wb") as f:
+        f.write(b"".join(parts))
+    os.replace(tmp_path, snapshot_path)
+
+
+class SnapshotTable(MappingABC):
+    """One registry table of a snapshot, mapping keys to records.
+
+    Records are only built when looked up; whole columns can be read with
+    column() without building any.
+    """
+
+    def __init__(
+        self,
+        snapshot: "RegistrySnapshot",
+        record_class: Type[RegistryRecord],
+        key: str,
+        rows: int,
+        columns: Sequence[Sequence[int]],
+    ):
+        """Wrap the string index columns of a table."""
+        self._snapshot = snapshot
+        self._record_class = record_class
+        self._key = key
+        self._rows = rows
+        self._columns = dict(zip(record_class.FIELDS, columns))
+        self._row_index: Optional[Dict[str, int]] = None
+
+    def column(self, field: str) -> List[Optional[str]]:
+        """Return the values of a field for all rows."""
+        string = self._snapshot.string
+        return [string(index) for index in self._columns[field]]
+
+    def key_column(self) -> List[str]:
+        """Return the key of every row.
+
+        Unlike other fields keys are never None, records are stored by key.
+        """
+        return cast(List[str], self.column(self._key))
+
+    def records(self) -> List[RegistryRecord]:
+        """Build every record, decoding one column at a time."""
+        columns = [self.column(field) for field in self._columns]
+        return [self._record_class.from_values(row) for row in zip(*columns)]
+
+    def values(self) -> List[RegistryRecord]:  # type: ignore[override]
+        """Return all records in registry order."""
+        return self.records()
+
+    def items(self) -> List[Tuple[str, RegistryRecord]]:  # type: ignore[override]
+        """Return (key, record) pairs in registry order."""
+        return list(zip(self.key_column(), self.records()))
+
+    def _rows_by_key(self) -> Dict[str, int]:
+        """Map each key to its row, built on first use."""
+        if self._row_index is None:
+            self._row_index = {key: row for row, key in enumerate(self.key_column())}
+        return self._row_index
+
+    def __getitem__(self, key: str) -> RegistryRecord:
+        """Build the record stored under key."""
+        row = self._rows_by_key()[key]
+        string = self._snapshot.string
+        return self._record_class.from_values(
+            string(column[row]) for column in self._columns.values()
+        )
+
+    def __contains__(self, key: object) -> bool:
+        """Return True if a record is stored under key."""
+        return key in self._rows_by_key()
+
+    def __iter__(self) -> Iterator[str]:
+        """Iterate over the keys in registry order."""
+        return iter(self._rows_by_key())
+
+    def __len__(self) -> int:
+        """Return the number of records."""
+        return self._rows
+
+
+class RegistrySnapshot:
+    """A memory-mapped registry snapshot."""
+
+    def __init__(self, snapshot_path: Path):
+        """Map a snapshot file, raising ValueError if it isn't one."""
+        with open(snapshot_path, "rb") as f:
+            self._map = mmap.mmap(f.fileno(), 0, access=mmap.ACCESS_READ)
+        self._views: List[memoryview] = []
+        try:
+            self._parse()
+        except (ValueError, struct.error, TypeError):
+            self.close()
+            raise ValueError(f"Not a valid registry snapshot: {snapshot_path}")
+
+    def _u32_view(self, offset: int, count: int) -> Sequence[int]:
+        """Return `count` 32-bit integers stored at offset."""
+        data = memoryview(self._map)[offset : offset + count * 4]
+        self._views.append(data)
+        if len(data) != count * 4:
+            raise ValueError("Truncated snapshot")
+        if sys.byteorder == "little":
+            view = data.cast("I")
+            self._views.append(view)
+            return view
+        values = array("I", data)
+        values.byteswap()
+        return values
+
+    def _parse(self):
+        """Read the header and locate the string table and columns."""
+        magic, version, checksum = _HEADER.unpack_from(self._map, 0)
+        if magic != SNAPSHOT_MAGIC:
+            raise ValueError("Bad magic")
+        self.version = version
+        self.checksum = checksum
+        offset = _HEADER.size
+
+        self.sources = []
+        for _ in TABLES:
+            self.sources.append(_SOURCE.unpack_from(self._map, offset))
+            offset += _SOURCE.size
+
+        string_count, blob_size = _COUNTS.unpack_from(self._map, offset)
+        offset += _COUNTS.size
+        self._offsets = self._u32_view(offset, string_count + 1)
+        offset += (string_count + 1) * 4
+        self._blob_offset = offset
+        self._strings: List[Optional[str]] = [None] * string_count
+        offset += blob_size
+
+        self.tables: Dict[str, SnapshotTable] = {}
+        for _name, collection, record_class, key in TABLES:
+            rows, column_count = _COUNTS.unpack_from(self._map, offset)
+            offset += _COUNTS.size
+            if column_count != len(record_class.FIELDS):
+                raise ValueError("Unexpected columns")
+            columns = []
+            for _ in range(column_count):
+                columns.append(self._u32_view(offset, rows))
+                offset += rows * 4
+            self.tables[collection] = SnapshotTable(
+                self, record_class, key, rows, columns
+            )
+
+    def string(self, index: int) -> Optional[str]:
+        """Return the string stored at index, decoding it on first use."""
+        if index == NONE:
+            return None
+        string = self._strings[index]
+        if string is None:
+            start = self._blob_offset + self._offsets[index]
+            end = self._blob_offset + self._offsets[index + 1]
+            string = self._map[start:end].decode("utf-8")
+            self._strings[index] = string
+        return string
+
+    def is_current(self, storage_dir: Path) -> bool:
+        """Return True if the snapshot matches the registry files on disk."""
+        return (
+            self.version == SNAPSHOT_VERSION
+            and self.checksum == _layout_checksum()
+            and [tuple(source) for source in self.sources]
+            == source_signatures(storage_dir)
+        )
+
+    @property
+    def entities(self) -> SnapshotTable:
+        """Entity registry entries keyed by entity_id."""
+        return self.tables["entities"]
+
+    @property
+    def devices(self) -> SnapshotTable:
+        """Device registry entries keyed by device id."""
+        return self.tables["devices"]
+
+    @property
+    def areas(self) -> SnapshotTable:
+        """Area registry entries keyed by area id."""
+        return self.tables["areas"]
+
+    def registry_index(self) -> RegistryIndex:
+        """Build the entity lookup index from the entity columns."""
+        entities = self.entities
+        return RegistryIndex.from_columns(
+            entities,
+            entities.key_column(),
+            entities.column("id"),
+            entities.column("disabled_by"),
+            entities.column("hidden_by"),
+        )
+
+    def close(self):
+        """Unmap the snapshot file; its tables can't be used afterwards."""
+        for view in reversed(self._views):
+            view.release()
+        self._views.clear()
+        self._map.close()
+
+
+def load_snapshot(
+    storage_dir: Path, cache_dir: Path = DEFAULT_CACHE_DIR, force: bool = False
+) -> Optional[RegistrySnapshot]:
+    """Return a current snapshot of the registries, rebuilding it if needed.
+
+    Returns None if the snapshot can't be built, e.g. because a registry
+    isn't valid JSON, in which case callers load the registries directly.
+    """
+    snapshot_path = Path(cache_dir) / SNAPSHOT_NAME
+    if not force:
+        try:
+            snapshot = RegistrySnapshot(snapshot_path)
+        except (OSError, ValueError):
+            pass
+        else:
+            if snapshot.is_current(storage_dir):
+                return snapshot
+            snapshot.close()
+
+    try:
+        build_snapshot(Path(storage_dir), snapshot_path)
+        snapshot = RegistrySnapshot(snapshot_path)
+    except (OSError, ValueError):
+        return None
+    # A registry written while the snapshot was built is caught next time
+    return snapshot
+
+
+def main():
+    """Build the registry snapshot from the command line."""
+    parser = argparse.ArgumentParser(
+        description="Compile the registries into a memory-mappable snapshot"
+    )
+    parser.add_argument("config_dir", nargs="?", default="config")
+    parser.add_argument(
+        "--cache-dir",
+        default=str(DEFAULT_CACHE_DIR),
+        help="Directory to write the snapshot to",
+    )
+    parser.add_argument(
+        "--force", action="store_true", help="Rebuild even if the snapshot is current"
+    )
+    args = parser.parse_args()
+
+    storage_dir = Path(args.config_dir) / ".storage"
+    start = time.perf_counter()
+    snapshot = load_snapshot(storage_dir, Path(args.cache_dir), args.force)
+    if snapshot is None:
+        print(f"❌ Could not build a registry snapshot from {storage_dir}")
+        sys.exit(1)
+
+    elapsed = (time.perf_counter() - start) * 1000
+    snapshot_path = Path(args.cache_dir) / SNAPSHOT_NAME
+    print(
+        f"✅ {snapshot_path}: {len(snapshot.entities)} entities, "
+        f"{len(snapshot.devices)} devices, {len(snapshot.areas)} areas, "
+        f"{snapshot_path.stat().st_size / 1024:.0f} KiB ({elapsed:.0f}ms)"
+    )
+
+
+if __name__ == "__main__":
+    main()
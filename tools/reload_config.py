@@ -5,48 +5,32 @@ Calls the Home Assistant API to reload core configuration after config files
 have been pushed to the instance.
 """
 
-import os
 import sys
-from pathlib import Path
+from typing import TYPE_CHECKING
 
 import requests
 
-
-def load_env_file():
-    """Load environment variables from .env file."""
-    env_file = Path(".env")
-    if env_file.exists():
-        with open(env_file) as f:
-            for line in f:
-                line = line.strip()
-                if line and not line.startswith("#") and "=" in line:
-                    key, value = line.split("=", 1)
-                    os.environ[key.strip()] = value.strip().strip('"').strip("'")
+if TYPE_CHECKING or __package__:
+    from tools.ha_client import HAClient
+else:  # Executed as a script from the tools directory
+    from ha_client import HAClient
 
 
 def reload_config():
     """Reload Home Assistant core configuration via API."""
-    # Load environment variables
-    load_env_file()
-
-    # Get configuration
-    ha_url = os.getenv("HA_URL", "http://homeassistant.local:8123")
-    token = os.getenv("HA_TOKEN", "")
+    client = HAClient.from_env(timeout=30)
+    ha_url = client.url
 
-    if not token:
+    if not client.token:
         print("❌ Error: HA_TOKEN not found in environment or .env file")
         print("   Create a .env file with: HA_TOKEN=your_long_lived_access_token")
         print("   Get your token from Home Assistant Profile page")
         return False
 
-    # Prepare API request
-    headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
-
-    url = f"{ha_url}/api/services/homeassistant/reload_core_config"
-
     try:
         print("🔄 Reloading Home Assistant core configuration...")
-        response = requests.post(url, headers=headers, timeout=30)
+        with client:
+            response = client.post("/api/services/homeassistant/reload_core_config")
 
         if response.status_code == 200:
             print("✅ Configuration reloaded successfully!")
@@ -1,25 +1,139 @@
 #!/usr/bin/env python3
 """Test suite runner for Home Assistant configuration validation.
 
-Runs all validators and provides a comprehensive report.
+Runs all validators and provides a comprehensive report. By default the
+validators run in this process and share parsed documents and caches; use
+``--isolated`` to run each validator in its own interpreter instead.
 """
 
+import argparse
+import importlib.util
+import io
+import json
 import subprocess
 import sys
+import threading
 import time
+import traceback
+from concurrent.futures import FIRST_COMPLETED, Future, ThreadPoolExecutor, wait
+from contextlib import redirect_stdout
 from pathlib import Path
-from typing import Any, Dict, Tuple
+from typing import TYPE_CHECKING, Any, Dict, List, Optional, Tuple
+
+if TYPE_CHECKING or __package__:
+    from tools.change_set import (
+        STATE_NAME,
+        current_state,
+        file_snapshot,
+        find_affected_files,
+        git_changed_files,
+        git_head,
+        snapshot_changed_files,
+    )
+    from tools.findings import FORMATS, Finding, FindingWriter, stream_findings
+    from tools.ha_official_validator import HAOfficialValidator
+    from tools.ha_yaml import DocumentCache
+    from tools.reference_validator import ReferenceValidator
+    from tools.validation_cache import DEFAULT_CACHE_DIR, ValidationCache
+    from tools.yaml_validator import YAMLValidator
+else:  # Executed as a script from the tools directory
+    from change_set import (
+        STATE_NAME,
+        current_state,
+        file_snapshot,
+        find_affected_files,
+        git_changed_files,
+        git_head,
+        snapshot_changed_files,
+    )
+    from findings import FORMATS, Finding, FindingWriter, stream_findings
+    from ha_official_validator import HAOfficialValidator
+    from ha_yaml import DocumentCache
+    from reference_validator import ReferenceValidator
+    from validation_cache import DEFAULT_CACHE_DIR, ValidationCache
+    from yaml_validator import YAMLValidator
+
+# Validators that support the persistent validation cache
+CACHED_VALIDATORS = {"yaml_validator.py", "reference_validator.py"}
+
+# Validation stages as (script, description, stages it depends on). A stage
+# starts as soon as its dependencies have passed and is skipped if any failed.
+VALIDATION_STAGES: List[Tuple[str, str, Tuple[str, ...]]] = [
+    ("yaml_validator.py", "YAML Syntax Validation", ()),
+    (
+        "reference_validator.py",
+        "Entity/Device Reference Validation",
+        ("yaml_validator.py",),
+    ),
+    (
+        "ha_official_validator.py",
+        "Official Home Assistant Configuration Validation",
+        ("yaml_validator.py",),
+    ),
+]
+
+# By default every stage that is ready runs at once
+DEFAULT_JOBS = len(VALIDATION_STAGES)
 
 
 class ValidationTestRunner:
     """Runs all validation tests and reports results."""
 
-    def __init__(self, config_dir: str = "config"):
-        """Initialize the test runner."""
+    def __init__(
+        self,
+        config_dir: str = "config",
+        cache_dir: Optional[str] = None,
+        use_cache: bool = True,
+        isolated: bool = False,
+        jobs: int = DEFAULT_JOBS,
+        changed: bool = False,
+        since: Optional[str] = None,
+        output_format: str = "text",
+        worker: bool = False,
+    ):
+        """Initialize the test runner.
+
+        With an output_format other than text, the validators' findings are
+        streamed to stdout in that format and progress goes to stderr. With
+        worker, the official check runs in a persistent check_config worker.
+        """
         self.config_dir = Path(config_dir).resolve()
         self.tools_dir = Path(__file__).parent
         self.venv_dir = self.tools_dir.parent / "venv"
+        self.cache_dir = cache_dir
+        self.use_cache = use_cache
+        self.isolated = isolated
+        self.jobs = max(1, jobs)
+        self.changed = changed
+        self.since = since
+        self.worker_socket: Optional[Path] = None
+        if worker:
+            self.worker_socket = (
+                Path(cache_dir or DEFAULT_CACHE_DIR) / "check_config.sock"
+            )
         self.results: Dict[str, Dict[str, Any]] = {}
+        self.validators: Dict[str, Any] = {}
+        self.writer: Optional[FindingWriter] = None
+        if output_format != "text":
+            self.writer = FindingWriter(sys.stdout, output_format)
+
+        # Files to validate in --changed mode, None to validate everything
+        self.files: Optional[List[Path]] = None
+        # The changed files themselves, which scope the official check
+        self.changed_files: Optional[List[Path]] = None
+        # Mtime and size of each file before validation, for the run state
+        self.snapshot: Dict[str, List[int]] = {}
+
+        # Serializes console output between the scheduler and validators
+        # that temporarily redirect stdout to capture their report
+        self._output_lock = threading.Lock()
+
+        # State shared by validators running in this process, and by the
+        # planning of --changed runs
+        self.document_cache = DocumentCache()
+        self.validation_cache: Optional[ValidationCache] = None
+        if use_cache and (changed or not isolated):
+            self.validation_cache = ValidationCache(cache_dir or DEFAULT_CACHE_DIR)
 
     def get_python_executable(self) -> str:
         """Get the Python executable from venv if available."""
@@ -28,16 +142,84 @@ class ValidationTestRunner:
             return str(venv_python)
         return sys.executable
 
+    def create_validator(self, script_name: str) -> Any:
+        """Create an in-process validator sharing this runner's caches."""
+        config_dir = str(self.config_dir)
+        if script_name == "yaml_validator.py":
+            return YAMLValidator(config_dir, self.document_cache, self.validation_cache)
+        if script_name == "reference_validator.py":
+            return ReferenceValidator(
+                config_dir, self.document_cache, self.validation_cache
+            )
+        if script_name == "ha_official_validator.py":
+            return HAOfficialValidator(config_dir, self.worker_socket)
+        return None
+
     def run_validator(
         self, script_name: str, description: str
     ) -> Tuple[bool, str, str, float]:
-        """Run a single validator script."""
+        """Run a single validator, in process unless running isolated."""
+        if self.isolated:
+            return self.run_validator_subprocess(script_name, description)
+        return self.run_validator_in_process(script_name, description)
+
+    def run_validator_in_process(
+        self, script_name: str, description: str
+    ) -> Tuple[bool, str, str, float]:
+        """Run a single validator in this interpreter."""
+        validator = self.create_validator(script_name)
+        if validator is None:
+            return False, "", f"Validator {script_name} not found", 0.0
+        self.validators[script_name] = validator
+        if self.writer is not None:
+            stream_findings(validator, self.writer.write)
+
+        start_time = time.perf_counter()
+        output = io.StringIO()
+        try:
+            if script_name in CACHED_VALIDATORS:
+                passed = validator.validate_all(self.files)
+            elif script_name == "ha_official_validator.py":
+                passed = validator.validate_all(self.changed_files)
+            else:
+                passed = validator.validate_all()
+            validated_time = time.perf_counter()
+            with self._output_lock, redirect_stdout(output):
+                validator.print_results()
+        except Exception:
+            duration = time.perf_counter() - start_time
+            return False, output.getvalue(), traceback.format_exc(), duration
+
+        end_time = time.perf_counter()
+        self.results.setdefault(script_name, {})["timings"] = {
+            "validate": validated_time - start_time,
+            "report": end_time - validated_time,
+        }
+        return passed, output.getvalue(), "", end_time - start_time
+
+    def run_validator_subprocess(
+        self, script_name: str, description: str
+    ) -> Tuple[bool, str, str, float]:
+        """Run a single validator script in a separate interpreter."""
         script_path = self.tools_dir / script_name
         if not script_path.exists():
             return False, "", f"Script {script_name} not found", 0.0
 
         python_exe = self.get_python_executable()
         cmd = [python_exe, str(script_path), str(self.config_dir)]
+        if self.writer is not None:
+            cmd.extend(["--format", "ndjson"])
+        if script_name == "ha_official_validator.py":
+            if self.worker_socket:
+                cmd.extend(["--worker", "--worker-socket", str(self.worker_socket)])
+            if self.changed_files is not None:
+                cmd.append("--changed-files")
+                cmd.extend(str(path) for path in self.changed_files)
+        if script_name in CACHED_VALIDATORS:
+            if not self.use_cache:
+                cmd.append("--no-cache")
+            elif self.cache_dir:
+                cmd.extend(["--cache-dir", self.cache_dir])
 
         start_time = time.time()
         try:
@@ -45,9 +227,13 @@ class ValidationTestRunner:
             end_time = time.time()
             duration = end_time - start_time
 
+            stdout = result.stdout
+            if self.writer is not None:
+                stdout = self.forward_findings(stdout, self.writer)
+
             return (
                 result.returncode == 0,
-                result.stdout,
+                stdout,
                 result.stderr,
                 duration,
             )
@@ -67,52 +253,219 @@ class ValidationTestRunner:
             duration = end_time - start_time
             return (False, "", f"Failed to run validator: {e}", duration)
 
-    def run_all_tests(self) -> bool:
-        """Run all validation tests."""
-        validators = [
-            ("yaml_validator.py", "YAML Syntax Validation"),
-            ("reference_validator.py", "Entity/Device Reference Validation"),
-            (
-                "ha_official_validator.py",
-                "Official Home Assistant Configuration Validation",
-            ),
-        ]
-
-        all_passed = True
-        total_duration = 0.0
-
-        print("🔍 Running Home Assistant Configuration Validation Tests")
-        print("=" * 60)
-        print()
+    def forward_findings(self, output: str, writer: FindingWriter) -> str:
+        """Write the findings of a validator's NDJSON output to writer.
 
-        for script_name, description in validators:
-            print(f"Running {description}...")
+        Returns the lines that aren't findings, such as a crash message.
+        """
+        other_lines = []
+        for line in output.splitlines():
+            try:
+                item = json.loads(line)
+            except ValueError:
+                other_lines.append(line)
+                continue
+            if isinstance(item, dict) and "message" in item:
+                writer.write(Finding.from_dict(item))
+        return "\n".join(other_lines)
 
-            passed, stdout, stderr, duration = self.run_validator(
-                script_name, description
+    def run_all_tests(self) -> bool:
+        """Run all validation tests, independent stages concurrently."""
+        self.results = {
+            script_name: {"description": description}
+            for script_name, description, _depends_on in VALIDATION_STAGES
+        }
+
+        self.report("🔍 Running Home Assistant Configuration Validation Tests")
+        self.report("=" * 60)
+        self.report()
+
+        start_time = time.perf_counter()
+        if self.validation_cache is not None:
+            # Taken first, so that files edited during the run count as changed
+            planner = self.create_validator("reference_validator.py")
+            self.snapshot = file_snapshot(self.config_dir, planner.get_yaml_files())
+        if self.changed:
+            self.select_changed_files()
+        pending = list(VALIDATION_STAGES)
+        running: Dict[Future, str] = {}
+        finished: Dict[str, bool] = {}
+
+        with ThreadPoolExecutor(max_workers=self.jobs) as executor:
+            while pending or running:
+                for stage in list(pending):
+                    script_name, description, depends_on = stage
+                    if not all(dep in finished for dep in depends_on):
+                        continue
+                    pending.remove(stage)
+
+                    failed_deps = [dep for dep in depends_on if not finished[dep]]
+                    if failed_deps:
+                        self.record_skipped(script_name, failed_deps)
+                        finished[script_name] = False
+                        continue
+
+                    self.report(f"Running {description}...")
+                    future = executor.submit(
+                        self.run_validator, script_name, description
+                    )
+                    running[future] = script_name
+
+                if not running:
+                    continue
+
+                done, _not_done = wait(running, return_when=FIRST_COMPLETED)
+                for future in done:
+                    script_name = running.pop(future)
+                    finished[script_name] = self.record_result(
+                        script_name, future.result()
+                    )
+
+        if self.validation_cache is not None:
+            self.save_run_state()
+
+        wall_time = time.perf_counter() - start_time
+        total_duration = sum(r["duration"] for r in self.results.values())
+
+        self.report()
+        self.report(
+            f"Total execution time: {wall_time:.2f}s "
+            f"(stages took {total_duration:.2f}s combined)"
+        )
+        self.report("=" * 60)
+
+        return all(finished.values())
+
+    def select_changed_files(self):
+        """Restrict validation to the files affected by changes."""
+        if self.validation_cache is None:
+            self.report("⚠️  --changed needs the validation cache")
+            self.report("   Validating all files instead")
+            self.report()
+            return
+
+        planner = self.create_validator("reference_validator.py")
+        previous = self.validation_cache.load_state(STATE_NAME)
+        # Files modified since the last run. The validation cache's own index
+        # can't tell, as validators run on their own update it too.
+        changed = snapshot_changed_files(
+            self.config_dir, self.snapshot, (previous or {}).get("files", {})
+        )
+        # Compare against the commit last validated rather than HEAD, so that
+        # changes committed since then are validated too
+        in_git = git_head(self.config_dir) is not None
+        base = self.since or (previous or {}).get("commit")
+        git_changed = None
+        if in_git and base:
+            git_changed = git_changed_files(self.config_dir, base)
+        if git_changed is not None:
+            changed = sorted(set(changed).union(git_changed))
+        elif in_git:
+            # What was committed since the last run is unknown
+            previous = None
+        if self.since and git_changed is None:
+            self.report(f"⚠️  Could not compare against {self.since} with git")
+
+        self.files = find_affected_files(planner, changed, previous)
+        if self.files is not None:
+            self.changed_files = changed
+        if self.files is None:
+            self.report("No usable previous run, validating all files")
+        else:
+            self.report(
+                f"{len(changed)} changed file(s), "
+                f"{len(self.files)} affected file(s) to validate"
             )
-            total_duration += duration
-
-            self.results[script_name] = {
-                "description": description,
+        self.report()
+
+    def save_run_state(self):
+        """Store what the next --changed run compares against.
+
+        Only the cached validators record which files failed, so when any
+        other stage failed, or a stage was skipped or crashed, the next
+        --changed run validates everything.
+        """
+        complete = all(
+            result["passed"]
+            or (
+                script_name in CACHED_VALIDATORS
+                and script_name in self.validators
+                and not result["stderr"]
+            )
+            for script_name, result in self.results.items()
+        )
+        state = None
+        if complete:
+            # Validators in other interpreters only get here if they passed
+            failed_files = [
+                path
+                for script_name in CACHED_VALIDATORS
+                if script_name in self.validators
+                for path in self.validators[script_name].failed_files
+            ]
+            planner = self.create_validator("reference_validator.py")
+            state = current_state(
+                planner, failed_files, git_head(self.config_dir), self.snapshot
+            )
+        self.validation_cache.save_state(STATE_NAME, state)
+
+    def record_result(
+        self, script_name: str, outcome: Tuple[bool, str, str, float]
+    ) -> bool:
+        """Store a finished stage's result and report it immediately."""
+        passed, stdout, stderr, duration = outcome
+        result = self.results[script_name]
+        result.update(
+            {
                 "passed": passed,
+                "skipped": False,
                 "stdout": stdout,
                 "stderr": stderr,
                 "duration": duration,
             }
+        )
+
+        status = "✅ PASSED" if passed else "❌ FAILED"
+        self.report(f"  {status} {result['description']} ({duration:.2f}s)")
+        if self.writer is not None and stderr.strip():
+            self.writer.write(
+                Finding(
+                    f"{result['description']} failed: {stderr.strip()}",
+                    severity="error",
+                    code="validator-failed",
+                    validator=Path(script_name).stem,
+                )
+            )
+        return passed
+
+    def record_skipped(self, script_name: str, failed_deps: List[str]):
+        """Store a stage that was not run because a dependency failed."""
+        reasons = ", ".join(self.results[dep]["description"] for dep in failed_deps)
+        result = self.results[script_name]
+        result.update(
+            {
+                "passed": False,
+                "skipped": True,
+                "stdout": "",
+                "stderr": f"Skipped because {reasons} failed",
+                "duration": 0.0,
+            }
+        )
+        self.report(f"  ⏭️  SKIPPED {result['description']}")
+        if self.writer is not None:
+            self.writer.write(
+                Finding(
+                    f"{result['description']} skipped because {reasons} failed",
+                    severity="warning",
+                    code="stage-skipped",
+                    validator=Path(script_name).stem,
+                )
+            )
 
-            if passed:
-                print(f"  ✅ PASSED ({duration:.2f}s)")
-            else:
-                print(f"  ❌ FAILED ({duration:.2f}s)")
-                all_passed = False
-
-            print()
-
-        print(f"Total execution time: {total_duration:.2f}s")
-        print("=" * 60)
-
-        return all_passed
+    def report(self, message: str = ""):
+        """Print a progress line without interleaving with captured output."""
+        with self._output_lock:
+            print(message, flush=True)
 
     def print_detailed_results(self):
         """Print detailed results for each validator."""
@@ -122,10 +475,18 @@ class ValidationTestRunner:
 
             if result["passed"]:
                 print("Status: ✅ PASSED")
+            elif result["skipped"]:
+                print("Status: ⏭️  SKIPPED")
             else:
                 print("Status: ❌ FAILED")
 
             print(f"Duration: {result['duration']:.2f}s")
+            if "timings" in result:
+                timings = ", ".join(
+                    f"{stage} {seconds:.3f}s"
+                    for stage, seconds in result["timings"].items()
+                )
+                print(f"Timings: {timings}")
 
             if result["stdout"].strip():
                 print("\nOutput:")
@@ -143,19 +504,33 @@ class ValidationTestRunner:
         """Print test summary."""
         total_tests = len(self.results)
         passed_tests = sum(1 for r in self.results.values() if r["passed"])
-        failed_tests = total_tests - passed_tests
+        skipped_tests = sum(1 for r in self.results.values() if r["skipped"])
+        failed_tests = total_tests - passed_tests - skipped_tests
 
         print("\n📊 TEST SUMMARY")
         print("=" * 30)
         print(f"Total tests: {total_tests}")
         print(f"Passed: {passed_tests}")
         print(f"Failed: {failed_tests}")
+        if skipped_tests:
+            print(f"Skipped: {skipped_tests}")
 
-        if failed_tests == 0:
+        if not self.isolated:
+            print(
+                f"Documents: {self.document_cache.reads} read, "
+                f"{self.document_cache.parses} parsed"
+            )
+            if self.validation_cache is not None:
+                print(
+                    f"Validation cache: {self.validation_cache.hits} hits, "
+                    f"{self.validation_cache.misses} misses"
+                )
+
+        if failed_tests == 0 and skipped_tests == 0:
             print("\n🎉 All tests passed! Your Home Assistant configuration is valid.")
         else:
             print(
-                f"\n⚠️  {failed_tests} test(s) failed. "
+                f"\n⚠️  {failed_tests + skipped_tests} test(s) failed or skipped. "
                 "Please review the errors above."
             )
 
@@ -169,6 +544,12 @@ class ValidationTestRunner:
         missing_modules = []
 
         for module in required_modules:
+            if not self.isolated:
+                # Validators run in this interpreter, no need to spawn one
+                if importlib.util.find_spec(module) is None:
+                    missing_modules.append(module)
+                continue
+
             try:
                 result = subprocess.run(
                     [python_exe, "-c", f"import {module}"],
@@ -192,6 +573,17 @@ class ValidationTestRunner:
 
     def run(self) -> bool:
         """Run the complete test suite."""
+        if self.writer is None:
+            return self.run_suite()
+
+        # Keep stdout for the findings, reporting progress on stderr
+        with redirect_stdout(sys.stderr):
+            all_passed = self.run_suite()
+        self.writer.finish(all_passed)
+        return all_passed
+
+    def run_suite(self) -> bool:
+        """Run the validators and report the results."""
         if not self.config_dir.exists():
             print(f"❌ Config directory not found: {self.config_dir}")
             return False
@@ -201,7 +593,9 @@ class ValidationTestRunner:
 
         all_passed = self.run_all_tests()
 
-        self.print_detailed_results()
+        # The findings replace the validators' reports
+        if self.writer is None:
+            self.print_detailed_results()
         self.print_summary()
 
         return all_passed
@@ -209,9 +603,64 @@ class ValidationTestRunner:
 
 def main():
     """Run main function for command line usage."""
-    config_dir = sys.argv[1] if len(sys.argv) > 1 else "config"
-
-    runner = ValidationTestRunner(config_dir)
+    parser = argparse.ArgumentParser(
+        description="Run all Home Assistant configuration validators"
+    )
+    parser.add_argument("config_dir", nargs="?", default="config")
+    parser.add_argument(
+        "--cache-dir", help="Directory for the persistent validation cache"
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true", help="Revalidate every file from scratch"
+    )
+    parser.add_argument(
+        "--isolated",
+        action="store_true",
+        help="Run each validator in a separate Python interpreter",
+    )
+    parser.add_argument(
+        "--jobs",
+        "-j",
+        type=int,
+        default=DEFAULT_JOBS,
+        help="Maximum number of validation stages to run concurrently",
+    )
+    parser.add_argument(
+        "--changed",
+        action="store_true",
+        help="Only validate files affected by changes since the last run",
+    )
+    parser.add_argument(
+        "--since",
+        metavar="REF",
+        help="With --changed, compare against this git revision (default: the "
+        "commit validated by the last run)",
+    )
+    parser.add_argument(
+        "--format",
+        choices=FORMATS,
+        default="text",
+        help="Stream findings to stdout as json, ndjson or sarif",
+    )
+    parser.add_argument(
+        "--worker",
+        action="store_true",
+        help="Run the official check in a persistent worker that keeps Home "
+        "Assistant loaded between runs",
+    )
+    args = parser.parse_args()
+
+    runner = ValidationTestRunner(
+        args.config_dir,
+        cache_dir=args.cache_dir,
+        use_cache=not args.no_cache,
+        isolated=args.isolated,
+        jobs=args.jobs,
+        changed=args.changed,
+        since=args.since,
+        output_format=args.format,
+        worker=args.worker,
+    )
     success = runner.run()
 
     sys.exit(0 if success else 1)
@@ -0,0 +1,191 @@
+"""Persistent on-disk cache for validation results.
+
+Per-file results are stored under ``.cache/ha-validate/`` keyed by the file's
+content hash, its path and a caller supplied context fingerprint (for
+example the entity registry fingerprint). Content hashes are themselves
+cached against file size and mtime, so unchanged files are skipped without
+being read.
+"""
+
+import hashlib
+import json
+import os
+import threading
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Union
+
+DEFAULT_CACHE_DIR = Path(".cache") / "ha-validate"
+
+# Bump when the layout or meaning of cached entries changes
+CACHE_VERSION = 2
+
+REGISTRY_FILES = ["core.entity_registry", "core.device_registry", "core.area_registry"]
+
+
+def fingerprint(*parts: Any) -> str:
+    """Combine arbitrary JSON-serializable parts into a short stable hash."""
+    payload = json.dumps(parts, sort_keys=True, default=str)
+    return hashlib.sha256(payload.encode("utf-8")).hexdigest()[:32]
+
+
+def source_fingerprint(module_file: Union[str, Path]) -> str:
+    """Fingerprint a validator's source so code changes invalidate its results."""
+    with open(module_file, "rb") as f:
+        return hashlib.sha256(f.read()).hexdigest()[:32]
+
+
+def registry_fingerprint(storage_dir: Path) -> Optional[str]:
+    """Fingerprint the registries by size and mtime.
+
+    Returns None if the entity or device registry is missing, in which case
+    results depending on the registries must not be cached.
+    """
+    parts: List[Any] = []
+    for name in REGISTRY_FILES:
+        try:
+            stat = (storage_dir / name).stat()
+        except OSError:
+            if name != "core.area_registry":
+                return None
+            parts.append([name, None])
+            continue
+        parts.append([name, stat.st_mtime_ns, stat.st_size])
+    return fingerprint(*parts)
+
+
+class ValidationCache:
+    """Stores per-file validation results across runs."""
+
+    def __init__(self, cache_dir: Union[str, Path] = DEFAULT_CACHE_DIR):
+        """Initialize the cache rooted at cache_dir."""
+        self.cache_dir = Path(cache_dir)
+        self._index_file = self.cache_dir / "files.json"
+        self._index: Dict[str, List[Any]] = self._load_index()
+        self._dirty = False
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def _load_index(self) -> Dict[str, List[Any]]:
+        """Load the path -> (mtime, size, digest) index."""
+        try:
+            with open(self._index_file, "r", encoding="utf-8") as f:
+                index = json.load(f)
+        except (OSError, ValueError):
+            return {}
+        if index.get("version") != CACHE_VERSION:
+            return {}
+        return index.get("files", {})
+
+    def file_digest(self, file_path: Union[str, Path]) -> Optional[str]:
+        """Return the content hash of a file, reading it only if it changed."""
+        key = os.path.abspath(file_path)
+        try:
+            stat = os.stat(key)
+        except OSError:
+            return None
+
+        entry = self._index.get(key)
+        if (
+            entry is not None
+            and entry[0] == stat.st_mtime_ns
+            and entry[1] == stat.st_size
+        ):
+            return entry[2]
+
+        try:
+            with open(key, "rb") as f:
+                digest = hashlib.sha256(f.read()).hexdigest()
+        except OSError:
+            return None
+
+        with self._lock:
+            self._index[key] = [stat.st_mtime_ns, stat.st_size, digest]
+            self._dirty = True
+        return digest
+
+    def _entry_path(self, namespace: str, key: str) -> Path:
+        """Return the on-disk location of a cache entry."""
+        return self.cache_dir / namespace / key[:2] / f"{key}.json"
+
+    def _key(self, file_path: Union[str, Path], digest: str, context: str) -> str:
+        """Build the entry key for a file version in a given context."""
+        return fingerprint(CACHE_VERSION, str(file_path), digest, context)
+
+    def get(
+        self,
+        namespace: str,
+        file_path: Union[str, Path],
+        context: str = "",
+    ) -> Optional[Any]:
+        """Return the cached result for a file, or None if unknown or stale."""
+        digest = self.file_digest(file_path)
+        if digest is None:
+            return None
+
+        entry_path = self._entry_path(namespace, self._key(file_path, digest, context))
+        try:
+            with open(entry_path, "r", encoding="utf-8") as f:
+                result = json.load(f)
+        except (OSError, ValueError):
+            self.misses += 1
+            return None
+
+        self.hits += 1
+        return result
+
+    def put(
+        self,
+        namespace: str,
+        file_path: Union[str, Path],
+        result: Any,
+        context: str = "",
+    ):
+        """Store the result for the current version of a file."""
+        digest = self.file_digest(file_path)
+        if digest is None:
+            return
+
+        entry_path = self._entry_path(namespace, self._key(file_path, digest, context))
+        self._write_json(entry_path, result)
+
+    def load_state(self, name: str) -> Optional[Any]:
+        """Return run state stored under a name, e.g. by the last run."""
+        try:
+            with open(self._state_path(name), "r", encoding="utf-8") as f:
+                state = json.load(f)
+        except (OSError, ValueError):
+            return None
+        if state.get("version") != CACHE_VERSION:
+            return None
+        return state.get("state")
+
+    def save_state(self, name: str, state: Any):
+        """Store run state, replacing whatever was stored under the name."""
+        self._write_json(
+            self._state_path(name), {"version": CACHE_VERSION, "state": state}
+        )
+
+    def _state_path(self, name: str) -> Path:
+        """Return the on-disk location of named run state."""
+        return self.cache_dir / "state" / f"{name}.json"
+
+    def save(self):
+        """Persist the file digest index."""
+        with self._lock:
+            if not self._dirty:
+                return
+            index = dict(self._index)
+            self._dirty = False
+        self._write_json(self._index_file, {"version": CACHE_VERSION, "files": index})
+
+    def _write_json(self, path: Path, payload: Any):
+        """Atomically write a JSON file, ignoring failures to write the cache."""
+        try:
+            path.parent.mkdir(parents=True, exist_ok=True)
+            tmp_path = path.with_name(f"{path.name}.{os.getpid()}.tmp")
+            with open(tmp_path, "w", encoding="utf-8") as f:
+                json.dump(payload, f)
+            os.replace(tmp_path, path)
+        except OSError:
+            pass
@@ -0,0 +1,543 @@
+#!/usr/bin/env python3
+"""Watch the configuration directory and revalidate files as they are saved.
+
+Keeps parsed documents, registries and YAML-defined entities in memory, so a
+saved file is checked again in milliseconds instead of paying for a cold
+start. Changes are picked up with inotify on Linux and by polling elsewhere.
+
+Diagnostics are printed as they change and are also served over a Unix
+socket using a JSON-lines protocol, one request and one response per line::
+
+    {"command": "status"}
+    {"command": "diagnostics", "path": "automations.yaml"}
+    {"command": "validate", "path": "automations.yaml"}
+
+Paths are relative to the configuration directory; leave out ``path`` to
+get or revalidate everything.
+"""
+
+import argparse
+import ctypes
+import ctypes.util
+import json
+import os
+import select
+import socket
+import socketserver
+import struct
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import TYPE_CHECKING, Any, Dict, Iterable, List, Optional, Set, Tuple
+
+if TYPE_CHECKING or __package__:
+    from tools.change_set import find_including_files
+    from tools.ha_yaml import DocumentCache
+    from tools.reference_validator import ReferenceValidator
+    from tools.validation_cache import DEFAULT_CACHE_DIR, REGISTRY_FILES
+    from tools.yaml_validator import YAMLValidator
+else:  # Executed as a script from the tools directory
+    from change_set import find_including_files
+    from ha_yaml import DocumentCache
+    from reference_validator import ReferenceValidator
+    from validation_cache import DEFAULT_CACHE_DIR, REGISTRY_FILES
+    from yaml_validator import YAMLValidator
+
+DEFAULT_SOCKET_PATH = DEFAULT_CACHE_DIR / "watch.sock"
+
+# Directories that never contain configuration the validators read
+SKIPPED_DIRS = frozenset(["www", "custom_components", "deps", "tts", "__pycache__"])
+
+# Diagnostics that don't belong to a single file
+GLOBAL_KEY = "<config>"
+
+# Time to wait for further events after the first, editors often write twice
+DEBOUNCE_SECONDS = 0.05
+
+Diagnostics = Dict[str, List[str]]
+
+
+def is_relevant(file_path: Path) -> bool:
+    """Return True for files whose changes can affect validation results."""
+    if file_path.suffix in (".yaml", ".yml"):
+        return True
+    if file_path.parent.name == "python_scripts":
+        return file_path.suffix == ".py"
+    return file_path.parent.name == ".storage" and file_path.name in REGISTRY_FILES
+
+
+def watched_dirs(config_dir: Path) -> List[Path]:
+    """Return config_dir and the subdirectories that may hold configuration."""
+    directories = []
+    for root, dirs, _files in os.walk(config_dir):
+        dirs[:] = sorted(
+            name
+            for name in dirs
+            if name not in SKIPPED_DIRS
+            and (not name.startswith(".") or name == ".storage")
+        )
+        directories.append(Path(root))
+    return directories
+
+
+class PollingWatcher:
+    """Detects changes by comparing file sizes and mtimes."""
+
+    def __init__(self, config_dir: Path):
+        """Take the initial snapshot of config_dir."""
+        self.config_dir = config_dir
+        self._snapshot = self._scan()
+
+    def _scan(self) -> Dict[Path, Tuple[int, int]]:
+        """Return the size and mtime of every relevant file."""
+        snapshot = {}
+        for directory in watched_dirs(self.config_dir):
+            try:
+                entries = list(os.scandir(directory))
+            except OSError:
+                continue
+            for entry in entries:
+                path = Path(entry.path)
+                if entry.is_file() and is_relevant(path):
+                    stat = entry.stat()
+                    snapshot[path] = (stat.st_mtime_ns, stat.st_size)
+        return snapshot
+
+    def poll(self, timeout: float) -> List[Path]:
+        """Wait `timeout` seconds and return the files that changed."""
+        time.sleep(timeout)
+        snapshot = self._scan()
+        changed = [
+            path
+            for path in snapshot.keys() | self._snapshot.keys()
+            if snapshot.get(path) != self._snapshot.get(path)
+        ]
+        self._snapshot = snapshot
+        return sorted(changed)
+
+    def close(self):
+        """Release resources, nothing to do for polling."""
+
+
+class InotifyWatcher:
+    """Detects changes with Linux inotify, called through ctypes."""
+
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_Q_OVERFLOW = 0x00004000
+    IN_ISDIR = 0x40000000
+    WATCH_MASK = IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+
+    EVENT = struct.Struct("iIII")
+
+    def __init__(self, config_dir: Path):
+        """Watch config_dir and its configuration subdirectories."""
+        library = ctypes.util.find_library("c")
+        self._libc = ctypes.CDLL(library or "libc.so.6", use_errno=True)
+        if not hasattr(self._libc, "inotify_init1"):
+            raise OSError("inotify is not available")
+
+        self.config_dir = config_dir
+        self._fd = self._libc.inotify_init1(os.O_NONBLOCK | os.O_CLOEXEC)
+        if self._fd < 0:
+            errno = ctypes.get_errno()
+            raise OSError(errno, os.strerror(errno))
+        self._dirs: Dict[int, Path] = {}
+        for directory in watched_dirs(config_dir):
+            self._add_watch(directory)
+
+    def _add_watch(self, directory: Path):
+        """Start watching a single directory."""
+        descriptor = self._libc.inotify_add_watch(
+            self._fd, os.fsencode(directory), self.WATCH_MASK
+        )
+        if descriptor >= 0:
+            self._dirs[descriptor] = directory
+
+    def poll(self, timeout: float) -> List[Path]:
+        """Wait up to `timeout` seconds and return the files that changed.
+
+        Returns ``[config_dir]`` if the kernel queue overflowed, meaning
+        every file has to be considered changed.
+        """
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return []
+
+        changed: Set[Path] = set()
+        overflow = False
+        while readable:
+            overflow |= self._read_events(changed)
+            readable, _, _ = select.select([self._fd], [], [], DEBOUNCE_SECONDS)
+
+        if overflow:
+            return [self.config_dir]
+        return sorted(path for path in changed if is_relevant(path))
+
+    def _read_events(self, changed: Set[Path]) -> bool:
+        """Read pending events into `changed`, returning True on overflow."""
+        try:
+            buffer = os.read(self._fd, 64 * 1024)
+        except BlockingIOError:
+            return False
+
+        overflow = False
+        offset = 0
+        while offset + self.EVENT.size <= len(buffer):
+            descriptor, mask, _cookie, length = self.EVENT.unpack_from(buffer, offset)
+            offset += self.EVENT.size
+            name = buffer[offset : offset + length].rstrip(b"\0")
+            offset += length
+
+            if mask & self.IN_Q_OVERFLOW:
+                overflow = True
+                continue
+            directory = self._dirs.get(descriptor)
+            if directory is None or not name:
+                continue
+
+            path = directory / os.fsdecode(name)
+            if mask & self.IN_ISDIR:
+                if mask & (self.IN_CREATE | self.IN_MOVED_TO):
+                    # Files may have been written before the watch was added
+                    for new_dir in watched_dirs(path):
+                        self._add_watch(new_dir)
+                        try:
+                            changed.update(new_dir / n for n in os.listdir(new_dir))
+                        except OSError:
+                            pass
+                continue
+            if not mask & self.IN_CREATE:
+                # Creation is followed by IN_CLOSE_WRITE once written
+                changed.add(path)
+        return overflow
+
+    def close(self):
+        """Stop watching."""
+        os.close(self._fd)
+
+
+def create_watcher(config_dir: Path, polling: bool = False) -> Any:
+    """Return an inotify watcher if possible, a polling one otherwise."""
+    if not polling and sys.platform.startswith("linux"):
+        try:
+            return InotifyWatcher(config_dir)
+        except (OSError, AttributeError):
+            pass
+    return PollingWatcher(config_dir)
+
+
+class WatchValidator:
+    """Keeps validation state warm and revalidates files as they change."""
+
+    def __init__(self, config_dir: str = "config"):
+        """Initialize the validators sharing one in-memory document cache."""
+        self.config_dir = Path(config_dir)
+        self.document_cache = DocumentCache()
+        self.yaml_validator = YAMLValidator(config_dir, self.document_cache)
+        self.reference_validator = ReferenceValidator(config_dir, self.document_cache)
+        self.diagnostics: Dict[str, Diagnostics] = {}
+        self.files: List[Path] = []
+        self._registry_diagnostics: Diagnostics = {"errors": [], "warnings": []}
+        self._yaml_entities: Set[str] = set()
+        self._lock = threading.Lock()
+
+    def key(self, file_path: Path) -> str:
+        """Return the diagnostics key of a file, relative to config_dir."""
+        return os.path.relpath(file_path, self.config_dir)
+
+    def validate_all(self) -> Dict[str, Diagnostics]:
+        """Validate every file, returning the diagnostics that changed."""
+        with self._lock:
+            self._load_registries()
+            return self._revalidate(None)
+
+    def handle_changes(self, paths: Iterable[Path]) -> Dict[str, Diagnostics]:
+        """Revalidate after files changed, returning diagnostics that changed."""
+        paths = [Path(os.path.normpath(path)) for path in paths]
+        with self._lock:
+            if any(path.parent.name == ".storage" for path in paths):
+                self._load_registries()
+                return self._revalidate(None)
+            if any(path.is_dir() for path in paths):
+                return self._revalidate(None)
+            return self._revalidate(paths)
+
+    def _load_registries(self):
+        """(Re)load the registries, keeping the problems reported on loading."""
+        validator = self.reference_validator
+        validator.invalidate_registries()
+        self._registry_diagnostics = self._collect(
+            lambda: (
+                validator.get_registry_index(),
+                validator.load_device_registry(),
+                validator.load_area_registry(),
+            ),
+            validator,
+        )
+
+    def _revalidate(self, changed: Optional[List[Path]]) -> Dict[str, Diagnostics]:
+        """Check changed files (or all if None) and the files depending on them."""
+        # YAML-defined entities and the include closure are cheap to refresh
+        # while the documents stay cached
+        reference_validator = self.reference_validator
+        reference_validator.invalidate_yaml_entities()
+        files = reference_validator.get_yaml_files()
+        yaml_entities = reference_validator.load_yaml_entities()
+        global_diagnostics = {
+            "errors": self._registry_diagnostics["errors"]
+            + reference_validator.include_resolver.errors,
+            "warnings": list(self._registry_diagnostics["warnings"]),
+        }
+
+        if changed is None:
+            to_check = set(files)
+        else:
+            to_check = set(changed) & set(files)
+            # Files including a changed file see its content too
+            to_check.update(
+                find_including_files(
+                    reference_validator.include_resolver, files, changed
+                )
+            )
+            redefined = yaml_entities ^ self._yaml_entities
+            if redefined:
+                to_check.update(
+                    reference_validator.get_entity_dependents(redefined, files)
+                )
+        self._yaml_entities = yaml_entities
+
+        updates = {GLOBAL_KEY: global_diagnostics}
+        for file_path in files:
+            if file_path in to_check:
+                updates[self.key(file_path)] = self._check_file(file_path)
+
+        # Files that were deleted or are no longer included
+        current = {self.key(file_path) for file_path in files} | {GLOBAL_KEY}
+        for key in set(self.diagnostics) - current:
+            updates[key] = {"errors": [], "warnings": []}
+
+        changed_diagnostics = {
+            key: diagnostics
+            for key, diagnostics in updates.items()
+            if self.diagnostics.get(key, {"errors": [], "warnings": []}) != diagnostics
+        }
+        for key, diagnostics in updates.items():
+            if key in current:
+                self.diagnostics[key] = diagnostics
+            else:
+                self.diagnostics.pop(key, None)
+        self.files = files
+        return changed_diagnostics
+
+    def _collect(self, check: Any, *validators: Any) -> Diagnostics:
+        """Run a check and return the errors and warnings it reported."""
+        for validator in validators:
+            validator.errors.clear()
+            validator.warnings.clear()
+        check()
+        return {
+            "errors": [error for v in validators for error in v.errors],
+            "warnings": [warning for v in validators for warning in v.warnings],
+        }
+
+    def _check_file(self, file_path: Path) -> Diagnostics:
+        """Run the YAML and reference checks on a single file."""
+        if file_path.name == "secrets.yaml":
+            return {"errors": [], "warnings": []}
+
+        yaml_diagnostics = self._collect(
+            lambda: self.yaml_validator.validate_file(file_path), self.yaml_validator
+        )
+        if not self.document_cache.get(file_path).ok:
+            return yaml_diagnostics
+
+        reference_diagnostics = self._collect(
+            lambda: self.reference_validator.validate_file_references(file_path),
+            self.reference_validator,
+        )
+        return {
+            kind: yaml_diagnostics[kind] + reference_diagnostics[kind]
+            for kind in ("errors", "warnings")
+        }
+
+    def handle_request(self, request: Any) -> Dict[str, Any]:
+        """Answer a single socket request."""
+        if not isinstance(request, dict):
+            return {"ok": False, "error": "Request must be a JSON object"}
+
+        command = request.get("command")
+        path = request.get("path")
+        if command == "status":
+            with self._lock:
+                return {
+                    "ok": True,
+                    "files": len(self.files),
+                    "errors": self.count("errors"),
+                    "warnings": self.count("warnings"),
+                }
+        if command == "validate":
+            start = time.perf_counter()
+            if path is None:
+                self.validate_all()
+            else:
+                self.handle_changes([self.config_dir / path])
+            response = self._diagnostics_response(path)
+            response["duration_ms"] = (time.perf_counter() - start) * 1000
+            return response
+        if command == "diagnostics":
+            return self._diagnostics_response(path)
+        return {"ok": False, "error": f"Unknown command: {command}"}
+
+    def _diagnostics_response(self, path: Optional[str]) -> Dict[str, Any]:
+        """Return the diagnostics of one file, or of every file."""
+        with self._lock:
+            if path is None:
+                diagnostics = dict(self.diagnostics)
+            else:
+                key = os.path.normpath(path)
+                diagnostics = {
+                    key: self.diagnostics.get(key, {"errors": [], "warnings": []})
+                }
+        return {"ok": True, "diagnostics": diagnostics}
+
+    def count(self, kind: str) -> int:
+        """Count the errors or warnings across all files."""
+        return sum(len(diagnostics[kind]) for diagnostics in self.diagnostics.values())
+
+
+class DiagnosticsHandler(socketserver.StreamRequestHandler):
+    """Serves JSON-lines requests on one socket connection."""
+
+    def handle(self):
+        """Answer each request line with one response line."""
+        for line in self.rfile:
+            if not line.strip():
+                continue
+            try:
+                response = self.server.watch.handle_request(json.loads(line))
+            except ValueError as e:
+                response = {"ok": False, "error": f"Invalid request: {e}"}
+            self.wfile.write(json.dumps(response).encode("utf-8") + b"\n")
+            self.wfile.flush()
+
+
+if hasattr(socket, "AF_UNIX"):
+
+    class DiagnosticsServer(socketserver.ThreadingUnixStreamServer):
+        """Unix socket server exposing a WatchValidator to editors."""
+
+        daemon_threads = True
+
+        def __init__(self, socket_path: Path, watch: WatchValidator):
+            """Bind to socket_path, replacing a stale socket file."""
+            self.watch = watch
+            self.socket_path = Path(socket_path)
+            self.socket_path.parent.mkdir(parents=True, exist_ok=True)
+            if self.socket_path.exists():
+                self.socket_path.unlink()
+            super().__init__(str(self.socket_path), DiagnosticsHandler)
+
+        def server_close(self):
+            """Close the socket and remove the socket file."""
+            super().server_close()
+            try:
+                self.socket_path.unlink()
+            except OSError:
+                pass
+
+
+def print_diagnostics(
+    changes: Dict[str, Diagnostics], previous: Dict[str, Diagnostics]
+):
+    """Print what changed since the previous diagnostics."""
+    timestamp = time.strftime("%H:%M:%S")
+    for key, diagnostics in sorted(changes.items()):
+        before = previous.get(key, {"errors": [], "warnings": []})
+        if not diagnostics["errors"] and before["errors"]:
+            print(f"[{timestamp}] ✅ {key}: all errors fixed")
+        for error in diagnostics["errors"]:
+            if error not in before["errors"]:
+                print(f"[{timestamp}] ❌ {error}")
+        for warning in diagnostics["warnings"]:
+            if warning not in before["warnings"]:
+                print(f"[{timestamp}] ⚠️  {warning}")
+    sys.stdout.flush()
+
+
+def main():
+    """Run the watch daemon from the command line."""
+    parser = argparse.ArgumentParser(
+        description="Revalidate Home Assistant configuration files on save"
+    )
+    parser.add_argument("config_dir", nargs="?", default="config")
+    parser.add_argument(
+        "--socket",
+        default=str(DEFAULT_SOCKET_PATH),
+        help="Unix socket to serve diagnostics on",
+    )
+    parser.add_argument(
+        "--no-socket", action="store_true", help="Don't serve diagnostics"
+    )
+    parser.add_argument(
+        "--poll", action="store_true", help="Poll for changes instead of inotify"
+    )
+    parser.add_argument(
+        "--interval",
+        type=float,
+        default=0.5,
+        help="Seconds between polls, or the inotify wait timeout",
+    )
+    args = parser.parse_args()
+
+    config_dir = Path(args.config_dir)
+    if not config_dir.is_dir():
+        print(f"❌ Config directory not found: {config_dir}")
+        sys.exit(1)
+
+    watch = WatchValidator(str(config_dir))
+    start = time.perf_counter()
+    print_diagnostics(watch.validate_all(), {})
+    print(
+        f"Validated {len(watch.files)} files in "
+        f"{(time.perf_counter() - start) * 1000:.0f}ms: "
+        f"{watch.count('errors')} errors, {watch.count('warnings')} warnings"
+    )
+
+    server = None
+    if not args.no_socket and hasattr(socket, "AF_UNIX"):
+        server = DiagnosticsServer(Path(args.socket), watch)
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        print(f"Serving diagnostics on {args.socket}")
+
+    watcher = create_watcher(config_dir, args.poll)
+    print(f"Watching {config_dir} ({type(watcher).__name__}), Ctrl+C to stop")
+    try:
+        while True:
+            changed = watcher.poll(args.interval)
+            if not changed:
+                continue
+            start = time.perf_counter()
+            previous = dict(watch.diagnostics)
+            changes = watch.handle_changes(changed)
+            print_diagnostics(changes, previous)
+            names = ", ".join(watch.key(path) for path in changed)
+            print(
+                f"[{time.strftime('%H:%M:%S')}] Revalidated after changes to "
+                f"{names} in {(time.perf_counter() - start) * 1000:.0f}ms"
+            )
+    except KeyboardInterrupt:
+        pass
+    finally:
+        watcher.close()
+        if server is not None:
+            server.shutdown()
+            server.server_close()
+
+
+if __name__ == "__main__":
+    main()
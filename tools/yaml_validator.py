@@ -1,96 +1,78 @@
 #!/usr/bin/env python3
 """YAML syntax validator for Home Assistant configuration files."""
 
+import argparse
 import sys
 from pathlib import Path
-from typing import List
+from typing import TYPE_CHECKING, List, Optional
 
 import yaml
 
-
-class HAYamlLoader(yaml.SafeLoader):
-    """Custom YAML loader that handles Home Assistant specific tags."""
-
-    pass
-
-
-def include_constructor(loader, node):
-    """Handle !include tag."""
-    filename = loader.construct_scalar(node)
-    return f"!include {filename}"
-
-
-def include_dir_named_constructor(loader, node):
-    """Handle !include_dir_named tag."""
-    dirname = loader.construct_scalar(node)
-    return f"!include_dir_named {dirname}"
-
-def include_dir_merge_named_constructor(loader, node):
-    """Handle !include_dir_merge_named tag."""
-    dirname = loader.construct_scalar(node)
-    return f"!include_dir_merge_named {dirname}"
-
-
-def include_dir_merge_list_constructor(loader, node):
-    """Handle !include_dir_merge_list tag."""
-    dirname = loader.construct_scalar(node)
-    return f"!include_dir_merge_list {dirname}"
-
-
-def include_dir_list_constructor(loader, node):
-    """Handle !include_dir_list tag."""
-    dirname = loader.construct_scalar(node)
-    return f"!include_dir_list {dirname}"
-
-
-def input_constructor(loader, node):
-    """Handle !input tag for blueprints."""
-    input_name = loader.construct_scalar(node)
-    return f"!input {input_name}"
-
-
-def secret_constructor(loader, node):
-    """Handle !secret tag."""
-    secret_name = loader.construct_scalar(node)
-    return f"!secret {secret_name}"
-
-
-# Register custom constructors
-HAYamlLoader.add_constructor("!include", include_constructor)
-HAYamlLoader.add_constructor(
-    "!include_dir_merge_named", include_dir_merge_named_constructor
-)
-HAYamlLoader.add_constructor(
-    "!include_dir_named", include_dir_named_constructor
-)
-HAYamlLoader.add_constructor(
-    "!include_dir_merge_list", include_dir_merge_list_constructor
-)
-HAYamlLoader.add_constructor("!include_dir_list", include_dir_list_constructor)
-HAYamlLoader.add_constructor("!input", input_constructor)
-HAYamlLoader.add_constructor("!secret", secret_constructor)
+if TYPE_CHECKING or __package__:
+    from tools.findings import (
+        Finding,
+        FindingList,
+        add_format_argument,
+        run_with_format,
+    )
+    from tools.ha_yaml import (
+        DocumentCache,
+        HAYamlLoader,
+        IncludeResolver,
+        get_yaml_files,
+    )
+    from tools.validation_cache import (
+        DEFAULT_CACHE_DIR,
+        ValidationCache,
+        source_fingerprint,
+    )
+else:  # Executed as a script from the tools directory
+    from findings import Finding, FindingList, add_format_argument, run_with_format
+    from ha_yaml import DocumentCache, HAYamlLoader, IncludeResolver, get_yaml_files
+    from validation_cache import DEFAULT_CACHE_DIR, ValidationCache, source_fingerprint
 
 
 class YAMLValidator:
     """Validates YAML syntax and basic structure for Home Assistant files."""
 
-    def __init__(self, config_dir: str = "config"):
+    def __init__(
+        self,
+        config_dir: str = "config",
+        document_cache: Optional[DocumentCache] = None,
+        validation_cache: Optional[ValidationCache] = None,
+    ):
         """Initialize the YAMLValidator."""
         self.config_dir = Path(config_dir)
-        self.errors: List[str] = []
-        self.warnings: List[str] = []
+        self.errors = FindingList("error", "yaml_validator")
+        self.warnings = FindingList("warning", "yaml_validator")
+        self.failed_files: List[Path] = []
+        self.document_cache = document_cache or DocumentCache(HAYamlLoader)
+        self.validation_cache = validation_cache
+        self.include_resolver = IncludeResolver(
+            self.config_dir, self.document_cache, validation_cache
+        )
 
     def validate_yaml_syntax(self, file_path: Path) -> bool:
         """Validate YAML syntax of a single file."""
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                yaml.load(f, Loader=HAYamlLoader)
+            self.document_cache.load(file_path)
             return True
         except yaml.YAMLError as e:
-            self.errors.append(f"{file_path}: YAML syntax error - {e}")
+            mark = getattr(e, "problem_mark", None)
+            self.errors.append(
+                Finding(
+                    f"YAML syntax error - {e}",
+                    code="yaml-syntax",
+                    file=file_path,
+                    line=mark.line + 1 if mark else None,
+                    column=mark.column + 1 if mark else None,
+                )
+            )
             return False
         except UnicodeDecodeError as e:
-            self.errors.append(f"{file_path}: Encoding error - {e}")
+            self.errors.append(
+                Finding(f"Encoding error - {e}", code="encoding", file=file_path)
+            )
             return False
         except Exception as e:
             self.errors.append(f"{file_path}: Unexpected error - {e}")
@@ -98,13 +80,13 @@ class YAMLValidator:
 
     def validate_file_encoding(self, file_path: Path) -> bool:
         """Ensure file is UTF-8 encoded as required by Home Assistant."""
-        try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                f.read()
-            return True
-        except UnicodeDecodeError:
-            self.errors.append(f"{file_path}: File must be UTF-8 encoded")
+        document = self.document_cache.get(file_path)
+        if isinstance(document.error, UnicodeDecodeError):
+            self.errors.append(
+                Finding("File must be UTF-8 encoded", code="encoding", file=file_path)
+            )
             return False
+        return True
 
     def validate_configuration_structure(self, file_path: Path) -> bool:
         """Validate basic Home Assistant configuration.yaml structure."""
@@ -112,8 +94,7 @@ class YAMLValidator:
             return True
 
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                config = yaml.load(f, Loader=HAYamlLoader)
+            config = self.document_cache.load(file_path)
 
             if not isinstance(config, dict):
                 self.errors.append(f"{file_path}: Configuration must be a dictionary")
@@ -127,7 +108,14 @@ class YAMLValidator:
             deprecated_keys = ["discovery", "introduction"]
             for key in deprecated_keys:
                 if key in config:
-                    self.warnings.append(f"{file_path}: '{key}' is deprecated")
+                    self.warnings.append(
+                        Finding(
+                            f"'{key}' is deprecated",
+                            code="deprecated-key",
+                            file=file_path,
+                            path=key,
+                        )
+                    )
 
             return True
         except Exception as e:
@@ -140,8 +128,7 @@ class YAMLValidator:
             return True
 
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                automations = yaml.load(f, Loader=HAYamlLoader)
+            automations = self.document_cache.load(file_path)
 
             if automations is None:
                 return True  # Empty file is valid
@@ -154,7 +141,12 @@ class YAMLValidator:
             for i, automation in enumerate(automations):
                 if not isinstance(automation, dict):
                     self.errors.append(
-                        f"{file_path}: Automation {i} must be a dictionary"
+                        Finding(
+                            f"Automation {i} must be a dictionary",
+                            code="automation-structure",
+                            file=file_path,
+                            path=f"[{i}]",
+                        )
                     )
                     all_valid = False
                     continue
@@ -165,20 +157,34 @@ class YAMLValidator:
                 if "use_blueprint" not in automation:
                     if "trigger" not in automation and "triggers" not in automation:
                         self.errors.append(
-                            f"{file_path}: Automation {i} missing 'trigger' "
-                            f"or 'triggers'"
+                            Finding(
+                                f"Automation {i} missing 'trigger' or 'triggers'",
+                                code="automation-structure",
+                                file=file_path,
+                                path=f"[{i}]",
+                            )
                         )
                         all_valid = False
                     if "action" not in automation and "actions" not in automation:
                         self.errors.append(
-                            f"{file_path}: Automation {i} missing 'action' or 'actions'"
+                            Finding(
+                                f"Automation {i} missing 'action' or 'actions'",
+                                code="automation-structure",
+                                file=file_path,
+                                path=f"[{i}]",
+                            )
                         )
                         all_valid = False
 
                 # Check for alias (recommended)
                 if "alias" not in automation:
                     self.warnings.append(
-                        f"{file_path}: Automation {i} missing 'alias' " f"(recommended)"
+                        Finding(
+                            f"Automation {i} missing 'alias' (recommended)",
+                            code="automation-alias",
+                            file=file_path,
+                            path=f"[{i}]",
+                        )
                     )
 
             return all_valid
@@ -194,8 +200,7 @@ class YAMLValidator:
             return True
 
         try:
-            with open(file_path, "r", encoding="utf-8") as f:
-                scripts = yaml.load(f, Loader=HAYamlLoader)
+            scripts = self.document_cache.load(file_path)
 
             if scripts is None:
                 return True  # Empty file is valid
@@ -208,7 +213,12 @@ class YAMLValidator:
             for script_name, script_config in scripts.items():
                 if not isinstance(script_config, dict):
                     self.errors.append(
-                        f"{file_path}: Script '{script_name}' must be a " f"dictionary"
+                        Finding(
+                            f"Script '{script_name}' must be a dictionary",
+                            code="script-structure",
+                            file=file_path,
+                            path=str(script_name),
+                        )
                     )
                     all_valid = False
                     continue
@@ -220,8 +230,13 @@ class YAMLValidator:
                     and "sequence" not in script_config
                 ):
                     self.errors.append(
-                        f"{file_path}: Script '{script_name}' missing required "
-                        f"'sequence' or 'use_blueprint'"
+                        Finding(
+                            f"Script '{script_name}' missing required "
+                            f"'sequence' or 'use_blueprint'",
+                            code="script-structure",
+                            file=file_path,
+                            path=str(script_name),
+                        )
                     )
                     all_valid = False
 
@@ -233,47 +248,85 @@ class YAMLValidator:
             return False
 
     def get_yaml_files(self) -> List[Path]:
-        """Get all YAML files in the config directory."""
-        yaml_files: List[Path] = []
-        for pattern in ["*.yaml", "*.yml"]:
-            yaml_files.extend(self.config_dir.glob(pattern))
-
-        # Skip blueprints directory - these are templates and don't need validation
-        return yaml_files
+        """Get all YAML files in the config directory and the files they include."""
+        return self.include_resolver.include_closure(get_yaml_files(self.config_dir))
 
-    def validate_all(self) -> bool:
-        """Validate all YAML files in the config directory."""
+    def validate_all(self, files: Optional[List[Path]] = None) -> bool:
+        """Validate all YAML files in the config directory, or only `files`."""
         if not self.config_dir.exists():
             self.errors.append(f"Config directory {self.config_dir} does not exist")
             return False
 
-        yaml_files = self.get_yaml_files()
+        yaml_files = self.get_yaml_files() if files is None else files
         if not yaml_files:
-            self.warnings.append("No YAML files found in config directory")
+            if files is None:
+                self.warnings.append("No YAML files found in config directory")
             return True
 
         all_valid = True
+        cache_context = source_fingerprint(__file__) if self.validation_cache else ""
 
         for file_path in yaml_files:
             # Skip secrets.yaml as it may contain sensitive data
             if file_path.name == "secrets.yaml":
                 continue
 
-            if not self.validate_file_encoding(file_path):
-                all_valid = False
-                continue
-
-            if not self.validate_yaml_syntax(file_path):
-                all_valid = False
-                continue
+            if self.validation_cache is not None:
+                cached = self.validation_cache.get("yaml", file_path, cache_context)
+                if cached is not None:
+                    self.errors.extend(cached["errors"])
+                    self.warnings.extend(cached["warnings"])
+                    all_valid = all_valid and cached["valid"]
+                    if cached["errors"]:
+                        self.failed_files.append(file_path)
+                    continue
 
-            # Structure validation for specific files
-            self.validate_configuration_structure(file_path)
-            self.validate_automations_structure(file_path)
-            self.validate_scripts_structure(file_path)
+            errors_before = len(self.errors)
+            warnings_before = len(self.warnings)
+            file_valid = self.validate_file(file_path)
+            all_valid = all_valid and file_valid
+            if len(self.errors) > errors_before:
+                self.failed_files.append(file_path)
+
+            if self.validation_cache is not None:
+                self.validation_cache.put(
+                    "yaml",
+                    file_path,
+                    {
+                        "valid": file_valid,
+                        "errors": self.errors.to_dicts(errors_before),
+                        "warnings": self.warnings.to_dicts(warnings_before),
+                    },
+                    cache_context,
+                )
+
+        # Missing include targets and include cycles
+        if files is not None:
+            self.include_resolver.include_closure(files)
+        if self.include_resolver.errors:
+            self.errors.extend(self.include_resolver.errors)
+            all_valid = False
+
+        if self.validation_cache is not None:
+            self.validation_cache.save()
 
         return all_valid
 
+    def validate_file(self, file_path: Path) -> bool:
+        """Run every check on a single file."""
+        if not self.validate_file_encoding(file_path):
+            return False
+
+        if not self.validate_yaml_syntax(file_path):
+            return False
+
+        # Structure validation for specific files
+        self.validate_configuration_structure(file_path)
+        self.validate_automations_structure(file_path)
+        self.validate_scripts_structure(file_path)
+
+        return True
+
     def print_results(self):
         """Print validation results."""
         if self.errors:
@@ -298,11 +351,22 @@ class YAMLValidator:
 
 def main():
     """Run YAML syntax validation from command line."""
-    config_dir = sys.argv[1] if len(sys.argv) > 1 else "config"
-
-    validator = YAMLValidator(config_dir)
-    is_valid = validator.validate_all()
-    validator.print_results()
+    parser = argparse.ArgumentParser(description="Validate Home Assistant YAML files")
+    parser.add_argument("config_dir", nargs="?", default="config")
+    parser.add_argument(
+        "--cache-dir",
+        default=str(DEFAULT_CACHE_DIR),
+        help="Directory for the persistent validation cache",
+    )
+    parser.add_argument(
+        "--no-cache", action="store_true", help="Revalidate every file from scratch"
+    )
+    add_format_argument(parser)
+    args = parser.parse_args()
+
+    validation_cache = None if args.no_cache else ValidationCache(args.cache_dir)
+    validator = YAMLValidator(args.config_dir, validation_cache=validation_cache)
+    is_valid = run_with_format(validator, validator.validate_all, args.format)
 
     sys.exit(0 if is_valid else 1)
 